@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import argparse
+import os
+import queue
 try:
     import curses  # type: ignore
 except Exception:  # On Windows without windows-curses
@@ -9,6 +11,7 @@ import subprocess
 import sys
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
 from fnmatch import fnmatch
@@ -25,6 +28,7 @@ from termdash.search_stats import SearchStats
 
 # File utils components
 from .filter_stack import FilterStack, FilterCriterion, FilterMode, FilterType
+from .size_engine import FolderSizeEngine, list_directory
 
 try:
     from cross_platform.clipboard_utils import set_clipboard
@@ -34,6 +38,14 @@ except ImportError:
 
 import re
 
+# Entry time fields and their index in the raw (ctime, mtime, atime) tuple
+_TIME_FIELDS = {"created": 0, "modified": 1, "accessed": 2}
+
+def _name_suffix(name: str) -> str:
+    """Extension of a file name without its dot, as Path(name).suffix gives it."""
+    i = name.rfind('.')
+    return name[i + 1:] if 0 < i < len(name) - 1 else ''
+
 @dataclass
 class Entry:
     path: Path
@@ -60,10 +72,41 @@ class Entry:
         """Check if folder size has been calculated."""
         return self.calculated_size is not None
 
+    @classmethod
+    def from_stat(cls, path: Path, name: str, is_dir: bool, st: os.stat_result, depth: int, parent_path: Optional[Path] = None) -> 'Entry':
+        """Entry whose created/modified/accessed datetimes are only built when first read."""
+        entry = cls.__new__(cls)
+        entry.__dict__.update(
+            path=path,
+            name=name,
+            is_dir=is_dir,
+            size=st.st_size,
+            depth=depth,
+            parent_path=parent_path,
+            _stat_times=(st.st_ctime, st.st_mtime, st.st_atime),
+        )
+        return entry
+
+    def __getattr__(self, name: str):
+        # Only reached for attributes not set yet: the lazy time fields of from_stat entries
+        times = self.__dict__.get("_stat_times")
+        if times is None or name not in _TIME_FIELDS:
+            raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+        value = datetime.fromtimestamp(times[_TIME_FIELDS[name]])
+        self.__dict__[name] = value
+        return value
+
+    def timestamp(self, field: str) -> float:
+        """POSIX timestamp of a time field ("created", "modified" or "accessed")."""
+        times = self.__dict__.get("_stat_times")
+        if times is not None and field not in self.__dict__:
+            return times[_TIME_FIELDS[field]]
+        return getattr(self, field).timestamp()
+
 SORT_FUNCS: Dict[str, Callable[[Entry], object]] = {
-    "created": lambda entry: entry.created.timestamp(),
-    "modified": lambda entry: entry.modified.timestamp(),
-    "accessed": lambda entry: entry.accessed.timestamp(),
+    "created": lambda entry: entry.timestamp("created"),
+    "modified": lambda entry: entry.timestamp("modified"),
+    "accessed": lambda entry: entry.timestamp("accessed"),
     "size": lambda entry: entry.get_display_size(),  # Use calculated size if available
     "name": lambda entry: entry.name.lower(),
 }
@@ -90,33 +133,44 @@ class SearchFilter:
 
     def matches(self, entry: Entry) -> bool:
         """Check if entry matches all active filter criteria."""
-        # Extension filter (only for files)
-        if self.extensions and not entry.is_dir:
-            if not any(matches_ext(entry.path, ext, case_sensitive=self.case_sensitive)
-                      for ext in self.extensions):
-                return False
+        return self.matches_name(entry.name, entry.is_dir) and self.matches_size(entry.size, entry.is_dir)
 
-        # Size filters (only for files)
-        if not entry.is_dir:
-            if self.min_size is not None and entry.size < self.min_size:
+    def matches_name(self, name: str, is_dir: bool) -> bool:
+        """Name-based criteria (extension, glob, regex); needs no stat."""
+        # Extension filter (only for files)
+        if self.extensions and not is_dir:
+            # Same rule as matches_ext, without building a Path per file
+            have = _name_suffix(name)
+            if not have:
                 return False
-            if self.max_size is not None and entry.size > self.max_size:
+            if not self.case_sensitive:
+                have = have.lower()
+            if not any(have == (ext if self.case_sensitive else ext.lower()) for ext in self.extensions):
                 return False
 
         # Name pattern filter (glob)
         if self.name_pattern:
-            name = entry.name if self.case_sensitive else entry.name.lower()
+            folded = name if self.case_sensitive else name.lower()
             pattern = self.name_pattern if self.case_sensitive else self.name_pattern.lower()
-            if not fnmatch(name, pattern):
+            if not fnmatch(folded, pattern):
                 return False
 
         # Name regex filter
         if self.name_regex:
-            if not self.name_regex.search(entry.name):
+            if not self.name_regex.search(name):
                 return False
 
         return True
 
+    def matches_size(self, size: int, is_dir: bool) -> bool:
+        """Size criteria (only for files)."""
+        if not is_dir:
+            if self.min_size is not None and size < self.min_size:
+                return False
+            if self.max_size is not None and size > self.max_size:
+                return False
+        return True
+
     def describe(self) -> str:
         """Return human-readable description of active filters."""
         parts = []
@@ -213,18 +267,15 @@ def calculate_folder_size(path: Path) -> Tuple[int, int]:
     total_size = 0
     item_count = 0
 
-    try:
-        for item in path.rglob('*'):
-            try:
-                if item.is_file():
-                    total_size += item.stat().st_size
-                    item_count += 1
-                elif item.is_dir():
-                    item_count += 1
-            except (OSError, PermissionError):
-                continue
-    except (OSError, PermissionError):
-        pass
+    stack = [os.fspath(path)]
+    while stack:
+        try:
+            listing = list_directory(stack.pop())
+        except OSError:
+            continue
+        total_size += listing.file_bytes
+        item_count += listing.item_count
+        stack.extend(listing.subdirs)
 
     return total_size, item_count
 
@@ -336,17 +387,75 @@ def collapse_intermediate_paths(entries: List[Entry], search_root: Path) -> List
 
     return entries
 
+@dataclass
+class _DirScan:
+    """One directory's worth of read_entries_recursive results."""
+    rows: List[Tuple[Optional[Entry], Optional[Path]]]  # (entry if listed, folder to descend into)
+    dirs: int = 0
+    files: int = 0
+    bytes: int = 0
+    files_found: int = 0
+    bytes_found: int = 0
+    error: Optional[OSError] = None
+
+def _scan_directory(
+    dir_path: Path,
+    depth: int,
+    parent: Optional[Path],
+    search_filter: Optional[SearchFilter],
+    descend: bool,
+) -> _DirScan:
+    """List one directory with os.scandir, filtering before any Entry is built."""
+    scan = _DirScan(rows=[])
+    # When filtering, only matching files are listed (folders are still descended into)
+    list_dirs = not (search_filter and search_filter.has_filters())
+    try:
+        with os.scandir(dir_path) as it:
+            for item in it:
+                try:
+                    is_dir = item.is_dir()  # d_type from the directory read, no stat
+                    if is_dir:
+                        scan.dirs += 1
+                        entry = None
+                        if list_dirs:
+                            entry = Entry.from_stat(Path(item.path), item.name, True, item.stat(), depth, parent)
+                        if descend:
+                            scan.rows.append((entry, entry.path if entry else Path(item.path)))
+                        elif entry is not None:
+                            scan.rows.append((entry, None))
+                        continue
+
+                    name_ok = search_filter is None or search_filter.matches_name(item.name, False)
+                    item_stats = item.stat()
+                    scan.files += 1
+                    scan.bytes += item_stats.st_size
+                    if not name_ok or (search_filter and not search_filter.matches_size(item_stats.st_size, False)):
+                        continue
+                    scan.files_found += 1
+                    scan.bytes_found += item_stats.st_size
+                    scan.rows.append((Entry.from_stat(Path(item.path), item.name, False, item_stats, depth, parent), None))
+                except OSError:
+                    continue
+    except OSError as exc:
+        scan.error = exc
+    return scan
+
 def read_entries_recursive(
     target: Path,
     max_depth: int,
     parent_path: Path = None,
     search_filter: Optional[SearchFilter] = None,
     stats: Optional[SearchStats] = None,
-    progress_callback: Optional[Callable[[SearchStats], None]] = None
+    progress_callback: Optional[Callable[[SearchStats], None]] = None,
+    workers: Optional[int] = None,
 ) -> List[Entry]:
     """
     Recursively read directory entries with optional filtering.
 
+    Directories are listed with os.scandir on a thread pool; entries come back in
+    depth-first order (each folder followed by its contents), as a sequential walk
+    would produce them.
+
     Args:
         target: Root directory to search
         max_depth: Maximum recursion depth
@@ -354,11 +463,11 @@ def read_entries_recursive(
         search_filter: Optional SearchFilter with multiple criteria
         stats: Optional SearchStats object to track progress
         progress_callback: Optional callback for progress updates
+        workers: Threads listing directories (default: scaled to the CPU count)
 
     Returns:
         List of Entry objects matching the filter criteria
     """
-    entries: List[Entry] = []
     if stats is None:
         stats = SearchStats()
 
@@ -366,77 +475,65 @@ def read_entries_recursive(
     last_progress_time = time.time()
     progress_interval = 0.1  # Update every 100ms
 
-    def _walk(curr_path: Path, current_depth: int, parent: Path = None):
-        nonlocal last_progress_time
-
-        if current_depth > max_depth:
-            return
-
-        try:
-            for item in curr_path.iterdir():
-                try:
-                    item_stats = item.stat()
-                    is_dir = item.is_dir()
-
-                    # Update statistics
-                    if is_dir:
-                        stats.dirs_searched += 1
-                    else:
-                        stats.files_searched += 1
-                        stats.bytes_searched += item_stats.st_size
-
-                    # Create temporary entry for filter matching
-                    temp_entry = Entry(
-                        path=item,
-                        name=item.name,
-                        is_dir=is_dir,
-                        size=item_stats.st_size,
-                        created=datetime.fromtimestamp(item_stats.st_ctime),
-                        modified=datetime.fromtimestamp(item_stats.st_mtime),
-                        accessed=datetime.fromtimestamp(item_stats.st_atime),
-                        depth=current_depth,
-                        expanded=False,
-                        parent_path=parent,
-                    )
-
-                    # Check if entry matches search filter
-                    matches_filter = True
-                    if search_filter:
-                        matches_filter = search_filter.matches(temp_entry)
-
-                    # Skip non-matching files
-                    if not is_dir and not matches_filter:
-                        continue
-
-                    # Update found stats for matching files
-                    if not is_dir and matches_filter:
-                        stats.files_found += 1
-                        stats.bytes_found += item_stats.st_size
-
-                    # When search filter is active, only add matching files (not directories)
-                    # This gives a clean list of just the matching files
-                    if search_filter and search_filter.has_filters() and is_dir:
-                        # Skip adding directories to entries when filtering
-                        # But still recurse into them to find matching files
-                        pass
-                    else:
-                        entries.append(temp_entry)
+    scans: Dict[Path, _DirScan] = {}
 
-                    # Call progress callback periodically
-                    current_time = time.time()
-                    if progress_callback and (current_time - last_progress_time) >= progress_interval:
-                        progress_callback(stats)
-                        last_progress_time = current_time
+    def record(dir_path: Path, scan: _DirScan) -> None:
+        nonlocal last_progress_time
+        scans[dir_path] = scan
+        if scan.error is not None:
+            sys.stderr.write(f"Cannot read directory {dir_path}: {scan.error}\n")
+        stats.dirs_searched += scan.dirs
+        stats.files_searched += scan.files
+        stats.bytes_searched += scan.bytes
+        stats.files_found += scan.files_found
+        stats.bytes_found += scan.bytes_found
+        current_time = time.time()
+        if progress_callback and (current_time - last_progress_time) >= progress_interval:
+            progress_callback(stats)
+            last_progress_time = current_time
+
+    if max_depth <= 0:
+        record(target, _scan_directory(target, 0, parent_path, search_filter, descend=False))
+    else:
+        # Listing is I/O bound: more threads than cores keeps the disk busy
+        pool_size = workers or min(32, (os.cpu_count() or 1) * 4)
+        done: "queue.Queue[Tuple[Path, int, Any]]" = queue.Queue()
 
-                    if is_dir:
-                        # Recurse into subdirectories
-                        _walk(item, current_depth + 1, item)
-                except OSError:
-                    continue
-        except OSError as exc:
-            sys.stderr.write(f"Cannot read directory {curr_path}: {exc}\n")
+        def scan_into_queue(dir_path: Path, depth: int, parent: Optional[Path]) -> None:
+            try:
+                result = _scan_directory(dir_path, depth, parent, search_filter, descend=depth < max_depth)
+            except BaseException as exc:  # Re-raised by the walking thread
+                result = exc
+            done.put((dir_path, depth, result))
+
+        with ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="lister-walk") as pool:
+            pool.submit(scan_into_queue, target, 0, parent_path)
+            inflight = 1
+            while inflight:
+                dir_path, depth, scan = done.get()
+                inflight -= 1
+                if isinstance(scan, BaseException):
+                    raise scan
+                for _, subdir in scan.rows:
+                    if subdir is not None:
+                        pool.submit(scan_into_queue, subdir, depth + 1, subdir)
+                        inflight += 1
+                record(dir_path, scan)
+
+    # Reassemble depth-first: each folder's rows followed by its subtree
+    entries: List[Entry] = []
+    stack = [iter(scans[target].rows)] if target in scans else []
+    while stack:
+        row = next(stack[-1], None)
+        if row is None:
+            stack.pop()
+            continue
+        entry, subdir = row
+        if entry is not None:
+            entries.append(entry)
+        if subdir is not None and subdir in scans:
+            stack.append(iter(scans[subdir].rows))
 
-    _walk(target, 0, parent_path)
     stats.end_time = time.time()
 
     # Final progress callback
@@ -592,8 +689,23 @@ class FileTypeColorManager:
 
         return self.COLOR_MAP.get(color_name, 1)  # Default to white
 
+def sort_entries(entries: List[Entry], sort_func: Optional[Callable[[Entry], object]], descending: bool, dirs_first: bool) -> List[Entry]:
+    """Return ``entries`` in display order (stable; folders first when ``dirs_first``)."""
+    ordered = list(entries)
+    if sort_func:
+        ordered.sort(key=sort_func, reverse=descending)
+        if dirs_first:
+            # Stable sort: dirs (False) before files (True), regardless of the descending flag
+            ordered.sort(key=lambda x: not x.is_dir)
+    return ordered
+
 class ListerManager:
-    """Manages the state and actions for the interactive file lister."""
+    """Manages the state and actions for the interactive file lister.
+
+    Entries are indexed by path and by parent, so the tree never has to be rebuilt
+    by scanning ``all_entries``: sorted child lists are cached per sort order and the
+    flat list of visible rows is patched in place on expand/collapse.
+    """
 
     def __init__(self, all_entries: List[Entry], max_depth: int):
         self.all_entries = all_entries
@@ -604,6 +716,107 @@ class ListerManager:
         self.filter_panel_focused = False  # Track which panel has focus
         # Cache for size calculations to avoid duplicate work across sessions
         self._size_lock = threading.Lock()
+        self.size_engine = FolderSizeEngine()
+        # Tree index: path -> entry, parent path -> children (in all_entries order).
+        # Keyed by str(path): Path objects recompute their hash on every lookup.
+        self._by_path: Dict[str, Entry] = {}
+        self._children: Dict[str, List[Entry]] = {}
+        self._top: List[Entry] = []  # Entries whose parent is not listed
+        self._indexed = 0  # Prefix of all_entries already indexed
+        self._indexed_list = all_entries
+        # Children in display order per parent (None = top level) for _sort_key
+        self._sorted: Dict[Optional[str], List[Entry]] = {}
+        self._sort_key: Optional[Tuple[Any, bool, bool]] = None
+        # Visible rows (before the filter stack) and the expansion state they reflect
+        self._visible: Optional[List[Entry]] = None
+        self._visible_expanded: set = set()
+        # Orders made stale by size threads (parent keys; _stale_all = every order). Only the
+        # UI thread touches _sorted/_visible: it applies these before reading them.
+        self._stale_lock = threading.Lock()
+        self._stale_parents: set = set()
+        self._stale_all = False
+        self._sync_index()
+
+    # Tree index
+    def _sync_index(self) -> None:
+        """Index entries appended to all_entries since the last call."""
+        if self._indexed_list is not self.all_entries or self._indexed > len(self.all_entries):
+            # all_entries was replaced or truncated: start over
+            self._by_path.clear()
+            self._children.clear()
+            self._top = []
+            self._indexed = 0
+            self._indexed_list = self.all_entries
+        new_entries = self.all_entries[self._indexed:]
+        if not new_entries:
+            return
+        self._indexed = len(self.all_entries)
+        for entry in new_entries:
+            self._by_path[str(entry.path)] = entry
+        for entry in new_entries:
+            parent = str(entry.parent_path) if entry.parent_path is not None else None
+            if parent is not None:
+                self._children.setdefault(parent, []).append(entry)
+            if parent is None or parent not in self._by_path:
+                self._top.append(entry)
+        # Entries listed before their parent are no longer top level
+        adopted = {id(child) for entry in new_entries if entry.is_dir for child in self._children.get(str(entry.path), ())}
+        if adopted:
+            self._top = [e for e in self._top if id(e) not in adopted]
+        self._sorted.clear()
+        self._visible = None
+
+    def entry_for(self, path: Optional[Path]) -> Optional[Entry]:
+        """Entry listed at ``path``, if any."""
+        self._sync_index()
+        return self._by_path.get(str(path)) if path is not None else None
+
+    def children_of(self, entry: Entry) -> List[Entry]:
+        """Direct children of ``entry`` that have been listed (unsorted)."""
+        self._sync_index()
+        return list(self._children.get(str(entry.path), ()))
+
+    def _sorted_children(self, parent: Optional[str], sort_func, descending: bool, dirs_first: bool) -> List[Entry]:
+        cached = self._sorted.get(parent)
+        if cached is None:
+            source = self._top if parent is None else self._children.get(parent, ())
+            cached = sort_entries(source, sort_func, descending, dirs_first)
+            self._sorted[parent] = cached
+        return cached
+
+    def _rows(self, entry: Entry, out: List[Entry]) -> None:
+        """Append ``entry`` and its visible descendants to ``out`` (iterative, depth-first)."""
+        sort_func, descending, dirs_first = self._sort_key
+        stack = [entry]
+        while stack:
+            current = stack.pop()
+            out.append(current)
+            if current.is_dir and current.path in self.expanded_folders:
+                stack.extend(reversed(self._sorted_children(str(current.path), sort_func, descending, dirs_first)))
+
+    def invalidate_order(self, entry: Optional[Entry] = None) -> None:
+        """Mark cached ordering stale after sort values changed (``entry``'s siblings, or everything).
+
+        Safe from any thread: the cached order is dropped by the next get_visible_entries().
+        """
+        with self._stale_lock:
+            if entry is None:
+                self._stale_all = True
+            else:
+                self._stale_parents.add(str(entry.parent_path) if entry.parent_path is not None else None)
+
+    def _apply_stale_orders(self) -> None:
+        """Drop the cached orders marked stale by invalidate_order (UI thread)."""
+        with self._stale_lock:
+            if not self._stale_all and not self._stale_parents:
+                return
+            stale_all, parents = self._stale_all, self._stale_parents
+            self._stale_all, self._stale_parents = False, set()
+        if stale_all:
+            self._sorted.clear()
+        for parent in parents:
+            self._sorted.pop(parent if parent in self._by_path else None, None)
+        self._visible = None
 
     def get_visible_entries(self, sort_func: Optional[Callable[[Entry], object]] = None, descending: bool = True, dirs_first: bool = True) -> List[Entry]:
         """Get the list of currently visible entries in hierarchical order.
@@ -611,48 +824,22 @@ class ListerManager:
         Returns entries sorted hierarchically: parent, then its children, then next parent.
         This maintains the tree structure while respecting the sort order.
         """
-        visible = []
-
-        def add_entry_and_children(entry: Entry):
-            """Recursively add entry and its children if expanded."""
-            visible.append(entry)
-
-            # If this entry is an expanded folder, add its children
-            if entry.is_dir and entry.path in self.expanded_folders:
-                # Get all direct children
-                children = [e for e in self.all_entries if e.parent_path == entry.path]
-
-                # Sort children if sort function provided
-                if sort_func:
-                    if dirs_first:
-                        # Use stable sort: first by field, then by is_dir
-                        # This ensures dirs_first works regardless of descending flag
-                        children.sort(key=sort_func, reverse=descending)
-                        children.sort(key=lambda x: not x.is_dir)  # Stable sort: dirs (False) before files (True)
-                    else:
-                        children.sort(key=sort_func, reverse=descending)
-
-                # Recursively add each child and their children
-                for child in children:
-                    add_entry_and_children(child)
-
-        # Get top-level entries (those with no parent or parent not in our list)
-        top_level = [e for e in self.all_entries if e.parent_path is None or
-                     not any(p.path == e.parent_path for p in self.all_entries)]
-
-        # Sort top-level entries
-        if sort_func:
-            if dirs_first:
-                # Use stable sort: first by field, then by is_dir
-                # This ensures dirs_first works regardless of descending flag
-                top_level.sort(key=sort_func, reverse=descending)
-                top_level.sort(key=lambda x: not x.is_dir)  # Stable sort: dirs (False) before files (True)
-            else:
-                top_level.sort(key=sort_func, reverse=descending)
-
-        # Build hierarchical list
-        for entry in top_level:
-            add_entry_and_children(entry)
+        self._sync_index()
+        self._apply_stale_orders()
+        sort_key = (sort_func, descending, dirs_first)
+        if sort_key != self._sort_key:
+            self._sort_key = sort_key
+            self._sorted.clear()
+            self._visible = None
+        rows = self._visible
+        if rows is None or self._visible_expanded != self.expanded_folders:
+            rows = []
+            for entry in self._sorted_children(None, sort_func, descending, dirs_first):
+                self._rows(entry, rows)
+            self._visible = rows
+            self._visible_expanded = set(self.expanded_folders)
+
+        visible = list(rows)
 
         # Apply filter stack if any filters are active
         if self.filter_stack.has_filters():
@@ -660,31 +847,105 @@ class ListerManager:
 
         return visible
 
+    def _patch_visible(self, entry: Entry, expanded: bool) -> None:
+        """Insert or remove ``entry``'s descendants in the cached visible rows."""
+        self._apply_stale_orders()
+        visible = self._visible
+        if visible is None or self._sort_key is None or self._visible_expanded != self.expanded_folders ^ {entry.path}:
+            self._visible = None
+            return
+        # By identity: Entry's dataclass __eq__ compares every field
+        idx = next((i for i, row in enumerate(visible) if row is entry), None)
+        if idx is None:
+            # Inside a collapsed folder: no visible rows change
+            self._visible_expanded = set(self.expanded_folders)
+            return
+        rows: List[Entry] = []
+        if expanded:
+            self._rows(entry, rows)
+            visible[idx + 1:idx + 1] = rows[1:]
+        else:
+            # Count the rows the subtree had while still expanded
+            self.expanded_folders.add(entry.path)
+            self._rows(entry, rows)
+            self.expanded_folders.discard(entry.path)
+            del visible[idx + 1:idx + len(rows)]
+        self._visible_expanded = set(self.expanded_folders)
+
     def collapse_all(self) -> None:
         """Collapse all expanded folders and clear expansion state."""
+        self._sync_index()
+        for path in self.expanded_folders:
+            entry = self._by_path.get(str(path))
+            if entry is not None:
+                entry.expanded = False
         self.expanded_folders.clear()
-        for entry in self.all_entries:
-            entry.expanded = False
+        self._visible = None
 
     def calculate_entry_size(self, entry: Entry) -> None:
         """Synchronously calculate size/item_count for a single entry (dirs only)."""
         if not entry.is_dir:
             return
+        self.calculate_sizes([entry], refresh=True)
+
+    def _apply_size(self, path: str, total_size: int, item_count: int) -> None:
+        """Size engine callback: store a finished folder total on its entry, if listed."""
+        entry = self._by_path.get(path)
+        if entry is None:
+            return
+        entry.calculated_size = total_size
+        entry.item_count = item_count
+        entry.size_calculating = False
+        # Its position among its siblings may change when sorting by size
+        self.invalidate_order(entry)
+
+    def calculate_sizes(
+        self,
+        folders: List[Entry],
+        on_progress: Optional[Callable[[int, int], None]] = None,
+        cancelled: Optional[Callable[[], bool]] = None,
+        refresh: bool = False,
+    ) -> None:
+        """Calculate sizes for ``folders`` (blocking; run it on a background thread).
+
+        Only the outermost folders are submitted: computing a folder fills in every
+        folder below it. ``on_progress(done, total)`` counts folders from ``folders``.
+        """
+        self._sync_index()
         with self._size_lock:
-            if entry.size_calculating:
-                return
-            entry.size_calculating = True
+            targets = [e for e in folders if e.is_dir and not e.size_calculating]
+            for entry in targets:
+                entry.size_calculating = True
+        wanted = {str(e.path) for e in targets}
+        roots = []
+        for entry in targets:
+            parent = str(entry.parent_path) if entry.parent_path is not None else None
+            while parent is not None and parent not in wanted:
+                ancestor = self._by_path.get(parent)
+                parent = str(ancestor.parent_path) if ancestor is not None and ancestor.parent_path is not None else None
+            if parent is None:
+                roots.append(entry.path)
+        done = 0
+
+        def on_result(path: str, total_size: int, item_count: int) -> None:
+            nonlocal done
+            self._apply_size(path, total_size, item_count)
+            if path in wanted:
+                done += 1
+                if on_progress:
+                    on_progress(done, len(wanted))
+
+        if on_progress:
+            on_progress(0, len(wanted))
         try:
-            total_size, item_count = calculate_folder_size(entry.path)
-            entry.calculated_size = total_size
-            entry.item_count = item_count
-        except Exception:
-            pass
+            self.size_engine.compute(roots, on_result=on_result, cancelled=cancelled, refresh=refresh)
         finally:
-            entry.size_calculating = False
+            for entry in targets:
+                entry.size_calculating = False
 
     def _should_hide(self, entry: Entry) -> bool:
         """Check if entry should be hidden due to collapsed parent."""
+        self._sync_index()
         # Walk up the parent chain
         current_path = entry.parent_path
         while current_path:
@@ -692,7 +953,7 @@ class ListerManager:
                 # Parent is not expanded, so hide this entry
                 return True
             # Find parent entry to continue walking up
-            parent_entry = next((e for e in self.all_entries if e.path == current_path), None)
+            parent_entry = self._by_path.get(str(current_path))
             if not parent_entry:
                 break
             current_path = parent_entry.parent_path
@@ -702,57 +963,55 @@ class ListerManager:
         """Toggle folder expansion. Dynamically loads contents if not already loaded. Returns True if state changed."""
         if not entry.is_dir:
             return False
+        self._sync_index()
 
         if entry.path in self.expanded_folders:
             # Collapse
             self.expanded_folders.discard(entry.path)
             entry.expanded = False
+            self._patch_visible(entry, expanded=False)
         else:
             # Expand - check if children need to be loaded
-            has_children = any(e.parent_path == entry.path for e in self.all_entries)
+            has_children = bool(self._children.get(str(entry.path)))
 
             if not has_children:
                 # Dynamically load this folder's contents (1 level only)
-                try:
-                    new_entries = []
-                    stats_list = []
-                    for item in entry.path.iterdir():
-                        try:
-                            stats = item.stat()
-                            stats_list.append((item, stats))
-                        except OSError:
-                            continue
-
-                    for item, stats in stats_list:
-                        new_entries.append(
-                            Entry(
-                                path=item,
-                                name=item.name,
-                                is_dir=item.is_dir(),
-                                size=stats.st_size,
-                                created=datetime.fromtimestamp(stats.st_ctime),
-                                modified=datetime.fromtimestamp(stats.st_mtime),
-                                accessed=datetime.fromtimestamp(stats.st_atime),
-                                depth=entry.depth + 1,
-                                expanded=False,
-                                parent_path=entry.path,
-                            )
-                        )
-
-                    self.all_entries.extend(new_entries)
-                except OSError as e:
-                    sys.stderr.write(f"Failed to read directory {entry.path}: {e}\n")
+                scan = _scan_directory(entry.path, entry.depth + 1, entry.path, None, descend=False)
+                if scan.error is not None:
+                    sys.stderr.write(f"Failed to read directory {entry.path}: {scan.error}\n")
+                else:
+                    self._add_children(entry, [row for row, _ in scan.rows if row is not None])
 
             self.expanded_folders.add(entry.path)
             entry.expanded = True
+            self._patch_visible(entry, expanded=True)
         return True
 
+    def _add_children(self, entry: Entry, new_entries: List[Entry]) -> None:
+        """Append freshly listed children of ``entry`` without invalidating the rest of the tree."""
+        self.all_entries.extend(new_entries)
+        self._indexed = len(self.all_entries)
+        for child in new_entries:
+            self._by_path[str(child.path)] = child
+        key = str(entry.path)
+        self._children.setdefault(key, []).extend(new_entries)
+        self._sorted.pop(key, None)
+        # Folders below one whose size was computed already have a total
+        for child in new_entries:
+            if child.is_dir:
+                known = self.size_engine.lookup(child.path)
+                if known is not None:
+                    child.calculated_size, child.item_count = known
+
     def expand_all_at_depth(self, depth: int):
         """Expand all folders at the specified depth."""
+        self._sync_index()
         for entry in self.all_entries:
             if entry.is_dir and entry.depth == depth and not self._should_hide(entry):
                 self.expanded_folders.add(entry.path)
                 entry.expanded = True
+        # Many subtrees open at once: rebuild the visible rows on the next request
+        self._visible = None
 
     # Filter panel management methods
     def toggle_panel_focus(self):
@@ -1093,6 +1352,13 @@ def run_lister(args: argparse.Namespace) -> int:
     # Store reference to stdscr for filter dialogs (set by InteractiveList)
     stdscr_ref = [None]  # Use list to allow modification in closure
 
+    def calc_folder_sizes(folders: List[Entry]) -> None:
+        """Run the size engine over folders, reporting progress and honouring ESC."""
+        def on_progress(done: int, total: int) -> None:
+            list_view.state.calc_progress = (done, total)
+
+        manager.calculate_sizes(folders, on_progress=on_progress, cancelled=lambda: list_view.state.calc_cancel)
+
     def action_handler(key: int, item: Entry) -> Tuple[bool, bool]:
         """Handle custom actions for folder navigation.
         Returns (handled, should_refresh)"""
@@ -1106,7 +1372,7 @@ def run_lister(args: argparse.Namespace) -> int:
 
             if item.parent_path:
                 # Find the parent folder
-                parent = next((e for e in manager.all_entries if e.path == item.parent_path), None)
+                parent = manager.entry_for(item.parent_path)
                 if parent and parent.expanded:
                     # Collapse the parent
                     manager.toggle_folder(parent)
@@ -1141,17 +1407,8 @@ def run_lister(args: argparse.Namespace) -> int:
 
                 # Calculate size for this folder if not already calculated
                 if not item.has_calculated_size() and not item.size_calculating:
-                    def calc_single():
-                        item.size_calculating = True
-                        try:
-                            total_size, item_count = calculate_folder_size(item.path)
-                            item.calculated_size = total_size
-                            item.item_count = item_count
-                        except Exception:
-                            pass
-                        item.size_calculating = False
-
-                    threading.Thread(target=calc_single, daemon=True).start()
+                    # Also fills in the sizes of every folder below it
+                    threading.Thread(target=manager.calculate_sizes, args=([item],), daemon=True).start()
 
                 # Need to refresh to copy items to visible
                 return True, True  # Handled, call _update_visible_items to update state.visible
@@ -1229,34 +1486,11 @@ def run_lister(args: argparse.Namespace) -> int:
 
             # Start calculation in background thread
             def calc_thread():
-                # Get all directories
-                folders = [e for e in manager.all_entries if e.is_dir]
-                list_view.state.calc_progress = (0, len(folders))
                 list_view.state.calc_cancel = False
-
-                for idx, folder in enumerate(folders):
-                    # Check for cancellation
-                    if list_view.state.calc_cancel:
-                        break
-
-                    # Mark folder as calculating
-                    folder.size_calculating = True
-
-                    # Calculate size
-                    try:
-                        total_size, item_count = calculate_folder_size(folder.path)
-                        folder.calculated_size = total_size
-                        folder.item_count = item_count
-                    except Exception:
-                        pass  # Silently skip errors
-
-                    folder.size_calculating = False
-
-                    # Update progress
-                    list_view.state.calc_progress = (idx + 1, len(folders))
-
-                # Done
-                list_view.state.calculating_sizes = False
+                try:
+                    calc_folder_sizes([e for e in manager.all_entries if e.is_dir])
+                finally:
+                    list_view.state.calculating_sizes = False
 
             list_view.state.calculating_sizes = True
             threading.Thread(target=calc_thread, daemon=True).start()
@@ -1268,16 +1502,12 @@ def run_lister(args: argparse.Namespace) -> int:
                 return True, False
 
             def calc_visible():
-                folders = [e for e in list_view.state.items if e.is_dir]
-                list_view.state.calc_progress = (0, len(folders))
                 list_view.state.calc_cancel = False
                 list_view.state.calculating_sizes = True
-                for idx, folder in enumerate(folders):
-                    if list_view.state.calc_cancel:
-                        break
-                    manager.calculate_entry_size(folder)
-                    list_view.state.calc_progress = (idx + 1, len(folders))
-                list_view.state.calculating_sizes = False
+                try:
+                    calc_folder_sizes([e for e in list_view.state.items if e.is_dir])
+                finally:
+                    list_view.state.calculating_sizes = False
 
             threading.Thread(target=calc_visible, daemon=True).start()
             return True, False
@@ -1510,26 +1740,12 @@ def run_lister(args: argparse.Namespace) -> int:
             import time
             time.sleep(0.1)  # Brief delay to let TUI initialize
             # Simulate pressing 'S' key
-            folders = [e for e in manager.all_entries if e.is_dir]
-            list_view.state.calc_progress = (0, len(folders))
             list_view.state.calc_cancel = False
             list_view.state.calculating_sizes = True
-
-            for idx, folder in enumerate(folders):
-                if list_view.state.calc_cancel:
-                    break
-
-                folder.size_calculating = True
-                try:
-                    total_size, item_count = calculate_folder_size(folder.path)
-                    folder.calculated_size = total_size
-                    folder.item_count = item_count
-                except Exception:
-                    pass
-                folder.size_calculating = False
-                list_view.state.calc_progress = (idx + 1, len(folders))
-
-            list_view.state.calculating_sizes = False
+            try:
+                calc_folder_sizes([e for e in manager.all_entries if e.is_dir])
+            finally:
+                list_view.state.calculating_sizes = False
 
         threading.Thread(target=start_calc, daemon=True).start()
 
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Folder Size Engine for File Lister
+
+Computes recursive folder sizes in the background:
+- Lists directories with os.scandir across a thread pool
+- Builds totals bottom-up, so a folder is reported as soon as its subtree is done
+- Computing a folder fills in every folder below it
+- Memoises each directory listing by (path, mtime), so recomputing an ancestor
+  only re-lists directories that changed
+
+A directory's mtime changes when entries are added, removed or renamed in it,
+not when a file in it is rewritten in place; pass ``refresh=True`` to ignore
+the memo.
+"""
+
+from __future__ import annotations
+
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+PathLike = Union[str, Path]
+SizeCallback = Callable[[str, int, int], None]
+
+
+@dataclass(frozen=True)
+class DirListing:
+    """Direct contents of one directory."""
+    mtime_ns: int
+    file_bytes: int  # Bytes of the files directly inside
+    item_count: int  # Files and folders directly inside
+    subdirs: Tuple[str, ...]  # Folders to descend into (symlinks are not followed)
+
+
+def list_directory(path: str, mtime_ns: int = 0) -> DirListing:
+    """One scandir pass over ``path``; unreadable entries are skipped."""
+    file_bytes = 0
+    item_count = 0
+    subdirs: List[str] = []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    item_count += 1
+                    subdirs.append(entry.path)
+                elif entry.is_file():
+                    item_count += 1
+                    file_bytes += entry.stat().st_size
+                elif entry.is_dir():
+                    item_count += 1  # Symlink to a folder: counted, not followed
+            except OSError:
+                continue
+    return DirListing(mtime_ns, file_bytes, item_count, tuple(subdirs))
+
+
+class FolderSizeEngine:
+    """
+    Recursive folder sizes computed on a shared thread pool.
+
+    Example:
+        >>> engine = FolderSizeEngine()
+        >>> engine.compute([root], on_result=lambda path, size, count: ...)
+        >>> engine.lookup(root / "sub")  # filled in while computing root
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        # Listing is I/O bound: more threads than cores keeps the disk queue full
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) * 4)
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._listings: Dict[str, DirListing] = {}
+        self._totals: Dict[str, Tuple[int, int]] = {}
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="folder-size")
+            return self._pool
+
+    def lookup(self, path: PathLike) -> Optional[Tuple[int, int]]:
+        """Last computed (total_bytes, item_count) for ``path``, if any."""
+        return self._totals.get(os.fspath(path))
+
+    def _listing(self, path: str, refresh: bool) -> Optional[DirListing]:
+        try:
+            mtime_ns = os.stat(path, follow_symlinks=False).st_mtime_ns
+        except OSError:
+            return None
+        cached = self._listings.get(path)
+        if cached is not None and cached.mtime_ns == mtime_ns and not refresh:
+            return cached
+        try:
+            listing = list_directory(path, mtime_ns)
+        except OSError:
+            return None
+        with self._lock:
+            self._listings[path] = listing
+        return listing
+
+    def compute(
+        self,
+        roots: Iterable[PathLike],
+        on_result: Optional[SizeCallback] = None,
+        cancelled: Optional[Callable[[], bool]] = None,
+        refresh: bool = False,
+    ) -> Dict[str, Tuple[int, int]]:
+        """
+        Compute (total_bytes, item_count) for each root and every folder below it.
+
+        ``on_result(path, total_bytes, item_count)`` is called from the calling
+        thread for each folder as soon as its subtree is complete, deepest first.
+        Returns the totals of the roots that completed; stops early once
+        ``cancelled()`` returns True.
+        """
+        keys = list(dict.fromkeys(os.fspath(root) for root in roots))
+        if not keys:
+            return {}
+        pool = self._executor()
+        done: "queue.Queue[Tuple[str, Optional[str], Optional[DirListing]]]" = queue.Queue()
+        # path -> [bytes, items, children outstanding, parent]
+        pending: Dict[str, list] = {}
+        results: Dict[str, Tuple[int, int]] = {}
+        inflight = 0
+
+        def visit(path: str, parent: Optional[str]) -> None:
+            nonlocal inflight
+            inflight += 1
+            pool.submit(lambda: done.put((path, parent, self._listing(path, refresh))))
+
+        def finish(path: str) -> None:
+            # Report a completed folder and fold its totals into its parents
+            while path is not None:
+                total_bytes, item_count, _, parent = pending.pop(path)
+                self._totals[path] = (total_bytes, item_count)
+                if on_result:
+                    on_result(path, total_bytes, item_count)
+                if parent is None:
+                    results[path] = (total_bytes, item_count)
+                    return
+                node = pending[parent]
+                node[0] += total_bytes
+                node[1] += item_count
+                node[2] -= 1
+                path = parent if node[2] == 0 else None
+
+        for key in keys:
+            visit(key, None)
+        while inflight:
+            if cancelled is not None and cancelled():
+                break
+            try:
+                path, parent, listing = done.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            inflight -= 1
+            if listing is None:
+                # Unreadable: contributes nothing, like a failed rglob
+                pending[path] = [0, 0, 0, parent]
+                finish(path)
+                continue
+            pending[path] = [listing.file_bytes, listing.item_count, len(listing.subdirs), parent]
+            for sub in listing.subdirs:
+                visit(sub, path)
+            if not listing.subdirs:
+                finish(path)
+        return results
+
+    def compute_one(self, path: PathLike, refresh: bool = False) -> Tuple[int, int]:
+        """Blocking (total_bytes, item_count) for a single folder."""
+        return self.compute([path], refresh=refresh).get(os.fspath(path), (0, 0))
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
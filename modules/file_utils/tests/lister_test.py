@@ -532,3 +532,150 @@ def test_deep_nesting_size_display(temp_dir_structure: Path):
             assert len(line) <= 80
             # Should still have content (not completely truncated)
             assert len(line) > 20
+
+def _naive_visible(manager, sort_func, descending, dirs_first):
+    """Reference tree walk: rebuild the visible rows from all_entries."""
+    paths = {e.path for e in manager.all_entries}
+    rows = []
+
+    def add(entry):
+        rows.append(entry)
+        if entry.is_dir and entry.path in manager.expanded_folders:
+            children = [e for e in manager.all_entries if e.parent_path == entry.path]
+            for child in lister.sort_entries(children, sort_func, descending, dirs_first):
+                add(child)
+
+    top = [e for e in manager.all_entries if e.parent_path is None or e.parent_path not in paths]
+    for entry in lister.sort_entries(top, sort_func, descending, dirs_first):
+        add(entry)
+    return rows
+
+def test_visible_rows_stay_consistent_across_toggles_and_sorts(tmp_path: Path):
+    import random
+
+    rng = random.Random(7)
+    for i in range(4):
+        folder = tmp_path / f"d{i}"
+        for j in range(3):
+            (folder / f"s{j}").mkdir(parents=True)
+            for k in range(rng.randint(0, 3)):
+                (folder / f"s{j}" / f"f{k}.txt").write_text("x" * rng.randint(1, 50))
+        (folder / "top.txt").write_text("y" * i)
+    entries = lister.read_entries_recursive(tmp_path, max_depth=0)
+    manager = lister.ListerManager(entries, max_depth=0)
+
+    for step in range(60):
+        if step % 5 == 0:
+            sort_func = lister.SORT_FUNCS[rng.choice(["name", "size"])]
+            descending, dirs_first = rng.random() < 0.5, rng.random() < 0.5
+        visible = manager.get_visible_entries(sort_func, descending, dirs_first)
+        assert visible == _naive_visible(manager, sort_func, descending, dirs_first)
+        dirs = [e for e in visible if e.is_dir]
+        if step == 30:
+            manager.collapse_all()
+        elif dirs:
+            manager.toggle_folder(rng.choice(dirs))  # lazily loads subfolders on first expand
+
+def test_lister_manager_indexes_children_listed_before_parent():
+    now = datetime.now()
+    child = lister.Entry(Path("/r/d/f.txt"), "f.txt", False, 1, now, now, now, 1, parent_path=Path("/r/d"))
+    folder = lister.Entry(Path("/r/d"), "d", True, 0, now, now, now, 0)
+    manager = lister.ListerManager([child], max_depth=1)
+    assert manager.get_visible_entries() == [child]
+
+    manager.all_entries.append(folder)
+    assert manager.get_visible_entries() == [folder]
+    assert manager.entry_for(Path("/r/d")) is folder
+    assert manager.children_of(folder) == [child]
+    assert not manager._should_hide(folder) and manager._should_hide(child)
+    manager.toggle_folder(folder)
+    assert manager.get_visible_entries() == [folder, child]
+
+def _sequential_walk(root: Path, max_depth: int, depth: int = 0, parent: Path = None):
+    """Reference walk in the order the lister lists entries: folder, then its contents."""
+    rows = []
+    for item in root.iterdir():
+        rows.append((item, depth, parent, item.stat().st_mtime))
+        if item.is_dir() and depth < max_depth:
+            rows.extend(_sequential_walk(item, max_depth, depth + 1, item))
+    return rows
+
+def test_parallel_walk_matches_sequential_order(tmp_path: Path):
+    for i in range(5):
+        for j in range(4):
+            leaf = tmp_path / f"d{i}" / f"s{j}"
+            leaf.mkdir(parents=True)
+            (leaf / f"f{j}.txt").write_text("x" * (i + j))
+        (tmp_path / f"d{i}" / "top.log").write_text("y")
+
+    for max_depth in (0, 1, 5):
+        entries = lister.read_entries_recursive(tmp_path, max_depth=max_depth, workers=4)
+        expected = _sequential_walk(tmp_path, max_depth)
+        assert [(e.path, e.depth, e.parent_path) for e in entries] == [(p, d, par) for p, d, par, _ in expected]
+        assert [e.timestamp("modified") for e in entries] == [mtime for _, _, _, mtime in expected]
+
+def test_walk_filters_before_building_entries(tmp_path: Path, monkeypatch):
+    (tmp_path / "a" / "b").mkdir(parents=True)
+    (tmp_path / "a" / "keep.PDF").write_bytes(b"x" * 300)
+    (tmp_path / "a" / "b" / "keep2.pdf").write_bytes(b"x" * 50)
+    (tmp_path / "a" / "b" / "small.pdf").write_bytes(b"x" * 5)
+    (tmp_path / "skip.txt").write_bytes(b"x" * 1000)
+
+    built = []
+    real = lister.Entry.from_stat.__func__
+    monkeypatch.setattr(lister.Entry, "from_stat", classmethod(lambda cls, *a: built.append(a[1]) or real(cls, *a)))
+    stats = lister.SearchStats()
+    search = lister.SearchFilter(extensions=["pdf"], min_size=10)
+    entries = lister.read_entries_recursive(tmp_path, max_depth=5, search_filter=search, stats=stats)
+
+    assert sorted(e.name for e in entries) == ["keep.PDF", "keep2.pdf"]
+    assert sorted(built) == ["keep.PDF", "keep2.pdf"]
+    assert (stats.files_searched, stats.dirs_searched, stats.files_found) == (4, 2, 2)
+    assert (stats.bytes_searched, stats.bytes_found) == (1355, 350)
+
+def test_walk_entries_build_datetimes_lazily(tmp_path: Path):
+    (tmp_path / "f.txt").write_text("x")
+    entry = lister.read_entries_recursive(tmp_path, max_depth=0)[0]
+    assert "modified" not in entry.__dict__
+    mtime = (tmp_path / "f.txt").stat().st_mtime
+    assert lister.SORT_FUNCS["modified"](entry) == mtime
+    assert entry.modified == datetime.fromtimestamp(mtime)
+    assert "modified" in entry.__dict__
+    with pytest.raises(AttributeError):
+        entry.missing
+
+def test_invalidate_order_from_another_thread_is_safe(tmp_path: Path):
+    import threading
+
+    for i in range(5):
+        for j in range(4):
+            (tmp_path / f"d{i}" / f"s{j}").mkdir(parents=True)
+            (tmp_path / f"d{i}" / f"s{j}" / "f.txt").write_text("x" * (i + j))
+    manager = lister.ListerManager(lister.read_entries_recursive(tmp_path, max_depth=1), max_depth=1)
+    sort_func = lister.SORT_FUNCS["size"]
+    stop = threading.Event()
+
+    def invalidate():
+        entries = list(manager.all_entries)
+        while not stop.is_set():
+            for entry in entries:
+                manager.invalidate_order(entry)
+            manager.invalidate_order()
+
+    import sys
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # switch threads often enough to hit the race
+    worker = threading.Thread(target=invalidate, daemon=True)
+    worker.start()
+    try:
+        for step in range(3000):
+            visible = manager.get_visible_entries(sort_func, True, True)
+            dirs = [e for e in visible if e.is_dir]
+            manager.toggle_folder(dirs[step % len(dirs)])
+    finally:
+        stop.set()
+        worker.join(5)
+        sys.setswitchinterval(interval)
+    visible = manager.get_visible_entries(sort_func, True, True)
+    assert visible == _naive_visible(manager, sort_func, True, True)
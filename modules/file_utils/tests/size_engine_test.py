@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+
+from file_utils import lister, size_engine
+from file_utils.size_engine import FolderSizeEngine
+
+
+@pytest.fixture
+def tree(tmp_path: Path) -> Path:
+    """root/{a.bin(10), one/{b.bin(20), two/{c.bin(30)}}, empty/}"""
+    (tmp_path / "one" / "two").mkdir(parents=True)
+    (tmp_path / "empty").mkdir()
+    (tmp_path / "a.bin").write_bytes(b"a" * 10)
+    (tmp_path / "one" / "b.bin").write_bytes(b"b" * 20)
+    (tmp_path / "one" / "two" / "c.bin").write_bytes(b"c" * 30)
+    return tmp_path
+
+
+def test_compute_fills_every_folder_bottom_up(tree: Path):
+    engine = FolderSizeEngine(max_workers=4)
+    reported = []
+    try:
+        totals = engine.compute([tree], on_result=lambda path, size, count: reported.append((path, size, count)))
+    finally:
+        engine.shutdown()
+
+    assert totals == {str(tree): (60, 6)}
+    assert totals[str(tree)] == lister.calculate_folder_size(tree)
+    order = [path for path, _, _ in reported]
+    assert order.index(str(tree / "one" / "two")) < order.index(str(tree / "one")) < order.index(str(tree))
+    assert engine.lookup(tree / "one") == (50, 3)
+    assert engine.lookup(tree / "empty") == (0, 0)
+
+
+def test_unchanged_folders_are_not_listed_again(tree: Path, monkeypatch):
+    engine = FolderSizeEngine(max_workers=2)
+    listed = []
+    real = size_engine.list_directory
+    monkeypatch.setattr(size_engine, "list_directory", lambda path, mtime_ns=0: listed.append(path) or real(path, mtime_ns))
+    try:
+        engine.compute_one(tree / "one")
+        assert sorted(listed) == [str(tree / "one"), str(tree / "one" / "two")]
+
+        # The parent only lists what the child computation has not seen
+        listed.clear()
+        two = tree / "one" / "two"
+        (two / "d.bin").write_bytes(b"d" * 5)
+        st = os.stat(two)
+        os.utime(two, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        assert engine.compute_one(tree) == (65, 7)
+        assert sorted(listed) == sorted([str(tree), str(tree / "empty"), str(two)])
+
+        listed.clear()
+        assert engine.compute_one(tree, refresh=True) == (65, 7)
+        assert len(listed) == 4
+    finally:
+        engine.shutdown()
+
+
+def test_manager_streams_sizes_into_entries(tree: Path):
+    entries = lister.read_entries_recursive(tree, max_depth=5)
+    manager = lister.ListerManager(entries, max_depth=5)
+    progress = []
+    folders = [e for e in entries if e.is_dir]
+    manager.calculate_sizes(folders, on_progress=lambda done, total: progress.append((done, total)))
+
+    sizes = {e.name: (e.calculated_size, e.item_count) for e in folders}
+    assert sizes == {"one": (50, 3), "two": (30, 1), "empty": (0, 0)}
+    assert progress[0] == (0, 3) and progress[-1] == (3, 3)
+    assert not any(e.size_calculating for e in folders)
+
+
+def test_lazily_loaded_folders_pick_up_known_sizes(tree: Path):
+    entries = lister.read_entries_recursive(tree, max_depth=0)
+    manager = lister.ListerManager(entries, max_depth=0)
+    one = next(e for e in entries if e.name == "one")
+    manager.calculate_entry_size(one)
+    assert (one.calculated_size, one.item_count) == (50, 3)
+
+    manager.toggle_folder(one)
+    two = next(e for e in manager.children_of(one) if e.name == "two")
+    assert (two.calculated_size, two.item_count) == (30, 1)
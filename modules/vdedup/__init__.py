@@ -8,8 +8,18 @@ __all__ = [
     "hashers",
     "probe",
     "phash",
+    "audio",
+    "audio_index",
+    "distance",
+    "fingerprints",
+    "extract",
+    "executor",
+    "incremental",
+    "streaming",
+    "bench",
     "grouping",
     "progress",
     "report",
+    "fileops",
     "pipeline",
 ]
@@ -2,8 +2,19 @@
 """
 Audio fingerprint helpers for vdedup.
 
-Uses ffmpeg to downsample audio to mono PCM blocks, then hashes each window to
-create a lightweight signature suitable for similarity matching.
+Uses ffmpeg to downsample audio to mono PCM on a pipe and turns it into a tuple of
+landmarks. Each landmark packs a content hash with the time offset (in analysis frames)
+it was seen at, ``(hash << OFFSET_BITS) | offset``, so fingerprints can be matched via
+an inverted index with offset-histogram voting (see vdedup.audio_index).
+
+With NumPy, landmarks are spectral-peak pairs (constellation style): a short-time FFT,
+the strongest peak per frequency band, and each anchor peak paired with a few later
+peaks as ``(f1, f2, dt)``. Peak positions survive re-encoding and gain changes, and the
+hashes do not depend on where a clip starts, so subsets of longer videos match too.
+
+Without NumPy, fixed PCM windows are hashed with BLAKE2b instead (exact audio only).
+
+The PCM stream is consumed in fixed-size reads, so memory does not grow with duration.
 """
 
 from __future__ import annotations
@@ -11,7 +22,47 @@ from __future__ import annotations
 import hashlib
 import subprocess
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+
+try:
+    import numpy as np  # type: ignore
+    _NUMPY_AVAILABLE = True
+except Exception:  # pragma: no cover - exercised only without numpy
+    np = None  # type: ignore
+    _NUMPY_AVAILABLE = False
+
+# Landmark layout: offset in the low bits, hash above it
+OFFSET_BITS = 20
+OFFSET_MASK = (1 << OFFSET_BITS) - 1
+
+# Fingerprint-store variant for the scheme this interpreter produces; the two schemes never mix
+FINGERPRINT_VARIANT = "spectral" if _NUMPY_AVAILABLE else "windows"
+
+# Spectral analysis parameters
+_FRAME_SECONDS = 0.128           # FFT length; hop is half of it
+_BANDS = 6                       # log-spaced peak bands between _MIN_FREQ and Nyquist
+_MIN_FREQ = 150.0
+_PEAKS_PER_FRAME = 2
+_PEAK_RATIO = 3.0                # band peak must exceed this multiple of the frame's mean magnitude
+_SILENCE_RMS = 16.0              # int16 RMS below which a frame counts as silent
+_FAN_OUT = 2                     # later peaks paired with each anchor
+_MAX_DT = 63                     # frames (6 bits)
+_FREQ_BITS = 10
+_DT_BITS = 6
+_FRAMES_PER_READ = 64
+_MIN_LANDMARKS = 16
+
+_WINDOW_HASH_MASK = (1 << 44) - 1
+
+
+def pack_landmark(hash_value: int, offset: int) -> int:
+    return (int(hash_value) << OFFSET_BITS) | (int(offset) & OFFSET_MASK)
+
+
+def unpack_landmark(value: int) -> Tuple[int, int]:
+    """Return (hash, offset) for one fingerprint element."""
+    value = int(value)
+    return value >> OFFSET_BITS, value & OFFSET_MASK
 
 
 def compute_audio_fingerprint(
@@ -22,15 +73,13 @@ def compute_audio_fingerprint(
     max_windows: int = 256,
 ) -> Optional[Tuple[int, ...]]:
     """
-    Generate an audio fingerprint as a tuple of integers.
+    Generate an audio fingerprint as a tuple of packed landmarks.
 
-    Each integer represents the BLAKE2b digest of a PCM window. This keeps the
-    signature compact while remaining robust to re-encoding and gain changes.
+    At most ``window_seconds * max_windows`` seconds of audio are analysed. Returns None
+    when ffmpeg fails or the audio is too short or silent to fingerprint.
     """
     sample_rate = max(2000, min(sample_rate, 16000))
-    window_seconds = max(0.5, min(window_seconds, 6.0))
-    window_bytes = int(sample_rate * window_seconds * 2)  # pcm_s16le => 2 bytes per sample
-    if window_bytes <= 0:
+    if pcm_window_bytes(sample_rate, window_seconds) <= 0:
         return None
 
     cmd = [
@@ -57,18 +106,15 @@ def compute_audio_fingerprint(
     except Exception:
         return None
 
-    sig: List[int] = []
     try:
         if not proc.stdout:
             return None
-        while len(sig) < max_windows:
-            chunk = proc.stdout.read(window_bytes)
-            if not chunk:
-                break
-            if not chunk.strip(b"\x00"):
-                continue
-            digest = hashlib.blake2b(chunk, digest_size=8).digest()
-            sig.append(int.from_bytes(digest, "big"))
+        sig = fingerprint_pcm_stream(
+            proc.stdout, sample_rate=sample_rate, window_seconds=window_seconds, max_windows=max_windows
+        )
+        # The fingerprint may stop reading before EOF; ffmpeg would block on the full pipe
+        if proc.poll() is None:
+            proc.kill()
         proc.wait(timeout=5)
     except Exception:
         try:
@@ -80,6 +126,148 @@ def compute_audio_fingerprint(
         if proc.stdout:
             proc.stdout.close()
 
+    return sig
+
+
+def pcm_window_bytes(sample_rate: int = 8000, window_seconds: float = 3.0) -> int:
+    """Byte length of one mono pcm_s16le window (after clamping like compute_audio_fingerprint)."""
+    sample_rate = max(2000, min(sample_rate, 16000))
+    window_seconds = max(0.5, min(window_seconds, 6.0))
+    return int(sample_rate * window_seconds * 2)
+
+
+def fingerprint_pcm_stream(
+    stream: BinaryIO,
+    *,
+    sample_rate: int = 8000,
+    window_seconds: float = 3.0,
+    max_windows: int = 256,
+) -> Optional[Tuple[int, ...]]:
+    """
+    Fingerprint mono s16le PCM read from ``stream`` (spectral landmarks with NumPy,
+    BLAKE2b windows without). Returns None when too little audio was usable.
+    """
+    sample_rate = max(2000, min(sample_rate, 16000))
+    if not _NUMPY_AVAILABLE:
+        window_bytes = pcm_window_bytes(sample_rate, window_seconds)
+        return _window_fingerprint(stream, window_bytes=window_bytes, max_windows=max_windows)
+    max_seconds = max(0.5, min(window_seconds, 6.0)) * max(1, max_windows)
+    sig = tuple(spectral_landmarks(stream, sample_rate=sample_rate, max_seconds=max_seconds))
+    return sig if len(sig) >= _MIN_LANDMARKS else None
+
+
+def _window_fingerprint(stream: BinaryIO, *, window_bytes: int, max_windows: int) -> Optional[Tuple[int, ...]]:
+    """Hash fixed-size PCM windows (silent windows are skipped); the offset is the window index."""
+    sig: List[int] = []
+    index = 0
+    while len(sig) < max_windows:
+        chunk = stream.read(window_bytes)
+        if not chunk:
+            break
+        index += 1
+        if not chunk.strip(b"\x00"):
+            continue
+        digest = int.from_bytes(hashlib.blake2b(chunk, digest_size=8).digest(), "big")
+        sig.append(pack_landmark(digest & _WINDOW_HASH_MASK, index - 1))
+
     if len(sig) < max(6, max_windows // 8):
         return None
     return tuple(sig)
+
+
+def analysis_hop(sample_rate: int) -> int:
+    """Samples between spectral frames (one landmark offset unit)."""
+    return _fft_size(sample_rate) // 2
+
+
+def _fft_size(sample_rate: int) -> int:
+    size = 1
+    while size < sample_rate * _FRAME_SECONDS:
+        size <<= 1
+    return size
+
+
+def _band_edges(sample_rate: int, n_fft: int) -> List[int]:
+    nyquist = sample_rate / 2.0
+    lo = _MIN_FREQ
+    hi = nyquist * 0.95
+    edges = []
+    for i in range(_BANDS + 1):
+        freq = lo * (hi / lo) ** (i / _BANDS)
+        edges.append(int(round(freq / nyquist * (n_fft // 2))))
+    # Every band needs at least one bin
+    for i in range(1, len(edges)):
+        edges[i] = max(edges[i], edges[i - 1] + 1)
+    return edges
+
+
+def _frame_peaks(spec, loud, edges: List[int]) -> List[List[int]]:
+    """Per frame, the bins of up to _PEAKS_PER_FRAME band maxima that stand out from the frame."""
+    rows = np.arange(spec.shape[0])
+    bins = np.empty((spec.shape[0], len(edges) - 1), dtype=np.int64)
+    mags = np.empty(bins.shape, dtype=spec.dtype)
+    for b in range(len(edges) - 1):
+        band = spec[:, edges[b]:edges[b + 1]]
+        arg = band.argmax(axis=1)
+        bins[:, b] = arg + edges[b]
+        mags[:, b] = band[rows, arg]
+    floor = spec[:, edges[0]:edges[-1]].mean(axis=1) * _PEAK_RATIO
+    valid = (mags > floor[:, None]) & loud[:, None]
+    ranked = np.argsort(np.where(valid, -mags, np.inf), axis=1)[:, :_PEAKS_PER_FRAME]
+    peaks: List[List[int]] = []
+    for r in range(spec.shape[0]):
+        peaks.append([int(bins[r, c]) for c in ranked[r] if valid[r, c]])
+    return peaks
+
+
+def spectral_landmarks(stream: BinaryIO, *, sample_rate: int = 8000, max_seconds: float = 768.0) -> Iterator[int]:
+    """
+    Yield packed landmarks for mono s16le PCM read from ``stream``.
+
+    Audio is read ``_FRAMES_PER_READ`` hops at a time; only the FFT overlap and the
+    anchors still inside the target zone are carried between reads.
+    """
+    if not _NUMPY_AVAILABLE:
+        raise RuntimeError("spectral landmarks require numpy")
+    n_fft = _fft_size(sample_rate)
+    hop = n_fft // 2
+    window = np.hanning(n_fft).astype(np.float32)
+    edges = _band_edges(sample_rate, n_fft)
+    max_frames = min(int(max_seconds * sample_rate / hop), OFFSET_MASK)
+    freq_mask = (1 << _FREQ_BITS) - 1
+
+    carry = np.zeros(0, dtype=np.int16)
+    odd = b""
+    frame = 0
+    pending: List[List[int]] = []  # [frame, bin, pairs still wanted]
+    while frame < max_frames:
+        chunk = stream.read(hop * _FRAMES_PER_READ * 2)
+        if not chunk:
+            break
+        chunk = odd + chunk
+        odd = chunk[len(chunk) & ~1:]
+        samples = np.frombuffer(chunk[: len(chunk) & ~1], dtype="<i2")
+        buf = np.concatenate((carry, samples))
+        count = min((len(buf) - n_fft) // hop + 1 if len(buf) >= n_fft else 0, max_frames - frame)
+        if count <= 0:
+            carry = buf
+            continue
+        index = np.arange(n_fft)[None, :] + hop * np.arange(count)[:, None]
+        frames = buf[index].astype(np.float32)
+        loud = np.sqrt((frames * frames).mean(axis=1)) >= _SILENCE_RMS
+        spec = np.abs(np.fft.rfft(frames * window, axis=1))
+        carry = buf[count * hop:]
+
+        for peaks in _frame_peaks(spec, loud, edges):
+            pending = [a for a in pending if frame - a[0] <= _MAX_DT]
+            for anchor in pending:
+                for target in peaks:
+                    if anchor[2] <= 0:
+                        break
+                    dt = frame - anchor[0]
+                    h = ((anchor[1] & freq_mask) << (_FREQ_BITS + _DT_BITS)) | ((target & freq_mask) << _DT_BITS) | dt
+                    yield pack_landmark(h, anchor[0])
+                    anchor[2] -= 1
+            pending = [a for a in pending if a[2] > 0]
+            pending.extend([frame, b, _FAN_OUT] for b in peaks)
+            frame += 1
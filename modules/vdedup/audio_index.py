@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+"""
+Inverted index over audio fingerprints for lookup-based matching.
+
+Each fingerprint element is a landmark ``(hash, offset)`` (see vdedup.audio). The
+index maps every hash to the items and offsets it occurs at, so finding the tracks
+that share audio with a query costs one posting-list read per query landmark instead
+of a comparison against every other track.
+
+Strategy:
+- Postings are packed ``(item << OFFSET_BITS) | offset`` in unsigned 64-bit arrays
+- A query collects, per candidate item, the offset differences of shared hashes
+- Real matches pile up on one difference (offset-histogram voting); chance hash
+  collisions scatter across many, so the peak height separates the two
+- Neighbouring differences are counted with the peak, absorbing the +-1 frame
+  jitter of clips that do not start on a frame boundary
+
+The winning difference is where the query's frame 0 sits in the matched item, so a
+clip that is a subset of a longer track is found, and located, by the same lookup.
+"""
+
+from __future__ import annotations
+
+from array import array
+from collections import Counter, defaultdict
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from vdedup.audio import OFFSET_BITS, OFFSET_MASK, unpack_landmark
+
+try:
+    import numpy as np  # type: ignore
+    _NUMPY_AVAILABLE = True
+except Exception:  # pragma: no cover - exercised only without numpy
+    np = None  # type: ignore
+    _NUMPY_AVAILABLE = False
+
+# Hashes with more postings than this are too common to be evidence and are skipped at query time
+DEFAULT_MAX_POSTINGS = 4096
+
+_DELTA_BIAS = 1 << OFFSET_BITS
+
+
+class AudioMatch(NamedTuple):
+    """One candidate returned by AudioIndex.query."""
+    item: int
+    offset: int       # position of the query's first frame in the matched item (negative: item starts later)
+    votes: int        # landmarks agreeing on that offset
+    score: float      # votes over the smaller landmark count of the two fingerprints, in [0, 1]
+
+
+class AudioIndex:
+    """
+    Hash -> (item, offset) inverted index with offset-histogram voting.
+
+    Example:
+        >>> index = AudioIndex()
+        >>> a = index.add(fingerprint_a)
+        >>> b = index.add(fingerprint_b)
+        >>> matches = index.query(fingerprint_a, exclude=a)
+    """
+
+    def __init__(self, max_postings: int = DEFAULT_MAX_POSTINGS):
+        self.max_postings = max(1, int(max_postings))
+        self._postings: Dict[int, array] = defaultdict(lambda: array("Q"))
+        self._sizes: List[int] = []
+        self._spans: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    @property
+    def total_landmarks(self) -> int:
+        return sum(self._sizes)
+
+    def add(self, sig: Sequence[int]) -> int:
+        """Index one fingerprint and return its item id (ids count up from 0)."""
+        item = len(self._sizes)
+        span = 0
+        for value in sig:
+            h, offset = unpack_landmark(value)
+            self._postings[h].append((item << OFFSET_BITS) | offset)
+            span = max(span, offset + 1)
+        self._sizes.append(len(sig))
+        self._spans.append(span)
+        return item
+
+    def span(self, item: int) -> int:
+        """Number of frames covered by an item's landmarks (its last offset + 1)."""
+        return self._spans[item]
+
+    def _votes(self, sig: Sequence[int]) -> Dict[int, Tuple[int, int]]:
+        """Return {item: (votes, offset delta)} for the best-supported offset of every candidate item."""
+        span = 2 * _DELTA_BIAS  # key = item * span + offset delta + bias
+        if _NUMPY_AVAILABLE:
+            parts = []
+            for value in sig:
+                h, offset = unpack_landmark(value)
+                posting = self._postings.get(h)
+                if not posting or len(posting) > self.max_postings:
+                    continue
+                entries = np.frombuffer(posting, dtype=np.uint64).astype(np.int64)
+                parts.append((entries >> OFFSET_BITS) * span + (entries & OFFSET_MASK) + (_DELTA_BIAS - offset))
+            if not parts:
+                return {}
+            keys, counts = np.unique(np.concatenate(parts), return_counts=True)
+            totals = counts.copy()
+            for step in (-1, 1):
+                pos = np.minimum(np.searchsorted(keys, keys + step), len(keys) - 1)
+                totals += np.where(keys[pos] == keys + step, counts[pos], 0)
+            items = keys // span
+            # Highest total first within each item, then the first row per item
+            order = np.lexsort((-totals, items))
+            _uniq, first = np.unique(items[order], return_index=True)
+            chosen = order[first]
+            return {
+                int(items[i]): (int(totals[i]), int(keys[i] % span) - _DELTA_BIAS)
+                for i in chosen
+            }
+
+        histogram: Counter = Counter()
+        for value in sig:
+            h, offset = unpack_landmark(value)
+            posting = self._postings.get(h)
+            if not posting or len(posting) > self.max_postings:
+                continue
+            for entry in posting:
+                histogram[(entry >> OFFSET_BITS) * span + (entry & OFFSET_MASK) + (_DELTA_BIAS - offset)] += 1
+        best: Dict[int, Tuple[int, int]] = {}
+        for key in sorted(histogram):
+            votes = histogram[key] + histogram.get(key - 1, 0) + histogram.get(key + 1, 0)
+            item, delta = divmod(key, span)
+            if item not in best or votes > best[item][0]:
+                best[item] = (votes, delta - _DELTA_BIAS)
+        return best
+
+    def query(
+        self,
+        sig: Sequence[int],
+        *,
+        min_votes: int = 5,
+        min_score: float = 0.1,
+        exclude: Optional[int] = None,
+    ) -> List[AudioMatch]:
+        """
+        Items sharing audio with ``sig``, best score first.
+
+        For each candidate item only the best offset is reported; an item is returned
+        when at least ``min_votes`` landmarks agree on it and they make up at least
+        ``min_score`` of the smaller fingerprint.
+        """
+        if not sig:
+            return []
+        matches: List[AudioMatch] = []
+        for item, (votes, offset) in self._votes(sig).items():
+            if item == exclude or votes < min_votes:
+                continue
+            score = min(1.0, votes / max(1, min(len(sig), self._sizes[item])))
+            if score >= min_score:
+                matches.append(AudioMatch(item=item, offset=offset, votes=votes, score=score))
+        matches.sort(key=lambda m: (-m.score, -m.votes, m.item))
+        return matches
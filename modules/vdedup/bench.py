@@ -0,0 +1,539 @@
+#!/usr/bin/env python3
+"""
+vdedup.bench
+
+Benchmark harness: build a reproducible synthetic corpus with known duplicates, run
+the pipeline over it and record per-stage cost and end-to-end accuracy as JSON that
+can be compared between runs.
+
+Corpus (``generate_corpus``):
+  original/<key>.mp4          seeded ffmpeg ``life`` pattern + tone, one per source
+  variants/<key>/<key>_*.*    transformed copies (exact copy, downscale, re-encode,
+                              no audio, container change, trimmed subset)
+  truth.json                  {key: {original, variants}} (video_dataset_tools format)
+The same (seed, sources, duration, variants) always yields the same corpus, and an
+existing corpus with a matching spec is reused instead of regenerated.
+
+Per stage (from ProgressReporter stage boundaries): wall seconds, items, items/sec,
+ffmpeg seconds (CPU time of reaped child processes, i.e. ffmpeg/ffprobe and pool
+workers) and peak RSS. Accuracy compares duplicate pairs against truth.json. The
+reporter's own cost is measured as nanoseconds per inc_hashed call under thread
+contention (locked vs sharded counters) and projected onto the run's item count.
+
+Usage:
+  video-dedupe bench -o ./bench -n 8 -p 1-7
+  video-dedupe bench -o ./bench -C ./bench/bench-previous.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as _dt
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+
+try:
+    import resource  # type: ignore
+    _RESOURCE_AVAILABLE = True
+except Exception:  # Windows
+    _RESOURCE_AVAILABLE = False
+
+try:
+    from argparse_enforcer import EnforcedArgumentParser
+except ImportError:
+    EnforcedArgumentParser = argparse.ArgumentParser
+
+from vdedup.pipeline import PipelineConfig, parse_pipeline, run_pipeline
+from vdedup.progress import ProgressReporter
+
+BENCH_VERSION = 1
+
+# Variant kinds in generation order; "trim" is only detectable with subset detection
+VARIANT_KINDS = ("copy", "downscale", "reencode", "noaudio", "remux", "trim")
+
+_CORPUS_SPEC = "corpus.json"
+_TRUTH = "truth.json"
+
+
+# -------------------------------------------------------------------------------------------------
+# Resource probes
+# -------------------------------------------------------------------------------------------------
+
+def _child_cpu_seconds() -> float:
+    if not _RESOURCE_AVAILABLE:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if not _RESOURCE_AVAILABLE:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+# -------------------------------------------------------------------------------------------------
+# Corpus
+# -------------------------------------------------------------------------------------------------
+
+def _transformations():
+    try:
+        from vdedup import video_transformations as vt  # type: ignore
+    except Exception:
+        from video_dataset_tools import transformations as vt  # type: ignore
+    return vt
+
+
+def _render_source(dest: Path, seed: int, duration: float) -> None:
+    """Encode one seeded synthetic source clip (distinct visuals and tone per seed)."""
+    rng = random.Random(seed)
+    video = f"life=s=320x240:rate=25:seed={seed}:ratio={rng.uniform(0.05, 0.3):.3f}:mold={rng.randint(0, 20)}"
+    audio = f"sine=frequency={rng.randint(180, 1800)}:sample_rate=22050"
+    cmd = [
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+        "-f", "lavfi", "-i", video,
+        "-f", "lavfi", "-i", audio,
+        "-t", f"{duration:.3f}",
+        "-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p",
+        "-c:a", "aac", "-shortest", str(dest),
+    ]
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed for {dest}: {result.stderr.decode(errors='replace')}")
+
+
+def _render_variant(kind: str, src: Path, dest_dir: Path, key: str, duration: float) -> Path:
+    vt = _transformations()
+    if kind == "copy":
+        out = dest_dir / f"{key}_copy.mp4"
+        shutil.copy2(src, out)
+    elif kind == "downscale":
+        out = dest_dir / f"{key}_180p.mp4"
+        vt.scale_video(src, out, height=180)
+    elif kind == "reencode":
+        out = dest_dir / f"{key}_crf32.mp4"
+        vt.change_video_bitrate(src, out, crf=32)
+    elif kind == "noaudio":
+        out = dest_dir / f"{key}_noaudio.mp4"
+        vt.remove_audio(src, out)
+    elif kind == "remux":
+        out = dest_dir / f"{key}_remux.mkv"
+        vt.change_container(src, out)
+    elif kind == "trim":
+        out = dest_dir / f"{key}_trim.mp4"
+        vt.trim_video(src, out, start=duration * 0.25, duration=duration * 0.5)
+    else:
+        raise ValueError(f"Unknown variant kind: {kind}")
+    return out
+
+
+def generate_corpus(
+    root: Path,
+    *,
+    sources: int = 8,
+    seed: int = 1,
+    duration: float = 12.0,
+    variants: Sequence[str] = VARIANT_KINDS,
+    negatives: int = 2,
+) -> Dict[str, Any]:
+    """
+    Build (or reuse) the synthetic corpus under ``root`` and return its spec.
+
+    ``negatives`` extra sources get no variants, so they only count against precision.
+    """
+    root = Path(root).expanduser().resolve()
+    spec = {
+        "seed": int(seed),
+        "sources": int(sources),
+        "negatives": int(negatives),
+        "duration": float(duration),
+        "variants": list(variants),
+    }
+    spec_path = root / _CORPUS_SPEC
+    if spec_path.exists() and (root / _TRUTH).exists():
+        try:
+            previous = json.loads(spec_path.read_text(encoding="utf-8"))
+        except Exception:
+            previous = {}
+        if previous.get("spec") == spec:
+            return previous
+    if not shutil.which("ffmpeg"):
+        raise RuntimeError("ffmpeg not found in PATH; it is required to generate the benchmark corpus")
+    for sub in ("original", "variants"):
+        shutil.rmtree(root / sub, ignore_errors=True)
+
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    truth: Dict[str, Dict[str, Any]] = {}
+    (root / "original").mkdir(parents=True, exist_ok=True)
+    for index in range(sources + negatives):
+        key = f"src{index:03d}"
+        original = root / "original" / f"{key}.mp4"
+        _render_source(original, rng.randrange(1, 2**31), duration)
+        produced: List[str] = []
+        if index < sources:
+            dest_dir = root / "variants" / key
+            dest_dir.mkdir(parents=True, exist_ok=True)
+            for kind in variants:
+                out = _render_variant(kind, original, dest_dir, key, duration)
+                produced.append(str(out.relative_to(root)))
+        truth[key] = {"original": str(original.relative_to(root)), "variants": produced}
+
+    (root / _TRUTH).write_text(
+        json.dumps({"version": 1, "dataset_root": str(root), "keys": truth}, indent=2), encoding="utf-8"
+    )
+    files = [root / entry["original"] for entry in truth.values()]
+    files += [root / v for entry in truth.values() for v in entry["variants"]]
+    record = {
+        "spec": spec,
+        "files": len(files),
+        "bytes": sum(p.stat().st_size for p in files),
+        "generated_seconds": round(time.perf_counter() - started, 3),
+    }
+    spec_path.write_text(json.dumps(record, indent=2), encoding="utf-8")
+    return record
+
+
+def load_truth(root: Path) -> List[List[Path]]:
+    """Duplicate sets from ``root/truth.json``: original plus its variants, resolved."""
+    root = Path(root).expanduser().resolve()
+    data = json.loads((root / _TRUTH).read_text(encoding="utf-8"))
+    sets: List[List[Path]] = []
+    for entry in (data.get("keys") or {}).values():
+        members = [entry["original"], *(entry.get("variants") or [])]
+        sets.append([(root / m).resolve() for m in members])
+    return sets
+
+
+# -------------------------------------------------------------------------------------------------
+# Measurement
+# -------------------------------------------------------------------------------------------------
+
+class StageRecorder(ProgressReporter):
+    """Headless reporter that samples cost metrics at every stage boundary."""
+
+    def __init__(self) -> None:
+        super().__init__(enable_dash=False, sharded=True)
+        self.samples: Dict[str, Dict[str, Any]] = {}
+        self._open: Dict[str, Tuple[float, float]] = {}
+
+    def _close(self, stage: str, items: int) -> None:
+        opened = self._open.pop(stage, None)
+        if opened is None:
+            return
+        started, child_cpu = opened
+        wall = time.perf_counter() - started
+        self.samples[stage] = {
+            "wall_seconds": round(wall, 4),
+            "items": int(items),
+            "items_per_second": round(items / wall, 2) if wall > 0 else None,
+            "ffmpeg_seconds": round(_child_cpu_seconds() - child_cpu, 4),
+            "peak_rss_mb": _peak_rss_mb(),
+        }
+
+    def start_stage(self, name: str, total: int) -> None:
+        # The base class closes a still-running stage implicitly; record it first
+        self.flush()
+        if self.stage_name in self._open:
+            self._close(self.stage_name, self.stage_done)
+        super().start_stage(name, total)
+        self._open[name] = (time.perf_counter(), _child_cpu_seconds())
+
+    def finish_stage(self, name: Optional[str] = None, *, status: str = "done") -> None:
+        stage = name or self.stage_name
+        self.flush()
+        items = self.stage_done if stage == self.stage_name else 0
+        super().finish_stage(name, status=status)
+        self._close(stage, items)
+
+
+def measure_reporter_overhead(*, threads: int = 4, calls: int = 50_000) -> Dict[str, Any]:
+    """
+    Nanoseconds per ``inc_hashed`` call while ``threads`` workers update one reporter,
+    for the locked and the sharded counters, net of an empty call as baseline.
+    """
+    def _elapsed(fn: Any) -> float:
+        barrier = threading.Barrier(threads + 1)
+
+        def _worker() -> None:
+            barrier.wait()
+            for _ in range(calls):
+                fn()
+
+        workers = [threading.Thread(target=_worker) for _ in range(threads)]
+        for w in workers:
+            w.start()
+        barrier.wait()
+        started = time.perf_counter()
+        for w in workers:
+            w.join()
+        return time.perf_counter() - started
+
+    baseline = _elapsed(lambda: None)
+    out: Dict[str, Any] = {"threads": threads, "calls_per_thread": calls}
+    for mode, sharded in (("locked", False), ("sharded", True)):
+        reporter = ProgressReporter(enable_dash=False, sharded=sharded)
+        elapsed = _elapsed(reporter.inc_hashed)
+        out[f"{mode}_ns_per_call"] = round(max(0.0, elapsed - baseline) / (threads * calls) * 1e9, 1)
+    return out
+
+
+def _pairs(sets: Iterable[Iterable[Path]]) -> Set[FrozenSet[Path]]:
+    pairs: Set[FrozenSet[Path]] = set()
+    for members in sets:
+        resolved = sorted({Path(m).resolve() for m in members})
+        for a, b in itertools.combinations(resolved, 2):
+            pairs.add(frozenset((a, b)))
+    return pairs
+
+
+def score_groups(groups: Mapping[str, Sequence[Any]], truth: Sequence[Sequence[Path]]) -> Dict[str, Any]:
+    """Pairwise precision/recall of pipeline groups against the truth sets, overall and per method."""
+    expected = _pairs(truth)
+    by_method: Dict[str, Set[FrozenSet[Path]]] = {}
+    for gid, members in groups.items():
+        method = str(gid).split(":", 1)[0]
+        by_method.setdefault(method, set()).update(_pairs([[m.path for m in members]]))
+    actual: Set[FrozenSet[Path]] = set().union(*by_method.values()) if by_method else set()
+    tp = len(expected & actual)
+    fp = len(actual - expected)
+    fn = len(expected - actual)
+    precision = tp / (tp + fp) if (tp + fp) else 0.0
+    recall = tp / (tp + fn) if (tp + fn) else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if (precision + recall) else 0.0
+    methods = {}
+    for method, pairs in sorted(by_method.items()):
+        hits = len(pairs & expected)
+        methods[method] = {"pairs": len(pairs), "tp": hits, "precision": round(hits / len(pairs), 4) if pairs else 0.0}
+    return {
+        "expected_pairs": len(expected),
+        "actual_pairs": len(actual),
+        "tp": tp,
+        "fp": fp,
+        "fn": fn,
+        "precision": round(precision, 4),
+        "recall": round(recall, 4),
+        "f1": round(f1, 4),
+        "by_method": methods,
+    }
+
+
+def run_bench(
+    corpus_root: Path,
+    *,
+    stages: Sequence[int],
+    cfg: PipelineConfig,
+    corpus: Optional[Mapping[str, Any]] = None,
+    overhead_calls: int = 50_000,
+) -> Dict[str, Any]:
+    """Run the pipeline once over ``corpus_root`` (cold: no cache) and return the result record."""
+    corpus_root = Path(corpus_root).expanduser().resolve()
+    truth = load_truth(corpus_root)
+    recorder = StageRecorder()
+    child_cpu = _child_cpu_seconds()
+    started = time.perf_counter()
+    groups = run_pipeline(
+        roots=[corpus_root],
+        patterns=None,
+        exclude_patterns=[_TRUTH, _CORPUS_SPEC],
+        max_depth=None,
+        selected_stages=stages,
+        cfg=cfg,
+        cache=None,
+        reporter=recorder,
+    )
+    wall = time.perf_counter() - started
+    overhead = measure_reporter_overhead(threads=max(1, cfg.threads), calls=overhead_calls)
+    items = sum(int(s.get("items") or 0) for s in recorder.samples.values())
+    # What the run's counter updates cost with the sharded reporter it used
+    overhead["share_pct"] = round(overhead["sharded_ns_per_call"] * items / 1e9 / wall * 100, 4) if wall > 0 else None
+    return {
+        "version": BENCH_VERSION,
+        "created": _dt.datetime.now().isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "corpus": {"root": str(corpus_root), **dict(corpus or {})},
+        "config": {"stages": list(stages), **asdict(cfg)},
+        "stages": recorder.samples,
+        "total": {
+            "wall_seconds": round(wall, 4),
+            "ffmpeg_seconds": round(_child_cpu_seconds() - child_cpu, 4),
+            "peak_rss_mb": _peak_rss_mb(),
+        },
+        "reporter": overhead,
+        "accuracy": score_groups(groups, truth),
+    }
+
+
+# -------------------------------------------------------------------------------------------------
+# Comparison
+# -------------------------------------------------------------------------------------------------
+
+def compare_results(
+    previous: Mapping[str, Any],
+    current: Mapping[str, Any],
+    *,
+    threshold: float = 10.0,
+) -> List[Dict[str, Any]]:
+    """
+    Rows of {metric, previous, current, change_pct, regression} for stage wall times,
+    totals and accuracy. A regression is a slowdown beyond ``threshold`` percent or any
+    drop in precision/recall.
+    """
+    rows: List[Dict[str, Any]] = []
+
+    def _row(metric: str, old: Any, new: Any, *, higher_is_better: bool, tolerance: float) -> None:
+        if not isinstance(old, (int, float)) or not isinstance(new, (int, float)):
+            return
+        change = ((new - old) / old * 100.0) if old else (0.0 if new == old else None)
+        worse = (new < old) if higher_is_better else (new > old)
+        regression = bool(worse and (change is None or abs(change) > tolerance))
+        rows.append({
+            "metric": metric,
+            "previous": old,
+            "current": new,
+            "change_pct": round(change, 1) if change is not None else None,
+            "regression": regression,
+        })
+
+    old_stages = previous.get("stages") or {}
+    new_stages = current.get("stages") or {}
+    for stage in [*old_stages, *(s for s in new_stages if s not in old_stages)]:
+        old, new = old_stages.get(stage) or {}, new_stages.get(stage) or {}
+        _row(f"{stage}.wall_seconds", old.get("wall_seconds"), new.get("wall_seconds"),
+             higher_is_better=False, tolerance=threshold)
+        _row(f"{stage}.ffmpeg_seconds", old.get("ffmpeg_seconds"), new.get("ffmpeg_seconds"),
+             higher_is_better=False, tolerance=threshold)
+    for metric in ("wall_seconds", "ffmpeg_seconds", "peak_rss_mb"):
+        _row(f"total.{metric}", (previous.get("total") or {}).get(metric), (current.get("total") or {}).get(metric),
+             higher_is_better=False, tolerance=threshold)
+    for metric in ("precision", "recall", "f1"):
+        _row(f"accuracy.{metric}", (previous.get("accuracy") or {}).get(metric),
+             (current.get("accuracy") or {}).get(metric), higher_is_better=True, tolerance=0.0)
+    return rows
+
+
+def format_comparison(rows: Sequence[Mapping[str, Any]]) -> str:
+    width = max([len("metric")] + [len(r["metric"]) for r in rows])
+    lines = [f"{'metric':<{width}}  {'previous':>12}  {'current':>12}  {'change':>8}"]
+    for r in rows:
+        change = "n/a" if r["change_pct"] is None else f"{r['change_pct']:+.1f}%"
+        flag = "  REGRESSION" if r["regression"] else ""
+        lines.append(f"{r['metric']:<{width}}  {r['previous']:>12}  {r['current']:>12}  {change:>8}{flag}")
+    return "\n".join(lines)
+
+
+def format_summary(result: Mapping[str, Any]) -> str:
+    lines = [f"{'stage':<20}  {'wall s':>9}  {'items':>7}  {'items/s':>9}  {'ffmpeg s':>9}  {'rss MB':>8}"]
+    for stage, s in (result.get("stages") or {}).items():
+        rate = s.get("items_per_second")
+        lines.append(
+            f"{stage:<20}  {s['wall_seconds']:>9.3f}  {s['items']:>7}  {rate if rate is not None else '-':>9}  "
+            f"{s['ffmpeg_seconds']:>9.3f}  {s['peak_rss_mb'] if s['peak_rss_mb'] is not None else '-':>8}"
+        )
+    rep = result.get("reporter")
+    if rep:
+        lines.append(
+            f"reporter overhead: {rep['locked_ns_per_call']} ns/call locked, {rep['sharded_ns_per_call']} ns/call "
+            f"sharded ({rep['threads']} threads); ~{rep.get('share_pct')}% of this run"
+        )
+    acc = result.get("accuracy") or {}
+    lines.append(
+        f"precision {acc.get('precision', 0):.3f}  recall {acc.get('recall', 0):.3f}  f1 {acc.get('f1', 0):.3f}  "
+        f"({acc.get('tp', 0)} tp / {acc.get('fp', 0)} fp / {acc.get('fn', 0)} fn pairs)"
+    )
+    return "\n".join(lines)
+
+
+# -------------------------------------------------------------------------------------------------
+# CLI
+# -------------------------------------------------------------------------------------------------
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    p = EnforcedArgumentParser(
+        prog="video-dedupe bench",
+        description="Benchmark the vdedup pipeline on a reproducible synthetic corpus.",
+    )
+    p.add_argument("-o", "--output-dir", default="vdedup-bench",
+                   help="Directory for the generated corpus and result JSON (default: ./vdedup-bench).")
+    p.add_argument("-c", "--corpus", default=None,
+                   help="Use an existing dataset directory containing truth.json instead of generating one.")
+    p.add_argument("-n", "--sources", type=int, default=8, help="Number of source clips with variants (default: 8).")
+    p.add_argument("-s", "--seed", type=int, default=1, help="Corpus seed (default: 1).")
+    p.add_argument("-d", "--duration", type=float, default=12.0, help="Source clip length in seconds (default: 12).")
+    p.add_argument("-p", "--pipeline", default="1-7", help="Stages to run, e.g. '1-4' or '1,2,4' (default: 1-7).")
+    p.add_argument("-t", "--threads", type=int, default=min(8, os.cpu_count() or 1),
+                   help="Worker threads (default: min(8, CPUs)).")
+    p.add_argument("-x", "--executor", choices=["auto", "thread", "process"], default="auto",
+                   help="Worker pool for Q4-Q7 descriptor work (default: auto).")
+    p.add_argument("-S", "--single-decode", action="store_true",
+                   help="Decode each video once for all Q4-Q7 descriptors.")
+    p.add_argument("-g", "--subset-detect", action="store_true",
+                   help="Enable subset detection (needed to find the trimmed variants).")
+    p.add_argument("-R", "--results", default=None,
+                   help="Result JSON path (default: <output-dir>/bench-<timestamp>.json).")
+    p.add_argument("-C", "--compare", default=None,
+                   help="Previous result JSON to compare against; exit status 1 on regressions.")
+    p.add_argument("-r", "--regression-threshold", type=float, default=10.0,
+                   help="Slowdown percentage that counts as a regression (default: 10).")
+    return p.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    output_dir = Path(args.output_dir).expanduser().resolve()
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    if args.corpus:
+        corpus_root = Path(args.corpus).expanduser().resolve()
+        corpus: Dict[str, Any] = {"spec": None}
+    else:
+        corpus_root = output_dir / "corpus"
+        print(f"Preparing corpus in {corpus_root} ...")
+        corpus = generate_corpus(corpus_root, sources=args.sources, seed=args.seed, duration=args.duration)
+    if not (corpus_root / _TRUTH).exists():
+        print(f"bench: error: {corpus_root / _TRUTH} not found", file=sys.stderr)
+        return 2
+
+    cfg = PipelineConfig(
+        threads=max(1, args.threads),
+        executor=args.executor,
+        single_decode=bool(args.single_decode),
+        subset_detect=bool(args.subset_detect),
+    )
+    result = run_bench(corpus_root, stages=parse_pipeline(args.pipeline), cfg=cfg, corpus=corpus)
+
+    results_path = Path(args.results).expanduser() if args.results else (
+        output_dir / f"bench-{_dt.datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    results_path.write_text(json.dumps(result, indent=2), encoding="utf-8")
+    print(format_summary(result))
+    print(f"Wrote benchmark results to: {results_path}")
+
+    if args.compare:
+        previous = json.loads(Path(args.compare).expanduser().read_text(encoding="utf-8"))
+        rows = compare_results(previous, result, threshold=args.regression_threshold)
+        print(format_comparison(rows))
+        if any(r["regression"] for r in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,16 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 import json
+import os
+import sqlite3
+import threading
 from pathlib import Path
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# mtime drift allowed between a cached record and the file on disk (coarse filesystems, copies)
+MTIME_TOLERANCE = 1.0
+
+_SQLITE_SUFFIXES = {".sqlite", ".sqlite3", ".db"}
 
 
 class HashCache:
@@ -14,11 +22,15 @@ class HashCache:
       - "partial": {"algo": "blake3"|"sha256", "head": str, "tail": str, "mid": str|None, "head_bytes": int, "tail_bytes": int, "mid_bytes": int}
       - "video_meta": {...} (normalized ffprobe info)
       - "phash": [int, ...]  (list of 64-bit ints)
-    Lookup key is (path, size, mtime).
+    Lookup key is (path, size, mtime). Tolerant lookups go through a (path, size)
+    index so each getter is O(1) regardless of cache size.
     """
     def __init__(self, path: Optional[Path]):
         self.path = path
         self._map: Dict[Tuple[str, int, float], Dict[str, Any]] = {}
+        self._index: Dict[Tuple[str, int], List[float]] = {}
+        self._lines = 0
+        self._lock = threading.Lock()
         self._fh = None
         if path:
             self._load()
@@ -34,19 +46,28 @@ class HashCache:
                     line = line.strip()
                     if not line:
                         continue
+                    self._lines += 1
                     try:
                         rec = json.loads(line)
                         k = (rec.get("path", ""), int(rec.get("size", 0)), float(rec.get("mtime", 0.0)))
                         if k[0]:
-                            self._map[k] = rec
+                            self._store(k, rec)
                     except Exception:
                         continue
         except Exception:
             pass
 
+    def _store(self, k: Tuple[str, int, float], rec: Dict[str, Any]) -> None:
+        if k not in self._map:
+            self._index.setdefault((k[0], k[1]), []).append(k[2])
+        self._map[k] = rec
+
     def open_append(self):
         if not self.path:
             return
+        # Every put_field appends a full record, so superseded lines pile up across runs.
+        if self._lines > 1000 and self._lines > 2 * len(self._map):
+            self.compact()
         p = Path(self.path).expanduser()
         self._fh = p.open("a", encoding="utf-8")
 
@@ -58,61 +79,200 @@ class HashCache:
                 pass
             self._fh = None
 
+    def compact(self) -> None:
+        """Rewrite the JSONL file with exactly one (latest) line per key."""
+        if not self.path:
+            return
+        p = Path(self.path).expanduser()
+        tmp = p.with_name(p.name + ".compact")
+        with self._lock:
+            reopen = self._fh is not None
+            self.close()
+            with tmp.open("w", encoding="utf-8") as f:
+                for rec in self._map.values():
+                    f.write(json.dumps(rec) + "\n")
+            os.replace(tmp, p)
+            self._lines = len(self._map)
+            if reopen:
+                self._fh = p.open("a", encoding="utf-8")
+
+    def __len__(self) -> int:
+        return len(self._map)
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        return iter(list(self._map.values()))
+
     def _key(self, path: Path, size: int, mtime: float):
         return (str(path), int(size), float(mtime))
 
+    def _lookup(self, path: Path, size: int, mtime: float) -> Optional[Dict[str, Any]]:
+        candidates = self._index.get((str(path), int(size)))
+        if not candidates:
+            return None
+        best: Optional[float] = None
+        for cached_mtime in candidates:
+            delta = abs(cached_mtime - mtime)
+            if delta <= MTIME_TOLERANCE and (best is None or delta < abs(best - mtime)):
+                best = cached_mtime
+        if best is None:
+            return None
+        return self._map.get((str(path), int(size), best))
+
     def get_record(self, path: Path, size: int, mtime: float) -> Optional[Dict[str, Any]]:
         return self._map.get(self._key(path, size, mtime))
 
+    def get_field(self, path: Path, size: int, mtime: float, field: str) -> Optional[Any]:
+        rec = self._lookup(path, size, mtime)
+        return rec.get(field) if rec else None
+
     def put_field(self, path: Path, size: int, mtime: float, field: str, value: Any):
         k = self._key(path, size, mtime)
-        rec = self._map.get(k) or {"path": str(path), "size": int(size), "mtime": float(mtime)}
-        rec[field] = value
-        self._map[k] = rec
-        if self._fh:
-            try:
-                self._fh.write(json.dumps(rec) + "\n")
-                self._fh.flush()
-            except Exception:
-                pass
+        with self._lock:
+            rec = self._map.get(k) or {"path": str(path), "size": int(size), "mtime": float(mtime)}
+            rec[field] = value
+            self._store(k, rec)
+            if self._fh:
+                try:
+                    self._fh.write(json.dumps(rec) + "\n")
+                    self._fh.flush()
+                    self._lines += 1
+                except Exception:
+                    pass
 
-    # Convenience getters
+    # Convenience getters (1s mtime tolerance)
     def get_sha256(self, path: Path, size: int, mtime: float) -> Optional[str]:
-        # Try to find a record that matches within tolerance
-        path_str = str(path)
-        for (cached_path, cached_size, cached_mtime), rec in self._map.items():
-            if (cached_path == path_str and
-                cached_size == size and
-                abs(cached_mtime - mtime) <= 1.0):  # Allow 1s tolerance
-                return rec.get("sha256")
-        return None
+        return self.get_field(path, size, mtime, "sha256")
 
     def get_partial(self, path: Path, size: int, mtime: float) -> Optional[Dict[str, Any]]:
-        # Try to find a record that matches within tolerance
-        path_str = str(path)
-        for (cached_path, cached_size, cached_mtime), rec in self._map.items():
-            if (cached_path == path_str and
-                cached_size == size and
-                abs(cached_mtime - mtime) <= 1.0):  # Allow 1s tolerance
-                return rec.get("partial")
-        return None
+        return self.get_field(path, size, mtime, "partial")
 
     def get_video_meta(self, path: Path, size: int, mtime: float) -> Optional[Dict[str, Any]]:
-        # Try to find a record that matches within tolerance
-        path_str = str(path)
-        for (cached_path, cached_size, cached_mtime), rec in self._map.items():
-            if (cached_path == path_str and
-                cached_size == size and
-                abs(cached_mtime - mtime) <= 1.0):  # Allow 1s tolerance
-                return rec.get("video_meta")
-        return None
+        return self.get_field(path, size, mtime, "video_meta")
 
     def get_phash(self, path: Path, size: int, mtime: float) -> Optional[Any]:
-        # Try to find a record that matches within tolerance
-        path_str = str(path)
-        for (cached_path, cached_size, cached_mtime), rec in self._map.items():
-            if (cached_path == path_str and
-                cached_size == size and
-                abs(cached_mtime - mtime) <= 1.0):  # Allow 1s tolerance
-                return rec.get("phash")
-        return None
+        return self.get_field(path, size, mtime, "phash")
+
+
+class SqliteHashCache(HashCache):
+    """
+    SQLite-backed cache with the same API as HashCache.
+
+    Records live in one table keyed by (path, size, mtime); the primary key index
+    answers tolerant lookups with a bounded range scan instead of a full pass.
+    put_field updates a single row in place, so the file never accumulates
+    superseded records. Writes are committed in batches and on close().
+    """
+
+    _COMMIT_EVERY = 256
+
+    def __init__(self, path: Optional[Path], *, import_from: Optional[Path] = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._pending = 0
+        p = Path(path).expanduser() if path else None
+        if p is not None:
+            p.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(p) if p else ":memory:", check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS records ("
+            " path TEXT NOT NULL, size INTEGER NOT NULL, mtime REAL NOT NULL, data TEXT NOT NULL,"
+            " PRIMARY KEY (path, size, mtime))"
+        )
+        self._conn.commit()
+        if import_from is not None and len(self) == 0:
+            legacy = Path(import_from).expanduser()
+            if legacy.exists():
+                self.import_jsonl(legacy)
+
+    def import_jsonl(self, jsonl_path: Path) -> int:
+        """Merge records from a legacy JSONL cache. Returns the number of keys imported."""
+        legacy = HashCache(Path(jsonl_path))
+        rows = [
+            (str(rec["path"]), int(rec.get("size", 0)), float(rec.get("mtime", 0.0)), json.dumps(rec))
+            for rec in legacy.records()
+        ]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?)", rows)
+            self._conn.commit()
+        return len(rows)
+
+    def open_append(self):
+        # Writes are always enabled; kept for API compatibility with HashCache.
+        return
+
+    def close(self):
+        with self._lock:
+            try:
+                self._conn.commit()
+                self._conn.close()
+            except Exception:
+                pass
+
+    def compact(self) -> None:
+        with self._lock:
+            self._conn.commit()
+            self._conn.execute("VACUUM")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM records").fetchone()[0])
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT data FROM records").fetchall()
+        return (json.loads(row[0]) for row in rows)
+
+    def get_record(self, path: Path, size: int, mtime: float) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM records WHERE path = ? AND size = ? AND mtime = ?",
+                self._key(path, size, mtime),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _lookup(self, path: Path, size: int, mtime: float) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM records WHERE path = ? AND size = ? AND mtime BETWEEN ? AND ?"
+                " ORDER BY ABS(mtime - ?) LIMIT 1",
+                (str(path), int(size), mtime - MTIME_TOLERANCE, mtime + MTIME_TOLERANCE, mtime),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_field(self, path: Path, size: int, mtime: float, field: str, value: Any):
+        k = self._key(path, size, mtime)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM records WHERE path = ? AND size = ? AND mtime = ?", k
+            ).fetchone()
+            rec = json.loads(row[0]) if row else {"path": k[0], "size": k[1], "mtime": k[2]}
+            rec[field] = value
+            self._conn.execute("INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?)", (*k, json.dumps(rec)))
+            self._pending += 1
+            if self._pending >= self._COMMIT_EVERY:
+                self._conn.commit()
+                self._pending = 0
+
+
+def open_cache(path: Optional[Path], backend: str = "auto") -> HashCache:
+    """
+    Open a cache with the requested backend ("jsonl", "sqlite", or "auto").
+
+    "auto" picks SQLite for .sqlite/.sqlite3/.db paths and JSONL otherwise. When a
+    new SQLite cache is created next to a legacy ``.jsonl`` cache of the same stem,
+    the legacy records are imported once.
+    """
+    if path is None:
+        return HashCache(None)
+    p = Path(path)
+    if backend == "auto":
+        backend = "sqlite" if p.suffix.lower() in _SQLITE_SUFFIXES else "jsonl"
+    if backend == "jsonl":
+        return HashCache(p)
+    if backend != "sqlite":
+        raise ValueError(f"Unknown cache backend: {backend}")
+    if p.suffix.lower() not in _SQLITE_SUFFIXES:
+        p = p.with_suffix(".sqlite")
+    return SqliteHashCache(p, import_from=p.with_suffix(".jsonl"))
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+vdedup.distance
+
+Shared Hamming-distance kernels for 64-bit perceptual signatures.
+
+Signatures are packed into uint64 arrays so popcounts run in bulk:
+- hamming_one_to_many(h, arr)            -> distance from one hash to many
+- hamming_matrix(a, b)                   -> many-vs-many distance block
+- prefix_distances(sig, matrix, lengths) -> per-row signature distance over the common prefix
+- best_alignment(short, long, strategies)-> sliding-window alignment used for subset detection
+
+Very short inputs are handled with Python ints, where NumPy call overhead would
+dominate. NumPy is optional (it ships with ImageHash); every kernel has a pure
+Python fallback with identical results.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np  # type: ignore
+    _NUMPY_AVAILABLE = True
+except Exception:  # pragma: no cover - exercised only without numpy
+    np = None  # type: ignore
+    _NUMPY_AVAILABLE = False
+
+_MASK64 = 0xFFFF_FFFF_FFFF_FFFF
+
+# Below this many element comparisons, scalar popcounts beat array setup.
+_SCALAR_CUTOFF = 32
+
+# (step, start_offset) strategies shared by the subset detectors:
+#   (1, 0) standard 1:1, (2, 0) every other frame of the longer clip, (1, 1) skip its first frame
+ALIGNMENT_STRATEGIES: Tuple[Tuple[int, int], ...] = ((1, 0), (2, 0), (1, 1))
+
+
+def _bin_popcount(x: int) -> int:
+    return bin(x).count("1")
+
+
+# int.bit_count() needs Python 3.10+
+_int_popcount = getattr(int, "bit_count", _bin_popcount)
+
+
+def hamming(a: int, b: int) -> int:
+    """Bit distance between two hashes."""
+    return _int_popcount((int(a) ^ int(b)) & _MASK64)
+
+
+def pack(sig: Sequence[int]):
+    """Pack a signature into a uint64 array (masked to 64 bits)."""
+    return np.fromiter((int(x) & _MASK64 for x in sig), dtype=np.uint64, count=len(sig))
+
+
+if _NUMPY_AVAILABLE and hasattr(np, "bitwise_count"):
+    def _popcount(arr):
+        return np.bitwise_count(arr).astype(np.int64)
+elif _NUMPY_AVAILABLE:
+    _BYTE_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.int64)
+
+    def _popcount(arr):
+        arr = np.ascontiguousarray(arr, dtype=np.uint64)
+        as_bytes = arr.view(np.uint8).reshape(arr.shape + (8,))
+        return _BYTE_POPCOUNT[as_bytes].sum(axis=-1)
+
+
+def hamming_one_to_many(h: int, hashes) -> List[int]:
+    """Distances from ``h`` to every hash in ``hashes`` (sequence or packed array)."""
+    if not _NUMPY_AVAILABLE or len(hashes) < _SCALAR_CUTOFF:
+        return [hamming(h, x) for x in hashes]
+    arr = hashes if isinstance(hashes, np.ndarray) else pack(hashes)
+    return _popcount(arr ^ np.uint64(int(h) & _MASK64)).tolist()
+
+
+def hamming_matrix(a: Sequence[int], b: Sequence[int]):
+    """len(a) x len(b) block of pairwise distances (ndarray, or nested lists without numpy)."""
+    if not _NUMPY_AVAILABLE:
+        return [[hamming(x, y) for y in b] for x in a]
+    pa = a if isinstance(a, np.ndarray) else pack(a)
+    pb = b if isinstance(b, np.ndarray) else pack(b)
+    return _popcount(pa[:, None] ^ pb[None, :])
+
+
+def signature_distance(sig_a: Sequence[int], sig_b: Sequence[int]) -> int:
+    """Total bit distance over zipped frames (the shorter length wins)."""
+    count = min(len(sig_a), len(sig_b))
+    if not _NUMPY_AVAILABLE or count < _SCALAR_CUTOFF:
+        return sum(hamming(a, b) for a, b in zip(sig_a, sig_b))
+    return int(_popcount(pack(sig_a[:count]) ^ pack(sig_b[:count])).sum())
+
+
+def avg_signature_distance(sig_a: Sequence[int], sig_b: Sequence[int]) -> float:
+    """Average per-frame bit distance over the common prefix; inf when either side is empty."""
+    count = min(len(sig_a), len(sig_b)) if sig_a and sig_b else 0
+    if count == 0:
+        return float("inf")
+    return signature_distance(sig_a, sig_b) / count
+
+
+def pack_matrix(sigs: Sequence[Sequence[int]]):
+    """
+    Pack variable-length signatures into a zero-padded (N, max_len) uint64 matrix.
+    Returns (matrix, lengths). Without numpy the signatures are returned as lists.
+    """
+    lengths = [len(s) for s in sigs]
+    if not _NUMPY_AVAILABLE:
+        return [list(s) for s in sigs], lengths
+    width = max(lengths) if lengths else 0
+    matrix = np.zeros((len(sigs), width), dtype=np.uint64)
+    for row, sig in enumerate(sigs):
+        if sig:
+            matrix[row, : len(sig)] = pack(sig)
+    return matrix, np.asarray(lengths, dtype=np.int64)
+
+
+def prefix_distances(sig: Sequence[int], matrix, lengths) -> Tuple[List[int], List[int]]:
+    """
+    One-vs-many signature distance against a packed matrix.
+
+    For each row r, sums frame distances over the first min(len(sig), lengths[r])
+    frames. Returns (totals, compared_counts) as lists aligned with the rows.
+    """
+    if not _NUMPY_AVAILABLE:
+        totals = [signature_distance(sig, row) for row in matrix]
+        counts = [min(len(sig), n) for n in lengths]
+        return totals, counts
+    n = len(sig)
+    if n == 0 or len(lengths) == 0:
+        return [0] * len(lengths), [0] * len(lengths)
+    width = min(n, matrix.shape[1])
+    block = _popcount(matrix[:, :width] ^ pack(sig[:width])[None, :])
+    counts = np.minimum(lengths, width)
+    block[np.arange(width)[None, :] >= counts[:, None]] = 0
+    return block.sum(axis=1).tolist(), counts.tolist()
+
+
+def adjacent_variation(sig: Sequence[int]) -> float:
+    """Mean bit distance between consecutive frames (0.0 for fewer than two frames)."""
+    if len(sig) < 2:
+        return 0.0
+    if not _NUMPY_AVAILABLE or len(sig) < _SCALAR_CUTOFF:
+        return sum(hamming(sig[i], sig[i + 1]) for i in range(len(sig) - 1)) / (len(sig) - 1)
+    packed = pack(sig)
+    return float(_popcount(packed[:-1] ^ packed[1:]).mean())
+
+
+def best_alignment(
+    short: Sequence[int],
+    long: Sequence[int],
+    strategies: Sequence[Tuple[int, int]] = ALIGNMENT_STRATEGIES,
+) -> Optional[Tuple[float, int, int, int]]:
+    """
+    Slide ``short`` along ``long`` for each (step, start_offset) strategy.
+
+    Window k compares short[i] with long[start_offset + k + i*step]; frames falling past
+    the end are dropped and a window needs min(3, len(short)) comparisons to count.
+    Returns (avg_distance, step, start_offset, base_offset) for the lowest average
+    (first strategy/offset wins ties), or None when no window qualifies.
+    """
+    len_a, len_b = len(short), len(long)
+    need = min(3, len_a)
+    best: Optional[Tuple[float, int, int, int]] = None
+
+    if not _NUMPY_AVAILABLE or len_a * len_b < _SCALAR_CUTOFF:
+        for step, start_offset in strategies:
+            max_positions = (len_b - start_offset - 1) // step + 1
+            if max_positions < len_a:
+                continue
+            for base_offset in range(0, max_positions - len_a + 1):
+                total = 0
+                valid = 0
+                for i in range(len_a):
+                    b_idx = start_offset + base_offset + i * step
+                    if b_idx >= len_b:
+                        break
+                    total += hamming(short[i], long[b_idx])
+                    valid += 1
+                if valid >= need:
+                    avg = total / valid
+                    if best is None or avg < best[0]:
+                        best = (avg, step, start_offset, base_offset)
+        return best
+
+    block = hamming_matrix(short, long)  # (len_a, len_b), computed once for every strategy
+    rows = np.arange(len_a)
+    for step, start_offset in strategies:
+        max_positions = (len_b - start_offset - 1) // step + 1
+        if max_positions < len_a:
+            continue
+        offsets = np.arange(0, max_positions - len_a + 1)
+        cols = start_offset + offsets[:, None] + rows[None, :] * step
+        valid_mask = cols < len_b
+        gathered = np.where(valid_mask, block[rows[None, :], np.minimum(cols, len_b - 1)], 0)
+        valid = valid_mask.sum(axis=1)
+        # Frames past the end only ever truncate the tail, matching the scalar loop's break.
+        with np.errstate(divide="ignore", invalid="ignore"):
+            avgs = np.where(valid >= need, gathered.sum(axis=1) / np.maximum(valid, 1), math.inf)
+        k = int(np.argmin(avgs))
+        avg = float(avgs[k])
+        if math.isfinite(avg) and (best is None or avg < best[0]):
+            best = (avg, step, start_offset, int(offsets[k]))
+    return best
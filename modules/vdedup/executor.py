@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+vdedup.executor
+
+Stage executor layer: decides whether stage work runs on threads or in a process pool.
+
+- "thread":  ThreadPoolExecutor only (ffmpeg/ffprobe waits and hashlib release the GIL)
+- "process": CPU-bound stage work runs in a ProcessPoolExecutor in chunked batches;
+             I/O-bound stages and callables that cannot be pickled stay on threads
+- "auto":    processes only for CPU-bound stages with enough items to amortise worker
+             start-up, threads otherwise
+
+Each StageExecutor measures worker utilisation (busy time / (wall time x workers)) and
+reports it to the ProgressReporter stage metrics when it closes.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import logging
+import multiprocessing
+import pickle
+import threading
+import time
+from collections import deque
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Deque, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from vdedup.progress import ProgressReporter
+
+LOGGER = logging.getLogger(__name__)
+
+EXECUTOR_KINDS = ("thread", "process", "auto")
+
+# "auto" keeps small batches on threads: spawning workers costs more than it saves
+_PROCESS_MIN_ITEMS = 64
+# Chunk sizing for process batches: ~4 chunks per worker, capped so progress stays live
+_CHUNKS_PER_WORKER = 4
+_MAX_CHUNK = 32
+
+
+# Failures of the pool itself (not of the task), after which work moves to threads
+_POOL_ERRORS = (BrokenProcessPool, pickle.PicklingError)
+
+
+def _picklable(obj: Any) -> bool:
+    try:
+        pickle.dumps(obj)
+        return True
+    except Exception:
+        return False
+
+
+def _run_chunk(fn: Callable[[Any], Any], items: Sequence[Any]) -> List[Tuple[float, Any]]:
+    """Process-pool task: apply ``fn`` to a batch, returning (busy seconds, result) pairs."""
+    out: List[Tuple[float, Any]] = []
+    for item in items:
+        started = time.perf_counter()
+        result = fn(item)
+        out.append((time.perf_counter() - started, result))
+    return out
+
+
+def _process_context():
+    # forkserver/spawn avoid forking a parent that already runs reporter threads
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+class StageExecutor:
+    """
+    Runs one stage's work on threads or processes and tracks worker utilisation.
+
+    map(fn, items)  -> results in input order. CPU-bound stages in process mode send
+                       picklable ``fn`` to the process pool in chunks; everything else
+                       uses the thread pool.
+    call(fn, ...)   -> run a single CPU-bound call from a worker thread, in the process
+                       pool when processes are in use (threads keep waiting on ffmpeg).
+
+    CPU-bound stages also honour pause/quit per item; items skipped after a quit come
+    back as None (threads) or are not yielded at all (processes).
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        workers: int,
+        *,
+        reporter: Optional[ProgressReporter] = None,
+        stage: Optional[str] = None,
+        cpu_bound: bool = False,
+        total: Optional[int] = None,
+    ):
+        self.kind = kind if kind in EXECUTOR_KINDS else "auto"
+        self.workers = max(1, int(workers))
+        self.reporter = reporter
+        self.stage = stage
+        self.cpu_bound = cpu_bound
+        self.total = total
+        self._busy = 0.0
+        self._busy_lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._threads: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._processes: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        self._process_failed = False
+        self._pool_lock = threading.Lock()
+
+    # ------------------------------------------------------------------ lifecycle
+    def __enter__(self) -> "StageExecutor":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._threads is not None:
+            self._threads.shutdown(wait=True)
+        if self._processes is not None:
+            self._processes.shutdown(wait=True, cancel_futures=True)
+        if self.reporter is not None and self.stage:
+            self.reporter.update_stage_metrics(
+                self.stage,
+                executor=f"{self.mode} x{self.workers}",
+                utilisation=f"{self.utilisation * 100:.0f}%",
+            )
+
+    # ------------------------------------------------------------------ policy
+    @property
+    def mode(self) -> str:
+        return "process" if self._processes is not None else "thread"
+
+    @property
+    def utilisation(self) -> float:
+        wall = time.perf_counter() - self._started
+        if wall <= 0:
+            return 0.0
+        return min(1.0, self._busy / (wall * self.workers))
+
+    def uses_processes(self, fn: Optional[Callable] = None, n_items: Optional[int] = None) -> bool:
+        if not self.cpu_bound or self.kind == "thread" or self.workers < 2 or self._process_failed:
+            return False
+        if self.kind == "auto":
+            count = n_items if n_items is not None else self.total
+            if count is None or count < _PROCESS_MIN_ITEMS:
+                return False
+        return fn is None or _picklable(fn)
+
+    def _add_busy(self, seconds: float) -> None:
+        with self._busy_lock:
+            self._busy += seconds
+
+    def _thread_pool(self) -> concurrent.futures.ThreadPoolExecutor:
+        with self._pool_lock:
+            if self._threads is None:
+                self._threads = concurrent.futures.ThreadPoolExecutor(max_workers=self.workers)
+            return self._threads
+
+    def _process_pool(self) -> concurrent.futures.ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._processes is None:
+                self._processes = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=_process_context()
+                )
+            return self._processes
+
+    def _fall_back(self, exc: BaseException) -> None:
+        self._process_failed = True
+        LOGGER.warning("Process pool unavailable for %s (%s); continuing on threads", self.stage or "stage", exc)
+
+    # ------------------------------------------------------------------ execution
+    def map(self, fn: Callable[[Any], Any], items: Iterable[Any]) -> Iterator[Any]:
+        items = list(items)
+        if self.uses_processes(fn, len(items)):
+            return self._map_processes(fn, items)
+        return self._map_threads(fn, items)
+
+    def call(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        if self.uses_processes(fn):
+            try:
+                return self._process_pool().submit(fn, *args, **kwargs).result()
+            except _POOL_ERRORS as exc:
+                self._fall_back(exc)
+        return fn(*args, **kwargs)
+
+    def _map_threads(self, fn: Callable[[Any], Any], items: List[Any]) -> Iterator[Any]:
+        guard = self.cpu_bound and self.reporter is not None
+
+        def timed(item: Any) -> Any:
+            if guard:
+                self.reporter.wait_if_paused()  # type: ignore[union-attr]
+                if self.reporter.should_quit():  # type: ignore[union-attr]
+                    return None
+            started = time.perf_counter()
+            try:
+                return fn(item)
+            finally:
+                self._add_busy(time.perf_counter() - started)
+
+        return self._thread_pool().map(timed, items)
+
+    def _map_processes(self, fn: Callable[[Any], Any], items: List[Any]) -> Iterator[Any]:
+        size = max(1, min(_MAX_CHUNK, len(items) // (self.workers * _CHUNKS_PER_WORKER)))
+        chunks: Deque[List[Any]] = deque(items[i:i + size] for i in range(0, len(items), size))
+        pending: Deque[Tuple[concurrent.futures.Future, List[Any]]] = deque()
+
+        def submit_next() -> bool:
+            if self.reporter is not None:
+                self.reporter.wait_if_paused()
+                if self.reporter.should_quit():
+                    return False
+            if not chunks:
+                return False
+            chunk = chunks.popleft()
+            pending.append((self._process_pool().submit(_run_chunk, fn, chunk), chunk))
+            return True
+
+        try:
+            # Bounded look-ahead keeps pause/quit responsive instead of queueing every task
+            for _ in range(self.workers * 2):
+                if not submit_next():
+                    break
+        except Exception as exc:
+            self._fall_back(exc)
+
+        while pending:
+            future, chunk = pending.popleft()
+            try:
+                results = future.result()
+            except _POOL_ERRORS as exc:
+                self._fall_back(exc)
+                for _future, rest in pending:
+                    _future.cancel()
+                    chunk = chunk + rest
+                pending.clear()
+                chunks.appendleft(chunk)
+                break
+            for elapsed, result in results:
+                self._add_busy(elapsed)
+                yield result
+            submit_next()
+
+        if self._process_failed and chunks:
+            remaining = [item for chunk in chunks for item in chunk]
+            chunks.clear()
+            yield from self._map_threads(fn, remaining)
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+vdedup.extract
+
+Single-decode descriptor extraction.
+
+One ffmpeg process decodes each video once and streams:
+  - scaled grayscale ``rawvideo`` frames at a fixed rate on stdout, and
+  - mono s16le PCM audio on a second pipe (POSIX) when audio is requested.
+
+Every requested descriptor is derived from those streams without temp files:
+  - "phash":    frames nearest to evenly spaced timestamps (Q4 signature)
+  - "scene":    frames where the mean frame difference crosses a scene threshold (Q5)
+  - "timeline": every frame up to ``timeline_max_frames`` (Q7)
+  - "audio":    landmark fingerprint from the PCM stream, same scheme as vdedup.audio (Q6)
+
+On platforms without inheritable extra pipes (Windows), audio is decoded by a
+second ffmpeg process so the video side still decodes once.
+"""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from vdedup.audio import fingerprint_pcm_stream
+from vdedup.phash import FRAME_SIZE, phash_gray
+
+DESCRIPTOR_KINDS = ("phash", "scene", "timeline", "audio")
+
+_FRAME_BYTES = FRAME_SIZE * FRAME_SIZE
+
+
+@dataclass
+class ExtractionSettings:
+    """Parameters mirrored from the per-stage extractors so descriptors stay comparable."""
+    stream_fps: float = 2.0
+    phash_frames: int = 5
+    max_scenes: int = 24
+    scene_threshold: float = 0.35
+    timeline_max_frames: int = 120
+    audio_sample_rate: int = 8000
+    audio_window_seconds: float = 3.0
+    audio_max_windows: int = 256
+    gpu: bool = False
+
+
+def gray_frame_phash(frame: bytes) -> int:
+    """64-bit pHash of one FRAME_SIZE x FRAME_SIZE grayscale frame."""
+    return phash_gray(frame)
+
+
+def _frame_difference(a: bytes, b: bytes) -> float:
+    """Mean absolute pixel difference in [0, 1]."""
+    return sum(abs(x - y) for x, y in zip(a, b)) / (255.0 * len(a))
+
+
+def _build_command(path: Path, settings: ExtractionSettings, *, video: bool, audio_target: Optional[str]) -> List[str]:
+    cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error"]
+    if settings.gpu and video:
+        cmd.extend(["-hwaccel", "cuda"])
+    cmd += ["-i", str(path)]
+    if video:
+        cmd += [
+            "-map", "0:v:0",
+            "-vf", f"fps={settings.stream_fps:.3f},scale={FRAME_SIZE}:{FRAME_SIZE},format=gray",
+            "-f", "rawvideo", "-pix_fmt", "gray", "pipe:1",
+        ]
+    if audio_target:
+        cmd += [
+            "-map", "0:a:0?",
+            "-ac", "1", "-ar", str(max(2000, min(settings.audio_sample_rate, 16000))),
+            "-f", "s16le", "-acodec", "pcm_s16le", audio_target,
+        ]
+    return cmd
+
+
+class _FrameConsumer:
+    """Derives phash/scene/timeline descriptors from a stream of frames, in fixed memory."""
+
+    def __init__(self, kinds: Iterable[str], settings: ExtractionSettings, duration: Optional[float]):
+        kinds = set(kinds)
+        self.settings = settings
+        self.want_phash = "phash" in kinds and bool(duration and duration > 0)
+        self.want_scene = "scene" in kinds
+        self.want_timeline = "timeline" in kinds
+        self.targets: List[float] = []
+        if self.want_phash:
+            n = max(1, settings.phash_frames)
+            self.targets = [
+                max(0.0, min(duration * (i + 1) / (n + 1), max(0.0, duration - 0.1)))  # type: ignore[operator]
+                for i in range(n)
+            ]
+        self.phash: List[int] = []
+        self.scene: List[int] = []
+        self.timeline: List[int] = []
+        self._prev: Optional[bytes] = None
+        self._prev_time = 0.0
+        self._target_idx = 0
+        self._last_hash: Optional[Tuple[int, int]] = None  # (frame index, hash)
+        self.frames = 0
+
+    def _hash(self, index: int, frame: bytes) -> int:
+        # The same frame often serves several descriptors; hash it once
+        if self._last_hash is None or self._last_hash[0] != index:
+            self._last_hash = (index, gray_frame_phash(frame))
+        return self._last_hash[1]
+
+    @property
+    def satisfied(self) -> bool:
+        """True once no descriptor needs further frames (lets the caller stop decoding)."""
+        return (
+            (not self.want_phash or self._target_idx >= len(self.targets))
+            and (not self.want_scene or len(self.scene) >= max(4, self.settings.max_scenes))
+            and (not self.want_timeline or len(self.timeline) >= max(10, self.settings.timeline_max_frames))
+        )
+
+    def feed(self, frame: bytes) -> None:
+        index = self.frames
+        t = index / self.settings.stream_fps
+        self.frames += 1
+
+        # phash: take the frame closest to each target timestamp
+        while self._target_idx < len(self.targets) and self._prev is not None and t >= self.targets[self._target_idx]:
+            target = self.targets[self._target_idx]
+            if abs(self._prev_time - target) <= abs(t - target):
+                self.phash.append(self._hash(index - 1, self._prev))
+            else:
+                self.phash.append(self._hash(index, frame))
+            self._target_idx += 1
+
+        if self.want_timeline and len(self.timeline) < max(10, self.settings.timeline_max_frames):
+            self.timeline.append(self._hash(index, frame))
+
+        if self.want_scene and self._prev is not None and len(self.scene) < max(4, self.settings.max_scenes):
+            threshold = max(0.05, min(self.settings.scene_threshold, 1.0))
+            if _frame_difference(self._prev, frame) > threshold:
+                self.scene.append(self._hash(index, frame))
+
+        self._prev = frame
+        self._prev_time = t
+
+    def finish(self) -> None:
+        # Targets past the last decoded frame fall back to that frame
+        while self._target_idx < len(self.targets) and self._prev is not None:
+            self.phash.append(self._hash(self.frames - 1, self._prev))
+            self._target_idx += 1
+
+    def results(self) -> Dict[str, Optional[Tuple[int, ...]]]:
+        out: Dict[str, Optional[Tuple[int, ...]]] = {}
+        if self.want_phash:
+            n = max(1, self.settings.phash_frames)
+            out["phash"] = tuple(self.phash) if len(self.phash) >= max(2, n // 2) else None
+        if self.want_scene:
+            out["scene"] = tuple(self.scene) if len(self.scene) >= 2 else None
+        if self.want_timeline:
+            min_frames = max(6, max(10, self.settings.timeline_max_frames) // 8)
+            out["timeline"] = tuple(self.timeline) if len(self.timeline) >= min_frames else None
+        return out
+
+
+def consume_frames(
+    read: Callable[[int], bytes],
+    kinds: Iterable[str],
+    settings: ExtractionSettings,
+    duration: Optional[float],
+    *,
+    stop_when_satisfied: bool = False,
+) -> Dict[str, Optional[Tuple[int, ...]]]:
+    """
+    Read raw FRAME_SIZE x FRAME_SIZE gray frames via ``read`` and derive the requested
+    descriptors. With ``stop_when_satisfied`` reading ends as soon as no descriptor
+    needs more frames.
+    """
+    consumer = _FrameConsumer(kinds, settings, duration)
+    while not (stop_when_satisfied and consumer.satisfied):
+        frame = read(_FRAME_BYTES)
+        if len(frame) < _FRAME_BYTES:
+            break
+        consumer.feed(frame)
+    consumer.finish()
+    return consumer.results()
+
+
+def _probe_duration(path: Path) -> Optional[float]:
+    from vdedup.probe import run_ffprobe_json
+
+    fmt = run_ffprobe_json(path)
+    try:
+        duration = float(fmt.get("format", {}).get("duration", 0.0)) if fmt else 0.0
+    except Exception:
+        duration = 0.0
+    return duration if duration > 0 else None
+
+
+def _read_audio(stream, settings: ExtractionSettings, out: Dict[str, Optional[Tuple[int, ...]]]) -> None:
+    try:
+        out["audio"] = fingerprint_pcm_stream(
+            stream,
+            sample_rate=settings.audio_sample_rate,
+            window_seconds=settings.audio_window_seconds,
+            max_windows=settings.audio_max_windows,
+        )
+        # Drain so ffmpeg never blocks on a full audio pipe while video is still flowing
+        while stream.read(1 << 16):
+            pass
+    except Exception:
+        out["audio"] = None
+
+
+def extract_descriptors(
+    path: Path,
+    kinds: Sequence[str],
+    *,
+    duration: Optional[float] = None,
+    settings: Optional[ExtractionSettings] = None,
+) -> Dict[str, Optional[Tuple[int, ...]]]:
+    """
+    Decode ``path`` once and return {kind: signature or None} for each requested kind.
+    Missing keys never occur: kinds that could not be derived map to None.
+    """
+    settings = settings or ExtractionSettings()
+    kinds = [k for k in kinds if k in DESCRIPTOR_KINDS]
+    video_kinds = [k for k in kinds if k != "audio"]
+    want_audio = "audio" in kinds
+    results: Dict[str, Optional[Tuple[int, ...]]] = {k: None for k in kinds}
+    if not kinds:
+        return results
+    if "phash" in video_kinds and not duration:
+        duration = _probe_duration(path)
+
+    shared_pipe = want_audio and bool(video_kinds) and os.name == "posix"
+    audio_r = audio_w = None
+    procs: List[subprocess.Popen] = []
+    readers: List[threading.Thread] = []
+    audio_out: Dict[str, Optional[Tuple[int, ...]]] = {}
+    try:
+        if shared_pipe:
+            audio_r, audio_w = os.pipe()
+            cmd = _build_command(path, settings, video=True, audio_target=f"pipe:{audio_w}")
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, pass_fds=(audio_w,))
+            os.close(audio_w)
+            audio_w = None
+            procs.append(proc)
+            audio_stream = os.fdopen(audio_r, "rb")
+            audio_r = None
+            readers.append(threading.Thread(target=_read_audio, args=(audio_stream, settings, audio_out), daemon=True))
+        else:
+            if video_kinds:
+                procs.append(subprocess.Popen(
+                    _build_command(path, settings, video=True, audio_target=None),
+                    stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                ))
+            if want_audio:
+                audio_proc = subprocess.Popen(
+                    _build_command(path, settings, video=False, audio_target="pipe:1"),
+                    stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                )
+                procs.append(audio_proc)
+                readers.append(threading.Thread(target=_read_audio, args=(audio_proc.stdout, settings, audio_out), daemon=True))
+
+        for reader in readers:
+            reader.start()
+
+        if video_kinds and procs and procs[0].stdout:
+            # Audio shares the decoder when piped alongside, so only stop early without it
+            results.update(consume_frames(
+                procs[0].stdout.read, video_kinds, settings, duration, stop_when_satisfied=not shared_pipe,
+            ))
+            if not shared_pipe and procs[0].poll() is None:
+                procs[0].kill()
+
+        for reader in readers:
+            reader.join(timeout=60)
+        if want_audio:
+            results["audio"] = audio_out.get("audio")
+        for proc in procs:
+            proc.wait(timeout=30)
+    except Exception:
+        for proc in procs:
+            try:
+                proc.kill()
+            except Exception:
+                pass
+    finally:
+        for fd in (audio_r, audio_w):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        for proc in procs:
+            if proc.stdout:
+                proc.stdout.close()
+    return results
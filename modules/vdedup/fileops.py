@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+vdedup.fileops
+
+Batched, parallel and resumable execution of the filesystem operations of an apply.
+
+An apply is planned as a list of FileOp (move, delete, hardlink) and handed to
+ApplyEngine, which runs it phase by phase:
+  - operations that stay on one device (deletes, hardlinks, same-device renames) are
+    grouped by device and directory and run in batches on the calling thread; they
+    are metadata updates, so threads would only contend on the same directory locks
+  - cross-device moves are copies, run on a bounded worker pool; each copy tries a
+    reflink clone, then os.copy_file_range, then a plain buffered copy, and lands
+    under a temporary name that is renamed into place once complete
+  - an operation whose prerequisite (``after``) failed is skipped, so e.g. losers are
+    never removed when their keep could not be moved into the vault
+
+Completed operations are recorded in a SQLite journal (ApplyJournal). Re-running an
+interrupted apply skips what the journal already lists. Work finished after the last
+journal commit is recognised by the operations themselves: a delete of a missing file
+and an existing link succeed, and a move whose source is gone counts as done only when
+its destination still has the size and mtime recorded for the source at planning time
+(``FileOp.src_id``). Any other move with a missing source fails, so its dependents are
+skipped rather than pointed at an unrelated file.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import sqlite3
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+try:
+    import fcntl  # type: ignore
+    # FICLONE from linux/fs.h: share the source's extents (btrfs, XFS, bcachefs, ...)
+    _FICLONE: Optional[int] = 0x40049409 if sys.platform.startswith("linux") else None
+except Exception:  # pragma: no cover - exercised only on platforms without fcntl
+    fcntl = None  # type: ignore
+    _FICLONE = None
+
+DEFAULT_APPLY_WORKERS = 4
+DEFAULT_BATCH_SIZE = 256
+
+_COPY_CHUNK = 1 << 20
+_COPY_RANGE_CHUNK = 1 << 30
+
+
+class FileOp(NamedTuple):
+    """One filesystem operation of an apply."""
+    kind: str                   # "move" (src -> dst), "delete" (src) or "link" (hardlink dst -> src)
+    src: Path
+    dst: Optional[Path] = None
+    phase: int = 0              # phases run in order; operations within a phase are independent
+    after: Optional[str] = None  # key of an operation that must have succeeded first
+    src_id: Optional[Tuple[int, int]] = None  # (st_size, st_mtime_ns) of src when planned
+
+    @property
+    def key(self) -> str:
+        return f"{self.kind}\0{self.src}\0{self.dst or ''}"
+
+
+def file_identity(path: Path) -> Optional[Tuple[int, int]]:
+    """(st_size, st_mtime_ns) of ``path``, kept by a rename and by a copy with copystat."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def parse_op_key(key: str) -> Tuple[str, Path, Optional[Path]]:
+    """Inverse of FileOp.key: (kind, src, dst)."""
+    kind, src, dst = key.split("\0", 2)
+    return kind, Path(src), Path(dst) if dst else None
+
+
+@dataclass
+class ApplyResult:
+    succeeded: Set[str] = field(default_factory=set)      # keys, including resumed ones
+    completed: Dict[str, int] = field(default_factory=dict)  # per kind, including resumed ones
+    resumed: int = 0
+    skipped: int = 0                                      # prerequisite failed
+    failures: List[Tuple[FileOp, str]] = field(default_factory=list)
+    copies: Dict[str, int] = field(default_factory=dict)  # cross-device copy method -> count
+    interrupted: bool = False
+
+    def _ok(self, op: FileOp) -> None:
+        self.succeeded.add(op.key)
+        self.completed[op.kind] = self.completed.get(op.kind, 0) + 1
+
+
+class ApplyJournal:
+    """SQLite list of completed operation keys for one apply."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS done (key TEXT PRIMARY KEY)")
+        self._conn.commit()
+
+    def done_keys(self) -> Set[str]:
+        with self._lock:
+            return {key for (key,) in self._conn.execute("SELECT key FROM done")}
+
+    def mark(self, keys: Iterable[str]) -> None:
+        rows = [(k,) for k in keys]
+        if not rows:
+            return
+        with self._lock:
+            with self._conn:
+                self._conn.executemany("INSERT OR IGNORE INTO done VALUES (?)", rows)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def discard(self) -> None:
+        """Close and delete the journal (the apply finished cleanly)."""
+        self.close()
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                Path(str(self.path) + suffix).unlink()
+            except FileNotFoundError:
+                pass
+
+
+def copy_file(src: Path, dst: Path) -> str:
+    """
+    Copy ``src`` to ``dst`` with the cheapest mechanism the filesystems allow.
+
+    Returns the method used: "reflink", "copy_file_range" or "copy".
+    """
+    with open(src, "rb") as fin, open(dst, "wb") as fout:
+        if _FICLONE is not None:
+            try:
+                fcntl.ioctl(fout.fileno(), _FICLONE, fin.fileno())
+                return "reflink"
+            except OSError:
+                pass
+        if hasattr(os, "copy_file_range"):
+            try:
+                while os.copy_file_range(fin.fileno(), fout.fileno(), _COPY_RANGE_CHUNK):
+                    pass
+                return "copy_file_range"
+            except OSError:
+                # Not supported for this pair (older kernels: across filesystems); start over
+                fin.seek(0)
+                fout.seek(0)
+                fout.truncate()
+        shutil.copyfileobj(fin, fout, _COPY_CHUNK)
+    return "copy"
+
+
+def move_across_devices(src: Path, dst: Path) -> str:
+    """Copy ``src`` next to ``dst``, rename it into place, then remove ``src``. Returns the copy method."""
+    part = dst.with_name(dst.name + ".part")
+    try:
+        method = copy_file(src, part)
+        shutil.copystat(src, part)
+        os.replace(part, dst)
+    except BaseException:
+        try:
+            part.unlink()
+        except OSError:
+            pass
+        raise
+    src.unlink()
+    return method
+
+
+class ApplyEngine:
+    """
+    Runs planned FileOps: same-device work in per-device batches, cross-device copies
+    on a pool of ``workers`` threads, progress journaled for resumption.
+
+    Example:
+        >>> engine = ApplyEngine(workers=4, journal=ApplyJournal(path))
+        >>> result = engine.run(ops)
+    """
+
+    def __init__(
+        self,
+        *,
+        workers: int = DEFAULT_APPLY_WORKERS,
+        journal: Optional[ApplyJournal] = None,
+        reporter: Any = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ):
+        self.workers = max(1, int(workers))
+        self.journal = journal
+        self.reporter = reporter
+        self.batch_size = max(1, int(batch_size))
+        self._devices: Dict[Path, Optional[int]] = {}
+        self._made_dirs: Set[Path] = set()
+        self._dir_lock = threading.Lock()
+
+    # ---- device / directory helpers ----
+    def _device_of(self, directory: Path) -> Optional[int]:
+        """st_dev of ``directory`` or of its nearest existing ancestor (memoised per directory)."""
+        if directory not in self._devices:
+            probe = directory
+            dev: Optional[int] = None
+            while True:
+                try:
+                    dev = os.stat(probe).st_dev
+                    break
+                except OSError:
+                    if probe.parent == probe:
+                        break
+                    probe = probe.parent
+            self._devices[directory] = dev
+        return self._devices[directory]
+
+    def same_device(self, src: Path, dst: Path) -> bool:
+        a = self._device_of(src.parent)
+        return a is not None and a == self._device_of(dst.parent)
+
+    def _ensure_dir(self, directory: Path) -> None:
+        with self._dir_lock:
+            if directory in self._made_dirs:
+                return
+            directory.mkdir(parents=True, exist_ok=True)
+            self._made_dirs.add(directory)
+
+    # ---- single operations (idempotent) ----
+    @staticmethod
+    def _moved_already(op: FileOp) -> bool:
+        """A move finished by an earlier run: source gone, destination is the planned file."""
+        assert op.dst is not None
+        if op.src_id is None or op.src.exists():
+            return False
+        return file_identity(op.dst) == op.src_id
+
+    def _local(self, op: FileOp) -> None:
+        if op.kind == "delete":
+            op.src.unlink(missing_ok=True)
+        elif op.kind == "link":
+            assert op.dst is not None
+            if op.dst.exists() and op.src.exists() and os.path.samefile(op.src, op.dst):
+                return
+            os.link(op.src, op.dst)
+        elif op.kind == "move":
+            assert op.dst is not None
+            if self._moved_already(op):
+                return
+            self._ensure_dir(op.dst.parent)
+            os.replace(op.src, op.dst)
+        else:
+            raise ValueError(f"unknown operation: {op.kind}")
+
+    def _remote(self, op: FileOp) -> Optional[str]:
+        assert op.dst is not None
+        if self._moved_already(op):
+            return None
+        self._ensure_dir(op.dst.parent)
+        return move_across_devices(op.src, op.dst)
+
+    # ---- bookkeeping ----
+    def _tick(self, resumed: bool = False) -> None:
+        if self.reporter:
+            try:
+                self.reporter.inc_hashed(1, cache_hit=resumed)
+            except Exception:
+                pass
+
+    def _should_quit(self) -> bool:
+        try:
+            return bool(self.reporter and self.reporter.should_quit())
+        except Exception:
+            return False
+
+    def _journal(self, keys: List[str]) -> None:
+        if self.journal is not None:
+            self.journal.mark(keys)
+
+    # ---- execution ----
+    def run(self, ops: Sequence[FileOp]) -> ApplyResult:
+        result = ApplyResult()
+        done = self.journal.done_keys() if self.journal is not None else set()
+        failed: Set[str] = set()
+        if self.reporter:
+            try:
+                self.reporter.start_stage("apply report", total=len(ops))
+            except Exception:
+                pass
+
+        for phase in sorted({op.phase for op in ops}):
+            local: Dict[Tuple[Optional[int], Path], List[FileOp]] = {}
+            remote: List[FileOp] = []
+            for op in (o for o in ops if o.phase == phase):
+                if op.key in done:
+                    result._ok(op)
+                    result.resumed += 1
+                    self._tick(resumed=True)
+                elif op.after is not None and op.after not in result.succeeded:
+                    failed.add(op.key)
+                    result.skipped += 1
+                    self._tick()
+                elif op.kind == "move" and op.dst is not None and not self.same_device(op.src, op.dst):
+                    remote.append(op)
+                else:
+                    local.setdefault((self._device_of(op.src.parent), op.src.parent), []).append(op)
+
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                futures: Dict[Future, FileOp] = {pool.submit(self._remote, op): op for op in remote}
+                self._run_local(local, result, failed, lambda: self._collect(futures, result, failed, block=False))
+                self._collect(futures, result, failed, block=True)
+            if result.interrupted:
+                break
+        return result
+
+    def _run_local(
+        self,
+        local: Dict[Tuple[Optional[int], Path], List[FileOp]],
+        result: ApplyResult,
+        failed: Set[str],
+        poll: Callable[[], None],
+    ) -> None:
+        """Same-device operations, device by device and directory by directory, in journaled batches."""
+        batch: List[str] = []
+        for key in sorted(local, key=lambda k: (k[0] or 0, str(k[1]))):
+            for op in local[key]:
+                if result.interrupted:
+                    break
+                try:
+                    self._local(op)
+                    result._ok(op)
+                    batch.append(op.key)
+                except Exception as e:
+                    failed.add(op.key)
+                    result.failures.append((op, str(e)))
+                self._tick()
+                if len(batch) >= self.batch_size:
+                    self._journal(batch)
+                    batch = []
+                    poll()
+                    result.interrupted = result.interrupted or self._should_quit()
+        self._journal(batch)
+
+    def _collect(self, futures: Dict[Future, FileOp], result: ApplyResult, failed: Set[str], *, block: bool) -> None:
+        """Record finished cross-device moves; with ``block`` wait for all of them (or a quit request)."""
+        while futures:
+            finished, _pending = wait(list(futures), timeout=0.2 if block else 0, return_when=FIRST_COMPLETED)
+            keys: List[str] = []
+            for fut in finished:
+                op = futures.pop(fut)
+                if fut.cancelled():
+                    continue
+                self._tick()
+                try:
+                    method = fut.result()
+                except Exception as e:
+                    failed.add(op.key)
+                    result.failures.append((op, str(e)))
+                    continue
+                result._ok(op)
+                keys.append(op.key)
+                if method:
+                    result.copies[method] = result.copies.get(method, 0) + 1
+            self._journal(keys)
+            if not block:
+                return
+            if result.interrupted or self._should_quit():
+                # Copies already running finish; queued ones are left for the resumed run
+                result.interrupted = True
+                for fut in futures:
+                    fut.cancel()
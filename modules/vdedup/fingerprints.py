@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+vdedup.fingerprints
+
+Persistent cross-run store for Q4-Q7 descriptors (phash, scene, audio, timeline).
+
+Each descriptor kind lives in its own SQLite table, keyed by (path, size, mtime,
+variant), with the signature stored as a packed unsigned 64-bit array. ``variant``
+records the extraction parameters (e.g. max scenes, fps) so changing them never
+returns a stale descriptor. A failed extraction is recorded in a separate table with
+its time, so an unchanged file is not decoded again just to fail again until the
+marker expires (``failure_ttl``); a transient failure is retried after that.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import sys
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Mapping, Optional, Sequence, Tuple
+
+from vdedup.cache import MTIME_TOLERANCE
+
+KINDS = ("phash", "scene", "audio", "timeline")
+
+# Seconds a recorded extraction failure suppresses retries of an unchanged file
+DEFAULT_FAILURE_TTL = 7 * 24 * 3600.0
+
+_MASK64 = 0xFFFF_FFFF_FFFF_FFFF
+
+
+def _encode(sig: Sequence[int]) -> bytes:
+    arr = array("Q", (int(x) & _MASK64 for x in sig))
+    if sys.byteorder != "little":
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def _decode(blob: bytes) -> Tuple[int, ...]:
+    arr = array("Q")
+    arr.frombytes(blob)
+    if sys.byteorder != "little":
+        arr.byteswap()
+    return tuple(arr)
+
+
+class FingerprintStore:
+    """
+    SQLite-backed descriptor store, one table per kind.
+
+    get() returns the stored tuple, () for an unexpired extraction failure, or None when
+    nothing usable is stored for this (path, size, mtime, variant).
+    """
+
+    _COMMIT_EVERY = 128
+
+    def __init__(self, path: Optional[Path], failure_ttl: float = DEFAULT_FAILURE_TTL):
+        self.path = path
+        self.failure_ttl = float(failure_ttl)
+        self._lock = threading.Lock()
+        self._pending = 0
+        p = Path(path).expanduser() if path else None
+        if p is not None:
+            p.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(p) if p else ":memory:", check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for kind in KINDS:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {kind} ("
+                " path TEXT NOT NULL, size INTEGER NOT NULL, mtime REAL NOT NULL,"
+                " variant TEXT NOT NULL, data BLOB NOT NULL,"
+                " PRIMARY KEY (path, size, variant, mtime))"
+            )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS failures ("
+            " kind TEXT NOT NULL, path TEXT NOT NULL, size INTEGER NOT NULL, mtime REAL NOT NULL,"
+            " variant TEXT NOT NULL, failed_at REAL NOT NULL,"
+            " PRIMARY KEY (kind, path, size, variant, mtime))"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _table(kind: str) -> str:
+        if kind not in KINDS:
+            raise ValueError(f"Unknown descriptor kind: {kind}")
+        return kind
+
+    def get(self, kind: str, path: Path, size: int, mtime: float, variant: str = "") -> Optional[Tuple[int, ...]]:
+        table = self._table(kind)
+        window = (mtime - MTIME_TOLERANCE, mtime + MTIME_TOLERANCE, mtime)
+        with self._lock:
+            # Empty blobs are failures recorded by older versions: retried like expired markers
+            row = self._conn.execute(
+                f"SELECT data FROM {table} WHERE path = ? AND size = ? AND variant = ?"
+                " AND length(data) > 0 AND mtime BETWEEN ? AND ? ORDER BY ABS(mtime - ?) LIMIT 1",
+                (str(path), int(size), variant, *window),
+            ).fetchone()
+            if row:
+                return _decode(row[0])
+            failed = self._conn.execute(
+                "SELECT 1 FROM failures WHERE kind = ? AND path = ? AND size = ? AND variant = ?"
+                " AND failed_at >= ? AND mtime BETWEEN ? AND ? LIMIT 1",
+                (kind, str(path), int(size), variant, time.time() - self.failure_ttl, *window[:2]),
+            ).fetchone()
+        return () if failed else None
+
+    def put(
+        self,
+        kind: str,
+        path: Path,
+        size: int,
+        mtime: float,
+        sig: Optional[Sequence[int]],
+        variant: str = "",
+    ) -> None:
+        """Store ``sig``; an empty or missing ``sig`` records an expiring failure marker."""
+        table = self._table(kind)
+        key = (str(path), int(size), float(mtime), variant)
+        with self._lock:
+            if sig:
+                self._conn.execute(f"INSERT OR REPLACE INTO {table} VALUES (?, ?, ?, ?, ?)", (*key, _encode(sig)))
+                self._conn.execute(
+                    "DELETE FROM failures WHERE kind = ? AND path = ? AND size = ? AND mtime = ? AND variant = ?",
+                    (kind, *key),
+                )
+            else:
+                self._conn.execute("INSERT OR REPLACE INTO failures VALUES (?, ?, ?, ?, ?, ?)", (kind, *key, time.time()))
+            self._pending += 1
+            if self._pending >= self._COMMIT_EVERY:
+                self._conn.commit()
+                self._pending = 0
+
+    def count(self, kind: str) -> int:
+        """Stored descriptors of ``kind`` (failure markers excluded)."""
+        table = self._table(kind)
+        with self._lock:
+            return int(self._conn.execute(f"SELECT COUNT(*) FROM {table} WHERE length(data) > 0").fetchone()[0])
+
+    def lazy(self, kind: str, metas: Iterable, variant: str = "") -> "LazyFingerprints":
+        """Mapping view over ``metas`` that loads each descriptor on first access."""
+        return LazyFingerprints(self, kind, metas, variant)
+
+    def flush(self) -> None:
+        with self._lock:
+            self._conn.commit()
+            self._pending = 0
+
+    def close(self) -> None:
+        with self._lock:
+            try:
+                self._conn.commit()
+                self._conn.close()
+            except Exception:
+                pass
+
+
+class LazyFingerprints(Mapping):
+    """
+    Read-only {path: signature} view backed by a FingerprintStore.
+
+    Only keys are materialised up front; a signature is read from disk the first time a
+    candidate pair asks for it and then kept, so memory follows the pairs actually
+    verified rather than the library size. Missing or failed descriptors read as ().
+    The pipeline uses it in Q5, where signatures are otherwise only needed packed.
+    """
+
+    def __init__(self, store: FingerprintStore, kind: str, metas: Iterable, variant: str = ""):
+        self._store = store
+        self._kind = kind
+        self._variant = variant
+        self._metas: Dict[Path, object] = {Path(m.path): m for m in metas}
+        self._loaded: Dict[Path, Tuple[int, ...]] = {}
+
+    def __getitem__(self, path: Path) -> Tuple[int, ...]:
+        key = Path(path)
+        if key not in self._loaded:
+            meta = self._metas[key]
+            sig = self._store.get(self._kind, key, meta.size, meta.mtime, self._variant)  # type: ignore[attr-defined]
+            self._loaded[key] = sig or ()
+        return self._loaded[key]
+
+    def __iter__(self) -> Iterator[Path]:
+        return iter(self._metas)
+
+    def __len__(self) -> int:
+        return len(self._metas)
+
+    @property
+    def loaded_count(self) -> int:
+        return len(self._loaded)
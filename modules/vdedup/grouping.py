@@ -4,6 +4,7 @@ from collections import defaultdict
 from pathlib import Path
 from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
 
+from .distance import ALIGNMENT_STRATEGIES, adjacent_variation, best_alignment
 from .models import FileMeta, VideoMeta
 from .phash import phash_distance
 
@@ -53,52 +54,12 @@ def alignable_avg_distance(a_sig: Sequence[int], b_sig: Sequence[int], per_frame
     if len(A) < 2:  # Need at least 2 frames for meaningful comparison
         return None
 
-    best_distance = None
-
-    # Calculate content complexity for adaptive thresholding
-    def _estimate_complexity(sig):
-        if len(sig) < 2:
-            return 1.0
-        # Estimate complexity based on frame-to-frame variation
-        variations = []
-        for i in range(len(sig) - 1):
-            x = int(sig[i]) ^ int(sig[i + 1])
-            variations.append(x.bit_count() if hasattr(int, "bit_count") else bin(x).count("1"))
-        return max(1.0, sum(variations) / len(variations) / 16.0)  # Normalize to 0-4 range
-
-    complexity_factor = min(2.0, _estimate_complexity(A))
+    complexity_factor = min(2.0, max(1.0, adjacent_variation(A) / 16.0))  # Normalize to 0-4 range
     adaptive_threshold = per_frame_thresh * complexity_factor
 
-    # Try different alignment strategies
-    strategies = [
-        (1, 0),      # Standard 1:1 alignment
-        (2, 0),      # Skip every other frame in B (handles different frame rates)
-        (1, 1),      # Skip first frame in B (handles intro/outro differences)
-    ]
-
-    for step, start_offset in strategies:
-        max_positions = (len(B) - start_offset - 1) // step + 1
-        if max_positions < len(A):
-            continue
-
-        for base_offset in range(0, max_positions - len(A) + 1):
-            total_distance = 0
-            valid_comparisons = 0
-
-            for i in range(len(A)):
-                b_idx = start_offset + base_offset + (i * step)
-                if b_idx >= len(B):
-                    break
-
-                x = int(A[i]) ^ int(B[b_idx])
-                frame_distance = x.bit_count() if hasattr(int, "bit_count") else bin(x).count("1")
-                total_distance += frame_distance
-                valid_comparisons += 1
-
-            if valid_comparisons >= min(3, len(A)):  # Need minimum valid comparisons
-                avg_distance = total_distance / valid_comparisons
-                if best_distance is None or avg_distance < best_distance:
-                    best_distance = avg_distance
+    # Standard 1:1, every other frame in B (frame rates), and skip first frame in B (intros)
+    best = best_alignment(A, B, ALIGNMENT_STRATEGIES)
+    best_distance = best[0] if best else None
 
     return best_distance if (best_distance is not None and best_distance <= adaptive_threshold) else None
 
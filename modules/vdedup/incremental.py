@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+vdedup.incremental
+
+Incremental runs: diff the filesystem against the previous run and re-examine only
+what changed.
+
+RunState (SQLite, one per output directory and quality level) records every scanned
+file as (path, size, mtime) plus the report entry of every duplicate group from the
+last run. An incremental run then:
+  1. scans as usual; files whose (size, mtime) differ from RunState are "touched"
+  2. limits Q1/Q2 to size buckets that contain a touched file, while Q3+ compare the
+     touched videos against every known video using persisted descriptors (hash
+     cache, fingerprint store), so unchanged files are not probed or decoded again
+  3. merges the groups involving touched files into the stored groups, writes the
+     merged report, and writes a delta report of new/updated/dissolved groups
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from vdedup.cache import MTIME_TOLERANCE
+
+FileState = Tuple[int, float]  # (size, mtime)
+
+
+def is_touched(previous: Optional[FileState], size: int, mtime: float) -> bool:
+    """True when a file is new or its size/mtime moved since the recorded state."""
+    if previous is None:
+        return True
+    return int(previous[0]) != int(size) or abs(float(previous[1]) - float(mtime)) > MTIME_TOLERANCE
+
+
+@dataclass
+class FileDelta:
+    added: Set[str] = field(default_factory=set)
+    changed: Set[str] = field(default_factory=set)
+    removed: Set[str] = field(default_factory=set)
+    unchanged: int = 0
+
+    @property
+    def touched(self) -> Set[str]:
+        return self.added | self.changed
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "added": len(self.added),
+            "changed": len(self.changed),
+            "removed": len(self.removed),
+            "unchanged": self.unchanged,
+        }
+
+
+def diff_files(previous: Mapping[str, FileState], current: Mapping[str, FileState]) -> FileDelta:
+    delta = FileDelta()
+    for path, (size, mtime) in current.items():
+        before = previous.get(path)
+        if before is None:
+            delta.added.add(path)
+        elif is_touched(before, size, mtime):
+            delta.changed.add(path)
+        else:
+            delta.unchanged += 1
+    delta.removed = {path for path in previous if path not in current}
+    return delta
+
+
+def _members(entry: Mapping[str, Any]) -> List[str]:
+    return [str(entry["keep"]), *(str(p) for p in entry.get("losers") or [])]
+
+
+def touching(entries: Mapping[str, Dict[str, Any]], paths: Set[str]) -> Dict[str, Dict[str, Any]]:
+    """Report entries with at least one member in ``paths``."""
+    return {gid: entry for gid, entry in entries.items() if any(m in paths for m in _members(entry))}
+
+
+def _member_meta(entry: Mapping[str, Any], path: str) -> Dict[str, Any]:
+    if path == entry.get("keep"):
+        return dict(entry.get("keep_meta") or {})
+    return dict((entry.get("loser_meta") or {}).get(path) or {})
+
+
+def _with_members(entry: Dict[str, Any], keep: str, losers: List[str], sources: Iterable[Mapping[str, Any]]) -> Dict[str, Any]:
+    """Copy of ``entry`` with a new member list; member metadata is taken from ``sources``."""
+    metas: Dict[str, Dict[str, Any]] = {}
+    for src in sources:
+        for member in _members(src):
+            metas.setdefault(member, _member_meta(src, member))
+    out = dict(entry)
+    out["keep"] = keep
+    out["losers"] = losers
+    out["keep_meta"] = metas.get(keep, {})
+    out["loser_meta"] = {p: metas.get(p, {}) for p in losers}
+    return out
+
+
+def merge_groups(
+    previous: Mapping[str, Dict[str, Any]],
+    fresh: Mapping[str, Dict[str, Any]],
+    delta: FileDelta,
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, List[str]]]:
+    """
+    Fold this run's groups (already limited to touched files) into the stored groups.
+
+    Removed and changed files leave their stored groups first (a group left with one
+    member is dissolved; a lost keeper is replaced by the first remaining loser). Each
+    fresh group then absorbs any stored group it overlaps, keeping the fresh keeper.
+    Returns (merged entries, {"new": [...], "updated": [...], "dissolved": [...]}).
+    """
+    gone = delta.removed | delta.changed
+    merged: Dict[str, Dict[str, Any]] = {}
+    updated: Set[str] = set()
+    dissolved: List[str] = []
+
+    for gid, entry in previous.items():
+        members = _members(entry)
+        alive = [m for m in members if m not in gone]
+        if len(alive) == len(members):
+            merged[gid] = entry
+        elif len(alive) < 2:
+            dissolved.append(gid)
+        else:
+            keep = entry["keep"] if entry["keep"] in alive else alive[0]
+            merged[gid] = _with_members(entry, keep, [m for m in alive if m != keep], [entry])
+            updated.add(gid)
+
+    owner: Dict[str, str] = {m: gid for gid, entry in merged.items() for m in _members(entry)}
+    new: List[str] = []
+    for gid, entry in fresh.items():
+        members = _members(entry)
+        overlapping = sorted({owner[m] for m in members if m in owner})
+        absorbed = [merged.pop(old) for old in overlapping]
+        extra = [m for old in absorbed for m in _members(old) if m not in members]
+        combined = _with_members(entry, entry["keep"], [*members[1:], *dict.fromkeys(extra)], [entry, *absorbed])
+        for old in overlapping:
+            updated.discard(old)
+        nid = gid
+        suffix = 1
+        while nid in merged:
+            nid = f"{gid}#{suffix}"
+            suffix += 1
+        merged[nid] = combined
+        for m in _members(combined):
+            owner[m] = nid
+        (updated.add(nid) if overlapping else new.append(nid))
+
+    return merged, {"new": new, "updated": sorted(updated), "dissolved": dissolved}
+
+
+class RunState:
+    """SQLite record of the last run: scanned files and the duplicate groups they formed."""
+
+    def __init__(self, path: Optional[Path]):
+        self.path = path
+        self._lock = threading.Lock()
+        p = Path(path).expanduser() if path else None
+        if p is not None:
+            p.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(p) if p else ":memory:", check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS groups (group_id TEXT PRIMARY KEY, data TEXT NOT NULL)")
+        self._conn.commit()
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM files LIMIT 1").fetchone() is None
+
+    def files(self) -> Dict[str, FileState]:
+        with self._lock:
+            rows = self._conn.execute("SELECT path, size, mtime FROM files").fetchall()
+        return {path: (int(size), float(mtime)) for path, size, mtime in rows}
+
+    def groups(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT group_id, data FROM groups").fetchall()
+        return {gid: json.loads(data) for gid, data in rows}
+
+    def record(self, files: Mapping[str, FileState], groups: Mapping[str, Dict[str, Any]]) -> None:
+        """Replace the stored state with this run's files and merged groups (one transaction)."""
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM files")
+                self._conn.execute("DELETE FROM groups")
+                self._conn.executemany(
+                    "INSERT INTO files VALUES (?, ?, ?)",
+                    ((path, int(size), float(mtime)) for path, (size, mtime) in files.items()),
+                )
+                self._conn.executemany(
+                    "INSERT INTO groups VALUES (?, ?)",
+                    ((gid, json.dumps(entry)) for gid, entry in groups.items()),
+                )
+
+    def close(self) -> None:
+        with self._lock:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
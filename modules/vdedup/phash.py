@@ -1,11 +1,28 @@
 #!/usr/bin/env python3
 from __future__ import annotations
-import io
 import subprocess
 from typing import List, Optional, Sequence, Tuple, NamedTuple
 from pathlib import Path
 from dataclasses import dataclass
 
+try:
+    import numpy as np  # type: ignore
+    _NUMPY_AVAILABLE = True
+except Exception:  # pragma: no cover - exercised only without numpy
+    np = None  # type: ignore
+    _NUMPY_AVAILABLE = False
+
+# Frames are decoded straight to FRAME_SIZE x FRAME_SIZE gray: the pHash DCT input size
+FRAME_SIZE = 32
+_FRAME_BYTES = FRAME_SIZE * FRAME_SIZE
+_HASH_SIZE = 8
+
+if _NUMPY_AVAILABLE:
+    # Low-frequency rows of the unnormalised DCT-II matrix (scipy.fftpack.dct convention)
+    _DCT_LOW = 2.0 * np.cos(
+        np.pi * np.arange(_HASH_SIZE)[:, None] * (2 * np.arange(FRAME_SIZE)[None, :] + 1) / (2 * FRAME_SIZE)
+    )
+
 
 @dataclass(frozen=True)
 class FrameHash:
@@ -139,24 +156,115 @@ def adaptive_sampling_params(duration: float, mode: str = "balanced") -> Adaptiv
 
 def _ffmpeg_frame_cmd(path: Path, ts: float, *, gpu: bool) -> list:
     """
-    Build ffmpeg command to grab a single keyframe near timestamp ts.
-    NVDEC/CUDA is hinted when gpu=True; ffmpeg falls back gracefully if unsupported.  # 5
-    We request demuxer-side seek (-ss before -i) and decode only keyframes (-skip_frame nokey).  # 6
+    Build ffmpeg command to grab a single keyframe near timestamp ts as raw gray pixels.
+    NVDEC/CUDA is hinted when gpu=True; ffmpeg falls back gracefully if unsupported.  # 5
+    We request demuxer-side seek (-ss before -i) and decode only keyframes (-skip_frame nokey).  # 6
     """
     base = [
         "ffmpeg", "-hide_banner", "-loglevel", "error",
         "-ss", f"{ts:.3f}", "-skip_frame", "nokey", "-i", str(path),
-        "-frames:v", "1", "-f", "image2pipe", "-vcodec", "png", "pipe:1",
+        "-frames:v", "1", "-vf", f"scale={FRAME_SIZE}:{FRAME_SIZE},format=gray",
+        "-f", "rawvideo", "-pix_fmt", "gray", "pipe:1",
     ]
     if gpu:
-        return ["ffmpeg", "-hide_banner", "-loglevel", "error", "-hwaccel", "cuda"] + base[2:]
+        return ["ffmpeg", "-hide_banner", "-loglevel", "error", "-hwaccel", "cuda"] + base[4:]
     return base
 
-def compute_phash_signature(path: Path, frames: int = 5, *, gpu: bool = False) -> Optional[Tuple[int, ...]]:
+
+def _ffmpeg_rawvideo_cmd(path: Path, timestamps: Sequence[float], *, gpu: bool) -> List[str]:
+    """
+    Build one ffmpeg command that writes a scaled gray frame for each timestamp to stdout.
+
+    Timestamps are treated as an evenly spaced grid (as every caller builds them): seek to
+    the first one, then let the fps filter pick the frame nearest each following step.
+    """
+    cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error"]
+    if gpu:
+        cmd.extend(["-hwaccel", "cuda"])
+    vf = f"scale={FRAME_SIZE}:{FRAME_SIZE},format=gray"
+    if len(timestamps) > 1:
+        step = max((timestamps[-1] - timestamps[0]) / (len(timestamps) - 1), 1e-3)
+        vf = f"fps=fps=1/{step:.6f}," + vf
+    cmd += [
+        "-ss", f"{max(0.0, timestamps[0]):.3f}", "-i", str(path),
+        "-vf", vf,
+        "-frames:v", str(len(timestamps)),
+        "-f", "rawvideo", "-pix_fmt", "gray", "pipe:1",
+    ]
+    return cmd
+
+
+def phash_gray(frame: bytes) -> int:
+    """
+    64-bit pHash of one FRAME_SIZE x FRAME_SIZE 8-bit gray frame (raw bytes).
+
+    Same construction as imagehash.phash: 8x8 low-frequency block of the 2-D DCT-II,
+    thresholded at its median, first coefficient in the most significant bit.
+    """
+    return phash_gray_frames(frame[:_FRAME_BYTES])[0]
+
+
+def phash_gray_frames(buf: bytes) -> List[int]:
+    """pHash every complete frame in a rawvideo gray buffer with one batched DCT."""
+    count = len(buf) // _FRAME_BYTES
+    if count == 0:
+        return []
+    pixels = np.frombuffer(buf, dtype=np.uint8, count=count * _FRAME_BYTES)
+    pixels = pixels.reshape(count, FRAME_SIZE, FRAME_SIZE).astype(np.float64)
+    low = (_DCT_LOW @ pixels @ _DCT_LOW.T).reshape(count, _HASH_SIZE * _HASH_SIZE)
+    # Rounding keeps exact ties (flat or symmetric frames) deterministic across BLAS builds
+    low = np.round(low, 6)
+    bits = low > np.median(low, axis=1)[:, None]
+    return [int.from_bytes(row.tobytes(), "big") for row in np.packbits(bits, axis=1)]
+
+
+def _batch_gray_frames(path: Path, timestamps: Sequence[float], *, gpu: bool) -> bytes:
+    """Single ffmpeg pass over all timestamps; returns the raw frame buffer (empty on failure)."""
     try:
-        from PIL import Image
-        import imagehash
+        result = subprocess.run(_ffmpeg_rawvideo_cmd(path, timestamps, gpu=gpu), capture_output=True)
     except Exception:
+        return b""
+    if result.returncode != 0:
+        return b""
+    return result.stdout[: len(timestamps) * _FRAME_BYTES]
+
+
+def _single_gray_frame(path: Path, ts: float, *, gpu: bool) -> Optional[bytes]:
+    # Try GPU then CPU
+    for attempt in (0, 1):
+        try:
+            cmd = _ffmpeg_frame_cmd(path, ts, gpu=(gpu and attempt == 0))
+            raw = subprocess.check_output(cmd, stderr=subprocess.DEVNULL)
+        except Exception:
+            # fallback once; if that fails, skip this frame
+            continue
+        if len(raw) >= _FRAME_BYTES:
+            return raw[:_FRAME_BYTES]
+    return None
+
+
+def _frame_hashes(path: Path, timestamps: Sequence[float], *, gpu: bool) -> Optional[List[Tuple[int, int]]]:
+    """
+    (timestamp index, pHash) pairs for the requested timestamps.
+
+    Frames come from one rawvideo pass; if that yields fewer than half of them, each
+    timestamp is seeked individually instead. None when both fall short.
+    """
+    need = max(2, len(timestamps) // 2)
+    hashes = list(enumerate(phash_gray_frames(_batch_gray_frames(path, timestamps, gpu=gpu))))
+    if len(hashes) >= need:
+        return hashes
+
+    hashes = []
+    for idx, ts in enumerate(timestamps):
+        frame = _single_gray_frame(path, ts, gpu=gpu)
+        if frame is not None:
+            hashes.append((idx, phash_gray(frame)))
+    return hashes if len(hashes) >= need else None
+
+
+def compute_phash_signature(path: Path, frames: int = 5, *, gpu: bool = False) -> Optional[Tuple[int, ...]]:
+    if not _NUMPY_AVAILABLE:
         return None
 
     # Probe duration lazily via ffprobe (import locally to avoid cycle)
@@ -175,143 +283,18 @@ def compute_phash_signature(path: Path, frames: int = 5, *, gpu: bool = False) -
 
 def _compute_phash_batch(path: Path, duration: float, frames: int, *, gpu: bool = False) -> Optional[Tuple[int, ...]]:
     """
-    Extract multiple frames more efficiently by batching seeks.
+    Extract evenly spaced frames in one rawvideo pass and hash them in memory.
     Falls back to individual extraction if batch fails.
     """
-    try:
-        from PIL import Image
-        import imagehash
-        import tempfile
-        import os
-    except Exception:
-        return None
-
-    # Calculate frame timestamps
     fractions = [(i + 1) / (frames + 1) for i in range(frames)]
     timestamps = [max(0.0, min(duration * frac, max(0.0, duration - 0.1))) for frac in fractions]
+    return _compute_phash_from_timestamps(path, timestamps, gpu=gpu)
 
-    # Use a temporary directory for batch extraction
-    try:
-        with tempfile.TemporaryDirectory() as temp_dir:
-            output_pattern = os.path.join(temp_dir, "frame_%03d.png")
-
-            # Build optimized batch command
-            cmd = _ffmpeg_batch_cmd_optimized(path, timestamps, output_pattern, gpu=gpu)
-
-            # Run batch extraction
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            if result.returncode != 0:
-                # Fallback to single-frame method
-                return _compute_phash_fallback(path, timestamps, gpu=gpu)
-
-            # Process extracted frames
-            sig: List[int] = []
-            for i in range(frames):
-                frame_path = os.path.join(temp_dir, f"frame_{i+1:03d}.png")
-                if os.path.exists(frame_path):
-                    try:
-                        with Image.open(frame_path) as img:
-                            h = imagehash.phash(img)
-                            sig.append(int(str(h), 16))
-                    except Exception:
-                        continue
-
-            if len(sig) >= max(2, frames // 2):
-                return tuple(sig)
-
-    except Exception:
-        pass
-
-    # Fallback to single-frame extraction
-    return _compute_phash_fallback(path, timestamps, gpu=gpu)
-
-
-def _ffmpeg_batch_cmd_optimized(path: Path, timestamps: List[float], output_pattern: str, *, gpu: bool) -> List[str]:
-    """
-    Build optimized ffmpeg command to extract specific frames to files.
-    Uses seek-based extraction which is more efficient than frame selection.
-    """
-    base_cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y"]  # -y to overwrite
-
-    if gpu:
-        base_cmd.extend(["-hwaccel", "cuda"])
-
-    # Create filter for extracting frames at specific timestamps
-    # Use fps filter to extract 1 frame per timestamp
-    timestamp_str = ",".join([f"{ts:.3f}" for ts in timestamps])
-
-    cmd = base_cmd + [
-        "-i", str(path),
-        "-vf", f"fps=fps=1/{len(timestamps)},scale=32:32",  # Extract evenly spaced frames
-        "-frames:v", str(len(timestamps)),
-        output_pattern
-    ]
-
-    return cmd
-
-
-def _ffmpeg_batch_cmd(path: Path, timestamps: List[float], *, gpu: bool) -> List[str]:
-    """
-    Build simplified ffmpeg command to extract frames using select filter.
-    More reliable than complex filter graphs.
-    """
-    base_cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error"]
-
-    if gpu:
-        base_cmd.extend(["-hwaccel", "cuda"])
-
-    # Create select expression for specific timestamps
-    # Convert timestamps to frame numbers (approximate)
-    select_expr = "+".join([f"eq(n,{int(ts * 25)})" for ts in timestamps])  # Assume 25fps average
-
-    cmd = base_cmd + [
-        "-i", str(path),
-        "-vf", f"select='{select_expr}',scale=32:32",
-        "-vsync", "0",  # Don't duplicate/drop frames
-        "-f", "image2pipe",
-        "-vcodec", "png",
-        "pipe:1"
-    ]
-
-    return cmd
-
-
-def _compute_phash_fallback(path: Path, timestamps: List[float], *, gpu: bool) -> Optional[Tuple[int, ...]]:
-    """
-    Fallback to single-frame extraction if batch method fails.
-    """
-    try:
-        from PIL import Image
-        import imagehash
-    except Exception:
-        return None
-
-    sig: List[int] = []
-    for ts in timestamps:
-        # Try GPU then CPU
-        for attempt in (0, 1):
-            try:
-                cmd = _ffmpeg_frame_cmd(path, ts, gpu=(gpu and attempt == 0))
-                raw = subprocess.check_output(cmd, stderr=subprocess.DEVNULL)
-                img = Image.open(io.BytesIO(raw))
-                img.load()
-                h = imagehash.phash(img)
-                sig.append(int(str(h), 16))
-                break
-            except Exception:
-                # fallback once; if that fails, skip this frame
-                continue
-
-    if len(sig) < max(2, len(timestamps) // 2):
-        return None
-    return tuple(sig)
 
 def phash_distance(sig_a: Sequence[int], sig_b: Sequence[int]) -> int:
-    dist = 0
-    for a, b in zip(sig_a, sig_b):
-        x = int(a) ^ int(b)
-        dist += x.bit_count() if hasattr(int, "bit_count") else bin(x).count("1")
-    return dist
+    from .distance import signature_distance
+
+    return signature_distance(sig_a, sig_b)
 
 
 def compute_phash_signature_adaptive(
@@ -346,10 +329,7 @@ def compute_phash_signature_adaptive(
         >>> # Fast mode for quick scans
         >>> sig = compute_phash_signature_adaptive(Path("video.mp4"), "fast")
     """
-    try:
-        from PIL import Image
-        import imagehash
-    except Exception:
+    if not _NUMPY_AVAILABLE:
         return None
 
     # Probe duration
@@ -409,10 +389,7 @@ def compute_video_fingerprint(
         >>> for frame in fingerprint.frames[:5]:
         ...     print(f"  Frame {frame.index} at {frame.timestamp:.2f}s: {frame.phash:016x}")
     """
-    try:
-        from PIL import Image
-        import imagehash
-    except Exception:
+    if not _NUMPY_AVAILABLE:
         return None
 
     # Probe duration
@@ -474,100 +451,12 @@ def _compute_frame_hashes_with_timestamps(
     Returns:
         List of FrameHash objects with timestamp/index/phash, or None on error
     """
-    try:
-        from PIL import Image
-        import imagehash
-        import tempfile
-        import os
-    except Exception:
-        return None
-
     if not timestamps:
         return None
-
-    # Use a temporary directory for batch extraction
-    try:
-        with tempfile.TemporaryDirectory() as temp_dir:
-            output_pattern = os.path.join(temp_dir, "frame_%03d.png")
-
-            # Build optimized batch command
-            cmd = _ffmpeg_batch_cmd_optimized(path, timestamps, output_pattern, gpu=gpu)
-
-            # Run batch extraction
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            if result.returncode != 0:
-                # Fallback to single-frame method
-                return _compute_frame_hashes_fallback(path, timestamps, gpu=gpu)
-
-            # Process extracted frames with metadata
-            frame_hashes: List[FrameHash] = []
-            for i in range(len(timestamps)):
-                frame_path = os.path.join(temp_dir, f"frame_{i+1:03d}.png")
-                if os.path.exists(frame_path):
-                    try:
-                        with Image.open(frame_path) as img:
-                            h = imagehash.phash(img)
-                            phash_int = int(str(h), 16)
-                            frame_hashes.append(FrameHash(
-                                timestamp=timestamps[i],
-                                index=i,
-                                phash=phash_int
-                            ))
-                    except Exception:
-                        continue
-
-            # Require at least half of the requested frames
-            if len(frame_hashes) >= max(2, len(timestamps) // 2):
-                return frame_hashes
-
-    except Exception:
-        pass
-
-    # Fallback to single-frame extraction
-    return _compute_frame_hashes_fallback(path, timestamps, gpu=gpu)
-
-
-def _compute_frame_hashes_fallback(
-    path: Path,
-    timestamps: List[float],
-    *,
-    gpu: bool = False
-) -> Optional[List[FrameHash]]:
-    """
-    Fallback to single-frame extraction if batch method fails.
-
-    Returns structured FrameHash objects with timestamps.
-    """
-    try:
-        from PIL import Image
-        import imagehash
-    except Exception:
+    hashes = _frame_hashes(path, timestamps, gpu=gpu)
+    if not hashes:
         return None
-
-    frame_hashes: List[FrameHash] = []
-    for idx, ts in enumerate(timestamps):
-        # Try GPU then CPU
-        for attempt in (0, 1):
-            try:
-                cmd = _ffmpeg_frame_cmd(path, ts, gpu=(gpu and attempt == 0))
-                raw = subprocess.check_output(cmd, stderr=subprocess.DEVNULL)
-                img = Image.open(io.BytesIO(raw))
-                img.load()
-                h = imagehash.phash(img)
-                phash_int = int(str(h), 16)
-                frame_hashes.append(FrameHash(
-                    timestamp=ts,
-                    index=idx,
-                    phash=phash_int
-                ))
-                break
-            except Exception:
-                # fallback once; if that fails, skip this frame
-                continue
-
-    if len(frame_hashes) < max(2, len(timestamps) // 2):
-        return None
-    return frame_hashes
+    return [FrameHash(timestamp=timestamps[i], index=i, phash=h) for i, h in hashes]
 
 
 def _compute_phash_from_timestamps(
@@ -579,8 +468,7 @@ def _compute_phash_from_timestamps(
     """
     Extract frames at specific timestamps and compute pHash for each.
 
-    This is a refactored version of the batch extraction logic that can be
-    reused by both fixed-count and adaptive sampling approaches.
+    Shared by both fixed-count and adaptive sampling approaches.
 
     Args:
         path: Path to video file
@@ -590,52 +478,12 @@ def _compute_phash_from_timestamps(
     Returns:
         Tuple of pHash integers, or None on error
     """
-    try:
-        from PIL import Image
-        import imagehash
-        import tempfile
-        import os
-    except Exception:
-        return None
-
     if not timestamps:
         return None
-
-    # Use a temporary directory for batch extraction
-    try:
-        with tempfile.TemporaryDirectory() as temp_dir:
-            output_pattern = os.path.join(temp_dir, "frame_%03d.png")
-
-            # Build optimized batch command
-            cmd = _ffmpeg_batch_cmd_optimized(path, timestamps, output_pattern, gpu=gpu)
-
-            # Run batch extraction
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            if result.returncode != 0:
-                # Fallback to single-frame method
-                return _compute_phash_fallback(path, timestamps, gpu=gpu)
-
-            # Process extracted frames
-            sig: List[int] = []
-            for i in range(len(timestamps)):
-                frame_path = os.path.join(temp_dir, f"frame_{i+1:03d}.png")
-                if os.path.exists(frame_path):
-                    try:
-                        with Image.open(frame_path) as img:
-                            h = imagehash.phash(img)
-                            sig.append(int(str(h), 16))
-                    except Exception:
-                        continue
-
-            # Require at least half of the requested frames
-            if len(sig) >= max(2, len(timestamps) // 2):
-                return tuple(sig)
-
-    except Exception:
-        pass
-
-    # Fallback to single-frame extraction
-    return _compute_phash_fallback(path, timestamps, gpu=gpu)
+    hashes = _frame_hashes(path, timestamps, gpu=gpu)
+    if not hashes:
+        return None
+    return tuple(h for _i, h in hashes)
 
 
 def compute_scene_fingerprint(
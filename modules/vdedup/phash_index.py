@@ -9,7 +9,9 @@ without requiring O(N²) comparisons. Uses segment-based bucketing where each
 Strategy:
 - Split 64-bit pHash into 4 × 16-bit segments
 - Index each frame in multiple buckets (one per segment)
-- Query returns candidates from all matching buckets
+- Query probes, per segment, every bucket within ``threshold // num_segments`` bits
+  of the query's segment (pigeonhole: two hashes within ``threshold`` bits agree
+  this closely on at least one segment), so no frame within the threshold is missed
 - Filter candidates by Hamming distance threshold
 
 This enables O(1) bucket lookup + O(k) candidate filtering instead of O(N²)
@@ -20,6 +22,9 @@ from __future__ import annotations
 from typing import Dict, List, Set, Tuple, Optional, NamedTuple
 from pathlib import Path
 from collections import defaultdict
+from itertools import combinations
+
+from vdedup.distance import hamming, hamming_one_to_many
 
 
 class FrameReference(NamedTuple):
@@ -69,6 +74,9 @@ class PHashIndex:
         self.total_videos = 0
         self._video_paths: Set[Path] = set()
 
+        # probe radius -> XOR masks of every segment value within that many bits
+        self._probe_masks: Dict[int, List[int]] = {}
+
     def add(self, video_path: Path, frame_index: int, timestamp: float, phash: int) -> None:
         """
         Add a frame to the index.
@@ -125,7 +133,8 @@ class PHashIndex:
 
         Strategy:
         1. Extract segments from query pHash
-        2. Collect all frames from matching buckets (union)
+        2. Collect all frames from the buckets within ``hamming_threshold // num_segments``
+           bits of each segment (union); exact segment matches without a threshold
         3. Deduplicate candidates
         4. Optionally filter by Hamming distance threshold
         5. Optionally exclude frames from a specific video
@@ -142,9 +151,16 @@ class PHashIndex:
         # Collect candidates from all matching buckets
         candidates: Dict[Tuple[Path, int], FrameReference] = {}
 
-        segments = self._extract_segments(phash)
-        for segment in segments:
-            for frame_ref in self.buckets[segment]:
+        radius = hamming_threshold // self.num_segments if hamming_threshold is not None else 0
+        masks = self._masks(radius)
+        if radius and self.probes_per_query(hamming_threshold) >= self.total_frames:
+            # Probing would touch more buckets than there are frames: scan segment 0,
+            # which holds every frame exactly once
+            probes = [key for key in self.buckets if key >> 32 == 0]
+        else:
+            probes = [segment ^ mask for segment in self._extract_segments(phash) for mask in masks]
+        for probe in probes:
+            for frame_ref in self.buckets.get(probe, ()):
                 # Use (video_path, frame_index) as key to deduplicate
                 key = (frame_ref.video_path, frame_ref.frame_index)
                 if key not in candidates:
@@ -153,11 +169,12 @@ class PHashIndex:
         # Convert to list
         results = list(candidates.values())
 
-        # Filter by Hamming distance if threshold provided
+        # Filter by Hamming distance if threshold provided (one-vs-many popcount)
         if hamming_threshold is not None:
+            distances = hamming_one_to_many(phash, [frame_ref.phash for frame_ref in results])
             results = [
-                frame_ref for frame_ref in results
-                if self._hamming_distance(phash, frame_ref.phash) <= hamming_threshold
+                frame_ref for frame_ref, dist in zip(results, distances)
+                if dist <= hamming_threshold
             ]
 
         # Exclude specific video if requested
@@ -240,6 +257,22 @@ class PHashIndex:
 
         return segments
 
+    def probes_per_query(self, hamming_threshold: int) -> int:
+        """Bucket lookups one thresholded query needs (the index scans instead past total_frames)."""
+        return len(self._masks(hamming_threshold // self.num_segments)) * self.num_segments
+
+    def _masks(self, radius: int) -> List[int]:
+        """XOR masks with at most ``radius`` bits set within one segment (0 first)."""
+        radius = min(max(0, radius), self.bits_per_segment)
+        masks = self._probe_masks.get(radius)
+        if masks is None:
+            masks = [0]
+            for k in range(1, radius + 1):
+                for bits in combinations(range(self.bits_per_segment), k):
+                    masks.append(sum(1 << b for b in bits))
+            self._probe_masks[radius] = masks
+        return masks
+
     @staticmethod
     def _hamming_distance(hash1: int, hash2: int) -> int:
         """
@@ -252,12 +285,7 @@ class PHashIndex:
         Returns:
             Number of differing bits (0-64)
         """
-        xor = hash1 ^ hash2
-        # Python 3.10+ has int.bit_count()
-        if hasattr(int, 'bit_count'):
-            return xor.bit_count()
-        else:
-            return bin(xor).count('1')
+        return hamming(hash1, hash2)
 
     def get_stats(self) -> Dict[str, int]:
         """
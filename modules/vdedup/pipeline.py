@@ -24,7 +24,6 @@ never looks idle while work is happening.
 
 from __future__ import annotations
 
-import concurrent.futures
 import hashlib
 import os
 import sys
@@ -32,7 +31,7 @@ import threading
 from collections import defaultdict
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union, Set
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union, Set
 
 # Optional dependency (fast partial hashing)
 try:
@@ -44,8 +43,22 @@ except Exception:
 # Local modules (absolute imports so CLI works installed or from source)
 from vdedup.models import FileMeta, VideoMeta
 from vdedup.cache import HashCache
+from vdedup.executor import StageExecutor
+from vdedup.extract import ExtractionSettings, extract_descriptors
+from vdedup.distance import (
+    ALIGNMENT_STRATEGIES,
+    adjacent_variation,
+    avg_signature_distance,
+    best_alignment,
+    pack_matrix,
+    prefix_distances,
+)
+from vdedup.fingerprints import FingerprintStore
+from vdedup.incremental import FileState, is_touched
+from vdedup.probe import ProbeService
 from vdedup.progress import ProgressReporter
 from vdedup.scoring import score_metadata_candidate, score_subset_candidate
+from vdedup.streaming import WorkQueue, stream_map
 import random
 import time
 
@@ -77,6 +90,12 @@ class PipelineConfig:
     sample_ratio: Optional[float] = None
     sample_seed: Optional[int] = None
     metadata_score_floor: float = 0.55
+    # Q4 comparison engine: "pairwise" (all pairs), "index" (PHashIndex candidates), "auto"
+    q4_engine: str = "auto"
+    # decode each video once for every Q4-Q7 descriptor (vdedup.extract)
+    single_decode: bool = False
+    # stage executor: "thread", "process" (CPU-bound descriptor work), or "auto" (vdedup.executor)
+    executor: str = "auto"
 
 
 def parse_pipeline(spec: Optional[str]) -> List[int]:
@@ -414,61 +433,14 @@ def _alignable_distance(a_sig, b_sig, per_frame_thresh: int) -> Optional[Alignme
     if len(A) < 2:  # Need at least 2 frames for meaningful comparison
         return None
 
-    best_distance: Optional[float] = None
-    best_offset = -1
-    best_step = 1
-    best_start_offset = 0
-
-    # Calculate content complexity for adaptive thresholding
-    def _estimate_complexity(sig):
-        if len(sig) < 2:
-            return 1.0
-        # Estimate complexity based on frame-to-frame variation
-        variations = []
-        for i in range(len(sig) - 1):
-            x = int(sig[i]) ^ int(sig[i + 1])
-            variations.append(x.bit_count() if hasattr(int, "bit_count") else bin(x).count("1"))
-        return max(1.0, sum(variations) / len(variations) / 16.0)  # Normalize to 0-4 range
-
-    complexity_factor = min(2.0, _estimate_complexity(A))
+    complexity_factor = min(2.0, max(1.0, adjacent_variation(A) / 16.0))  # Normalize to 0-4 range
     adaptive_threshold = per_frame_thresh * complexity_factor
 
-    # Try different alignment strategies
-    strategies = [
-        (1, 0),      # Standard 1:1 alignment
-        (2, 0),      # Skip every other frame in B (handles different frame rates)
-        (1, 1),      # Skip first frame in B (handles intro/outro differences)
-    ]
-
-    for step, start_offset in strategies:
-        max_positions = (len(B) - start_offset - 1) // step + 1
-        if max_positions < len(A):
-            continue
-
-        for base_offset in range(0, max_positions - len(A) + 1):
-            total_distance = 0
-            valid_comparisons = 0
-
-            for i in range(len(A)):
-                b_idx = start_offset + base_offset + (i * step)
-                if b_idx >= len(B):
-                    break
-
-                x = int(A[i]) ^ int(B[b_idx])
-                frame_distance = x.bit_count() if hasattr(int, "bit_count") else bin(x).count("1")
-                total_distance += frame_distance
-                valid_comparisons += 1
-
-            if valid_comparisons >= min(3, len(A)):  # Need minimum valid comparisons
-                avg_distance = total_distance / valid_comparisons
-                if best_distance is None or avg_distance < best_distance:
-                    best_distance = avg_distance
-                    best_offset = base_offset
-                    best_step = step
-                    best_start_offset = start_offset
-
-    if best_distance is None or best_distance > adaptive_threshold:
+    # Standard 1:1, every other frame in B (frame rates), and skip first frame in B (intros)
+    best = best_alignment(A, B, ALIGNMENT_STRATEGIES)
+    if best is None or best[0] > adaptive_threshold:
         return None
+    best_distance, best_step, best_start_offset, best_offset = best
     return AlignmentResult(
         distance=best_distance,
         base_offset=best_offset,
@@ -499,16 +471,196 @@ def _effective_length(meta: VideoMeta) -> float:
 
 def _avg_signature_distance(sig_a: Sequence[int], sig_b: Sequence[int]) -> float:
     """Return average bit distance between two equal-length signatures."""
-    if not sig_a or not sig_b:
-        return float("inf")
-    count = min(len(sig_a), len(sig_b))
-    if count == 0:
-        return float("inf")
-    total = 0
-    for a, b in zip(sig_a[:count], sig_b[:count]):
-        x = int(a) ^ int(b)
-        total += x.bit_count() if hasattr(int, "bit_count") else bin(x).count("1")
-    return total / count
+    return avg_signature_distance(sig_a, sig_b)
+
+
+class _OnPath:
+    """Picklable adapter calling ``fn(vm.path, **kwargs)``, so descriptor work can run in a process pool."""
+
+    def __init__(self, fn, **kwargs: Any):
+        self.fn = fn
+        self.kwargs = kwargs
+
+    def __call__(self, vm: VideoMeta):
+        return self.fn(vm.path, **self.kwargs)
+
+
+def _descriptor_map(
+    stage_exec: StageExecutor,
+    vms: Sequence[VideoMeta],
+    compute,
+    reporter: ProgressReporter,
+    *,
+    store: Optional[FingerprintStore] = None,
+    kind: str = "",
+    variant: str = "",
+) -> Iterator[Tuple[VideoMeta, Optional[Tuple[int, ...]]]]:
+    """
+    Yield (vm, descriptor) for ``vms``: stored descriptors first, then the rest computed
+    through ``stage_exec`` and persisted. Stored extraction failures come back as None
+    without re-running ffmpeg.
+    """
+    misses: List[VideoMeta] = []
+    for vm in vms:
+        cached = None
+        if store is not None:
+            try:
+                cached = store.get(kind, vm.path, vm.size, vm.mtime, variant)
+            except Exception:
+                cached = None
+        if cached is None:
+            misses.append(vm)
+            continue
+        reporter.inc_hashed(1, cache_hit=True)
+        yield vm, cached or None
+
+    for vm, sig in zip(misses, stage_exec.map(compute, misses)):
+        if reporter.should_quit():
+            yield vm, None
+            continue
+        if store is not None:
+            try:
+                store.put(kind, vm.path, vm.size, vm.mtime, sig, variant)
+            except Exception:
+                pass
+        reporter.inc_hashed(1, cache_hit=False)
+        yield vm, tuple(int(x) for x in sig) if sig else None
+
+
+# Descriptor kind produced by each visual/audio stage, in pipeline order
+_DESCRIPTOR_STAGES: Tuple[Tuple[int, str], ...] = ((4, "phash"), (5, "scene"), (6, "audio"), (7, "timeline"))
+
+# Q6 audio matches: landmarks agreeing on one offset, absolute and as a share of the shorter track
+_AUDIO_MIN_VOTES = 5
+_AUDIO_MIN_SCORE = 0.2
+
+# Fingerprint-store variant suffix for descriptors derived from the shared frame stream
+_STREAM_VARIANT = ";stream"
+
+
+def _descriptor_variant(cfg: PipelineConfig, kind: str) -> str:
+    """Fingerprint-store variant of the descriptors a stage computes for ``kind``."""
+    if kind == "audio":
+        # Both extraction paths decode identical PCM, so the descriptors share a variant
+        from vdedup.audio import FINGERPRINT_VARIANT
+
+        return FINGERPRINT_VARIANT
+    if kind == "phash":
+        variant = f"frames={cfg.phash_frames}"
+    elif kind == "scene":
+        variant = f"max_scenes={max(12, cfg.phash_frames * 2)}"
+    else:
+        variant = "fps=2.0,max_frames=120"
+    return variant + _STREAM_VARIANT if cfg.single_decode else variant
+
+
+class _SingleDecoder:
+    """
+    Memoised single-decode extraction for PipelineConfig.single_decode.
+
+    The first descriptor stage that needs a file decodes it once for its own kind and
+    every kind of the selected stages after it that ``store`` does not already hold;
+    later stages take their descriptor from memory. Each descriptor is handed out once
+    and then dropped, and release(kind) drops what finished stages never asked for.
+    """
+
+    def __init__(self, cfg: PipelineConfig, selected_stages: Set[int], store: Optional[FingerprintStore] = None):
+        self._cfg = cfg
+        self._stages = selected_stages  # live set: runtime stage extensions are honoured
+        self._store = store
+        self._pending: Dict[Path, Dict[str, Optional[Tuple[int, ...]]]] = {}
+        self._lock = threading.Lock()
+        self.decodes = 0
+
+    def _settings(self) -> ExtractionSettings:
+        return ExtractionSettings(
+            phash_frames=self._cfg.phash_frames,
+            max_scenes=max(12, self._cfg.phash_frames * 2),
+            gpu=self._cfg.gpu,
+        )
+
+    def get(self, vm: VideoMeta, kind: str, run=None) -> Optional[Tuple[int, ...]]:
+        """Descriptor ``kind`` for ``vm``; ``run(fn, *args, **kwargs)`` executes the decode (e.g. StageExecutor.call)."""
+        key = _normalized_path(vm.path)
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is not None and kind in entry:
+                sig = entry.pop(kind)
+                if not entry:
+                    del self._pending[key]
+                return sig
+        order = [k for _stage, k in _DESCRIPTOR_STAGES]
+        kinds = [
+            k for stage, k in _DESCRIPTOR_STAGES
+            if k == kind or (stage in self._stages and order.index(k) > order.index(kind) and not self._stored(vm, k))
+        ]
+        if run is None:
+            results = extract_descriptors(vm.path, kinds, duration=vm.duration, settings=self._settings())
+        else:
+            results = run(extract_descriptors, vm.path, kinds, duration=vm.duration, settings=self._settings())
+        sig = results.pop(kind, None)
+        with self._lock:
+            self.decodes += 1
+            if results:
+                self._pending.setdefault(key, {}).update(results)
+        return sig
+
+    def _stored(self, vm: VideoMeta, kind: str) -> bool:
+        """True when the store already answers ``kind`` for ``vm`` (a descriptor or a recorded failure)."""
+        if self._store is None:
+            return False
+        try:
+            return self._store.get(kind, vm.path, vm.size, vm.mtime, _descriptor_variant(self._cfg, kind)) is not None
+        except Exception:
+            return False
+
+    def release(self, kind: str) -> None:
+        """
+        Drop memoised descriptors of ``kind`` and of every kind before it. Stages run in
+        order, so once ``kind``'s stage has extracted nothing asks for them again (this
+        also covers descriptors of a stage that was skipped).
+        """
+        order = [k for _stage, k in _DESCRIPTOR_STAGES]
+        done = set(order[: order.index(kind) + 1])
+        with self._lock:
+            for key in list(self._pending):
+                entry = self._pending[key]
+                for k in done.intersection(entry):
+                    del entry[k]
+                if not entry:
+                    del self._pending[key]
+
+    @property
+    def memoised(self) -> int:
+        with self._lock:
+            return sum(len(entry) for entry in self._pending.values())
+
+
+class _SignatureRows:
+    """
+    Average signature distances for a fixed list of signatures, computed one row at a time.
+
+    The first lookup for row i scores signature i against every other signature in a single
+    vectorised pass; later lookups on the same row are list reads. Only the packed matrix is
+    kept, so callers may drop the signatures once this is built.
+    """
+
+    def __init__(self, sigs: Sequence[Sequence[int]]) -> None:
+        self._matrix, self._lengths = pack_matrix(sigs)
+        self._row: Optional[int] = None
+        self._totals: List[int] = []
+        self._counts: List[int] = []
+
+    def length(self, i: int) -> int:
+        return int(self._lengths[i])
+
+    def avg(self, i: int, j: int) -> float:
+        if self._row != i:
+            sig = self._matrix[i][: self.length(i)]
+            self._totals, self._counts = prefix_distances(sig, self._matrix, self._lengths)
+            self._row = i
+        count = self._counts[j]
+        return self._totals[j] / count if count else float("inf")
 
 
 def _subset_master_loser(a: VideoMeta, b: VideoMeta) -> Tuple[VideoMeta, VideoMeta]:
@@ -524,24 +676,6 @@ def _subset_master_loser(a: VideoMeta, b: VideoMeta) -> Tuple[VideoMeta, VideoMe
     return (a, b) if _key(a) >= _key(b) else (b, a)
 
 
-def _safe_float(value: Any) -> Optional[float]:
-    try:
-        if value is None:
-            return None
-        return float(value)
-    except (TypeError, ValueError):
-        return None
-
-
-def _safe_int(value: Any) -> Optional[int]:
-    try:
-        if value is None:
-            return None
-        return int(value)
-    except (TypeError, ValueError):
-        return None
-
-
 def _metadata_quality_key(vm: VideoMeta) -> Tuple[float, int, int, int]:
     duration = vm.duration if vm.duration is not None else 0.0
     bitrate = vm.video_bitrate or vm.overall_bitrate or 0
@@ -553,6 +687,57 @@ def _metadata_quality_key(vm: VideoMeta) -> Tuple[float, int, int, int]:
     )
 
 
+def _metadata_block_key(vm: VideoMeta, cfg: PipelineConfig) -> Tuple[Any, ...]:
+    """Attributes that must match exactly under the same_res/same_codec/same_container switches."""
+    key: Tuple[Any, ...] = ()
+    if cfg.same_res:
+        key += (vm.width, vm.height)
+    if cfg.same_codec:
+        key += (vm.vcodec,)
+    if cfg.same_container:
+        key += (vm.container,)
+    return key
+
+
+def _metadata_clusters(
+    probed: Sequence[VideoMeta],
+    *,
+    tolerance: float,
+    cfg: PipelineConfig,
+) -> Tuple[List[List[VideoMeta]], int, int]:
+    """
+    Group videos whose durations chain together within ``tolerance`` and whose block key
+    matches, returning (clusters with two or more members, comparisons, blocks).
+
+    Videos are blocked on the exact-match attributes, then each block is swept in duration
+    order: since closeness is judged on one axis, a video only has to be compared with its
+    predecessor, so the cost is a sort per block rather than pairs per duration bucket.
+    Clusters and their members keep the order of ``probed``.
+    """
+    blocks: Dict[Tuple[Any, ...], List[int]] = defaultdict(list)
+    for idx, vm in enumerate(probed):
+        if vm.duration is not None:
+            blocks[_metadata_block_key(vm, cfg)].append(idx)
+
+    label: Dict[int, int] = {}
+    comparisons = 0
+    for members in blocks.values():
+        members.sort(key=lambda i: (probed[i].duration, i))
+        start = members[0]
+        for prev, idx in zip(members, members[1:]):
+            comparisons += 1
+            if probed[idx].duration - probed[prev].duration > tolerance:  # type: ignore[operator]
+                start = idx
+            label[idx] = start
+        label[members[0]] = members[0]
+
+    clusters: Dict[int, List[VideoMeta]] = defaultdict(list)
+    for idx, vm in enumerate(probed):
+        if idx in label:
+            clusters[label[idx]].append(vm)
+    return [c for c in clusters.values() if len(c) > 1], comparisons, len(blocks)
+
+
 def _score_metadata_cluster(
     members: Sequence[VideoMeta],
     *,
@@ -622,6 +807,91 @@ def _score_metadata_cluster(
     return accepted, metadata_payload
 
 
+# Below this many phashed videos the all-pairs Q4 loop is cheaper than building an index.
+_Q4_INDEX_MIN_VIDEOS = 256
+# Cost of one index bucket probe relative to one pairwise signature comparison (measured).
+_Q4_PROBE_COST = 0.1
+
+
+def _use_phash_index(cfg: PipelineConfig, count: int, frames: int = 0) -> bool:
+    """
+    Pick the Q4 engine. Both find the same pairs; ``auto`` takes the index when its
+    probes (which grow steeply with the threshold) cost less than comparing all pairs.
+    """
+    engine = (getattr(cfg, "q4_engine", "auto") or "auto").lower()
+    if engine == "index":
+        return True
+    if engine == "pairwise":
+        return False
+    if count < _Q4_INDEX_MIN_VIDEOS:
+        return False
+    from vdedup.phash_index import PHashIndex
+
+    probes = min(PHashIndex().probes_per_query(int(cfg.phash_threshold)), frames)
+    return frames * probes * _Q4_PROBE_COST < count * (count - 1) / 2
+
+
+def _signature_fingerprint(vm: VideoMeta):
+    """Wrap a flat pHash signature as a VideoFingerprint with evenly spaced timestamps."""
+    from vdedup.phash import FrameHash, VideoFingerprint
+
+    sig = vm.phash_signature or ()
+    duration = float(vm.duration) if vm.duration else float(len(sig))
+    step = duration / (len(sig) + 1) if sig else 0.0
+    frames = tuple(FrameHash(timestamp=step * (i + 1), index=i, phash=int(h)) for i, h in enumerate(sig))
+    return VideoFingerprint(path=vm.path, duration=duration, frames=frames)
+
+
+def _phash_candidate_neighbors(
+    vids: Sequence[VideoMeta],
+    frame_threshold: int,
+    min_matching_frames: int = 1,
+) -> Dict[int, Set[int]]:
+    """
+    Build a PHashIndex over every frame hash and return, per video index, the indices of
+    videos sharing at least ``min_matching_frames`` frames within ``frame_threshold`` bits.
+
+    Candidates come from segment buckets, so the cost grows with bucket occupancy rather
+    than with the number of video pairs. Only these pairs need full verification. The
+    index probes every bucket within ``frame_threshold // 4`` bits of each segment, so no
+    frame within the threshold is missed; a pair whose mean frame distance is within the
+    threshold always has such a frame, so no duplicate pair is missed either.
+    """
+    from vdedup.phash_index import PHashIndex
+
+    index = PHashIndex()
+    position: Dict[Path, int] = {}
+    fingerprints = []
+    for idx, vm in enumerate(vids):
+        if not vm.phash_signature:
+            continue
+        fp = _signature_fingerprint(vm)
+        index.add_fingerprint(fp)
+        position[vm.path] = idx
+        fingerprints.append((idx, fp))
+
+    neighbors: Dict[int, Set[int]] = defaultdict(set)
+    for idx, fp in fingerprints:
+        for other_path, _count in index.find_matching_videos(
+            fp, hamming_threshold=frame_threshold, min_matching_frames=min_matching_frames
+        ):
+            other = position.get(other_path)
+            if other is not None and other != idx:
+                neighbors[idx].add(other)
+                neighbors[other].add(idx)
+    return neighbors
+
+
+def _subset_resolution_factor(short: VideoMeta, long: VideoMeta) -> float:
+    """Ratio-threshold adjustment used when comparing clips of different resolutions."""
+    res1 = (short.width or 0, short.height or 0)
+    res2 = (long.width or 0, long.height or 0)
+    if res1 != res2 and res1[0] > 0 and res2[0] > 0:
+        area1, area2 = res1[0] * res1[1], res2[0] * res2[1]
+        return min(2.0, max(0.5, area2 / area1)) if area1 > 0 else 1.0
+    return 1.0
+
+
 # -------------------------------------------------------------------------------------------------
 # Main pipeline
 # -------------------------------------------------------------------------------------------------
@@ -638,6 +908,10 @@ class GroupResults(dict):
     def __init__(self) -> None:
         super().__init__()
         self.metadata: Dict[str, Dict[str, Any]] = {}
+        # {path: (size, mtime)} of every scanned file, and the paths that differ from the
+        # baseline of an incremental run (None for full runs)
+        self.scanned: Dict[str, FileState] = {}
+        self.touched: Optional[Set[str]] = None
 
 
 def run_pipeline(
@@ -652,6 +926,8 @@ def run_pipeline(
     cache: Optional[HashCache] = None,
     reporter: Optional[ProgressReporter] = None,
     skip_paths: Optional[Set[Path]] = None,
+    fingerprints: Optional[FingerprintStore] = None,
+    baseline: Optional[Dict[str, FileState]] = None,
 ) -> GroupResults:
     """
     Execute the selected stages and return a mapping of {group_id: [members]}.
@@ -660,6 +936,10 @@ def run_pipeline(
       - Q2 exact-hash groups are EXCLUDED from Q3/Q4 (fastest-first).
       - Q3 metadata groups are EXCLUDED from Q4.
     skip_paths: if provided, any file in this set is ignored during scanning.
+    fingerprints: optional store that persists Q4-Q7 descriptors across runs.
+    baseline: {path: (size, mtime)} from the previous run (vdedup.incremental). Files
+      matching it are "untouched": Q2 only hashes size buckets holding a touched file,
+      and the run ends right after scanning when nothing was touched.
     """
     reporter = reporter or ProgressReporter(enable_dash=False)
 
@@ -682,6 +962,7 @@ def run_pipeline(
     logger.info(f"Resolved scan_roots: {scan_roots}")
 
     skip_norm: Set[Path] = {p.expanduser().resolve() for p in skip_paths} if skip_paths else set()
+    decoder = _SingleDecoder(cfg, selected_stages, fingerprints) if cfg.single_decode else None
     logger.info(f"Exclusions: {len(skip_norm)} paths")
 
     reporter.set_stage_plan(_build_stage_plan(sorted(selected_stages)))
@@ -726,164 +1007,211 @@ def run_pipeline(
         logger.error(f"update_root_progress() failed: {e}")
         raise
 
-    files: List[Path] = []
+    # Discovery, stat and Q2 partial hashing run as one streaming front end: the walk feeds
+    # a bounded stat queue, and files whose size is shared (the only possible exact
+    # duplicates) are handed to partial-hash workers while the walk is still going.
     skipped_during_enum = 0
     artifact_skipped = 0
-    discovery_bytes = 0
-    for index, scan_root in enumerate(scan_roots, start=1):
-        logger.info("=== File enumeration starting for root %d/%d: %s (patterns: %s, max_depth: %s) ===",
-                    index, len(scan_roots), scan_root, patterns, max_depth)
+    discovered_count = 0
+    walk_done = False
+    total_bytes = 0
+    video_bytes = 0
 
-        try:
+    def _discover() -> Iterator[Path]:
+        nonlocal skipped_during_enum, artifact_skipped, discovered_count, walk_done
+        for index, scan_root in enumerate(scan_roots, start=1):
+            logger.info("=== File enumeration starting for root %d/%d: %s (patterns: %s, max_depth: %s) ===",
+                        index, len(scan_roots), scan_root, patterns, max_depth)
             reporter.update_root_progress(current=scan_root, completed=index - 1, total=len(scan_roots))
             reporter.set_status(f"Discovering files under {scan_root}")
-            logger.info("Reporter status updated successfully")
-        except Exception as e:
-            logger.error(f"Reporter update failed: {e}")
-            raise
-
-        file_count_at_start = len(files)
-        logger.info(f"Starting _iter_files() generator for: {scan_root}")
-
-        try:
-            for file_idx, path in enumerate(_iter_files(scan_root, patterns, max_depth, exclude_patterns)):
-                resolved = path.expanduser().resolve()
-                if skip_norm and resolved in skip_norm:
-                    skipped_during_enum += 1
-                    continue
-                if not cfg.include_partials and _looks_like_artifact(path):
-                    artifact_skipped += 1
-                    continue
-                files.append(path)
-                try:
-                    discovery_bytes += path.stat().st_size
-                except Exception:
-                    pass
-
-                # Frequent UI updates for better responsiveness
-                if len(files) % 50 == 0:
-                    reporter.update_discovery(
-                        len(files),
-                        skipped=skipped_during_enum,
-                        artifacts=artifact_skipped,
-                        bytes_total=discovery_bytes,
-                    )
-
-                # Log progress every 500 files
-                if len(files) % 500 == 0:
-                    logger.info(f"Discovered {len(files):,} files (current root: {file_idx + 1:,} files)")
-
-                # Detailed log every 100 files for first 1000, then every 1000
-                elif len(files) < 1000 and len(files) % 100 == 0:
-                    logger.debug(f"Discovery progress: {len(files)} files found")
-        except Exception as e:
-            logger.error(f"Error during file enumeration: {e}", exc_info=True)
-            raise
-
-        files_from_this_root = len(files) - file_count_at_start
-        logger.info(f"Completed root {index}/{len(scan_roots)}: found {files_from_this_root:,} files")
 
-        try:
+            count_at_start = discovered_count
+            try:
+                for file_idx, path in enumerate(_iter_files(scan_root, patterns, max_depth, exclude_patterns)):
+                    resolved = path.expanduser().resolve()
+                    if skip_norm and resolved in skip_norm:
+                        skipped_during_enum += 1
+                        continue
+                    if not cfg.include_partials and _looks_like_artifact(path):
+                        artifact_skipped += 1
+                        continue
+                    discovered_count += 1
+
+                    # Frequent UI updates for better responsiveness (bytes come from the stat stage)
+                    if discovered_count % 50 == 0:
+                        reporter.update_discovery(
+                            discovered_count,
+                            skipped=skipped_during_enum,
+                            artifacts=artifact_skipped,
+                            bytes_total=total_bytes,
+                        )
+                    if discovered_count % 500 == 0:
+                        logger.info(f"Discovered {discovered_count:,} files (current root: {file_idx + 1:,} files)")
+                    yield path
+            except Exception as e:
+                logger.error(f"Error during file enumeration: {e}", exc_info=True)
+                raise
+
+            logger.info(f"Completed root {index}/{len(scan_roots)}: found {discovered_count - count_at_start:,} files")
             reporter.update_root_progress(current=scan_root, completed=index, total=len(scan_roots))
-        except Exception as e:
-            logger.error(f"Root progress update failed: {e}")
-            raise
+        walk_done = True
+
+    def _finish_discovery() -> None:
+        reporter.update_discovery(
+            discovered_count,
+            skipped=skipped_during_enum,
+            artifacts=artifact_skipped,
+            bytes_total=total_bytes,
+        )
+        logger.info(
+            "File enumeration completed across %d root(s). Found %d files (skipped %d excluded paths, %d artifacts).",
+            len(scan_roots),
+            discovered_count,
+            skipped_during_enum,
+            artifact_skipped,
+        )
+        reporter.set_total_files(discovered_count)
+        reporter.update_root_progress(current=None, completed=len(scan_roots), total=len(scan_roots))
+        reporter.finish_stage("discovering files")
 
-    total_discovered = len(files)
+    source: Iterable[Path]
+    streaming = True
     sample_ratio = getattr(cfg, "sample_ratio", None)
     if sample_ratio is not None:
         sample_ratio = max(0.0, min(1.0, float(sample_ratio)))
-    if sample_ratio and 0 < sample_ratio < 1 and total_discovered > 1:
-        sample_seed = cfg.sample_seed if cfg.sample_seed is not None else time.time()
-        rng = random.Random(sample_seed)
-        sample_count = max(1, int(round(total_discovered * sample_ratio)))
-        sample_count = min(sample_count, total_discovered)
-        if sample_count < total_discovered:
-            files = rng.sample(files, sample_count)
-            discovery_bytes = 0
-            for sampled in files:
-                try:
-                    discovery_bytes += sampled.stat().st_size
-                except Exception:
-                    continue
-            reporter.add_log(
-                f"Sampling {sample_count:,}/{total_discovered:,} files ({sample_ratio * 100:.1f}%) for quick validation",
-                "INFO",
-                source="sampling",
-            )
-            logger.info(
-                "Sampling enabled: keeping %d of %d files (ratio=%.4f, seed=%s)",
-                sample_count,
-                total_discovered,
-                sample_ratio,
-                cfg.sample_seed if cfg.sample_seed is not None else "auto",
-            )
-
-    reporter.update_discovery(
-        len(files),
-        skipped=skipped_during_enum,
-        artifacts=artifact_skipped,
-        bytes_total=discovery_bytes,
-    )
-    logger.info(
-        "File enumeration completed across %d root(s). Found %d files (skipped %d excluded paths, %d artifacts).",
-        len(scan_roots),
-        len(files),
-        skipped_during_enum,
-        artifact_skipped,
-    )
-
-    reporter.set_total_files(len(files))
-    reporter.update_root_progress(current=None, completed=len(scan_roots), total=len(scan_roots))
-    reporter.finish_stage("discovering files")
-    reporter.start_stage("scanning files", total=len(files))
-    reporter.set_status("Scanning files for metadata")
-    reporter.update_stage_metrics("scanning files", queued=f"{len(files):,}")
-    logger.info(f"Starting scanning stage with {cfg.threads} threads")
+    if sample_ratio and 0 < sample_ratio < 1:
+        # Sampling needs the full listing before anything is scanned
+        streaming = False
+        files = list(_discover())
+        total_discovered = len(files)
+        if total_discovered > 1:
+            sample_seed = cfg.sample_seed if cfg.sample_seed is not None else time.time()
+            rng = random.Random(sample_seed)
+            sample_count = max(1, int(round(total_discovered * sample_ratio)))
+            sample_count = min(sample_count, total_discovered)
+            if sample_count < total_discovered:
+                files = rng.sample(files, sample_count)
+                discovered_count = len(files)
+                reporter.add_log(
+                    f"Sampling {sample_count:,}/{total_discovered:,} files ({sample_ratio * 100:.1f}%) for quick validation",
+                    "INFO",
+                    source="sampling",
+                )
+                logger.info(
+                    "Sampling enabled: keeping %d of %d files (ratio=%.4f, seed=%s)",
+                    sample_count,
+                    total_discovered,
+                    sample_ratio,
+                    cfg.sample_seed if cfg.sample_seed is not None else "auto",
+                )
+        source = files
+        _finish_discovery()
+        reporter.start_stage("scanning files", total=len(files))
+        reporter.set_status("Scanning files for metadata")
+        reporter.update_stage_metrics("scanning files", queued=f"{len(files):,}")
+    else:
+        source = _discover()
 
     metas: List[FileMeta] = []
     by_size: Dict[int, List[FileMeta]] = defaultdict(list)
+    order: Dict[int, int] = {}  # id(meta) -> discovery index, so results stay deterministic
+    scanned_state: Dict[str, FileState] = {}
+    touched: Optional[Set[str]] = set() if baseline is not None else None
+    touched_sizes: Set[int] = set()
 
-    def scan_one(p: Path) -> FileMeta:
+    def scan_one(item: Tuple[int, Path]) -> Tuple[int, FileMeta]:
+        seq, p = item
         try:
             st = p.stat()
-            return FileMeta(path=p, size=int(st.st_size), mtime=float(st.st_mtime))
+            return seq, FileMeta(path=p, size=int(st.st_size), mtime=float(st.st_mtime))
         except Exception:
-            return FileMeta(path=p, size=0, mtime=0.0)
-
-    total_bytes = 0
-    video_bytes = 0
-
-    if files:
-        logger.info(f"Starting metadata scan of {len(files):,} files across {cfg.threads} thread(s)")
-
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, int(cfg.threads))) as ex:
-            for idx, meta in enumerate(ex.map(scan_one, files), start=1):
-                metas.append(meta)
-                by_size[meta.size].append(meta)
-                is_video = _is_video_suffix(meta.path)
-                reporter.inc_scanned(1, bytes_added=meta.size, is_video=is_video)
-
-                total_bytes += meta.size
-                if is_video:
-                    video_bytes += meta.size
-
-                if idx % 50 == 0 or idx == len(files):
-                    reporter.update_progress_periodically(idx, len(files))
-
-                if idx % 500 == 0:
-                    pct = (idx / len(files)) * 100 if files else 0
-                    logger.info(f"Scanning: {idx:,}/{len(files):,} files ({pct:.1f}%)")
-
-                if idx < 500 and idx % 100 == 0:
-                    logger.debug(f"Scanned {idx} files...")
-
-        reporter.update_progress_periodically(len(files), len(files), force_update=True)
-        logger.info(
-            "Scanning complete: processed %d files (%.2f GiB)",
-            len(metas),
-            total_bytes / (1024**3) if total_bytes else 0.0,
-        )
+            return seq, FileMeta(path=p, size=0, mtime=0.0)
+
+    # ---- Q2 partial hashing (fed from the scan, or after it for runtime-enabled Q2)
+    partial_map: Dict[str, List[FileMeta]] = defaultdict(list)
+    partial_lock = threading.Lock()
+    hashed_sizes: Set[int] = set()
+    hasher: Optional[WorkQueue] = None
+
+    def _do_partial(m: FileMeta) -> None:
+        # Avoid problematic blocking calls in worker threads
+        # Skip: reporter.wait_if_paused() and reporter.should_quit() to prevent deadlocks
+        sig = _blake3_partial_hex(m.path, head=1 << 20, tail=1 << 20, mid=0)
+        with partial_lock:
+            partial_map[sig].append(m)
+        # Safe call: simple counter increment (only catch threading-related exceptions)
+        try:
+            reporter.inc_hashed(1, cache_hit=False)
+        except (RuntimeError, threading.ThreadError, AttributeError):
+            pass  # Only catch specific UI threading issues
+
+    def _admit_for_q2(meta: FileMeta) -> None:
+        """Queue ``meta`` once its size bucket can hold an exact duplicate worth hashing."""
+        if hasher is None:
+            return
+        size = meta.size
+        if size in hashed_sizes:
+            hasher.submit(meta)
+            return
+        bucket = by_size[size]
+        if len(bucket) > 1 and (touched is None or size in touched_sizes):
+            # Exact duplicates share a size; with a baseline, untouched buckets cannot gain a group
+            hashed_sizes.add(size)
+            for member in bucket:
+                hasher.submit(member)
+
+    def _stop_hasher() -> None:
+        if hasher is not None:
+            hasher.cancel()
+
+    if 2 in selected_stages:
+        hasher = WorkQueue(_do_partial, cfg.threads)
+
+    if streaming:
+        reporter.set_status("Discovering and scanning files")
+    logger.info(f"Starting scanning stage with {cfg.threads} threads")
+    stat_source = enumerate(source)
+    scanning_started = not streaming
+    idx = 0
+    for idx, (seq, meta) in enumerate(stream_map(scan_one, stat_source, cfg.threads, stop=reporter.should_quit), start=1):
+        if not scanning_started and walk_done:
+            # The walk has finished; what is left in the queues is plain scanning
+            scanning_started = True
+            _finish_discovery()
+            reporter.start_stage("scanning files", total=max(0, discovered_count - idx + 1))
+            reporter.set_status("Scanning files for metadata")
+        order[id(meta)] = seq
+        metas.append(meta)
+        by_size[meta.size].append(meta)
+        is_video = _is_video_suffix(meta.path)
+        reporter.inc_scanned(1, bytes_added=meta.size, is_video=is_video)
+        total_bytes += meta.size
+        if is_video:
+            video_bytes += meta.size
+
+        state = (meta.size, meta.mtime)
+        scanned_state[str(meta.path)] = state
+        if touched is not None and is_touched(baseline.get(str(meta.path)), *state):  # type: ignore[union-attr]
+            touched.add(str(meta.path))
+            touched_sizes.add(meta.size)
+        _admit_for_q2(meta)
+
+        if idx % 50 == 0:
+            reporter.update_progress_periodically(idx, max(idx, discovered_count))
+        if idx % 500 == 0:
+            logger.info(f"Scanning: {idx:,}/{discovered_count:,} discovered files")
+
+    if not scanning_started:
+        _finish_discovery()
+        reporter.start_stage("scanning files", total=0)
+    reporter.update_progress_periodically(len(metas), max(1, len(metas)), force_update=True)
+    # Completion order depends on thread timing; restore discovery order
+    metas.sort(key=lambda m: order[id(m)])
+    logger.info(
+        "Scanning complete: processed %d files (%.2f GiB)",
+        len(metas),
+        total_bytes / (1024**3) if total_bytes else 0.0,
+    )
 
     reporter.set_total_bytes(total_bytes)
     reporter.mark_video_bytes_total(video_bytes)
@@ -892,20 +1220,35 @@ def run_pipeline(
         scanned=f"{len(metas):,}",
         data=f"{total_bytes / (1024**3):.2f} GiB",
     )
+    if hasher is not None:
+        reporter.update_stage_metrics("scanning files", hashed_during_scan=f"{hasher.completed:,}")
     reporter.finish_stage("scanning files")
 
     if reporter.should_quit():
+        _stop_hasher()
         reporter.flush()
         return {}
 
+    if touched is not None:
+        reporter.update_stage_metrics("scanning files", touched=f"{len(touched):,}")
+        reporter.add_log(
+            f"Incremental: {len(touched):,} new or changed of {len(scanned_state):,} scanned files",
+            source="incremental",
+        )
+        if not touched:
+            _stop_hasher()
+            unchanged = GroupResults()
+            unchanged.scanned = scanned_state
+            unchanged.touched = touched
+            reporter.flush()
+            return unchanged
+
     # -------------------------------------------
     # Q1: size buckets (optimization hint, NOT elimination)
     # -------------------------------------------
     # CRITICAL: Q1 is an optimization for exact duplicates, NOT an elimination stage
     # Visual duplicates (different encodings/resolutions/clips) have DIFFERENT sizes
     # ALL files must continue to Q2/Q3/Q4 for visual similarity detection
-    size_buckets_for_q2: Dict[int, List[FileMeta]] = {}  # Size-matched groups (optimization hint)
-
     _sync_runtime_stages()
     if 1 in selected_stages:
         logger.info("Starting Q1: size bucket analysis (optimization, not elimination)")
@@ -914,11 +1257,12 @@ def run_pipeline(
 
         # Identify size-matched groups for Q2 optimization
         size_matched_count = 0
+        size_matched_buckets = 0
         unique_size_count = 0
 
         for idx, (size, bucket) in enumerate(by_size.items(), start=1):
             if len(bucket) > 1:
-                size_buckets_for_q2[size] = bucket
+                size_matched_buckets += 1
                 size_matched_count += len(bucket)
             else:
                 unique_size_count += 1
@@ -935,7 +1279,7 @@ def run_pipeline(
         )
 
         # Log findings
-        logger.info(f"Q1 completed: {size_matched_count:,} files in {len(size_buckets_for_q2):,} size-matched groups")
+        logger.info(f"Q1 completed: {size_matched_count:,} files in {size_matched_buckets:,} size-matched groups")
         logger.info(f"Q1: {unique_size_count:,} files have unique sizes (still processed for visual similarity)")
         reporter.add_log(
             f"Q1: {size_matched_count:,} files in size-matched groups (exact duplicate candidates)",
@@ -950,10 +1294,9 @@ def run_pipeline(
     else:
         reporter.set_status("Skipping Q1 (size buckets disabled)")
 
-    # ALL files continue to Q2 (nothing eliminated based on size alone!)
-    all_candidates = metas
-
     groups: GroupResults = GroupResults()
+    groups.scanned = scanned_state
+    groups.touched = touched
     excluded_after_q2: Set[Path] = set()
     excluded_after_q3: Set[Path] = set()
     excluded_after_q4: Set[Path] = set()
@@ -963,69 +1306,44 @@ def run_pipeline(
 
     # -------------------------------------------------------
     # Q2: partial (blake3 slices) -> full sha256 on collisions
-    # Smart ordering: prioritize size-matched groups for early exact-duplicate detection
+    # Only size-matched files are hashed; usually most of them were already hashed
+    # while the scan was still running
     # -------------------------------------------------------
     _sync_runtime_stages()
-    if 2 in selected_stages and all_candidates:
-        # Smart ordering: process size-matched files first for faster exact-duplicate detection
-        priority_files = [f for bucket in size_buckets_for_q2.values() for f in bucket]
-        remaining_files = [f for f in all_candidates if f not in priority_files]
-        q2_candidates = priority_files + remaining_files
-
-        logger.info(f"Starting Q2: partial hashing for {len(q2_candidates):,} files ({len(priority_files):,} priority, {len(remaining_files):,} remaining)")
+    if 2 in selected_stages and hasher is None:
+        # Q2 enabled at runtime: hash the size-matched buckets now
+        hasher = WorkQueue(_do_partial, cfg.threads)
+        for size, bucket in by_size.items():
+            if len(bucket) > 1 and (touched is None or size in touched_sizes):
+                hashed_sizes.add(size)
+                for member in bucket:
+                    hasher.submit(member)
+    if 2 in selected_stages and hasher is not None and hasher.submitted:
+        q2_total = hasher.submitted
+        logger.info(f"Starting Q2: partial hashing for {q2_total:,} size-matched files ({hasher.completed:,} already hashed during scan)")
         reporter.set_status("Q2 partial hashing")
-        reporter.start_stage("Q2 partial", total=len(q2_candidates))
-        reporter.set_hash_total(len(q2_candidates))
-
-        partial_map: Dict[str, List[FileMeta]] = defaultdict(list)
-
-        def _do_partial(m: FileMeta) -> Tuple[FileMeta, str]:
-            # Avoid problematic blocking calls in thread workers
-            # Skip: reporter.wait_if_paused() and reporter.should_quit() to prevent deadlocks
-            sig = _blake3_partial_hex(m.path, head=1 << 20, tail=1 << 20, mid=0)
-            # Safe call: simple counter increment (only catch threading-related exceptions)
-            try:
-                reporter.inc_hashed(1, cache_hit=False)
-            except (RuntimeError, threading.ThreadError, AttributeError):
-                pass  # Only catch specific UI threading issues
-            return m, sig
-
-        # Multi-threaded partial hashing with progress tracking
-        logger.info(f"Starting partial hash computation for {len(q2_candidates):,} files using {cfg.threads} threads")
-
-        # Thread-safe counter for progress
-        completed = threading.Lock()
-        completed_count = [0]
-
-        def _do_partial_tracked(m: FileMeta) -> Tuple[FileMeta, str]:
-            result = _do_partial(m)
-            # Update counter atomically
-            with completed:
-                completed_count[0] += 1
-                current = completed_count[0]
-
-                # Log progress every 100 files
-                if current % 100 == 0:
-                    pct = (current / len(q2_candidates)) * 100
-                    logger.info(f"Partial hashing: {current:,}/{len(q2_candidates):,} ({pct:.1f}%) - {cfg.threads} workers")
-
-                # Update UI every 20 files
-                if current % 20 == 0:
-                    reporter.update_progress_periodically(current, len(q2_candidates))
-
-            return result
-
-        # Execute with thread pool
-        with concurrent.futures.ThreadPoolExecutor(max_workers=cfg.threads) as ex:
-            for m_result, sig in ex.map(_do_partial_tracked, q2_candidates):
-                partial_map[sig].append(m_result)
+        reporter.start_stage("Q2 partial", total=q2_total)
+        reporter.set_hash_total(q2_total)
+        reporter.inc_hashed(hasher.completed)
+
+        # Wait for outstanding partial hashes, keeping the UI moving
+        while not hasher.finished:
+            if reporter.should_quit():
+                hasher.cancel()
+                reporter.flush()
+                return groups
+            reporter.update_progress_periodically(hasher.completed, q2_total)
+            time.sleep(0.05)
+        hasher.join()  # re-raises a worker failure
+        for lst in partial_map.values():
+            lst.sort(key=lambda m: order[id(m)])
 
         # Final update
-        reporter.update_progress_periodically(len(q2_candidates), len(q2_candidates), force_update=True)
+        reporter.update_progress_periodically(q2_total, q2_total, force_update=True)
         logger.info(f"Partial hashing complete: {len(partial_map):,} unique signatures using {cfg.threads} threads")
         reporter.update_stage_metrics(
             "Q2 partial",
-            candidates=f"{len(q2_candidates):,}",
+            candidates=f"{q2_total:,}",
             unique=f"{len(partial_map):,}",
         )
         reporter.finish_stage("Q2 partial")
@@ -1051,10 +1369,10 @@ def run_pipeline(
             try:
                 if cache:
                     # Try BLAKE3 cache first
-                    full_hash = cache.get_field(m.path, m.size, m.mtime, "blake3_full")  # type: ignore[attr-defined]
+                    full_hash = cache.get_field(m.path, m.size, m.mtime, "blake3_full")
                     if not full_hash:
                         # Fall back to SHA256 cache (backward compatibility)
-                        full_hash = cache.get_field(m.path, m.size, m.mtime, "sha256")  # type: ignore[attr-defined]
+                        full_hash = cache.get_field(m.path, m.size, m.mtime, "sha256")
             except Exception:
                 full_hash = None
             if full_hash:
@@ -1116,7 +1434,7 @@ def run_pipeline(
                 return result
 
             # Execute with thread pool
-            with concurrent.futures.ThreadPoolExecutor(max_workers=cfg.threads) as ex:
+            with StageExecutor(cfg.executor, cfg.threads, reporter=reporter, stage="Q2 full hash") as ex:
                 for m_result, full_hash, _hit in ex.map(_do_full_tracked, to_full):
                     if full_hash:
                         by_hash[full_hash].append(m_result)
@@ -1176,127 +1494,35 @@ def run_pipeline(
             reporter.start_stage("Q3 metadata", total=len(vids_in))
             reporter.set_hash_total(len(vids_in))  # reuse hashed bar for "probed"
 
-            # Lazy import to avoid hard dependency during tests
-            try:
-                from vdedup import probe as _probe_mod  # type: ignore
-            except Exception:
-                _probe_mod = None  # type: ignore
-
-            def _probe_video(path: Path) -> Optional[VideoMeta]:
-                if _probe_mod is None:
-                    return None
-                if hasattr(_probe_mod, "probe_video"):
-                    return _probe_mod.probe_video(path)  # type: ignore[attr-defined]
-                if hasattr(_probe_mod, "run_ffprobe_json"):
-                    fmt = _probe_mod.run_ffprobe_json(path)  # type: ignore[attr-defined]
-                    if not fmt:
-                        return None
-                    format_block = fmt.get("format", {}) or {}
-                    duration = _safe_float(format_block.get("duration"))
-                    container = None
-                    if isinstance(format_block.get("format_name"), str):
-                        container = str(format_block.get("format_name")).split(",")[0]
-                    overall_bitrate = _safe_int(format_block.get("bit_rate"))
-                    width = height = None
-                    vcodec = None
-                    video_bitrate = None
-                    try:
-                        for s in fmt.get("streams", []):
-                            if s.get("codec_type") == "video":
-                                width = int(s.get("width") or 0) or None
-                                height = int(s.get("height") or 0) or None
-                                vcodec = s.get("codec_name")
-                                video_bitrate = _safe_int(s.get("bit_rate"))
-                                break
-                    except Exception:
-                        pass
-                    st = path.stat()
-                    return VideoMeta(
-                        path=path,
-                        size=st.st_size,
-                        mtime=st.st_mtime,
-                        duration=duration,
-                        width=width,
-                        height=height,
-                        container=container,
-                        vcodec=vcodec,
-                        overall_bitrate=overall_bitrate,
-                        video_bitrate=video_bitrate,
-                    )
-                return None
+            # Memo -> hash cache -> in-process/ffprobe probe; fresh results land in the cache
+            probes = ProbeService(cache, workers=cfg.threads)
 
             def _probe_one(vm: VideoMeta) -> Optional[VideoMeta]:
                 reporter.wait_if_paused()
                 if reporter.should_quit():
                     return None
-                out = _probe_video(vm.path)
-                reporter.inc_hashed(1, cache_hit=False)
-                return out if out else None
+                fields = probes.cached(vm.path, vm.size, vm.mtime)
+                hit = fields is not None
+                if fields is None:
+                    fields = probes.probe(vm.path, vm.size, vm.mtime)
+                reporter.inc_hashed(1, cache_hit=hit)
+                if not fields:
+                    return None
+                return VideoMeta(path=vm.path, size=vm.size, mtime=vm.mtime, **fields)
 
             probed: List[VideoMeta] = []
-            with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, int(cfg.threads))) as ex:
+            with StageExecutor(cfg.executor, cfg.threads, reporter=reporter, stage="Q3 metadata") as ex:
                 for vm in ex.map(_probe_one, vids_in):
                     if vm:
                         probed.append(vm)
 
-            # Cluster by duration buckets within tolerance (+ optional constraints)
             tol = max(0.0, float(cfg.duration_tolerance))
-            bucket: Dict[int, List[VideoMeta]] = defaultdict(list)
-            for v in probed:
-                d = v.duration if v.duration is not None else -1.0
-                bucket[int(d // max(1.0, tol))].append(v)
-
-            def _similar(a: VideoMeta, b: VideoMeta) -> bool:
-                if a.duration is None or b.duration is None:
-                    return False
-                if abs(a.duration - b.duration) > tol:
-                    return False
-                if cfg.same_res and (a.width != b.width or a.height != b.height):
-                    return False
-                if cfg.same_codec and (a.vcodec != b.vcodec):
-                    return False
-                if cfg.same_container and (a.container != b.container):
-                    return False
-                return True
-
-            # Union-find across each bucket and neighbor
-            parent: Dict[int, int] = {}
-
-            def _find(x: int) -> int:
-                while parent[x] != x:
-                    parent[x] = parent[parent[x]]
-                    x = parent[x]
-                return x
-
-            def _union(a: int, b: int) -> None:
-                ra, rb = _find(a), _find(b)
-                if ra != rb:
-                    parent[rb] = ra
-
-            for v in probed:
-                parent[id(v)] = id(v)
-
-            keys = sorted(bucket.keys())
-            for k in keys:
-                curr = bucket[k]
-                nxt = bucket.get(k + 1, [])
-                for i in range(len(curr)):
-                    for j in range(i + 1, len(curr)):
-                        if _similar(curr[i], curr[j]):
-                            _union(id(curr[i]), id(curr[j]))
-                for a in curr:
-                    for b in nxt:
-                        if _similar(a, b):
-                            _union(id(a), id(b))
-
-            comps: Dict[int, List[VideoMeta]] = defaultdict(list)
-            for v in probed:
-                comps[_find(id(v))].append(v)
+            clusters, comparisons, blocks = _metadata_clusters(probed, tolerance=tol, cfg=cfg)
 
             formed = 0
             duplicate_members = 0
             gid = 0
-            for comp in comps.values():
+            for comp in clusters:
                 filtered, meta_payload = _score_metadata_cluster(
                     comp,
                     tolerance=tol,
@@ -1320,6 +1546,9 @@ def run_pipeline(
             reporter.update_stage_metrics(
                 "Q3 metadata",
                 probed=f"{len(probed):,}",
+                probe_backend=probes.backend,
+                blocks=f"{blocks:,}",
+                comparisons=f"{comparisons:,}",
                 groups=f"{formed:,}",
                 tolerance=f"{tol:.1f}s",
             )
@@ -1364,26 +1593,37 @@ def run_pipeline(
             reporter.start_stage("Q4 pHash", total=len(pending_for_q4))
             reporter.set_hash_total(len(pending_for_q4))
 
-            def _do_phash(vm: VideoMeta) -> VideoMeta:
-                reporter.wait_if_paused()
-                if reporter.should_quit():
-                    return vm
-                sig = compute_phash_signature(vm.path, frames=cfg.phash_frames, gpu=cfg.gpu)
-                if sig:
-                    vm = VideoMeta(
-                        path=vm.path, size=vm.size, mtime=vm.mtime,
-                        duration=vm.duration, width=vm.width, height=vm.height,
-                        container=vm.container, vcodec=vm.vcodec, acodec=vm.acodec,
-                        overall_bitrate=vm.overall_bitrate, video_bitrate=vm.video_bitrate,
-                        phash_signature=tuple(int(x) for x in sig),
-                    )
-                reporter.inc_hashed(1, cache_hit=False)
-                return vm
-
             phashed: List[VideoMeta] = []
-            with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, int(cfg.threads))) as ex:
-                for vm in ex.map(_do_phash, pending_for_q4):
+            variant = _descriptor_variant(cfg, "phash")
+            with StageExecutor(
+                cfg.executor, cfg.threads, reporter=reporter, stage="Q4 pHash", cpu_bound=True, total=len(pending_for_q4)
+            ) as stage_exec:
+                compute = _OnPath(compute_phash_signature, frames=cfg.phash_frames, gpu=cfg.gpu)
+                if decoder is not None:
+                    compute = lambda vm: decoder.get(vm, "phash", run=stage_exec.call)
+                for vm, sig in _descriptor_map(
+                    stage_exec, pending_for_q4, compute, reporter, store=fingerprints, kind="phash", variant=variant,
+                ):
+                    if sig:
+                        vm = VideoMeta(
+                            path=vm.path, size=vm.size, mtime=vm.mtime,
+                            duration=vm.duration, width=vm.width, height=vm.height,
+                            container=vm.container, vcodec=vm.vcodec, acodec=vm.acodec,
+                            overall_bitrate=vm.overall_bitrate, video_bitrate=vm.video_bitrate,
+                            phash_signature=sig,
+                        )
                     phashed.append(vm)
+            if decoder is not None:
+                decoder.release("phash")
+                reporter.update_stage_metrics("Q4 pHash", decodes=f"{decoder.decodes:,}")
+
+            # Candidate pairs: all pairs, or only those sharing indexed frame buckets
+            neighbors: Optional[Dict[int, Set[int]]] = None
+            frames = sum(len(vm.phash_signature or ()) for vm in phashed)
+            if _use_phash_index(cfg, len(phashed), frames):
+                reporter.set_status("Q4 indexing frame hashes")
+                neighbors = _phash_candidate_neighbors(phashed, int(cfg.phash_threshold))
+            verified_pairs = 0
 
             # Group by pHash proximity (same-length matches)
             formed_phash = 0
@@ -1398,7 +1638,11 @@ def run_pipeline(
                         continue
                     grp = [a]
                     used.add(i)
-                    for j in range(i + 1, len(phashed)):
+                    if neighbors is None:
+                        others: Iterable[int] = range(i + 1, len(phashed))
+                    else:
+                        others = sorted(j for j in neighbors.get(i, ()) if j > i)
+                    for j in others:
                         if j in used:
                             continue
                         b = phashed[j]
@@ -1407,6 +1651,7 @@ def run_pipeline(
                         L = min(len(a.phash_signature), len(b.phash_signature))
                         if L < 2:
                             continue
+                        verified_pairs += 1
                         dist = phash_distance(a.phash_signature[:L], b.phash_signature[:L])  # type: ignore[misc]
                         if dist <= cfg.phash_threshold * L:
                             grp.append(b)
@@ -1423,6 +1668,8 @@ def run_pipeline(
             reporter.update_stage_metrics(
                 "Q4 pHash",
                 signatures=f"{len(phashed):,}",
+                engine="index" if neighbors is not None else "pairwise",
+                comparisons=f"{verified_pairs:,}",
                 groups=f"{formed_phash:,}",
             )
             reporter.flush()
@@ -1433,31 +1680,33 @@ def run_pipeline(
                 gid = 0
                 vids_sorted = sorted([v for v in phashed if v.duration], key=lambda v: v.duration or 0.0)
 
-                # Group videos by resolution for more targeted comparisons
-                by_resolution = {}
-                for v in vids_sorted:
-                    res_key = (v.width or 0, v.height or 0)
-                    if res_key not in by_resolution:
-                        by_resolution[res_key] = []
-                    by_resolution[res_key].append(v)
-
-                # Compare within and across resolution groups
                 all_pairs = []
-                for res1, vids1 in by_resolution.items():
-                    for res2, vids2 in by_resolution.items():
-                        # Allow cross-resolution comparison with adjusted ratio thresholds
-                        res_factor = 1.0
-                        if res1 != res2 and res1[0] > 0 and res2[0] > 0:
-                            # Adjust threshold for different resolutions
-                            area1, area2 = res1[0] * res1[1], res2[0] * res2[1]
-                            res_factor = min(2.0, max(0.5, area2 / area1)) if area1 > 0 else 1.0
-
-                        for v1 in vids1:
-                            for v2 in vids2:
-                                if v1.path == v2.path:
-                                    continue
-                                if v1.duration and v2.duration and v1.duration < v2.duration:
-                                    all_pairs.append((v1, v2, res_factor))
+                # _alignable_distance may double its per-frame threshold, so an aligned pair has a
+                # frame within this many bits; the Q4 candidates only cover that up to phash_threshold
+                subset_radius = max(int(cfg.phash_threshold), 2 * int(cfg.subset_frame_threshold))
+                if neighbors is not None and subset_radius <= int(cfg.phash_threshold):
+                    # Only pairs that share at least one indexed frame can align
+                    position = {id(v): idx for idx, v in enumerate(phashed)}
+                    for v1 in vids_sorted:
+                        for j in sorted(neighbors.get(position[id(v1)], ())):
+                            v2 = phashed[j]
+                            if v1.duration and v2.duration and v1.duration < v2.duration:
+                                all_pairs.append((v1, v2, _subset_resolution_factor(v1, v2)))
+                else:
+                    # Group videos by resolution for more targeted comparisons
+                    by_resolution: Dict[Tuple[int, int], List[VideoMeta]] = {}
+                    for v in vids_sorted:
+                        by_resolution.setdefault((v.width or 0, v.height or 0), []).append(v)
+
+                    # Compare within and across resolution groups
+                    for vids1 in by_resolution.values():
+                        for vids2 in by_resolution.values():
+                            for v1 in vids1:
+                                for v2 in vids2:
+                                    if v1.path == v2.path:
+                                        continue
+                                    if v1.duration and v2.duration and v1.duration < v2.duration:
+                                        all_pairs.append((v1, v2, _subset_resolution_factor(v1, v2)))
 
                 # Process all potential subset pairs
                 subset_consumed: Set[Path] = set()
@@ -1529,22 +1778,37 @@ def run_pipeline(
 
             scene_fps: Dict[Path, Tuple[VideoMeta, Tuple[int, ...]]] = {}
 
-            def _do_scene(vm: VideoMeta) -> Tuple[VideoMeta, Optional[Tuple[int, ...]]]:
-                reporter.wait_if_paused()
-                if reporter.should_quit():
-                    return vm, None
-                sig = compute_scene_fingerprint(vm.path, max_scenes=max(12, cfg.phash_frames * 2), gpu=cfg.gpu)
-                reporter.inc_hashed(1, cache_hit=False)
-                return vm, sig
-
-            with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, int(cfg.threads))) as ex:
-                for vm, sig in ex.map(_do_scene, pending_for_q5):
+            max_scenes = max(12, cfg.phash_frames * 2)
+            variant = _descriptor_variant(cfg, "scene")
+            with StageExecutor(
+                cfg.executor, cfg.threads, reporter=reporter, stage="Q5 scene", cpu_bound=True, total=len(pending_for_q5)
+            ) as stage_exec:
+                compute = _OnPath(compute_scene_fingerprint, max_scenes=max_scenes, gpu=cfg.gpu)
+                if decoder is not None:
+                    compute = lambda vm: decoder.get(vm, "scene", run=stage_exec.call)
+                for vm, sig in _descriptor_map(
+                    stage_exec, pending_for_q5, compute, reporter, store=fingerprints, kind="scene", variant=variant,
+                ):
                     if sig:
                         scene_fps[_normalized_path(vm.path)] = (vm, sig)
 
+            if fingerprints is not None:
+                fingerprints.flush()
             reporter.update_stage_metrics("Q5 scene", descriptors=f"{len(scene_fps):,}")
-
-            entries = list(scene_fps.values())
+            if decoder is not None:
+                decoder.release("scene")
+                reporter.update_stage_metrics("Q5 scene", decodes=f"{decoder.decodes:,}")
+
+            # The distance scan runs on the packed rows; the tuples are only needed again for
+            # subset alignment, so with a store they are read back lazily for those pairs
+            entries = [vm for vm, _sig in scene_fps.values()]
+            rows = _SignatureRows([sig for _vm, sig in scene_fps.values()])
+            scene_sigs: Mapping[Path, Tuple[int, ...]] = (
+                fingerprints.lazy("scene", entries, variant)
+                if fingerprints is not None
+                else {vm.path: sig for vm, sig in scene_fps.values()}
+            )
+            scene_fps.clear()
             pairs_evaluated = 0
             formed_scene = 0
             duplicate_members = 0
@@ -1555,16 +1819,16 @@ def run_pipeline(
             per_scene_thresh = max(8, int(cfg.subset_frame_threshold * 1.2))
 
             for i in range(len(entries)):
-                vm_a, sig_a = entries[i]
+                vm_a = entries[i]
                 path_a = _normalized_path(vm_a.path)
-                if path_a in consumed or not sig_a:
+                if path_a in consumed or not rows.length(i):
                     continue
                 for j in range(i + 1, len(entries)):
-                    vm_b, sig_b = entries[j]
+                    vm_b = entries[j]
                     path_b = _normalized_path(vm_b.path)
-                    if path_b in consumed or not sig_b:
+                    if path_b in consumed or not rows.length(j):
                         continue
-                    if abs(len(sig_a) - len(sig_b)) > 6:
+                    if abs(rows.length(i) - rows.length(j)) > 6:
                         continue
 
                     pairs_evaluated += 1
@@ -1574,7 +1838,7 @@ def run_pipeline(
                     max_len = max(len_a, len_b)
 
                     if diff <= max(5.0, 0.05 * max_len):
-                        avg_dist = _avg_signature_distance(sig_a, sig_b)
+                        avg_dist = rows.avg(i, j)
                         if avg_dist <= per_scene_thresh:
                             groups[f"scene:{gid}"] = [vm_a, vm_b]
                             consumed.update({path_a, path_b})
@@ -1592,9 +1856,7 @@ def run_pipeline(
                         short_norm = _normalized_path(short_vm.path)
                         if short_norm in subset_consumed:
                             continue
-                        short_sig = sig_a if short_vm is vm_a else sig_b
-                        long_sig = sig_b if short_vm is vm_a else sig_a
-                        match = _alignable_distance(short_sig, long_sig, per_scene_thresh)
+                        match = _alignable_distance(scene_sigs[short_vm.path], scene_sigs[long_vm.path], per_scene_thresh)
                         if match is not None:
                             master, loser = _subset_master_loser(short_vm, long_vm)
                             group_id = f"scene-sub:{gid}"
@@ -1647,7 +1909,8 @@ def run_pipeline(
         ]
 
         try:
-            from vdedup.audio import compute_audio_fingerprint  # type: ignore
+            from vdedup.audio import FINGERPRINT_VARIANT, compute_audio_fingerprint  # type: ignore
+            from vdedup.audio_index import AudioIndex
         except Exception:
             compute_audio_fingerprint = None  # type: ignore
 
@@ -1658,44 +1921,51 @@ def run_pipeline(
 
             audio_fps: Dict[Path, Tuple[VideoMeta, Tuple[int, ...]]] = {}
 
-            def _do_audio(vm: VideoMeta) -> Tuple[VideoMeta, Optional[Tuple[int, ...]]]:
-                reporter.wait_if_paused()
-                if reporter.should_quit():
-                    return vm, None
-                sig = compute_audio_fingerprint(vm.path)
-                reporter.inc_hashed(1, cache_hit=False)
-                return vm, sig
-
-            with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, int(cfg.threads))) as ex:
-                for vm, sig in ex.map(_do_audio, pending_for_q6):
+            with StageExecutor(
+                cfg.executor, cfg.threads, reporter=reporter, stage="Q6 audio", cpu_bound=True, total=len(pending_for_q6)
+            ) as stage_exec:
+                # Both paths decode identical PCM, so the descriptors share a variant
+                compute = _OnPath(compute_audio_fingerprint)
+                if decoder is not None:
+                    compute = lambda vm: decoder.get(vm, "audio", run=stage_exec.call)
+                for vm, sig in _descriptor_map(
+                    stage_exec, pending_for_q6, compute, reporter,
+                    store=fingerprints, kind="audio", variant=FINGERPRINT_VARIANT,
+                ):
                     if sig:
                         audio_fps[_normalized_path(vm.path)] = (vm, sig)
 
+            if fingerprints is not None:
+                fingerprints.flush()
             reporter.update_stage_metrics("Q6 audio", descriptors=f"{len(audio_fps):,}")
+            if decoder is not None:
+                decoder.release("audio")
+                reporter.update_stage_metrics("Q6 audio", decodes=f"{decoder.decodes:,}")
 
+            # Matching is a lookup per track: shared landmarks vote for an offset in the other track
             entries = list(audio_fps.values())
+            index = AudioIndex()
+            for _vm, sig in entries:
+                index.add(sig)
+            reporter.update_stage_metrics("Q6 audio", landmarks=f"{index.total_landmarks:,}")
+
             formed_audio = 0
             audio_subset_pairs = 0
             duplicate_members = 0
             comparisons = 0
             processed_audio: Set[Path] = set()
             subset_audio_consumed: Set[Path] = set()
-            audio_dup_thresh = 12
-            audio_subset_thresh = max(14, int(cfg.subset_frame_threshold * 1.5))
             gid = 0
 
-            for i in range(len(entries)):
-                vm_a, sig_a = entries[i]
+            for i, (vm_a, sig_a) in enumerate(entries):
                 path_a = _normalized_path(vm_a.path)
-                if path_a in processed_audio or not sig_a:
+                if path_a in processed_audio:
                     continue
-                for j in range(i + 1, len(entries)):
-                    vm_b, sig_b = entries[j]
+                for match in index.query(sig_a, min_votes=_AUDIO_MIN_VOTES, min_score=_AUDIO_MIN_SCORE, exclude=i):
+                    if match.item < i and _normalized_path(entries[match.item][0].path) not in processed_audio:
+                        continue  # that pair was settled when the other track queried
+                    vm_b, _sig_b = entries[match.item]
                     path_b = _normalized_path(vm_b.path)
-                    if path_b in processed_audio or not sig_b:
-                        continue
-                    if abs(len(sig_a) - len(sig_b)) > 10:
-                        continue
                     comparisons += 1
                     len_a = _effective_length(vm_a)
                     len_b = _effective_length(vm_b)
@@ -1703,40 +1973,47 @@ def run_pipeline(
                     max_len = max(len_a, len_b)
 
                     if diff <= max(6.0, 0.08 * max_len):
-                        avg_dist = _avg_signature_distance(sig_a, sig_b)
-                        if avg_dist <= audio_dup_thresh:
-                            groups[f"audio:{gid}"] = [vm_a, vm_b]
-                            processed_audio.update({path_a, path_b})
-                            excluded_after_q6.update({path_a, path_b})
-                            formed_audio += 1
-                            duplicate_members += 1
-                            gid += 1
-                            break
-                    else:
-                        ratio = min(len_a, len_b) / max_len if max_len else 0.0
-                        if ratio < max(cfg.subset_min_ratio, 0.25):
-                            continue
-                        short_vm = vm_a if len_a <= len_b else vm_b
-                        long_vm = vm_b if short_vm is vm_a else vm_a
-                        short_norm = _normalized_path(short_vm.path)
-                        if short_norm in subset_audio_consumed:
-                            continue
-                        short_sig = sig_a if short_vm is vm_a else sig_b
-                        long_sig = sig_b if short_vm is vm_a else sig_a
-                        match = _alignable_distance(short_sig, long_sig, audio_subset_thresh)
-                        if match is not None:
-                            master, loser = _subset_master_loser(short_vm, long_vm)
-                            group_id = f"audio-sub:{gid}"
-                            groups[group_id] = [master, loser]
-                            _record_subset_metadata(groups, group_id, "subset-audio", short_vm, long_vm, match, reporter=reporter)
-                            processed_audio.add(short_norm)
-                            subset_audio_consumed.add(short_norm)
-                            excluded_after_q6.add(short_norm)
-                            formed_audio += 1
-                            duplicate_members += 1
-                            audio_subset_pairs += 1
-                            gid += 1
+                        if path_b in processed_audio:
                             continue
+                        groups[f"audio:{gid}"] = [vm_a, vm_b]
+                        processed_audio.update({path_a, path_b})
+                        excluded_after_q6.update({path_a, path_b})
+                        formed_audio += 1
+                        duplicate_members += 1
+                        gid += 1
+                        break
+
+                    ratio = min(len_a, len_b) / max_len if max_len else 0.0
+                    if ratio < max(cfg.subset_min_ratio, 0.25):
+                        continue
+                    a_is_short = len_a <= len_b
+                    short_vm, long_vm = (vm_a, vm_b) if a_is_short else (vm_b, vm_a)
+                    short_norm = _normalized_path(short_vm.path)
+                    if short_norm in subset_audio_consumed:
+                        continue
+                    short_item, long_item = (i, match.item) if a_is_short else (match.item, i)
+                    aligned = AlignmentResult(
+                        # Agreement mapped onto the 64-bit Hamming scale the subset scorer expects
+                        distance=round(32.0 * (1.0 - match.score), 3),
+                        base_offset=0,
+                        start_offset=max(0, match.offset if a_is_short else -match.offset),
+                        step=1,
+                        shorter_len=index.span(short_item),
+                        longer_len=index.span(long_item),
+                    )
+                    master, loser = _subset_master_loser(short_vm, long_vm)
+                    group_id = f"audio-sub:{gid}"
+                    groups[group_id] = [master, loser]
+                    _record_subset_metadata(groups, group_id, "subset-audio", short_vm, long_vm, aligned, reporter=reporter)
+                    processed_audio.add(short_norm)
+                    subset_audio_consumed.add(short_norm)
+                    excluded_after_q6.add(short_norm)
+                    formed_audio += 1
+                    duplicate_members += 1
+                    audio_subset_pairs += 1
+                    gid += 1
+                    if a_is_short:
+                        break
 
             if formed_audio:
                 reporter.inc_group("audio", formed_audio)
@@ -1788,22 +2065,28 @@ def run_pipeline(
 
             timeline_fps: Dict[Path, Tuple[VideoMeta, Tuple[int, ...]]] = {}
 
-            def _do_timeline(vm: VideoMeta) -> Tuple[VideoMeta, Optional[Tuple[int, ...]]]:
-                reporter.wait_if_paused()
-                if reporter.should_quit():
-                    return vm, None
-                sig = compute_timeline_signature(vm.path, fps=2.0, max_frames=120, gpu=cfg.gpu)
-                reporter.inc_hashed(1, cache_hit=False)
-                return vm, sig
-
-            with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, int(cfg.threads))) as ex:
-                for vm, sig in ex.map(_do_timeline, pending_for_q7):
+            variant = _descriptor_variant(cfg, "timeline")
+            with StageExecutor(
+                cfg.executor, cfg.threads, reporter=reporter, stage="Q7 timeline", cpu_bound=True, total=len(pending_for_q7)
+            ) as stage_exec:
+                compute = _OnPath(compute_timeline_signature, fps=2.0, max_frames=120, gpu=cfg.gpu)
+                if decoder is not None:
+                    compute = lambda vm: decoder.get(vm, "timeline", run=stage_exec.call)
+                for vm, sig in _descriptor_map(
+                    stage_exec, pending_for_q7, compute, reporter, store=fingerprints, kind="timeline", variant=variant,
+                ):
                     if sig:
                         timeline_fps[_normalized_path(vm.path)] = (vm, sig)
 
+            if fingerprints is not None:
+                fingerprints.flush()
             reporter.update_stage_metrics("Q7 timeline", descriptors=f"{len(timeline_fps):,}")
+            if decoder is not None:
+                decoder.release("timeline")
+                reporter.update_stage_metrics("Q7 timeline", decodes=f"{decoder.decodes:,}")
 
             entries = list(timeline_fps.values())
+            rows = _SignatureRows([sig for _vm, sig in entries])
             formed_timeline = 0
             timeline_subset_pairs = 0
             duplicate_members = 0
@@ -1831,7 +2114,7 @@ def run_pipeline(
                     max_len = max(len_a, len_b)
 
                     if diff <= max(8.0, 0.04 * max_len):
-                        avg_dist = _avg_signature_distance(sig_a, sig_b)
+                        avg_dist = rows.avg(i, j)
                         if avg_dist <= timeline_dup_thresh:
                             groups[f"timeline:{gid}"] = [vm_a, vm_b]
                             processed_timeline.update({path_a, path_b})
@@ -2,8 +2,17 @@
 from __future__ import annotations
 import json
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable, List, Tuple
+
+try:
+    import av  # type: ignore
+    _PYAV_AVAILABLE = True
+except Exception:  # pragma: no cover - exercised only with PyAV installed
+    av = None  # type: ignore
+    _PYAV_AVAILABLE = False
 
 def run_ffprobe_json(path: Path) -> Optional[Dict[str, Any]]:
     """
@@ -56,3 +65,211 @@ def run_ffprobe_json(path: Path) -> Optional[Dict[str, Any]]:
     except Exception:
         # Catch-all for unexpected errors
         return None
+
+
+# -------------------------------------------------------------------------------------------------
+# Probe service: memo -> metadata cache -> in-process PyAV / ffprobe
+# -------------------------------------------------------------------------------------------------
+
+# VideoMeta fields filled by probing and kept in the hash cache as "video_meta"
+PROBE_FIELDS = ("duration", "width", "height", "container", "vcodec", "acodec", "overall_bitrate", "video_bitrate")
+
+# Fields shown by the report renderers (plus "size", which comes from stat)
+STAT_FIELDS = ("duration", "width", "height", "overall_bitrate", "video_bitrate")
+
+DEFAULT_PROBE_WORKERS = 8
+
+
+def _safe_float(value: Any) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _safe_int(value: Any) -> Optional[int]:
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_ffprobe(js: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Map run_ffprobe_json output onto PROBE_FIELDS (None when there is nothing to map)."""
+    if not js:
+        return None
+    fields: Dict[str, Any] = dict.fromkeys(PROBE_FIELDS)
+    fmt = js.get("format", {}) or {}
+    fields["duration"] = _safe_float(fmt.get("duration"))
+    if isinstance(fmt.get("format_name"), str):
+        fields["container"] = fmt["format_name"].split(",")[0]
+    fields["overall_bitrate"] = _safe_int(fmt.get("bit_rate"))
+    for s in js.get("streams", []) or []:
+        if s.get("codec_type") == "video":
+            fields["width"] = _safe_int(s.get("width")) or None
+            fields["height"] = _safe_int(s.get("height")) or None
+            fields["vcodec"] = s.get("codec_name")
+            fields["video_bitrate"] = _safe_int(s.get("bit_rate"))
+            break
+    return fields
+
+
+def _probe_pyav(path: Path) -> Optional[Dict[str, Any]]:
+    """Read container metadata in-process (no subprocess); None if PyAV cannot open the file."""
+    try:
+        with av.open(str(path)) as container:  # type: ignore[union-attr]
+            fields: Dict[str, Any] = dict.fromkeys(PROBE_FIELDS)
+            if container.duration is not None:
+                fields["duration"] = container.duration / av.time_base  # type: ignore[union-attr]
+            name = getattr(container.format, "name", None)
+            fields["container"] = name.split(",")[0] if name else None
+            fields["overall_bitrate"] = container.bit_rate or None
+            video = next(iter(container.streams.video), None)
+            if video is not None:
+                ctx = video.codec_context
+                fields["width"] = ctx.width or None
+                fields["height"] = ctx.height or None
+                fields["vcodec"] = ctx.name
+                fields["video_bitrate"] = video.bit_rate or ctx.bit_rate or None
+            audio = next(iter(container.streams.audio), None)
+            if audio is not None:
+                fields["acodec"] = audio.codec_context.name
+            return fields
+    except Exception:
+        return None
+
+
+def probe_file(path: Path) -> Optional[Dict[str, Any]]:
+    """PROBE_FIELDS for ``path``: PyAV when installed, ffprobe otherwise (or when PyAV fails)."""
+    if _PYAV_AVAILABLE:
+        fields = _probe_pyav(path)
+        if fields is not None:
+            return fields
+    return parse_ffprobe(run_ffprobe_json(path))
+
+
+class ProbeService:
+    """
+    Shared metadata prober for the pipeline and the report renderers.
+
+    Answers come from memory first, then the hash cache ("video_meta"), and only then
+    from probing the file; fresh results are written back to the cache. probe_many()
+    probes the misses of a whole batch concurrently, so PyAV opens run in-process and
+    ffprobe runs overlap instead of being spawned one after another.
+    """
+
+    def __init__(self, cache: Any = None, *, workers: int = DEFAULT_PROBE_WORKERS):
+        self._cache = cache
+        self._workers = max(1, int(workers))
+        self._memo: Dict[Tuple[str, int, float], Optional[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self.probed = 0
+        self.cache_hits = 0
+
+    @property
+    def backend(self) -> str:
+        return "pyav" if _PYAV_AVAILABLE else "ffprobe"
+
+    @staticmethod
+    def _key(path: Path, size: Optional[int], mtime: Optional[float]) -> Optional[Tuple[str, int, float]]:
+        if size is None or mtime is None:
+            try:
+                st = Path(path).stat()
+            except OSError:
+                return None
+            size, mtime = st.st_size, st.st_mtime
+        return (str(path), int(size), float(mtime))
+
+    def cached(self, path: Path, size: Optional[int] = None, mtime: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Fields already known for this file version, without probing."""
+        key = self._key(path, size, mtime)
+        if key is None:
+            return None
+        with self._lock:
+            if self._memo.get(key) is not None:
+                return self._memo[key]
+        if self._cache is None:
+            return None
+        try:
+            stored = self._cache.get_video_meta(Path(path), key[1], key[2])
+        except Exception:
+            stored = None
+        if not isinstance(stored, dict):
+            return None
+        fields = {k: stored.get(k) for k in PROBE_FIELDS}
+        with self._lock:
+            self._memo[key] = fields
+            self.cache_hits += 1
+        return fields
+
+    def probe(self, path: Path, size: Optional[int] = None, mtime: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Probe the file and store the result (failures are remembered for this service only)."""
+        key = self._key(path, size, mtime)
+        if key is None:
+            return None
+        fields = probe_file(Path(path))
+        with self._lock:
+            self._memo[key] = fields
+            self.probed += 1
+        if fields is not None and self._cache is not None:
+            try:
+                self._cache.put_field(Path(path), key[1], key[2], "video_meta", fields)
+            except Exception:
+                pass
+        return fields
+
+    def get(self, path: Path, size: Optional[int] = None, mtime: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        key = self._key(path, size, mtime)
+        if key is None:
+            return None
+        with self._lock:
+            if key in self._memo:
+                return self._memo[key]
+        fields = self.cached(path, key[1], key[2])
+        return fields if fields is not None else self.probe(path, key[1], key[2])
+
+    def probe_many(self, paths: Iterable[Path]) -> Dict[Path, Optional[Dict[str, Any]]]:
+        """get() for every path, probing cache misses concurrently."""
+        unique: List[Path] = list(dict.fromkeys(Path(p) for p in paths))
+        results: Dict[Path, Optional[Dict[str, Any]]] = {}
+        misses: List[Path] = []
+        for p in unique:
+            fields = self.cached(p)
+            if fields is None:
+                misses.append(p)
+            results[p] = fields
+        if misses:
+            with ThreadPoolExecutor(max_workers=min(self._workers, len(misses))) as pool:
+                for p, fields in zip(misses, pool.map(self.probe, misses)):
+                    results[p] = fields
+        return results
+
+
+def probe_stats(
+    path: Path,
+    *,
+    probes: Optional[ProbeService] = None,
+    known: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Stat line values for the report renderers: size plus STAT_FIELDS.
+
+    Values in ``known`` (a report's keep_meta/loser_meta) are used as-is; the file is
+    only probed when they lack a duration. Works without ffprobe; then only "size" is filled.
+    """
+    out: Dict[str, Any] = {"size": 0}
+    out.update(dict.fromkeys(STAT_FIELDS))
+    try:
+        out["size"] = int(Path(path).stat().st_size)
+    except Exception:
+        if known and isinstance(known.get("size"), int):
+            out["size"] = known["size"]
+    for k in STAT_FIELDS:
+        if known and known.get(k) is not None:
+            out[k] = known[k]
+    if out["duration"] is None:
+        fields = (probes or ProbeService()).get(Path(path))
+        for k in STAT_FIELDS:
+            if out[k] is None and fields:
+                out[k] = fields.get(k)
+    return out
@@ -3,10 +3,17 @@
 vdedup.progress
 
 Rich-powered status dashboard that surfaces pipeline health in real time.
+
+With ``sharded=True`` the per-item counters (inc_scanned, inc_hashed,
+update_progress_periodically) never take the reporter lock: each worker thread bumps
+its own _CounterShard and a single heartbeat thread folds the shards into the totals
+at the refresh rate, then renders. ``metrics_stream`` writes the same totals as one
+JSON object per line for headless runs.
 """
 
 from __future__ import annotations
 
+import json
 import os
 import select
 import sys
@@ -14,7 +21,7 @@ import threading
 import time
 from collections import deque
 from pathlib import Path
-from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+from typing import Any, Deque, Dict, List, Optional, Sequence, TextIO, Tuple
 
 from rich.align import Align
 from rich.console import Console, Group
@@ -127,6 +134,24 @@ class _KeyReader:
             return None
 
 
+class _CounterShard:
+    """Cumulative counters of one worker thread; only the owning thread writes them."""
+
+    __slots__ = ("scanned", "bytes_seen", "videos", "video_bytes", "hashed", "cache_hits", "stage")
+
+    def __init__(self) -> None:
+        self.scanned = 0
+        self.bytes_seen = 0
+        self.videos = 0
+        self.video_bytes = 0
+        self.hashed = 0
+        self.cache_hits = 0
+        self.stage = 0
+
+    def values(self) -> Tuple[int, ...]:
+        return (self.scanned, self.bytes_seen, self.videos, self.video_bytes, self.hashed, self.cache_hits, self.stage)
+
+
 class ProgressReporter:
     """Thread-safe progress reporter with multi-panel dashboard output."""
 
@@ -137,6 +162,9 @@ class ProgressReporter:
         refresh_rate: float = 1.0,
         banner: str = "",
         stacked_ui: Optional[bool] = None,  # preserved for backwards compatibility
+        sharded: bool = False,
+        metrics_stream: Optional[TextIO] = None,
+        metrics_interval: float = 1.0,
     ):
         self.enable_dash = bool(enable_dash)
         # Clamp refresh rate between 0.1s (10 Hz) and 1.0s (1 Hz) for responsive UI
@@ -144,6 +172,17 @@ class ProgressReporter:
         self.banner = banner
         self._stacked_ui = stacked_ui
 
+        # Lock-free worker counters, folded in by the heartbeat thread
+        self.sharded = bool(sharded)
+        self._tls = threading.local()
+        self._shards: List[Tuple[_CounterShard, List[int]]] = []
+        self._pending_step: Optional[Tuple[int, int]] = None
+
+        # Headless NDJSON metrics
+        self._metrics_stream = metrics_stream
+        self._metrics_interval = max(0.1, float(metrics_interval))
+        self._last_metrics = 0.0
+
         # Locks & timing
         self.lock = threading.Lock()
         self.start_ts = time.time()
@@ -155,7 +194,8 @@ class ProgressReporter:
         self.console = Console(highlight=False, soft_wrap=False)
         self._heartbeat_thread: Optional[threading.Thread] = None
         self._heartbeat_stop = threading.Event()
-        self._heartbeat_interval = 0.25
+        # Sharded counters are aggregated (and rendered) at a fixed rate
+        self._heartbeat_interval = self.refresh_rate if self.sharded else 0.25
         self._stage_activity_ts = self.start_ts
         self._stage_stall_logged: Optional[str] = None
         self._stage_stall_threshold = 90.0  # seconds
@@ -267,7 +307,7 @@ class ProgressReporter:
             self._live.start()
             self._ui_initialized = True
             self._start_control_listener()
-            self._start_heartbeat()
+        self._start_heartbeat()
 
     def set_status(self, text: str) -> None:
         """Update status line."""
@@ -373,6 +413,9 @@ class ProgressReporter:
         """Begin a new stage and reset stage-local counters."""
         now = time.time()
         with self.lock:
+            if self.sharded:
+                # Counts made so far belong to the stage that is ending
+                self._drain_shards_locked()
             prev_key = _stage_key(self.stage_name)
             prev_entry = self.stage_records.get(prev_key)
             if prev_entry and prev_entry.get("status") == "running":
@@ -431,6 +474,15 @@ class ProgressReporter:
 
     def inc_scanned(self, n: int = 1, *, bytes_added: int = 0, is_video: bool = False) -> None:
         """Increment metadata scanning counters."""
+        if self.sharded:
+            shard = self._shard()
+            shard.scanned += n
+            shard.bytes_seen += bytes_added
+            if is_video:
+                shard.videos += n
+                shard.video_bytes += bytes_added
+            shard.stage += n
+            return
         with self.lock:
             inc = int(n)
             self.scanned_files += inc
@@ -447,11 +499,20 @@ class ProgressReporter:
     def set_hash_total(self, n: int) -> None:
         """Set number of items that require hashing/probing."""
         with self.lock:
+            if self.sharded:
+                self._drain_shards_locked()
             self.hash_total = int(n)
             self.hash_done = 0
 
     def inc_hashed(self, n: int = 1, cache_hit: bool = False) -> None:
         """Increment hashing/probe counters."""
+        if self.sharded:
+            shard = self._shard()
+            shard.hashed += n
+            if cache_hit:
+                shard.cache_hits += n
+            shard.stage += n
+            return
         with self.lock:
             inc = int(n)
             self.hash_done += inc
@@ -509,6 +570,12 @@ class ProgressReporter:
 
     def update_progress_periodically(self, current_step: int, total_steps: int, force_update: bool = False) -> None:
         """Update progress counters and refresh UI if needed."""
+        if self.sharded:
+            # One tuple assignment; the heartbeat applies the latest value
+            self._pending_step = (int(current_step), int(total_steps))
+            if force_update:
+                self._print_now()
+            return
         with self.lock:
             previous = self.stage_done
             self.stage_done = max(0, int(current_step))
@@ -522,9 +589,41 @@ class ProgressReporter:
             self._print_if_due()
 
     def flush(self) -> None:
-        """Force an immediate refresh."""
+        """Fold in worker counters and force an immediate refresh."""
+        if self.sharded:
+            with self.lock:
+                self._drain_shards_locked()
         self._print_now()
 
+    def snapshot(self) -> Dict[str, Any]:
+        """Current totals as a JSON-ready dict (the record written to the metrics stream)."""
+        with self.lock:
+            if self.sharded:
+                self._drain_shards_locked()
+            groups = {
+                "hash": self.groups_hash,
+                "meta": self.groups_meta,
+                "phash": self.groups_phash,
+                "subset": self.groups_subset,
+                "scene": self.groups_scene,
+                "audio": self.groups_audio,
+                "timeline": self.groups_timeline,
+            }
+            return {
+                "t": round(time.time() - self.start_ts, 3),
+                "status": self.status_line,
+                "stage": self.stage_name,
+                "stage_done": self.stage_done,
+                "stage_total": self.stage_total,
+                "scanned": self.scanned_files,
+                "bytes_seen": self.bytes_seen,
+                "hashed": self.hash_done,
+                "hash_total": self.hash_total,
+                "cache_hits": self.cache_hits,
+                "groups": {k: v for k, v in groups.items() if v},
+                "duplicates": self.duplicates_found,
+            }
+
     def wait_if_paused(self) -> None:
         """Block worker threads when paused."""
         self._paused_evt.wait()
@@ -538,6 +637,8 @@ class ProgressReporter:
         self._stop_evt.set()
         self._control_stop.set()
         self._stop_heartbeat()
+        if self._metrics_stream is not None:
+            self._emit_metrics(final=True)
         if self._key_reader:
             try:
                 self._key_reader.close()
@@ -606,6 +707,49 @@ class ProgressReporter:
             if len(self._control_messages) > 5:
                 self._control_messages.popleft()
 
+    def _shard(self) -> _CounterShard:
+        try:
+            return self._tls.shard
+        except AttributeError:
+            shard = self._tls.shard = _CounterShard()
+            with self.lock:
+                self._shards.append((shard, [0] * len(shard.values())))
+            return shard
+
+    def _drain_shards_locked(self) -> None:
+        """Fold what every shard counted since the last drain into the totals."""
+        stage_before = self.stage_done
+        for shard, seen in self._shards:
+            now = shard.values()
+            scanned, bytes_seen, videos, video_bytes, hashed, cache_hits, stage = (a - b for a, b in zip(now, seen))
+            seen[:] = now
+            self.scanned_files += scanned
+            self.bytes_seen += bytes_seen
+            self.video_files += videos
+            self.video_bytes_processed += video_bytes
+            self.hash_done += hashed
+            self.cache_hits += cache_hits
+            self.stage_done += stage
+        step = self._pending_step
+        if step is not None:
+            self._pending_step = None
+            self.stage_done = max(0, step[0])
+            if step[1] > 0:
+                self.stage_total = max(self.stage_total, step[1])
+        if self.stage_done != stage_before:
+            self._note_stage_activity_locked()
+
+    def _emit_metrics(self, *, final: bool = False) -> None:
+        record = self.snapshot()
+        if final:
+            record["final"] = True
+        self._last_metrics = time.time()
+        try:
+            self._metrics_stream.write(json.dumps(record) + "\n")
+            self._metrics_stream.flush()
+        except Exception:
+            self._metrics_stream = None
+
     def _note_stage_activity_locked(self) -> None:
         self._stage_activity_ts = time.time()
         self._stage_stall_logged = None
@@ -701,7 +845,9 @@ class ProgressReporter:
         self._record_control_event("Controls: P=Pause, +=Extend, S=Stop, Q=Abort, 1/2/3=Log filter, PgUp/PgDn=Scroll")
 
     def _start_heartbeat(self) -> None:
-        if self._heartbeat_thread or not self.enable_dash:
+        if self._heartbeat_thread:
+            return
+        if not (self._ui_initialized or self.sharded or self._metrics_stream is not None):
             return
         self._heartbeat_stop = threading.Event()
         self._heartbeat_thread = threading.Thread(target=self._heartbeat_loop, daemon=True)
@@ -716,6 +862,11 @@ class ProgressReporter:
 
     def _heartbeat_loop(self) -> None:
         while not self._heartbeat_stop.wait(self._heartbeat_interval):
+            if self.sharded:
+                with self.lock:
+                    self._drain_shards_locked()
+            if self._metrics_stream is not None and time.time() - self._last_metrics >= self._metrics_interval:
+                self._emit_metrics()
             if not self._ui_initialized:
                 continue
             self._check_stage_stall()
@@ -800,6 +951,8 @@ class ProgressReporter:
     def _render_layout(self) -> Layout:
         """Build the main dashboard layout."""
         with self.lock:
+            if self.sharded:
+                self._drain_shards_locked()
             elapsed = max(0.0, time.time() - self.start_ts)
             stage_elapsed = max(0.0, time.time() - self.stage_start_ts)
             pct = (self.stage_done / self.stage_total * 100.0) if self.stage_total > 0 else 0.0
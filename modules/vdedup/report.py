@@ -7,8 +7,10 @@ import sys
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
+from .fileops import DEFAULT_APPLY_WORKERS, ApplyEngine, ApplyJournal, FileOp, file_identity, parse_op_key
 from .models import FileMeta, VideoMeta
-from .report_models import load_report_groups
+from .probe import ProbeService, probe_stats
+from .report_models import is_streaming_report, iter_report_groups, load_report_groups, read_report
 from .report_viewer import render_reports_to_text
 
 Meta = FileMeta | VideoMeta
@@ -39,54 +41,18 @@ def _fmt_hms(sec: Any) -> str:
         return "--:--:--"
 
 
-def _probe_stats(path: Path) -> Dict[str, Any]:
+def _probe_stats(
+    path: Path,
+    *,
+    probes: Optional[ProbeService] = None,
+    known: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
     """
-    Lightweight probe: duration, width, height, bitrates, size.
-    Works even without ffprobe; then only 'size' is filled.
+    Lightweight stats: duration, width, height, bitrates, size.
+    Report metadata (``known``) is preferred over probing; works even without ffprobe,
+    then only 'size' is filled.
     """
-    size = 0
-    try:
-        st = path.stat()
-        size = int(st.st_size)
-    except Exception:
-        pass
-
-    out: Dict[str, Any] = {
-        "size": size,
-        "duration": None,
-        "width": None,
-        "height": None,
-        "overall_bitrate": None,
-        "video_bitrate": None,
-    }
-    try:
-        from .probe import run_ffprobe_json  # lazy import
-        js = run_ffprobe_json(path)
-        if js:
-            try:
-                out["duration"] = float(js.get("format", {}).get("duration", 0.0))
-            except Exception:
-                pass
-            try:
-                br = js.get("format", {}).get("bit_rate")
-                out["overall_bitrate"] = int(br) if br is not None else None
-            except Exception:
-                pass
-            for s in js.get("streams", []):
-                if s.get("codec_type") == "video":
-                    try:
-                        out["video_bitrate"] = int(s.get("bit_rate")) if s.get("bit_rate") is not None else None
-                    except Exception:
-                        pass
-                    try:
-                        out["width"] = int(s.get("width") or 0) or None
-                        out["height"] = int(s.get("height") or 0) or None
-                    except Exception:
-                        pass
-                    break
-    except Exception:
-        pass
-    return out
+    return probe_stats(path, probes=probes, known=known)
 
 
 def _render_pair_diff(keep: Path, lose: Path, a: Dict[str, Any], b: Dict[str, Any]) -> List[str]:
@@ -121,7 +87,7 @@ def _render_pair_diff(keep: Path, lose: Path, a: Dict[str, Any], b: Dict[str, An
 # ----------------
 
 def load_report(path: Path) -> Dict[str, Any]:
-    return json.loads(Path(path).read_text(encoding="utf-8"))
+    return read_report(Path(path))
 
 
 def pretty_print_reports(paths: List[Path], verbosity: int = 1) -> str:
@@ -152,8 +118,7 @@ def collect_exclusions(paths: List[Path]) -> set[Path]:
     ex: set[Path] = set()
     for rp in paths:
         try:
-            d = load_report(rp)
-            for g in (d.get("groups") or {}).values():
+            for _gid, g in iter_report_groups(rp):
                 for p in (g.get("losers") or []):
                     ex.add(Path(p))
         except Exception:
@@ -182,17 +147,13 @@ def _meta_from_meta(meta: Meta, *, overlap_hint: Optional[float] = None) -> Dict
     return data
 
 
-def write_report(
-    path: Path,
+def report_entries(
     winners: Dict[str, Tuple[Meta, List[Meta]]],
     *,
     metadata: Optional[Dict[str, Dict[str, Any]]] = None,
-):
-    out = {}
-    total_size = 0
-    losers_total = 0
-    by_method: Dict[str, int] = {}
-
+) -> Dict[str, Dict[str, Any]]:
+    """Report "groups" section: {group_id: {keep, losers, method, evidence, keep_meta, loser_meta}}."""
+    out: Dict[str, Dict[str, Any]] = {}
     for gid, (keep, losers) in winners.items():
         keep_path = str(keep.path)
         loser_paths = [str(m.path) for m in losers]
@@ -220,27 +181,97 @@ def write_report(
             "keep_meta": _meta_from_meta(keep, overlap_hint=keep_hint if isinstance(keep_hint, (int, float)) else None),
             "loser_meta": loser_meta_payload,
         }
-        losers_total += len(losers)
-        for m in losers:
-            try:
-                total_size += int(Path(m.path).stat().st_size)
-            except Exception:
-                pass
-        by_method[out[gid]["method"]] = by_method.get(out[gid]["method"], 0) + 1
+    return out
+
 
-    payload = {
-        "summary": {"groups": len(out), "losers": losers_total, "size_bytes": total_size, "by_method": by_method},
-        "groups": out,
-    }
-    path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+class ReportWriter:
+    """
+    Write a report one group at a time.
+
+    NDJSON reports (``.ndjson``/``.jsonl``) go straight to disk, one
+    ``{"group": gid, ...entry}`` line per group and a closing ``{"summary": ...}``
+    line, so the writer holds no group data. Any other path gets the classic JSON
+    document, assembled in memory and written on close. Sizes in the summary come
+    from the recorded ``loser_meta``; nothing is stat'ed.
+
+    Example:
+        >>> with ReportWriter(path) as out:
+        ...     for gid, entry in entries.items():
+        ...         out.add(gid, entry)
+    """
+
+    def __init__(self, path: Path, **extra: Any):
+        self.path = Path(path)
+        self.extra = extra
+        self.streaming = is_streaming_report(self.path)
+        self.summary: Dict[str, Any] = {"groups": 0, "losers": 0, "size_bytes": 0, "by_method": {}}
+        self._groups: Dict[str, Dict[str, Any]] = {}
+        self._closed = False
+        self._fh = open(self.path, "w", encoding="utf-8") if self.streaming else None
+
+    def add(self, gid: str, entry: Dict[str, Any]) -> None:
+        summary = self.summary
+        summary["groups"] += 1
+        summary["losers"] += len(entry.get("losers") or [])
+        for meta in (entry.get("loser_meta") or {}).values():
+            summary["size_bytes"] += int((meta or {}).get("size") or 0)
+        method = entry.get("method", "unknown")
+        summary["by_method"][method] = summary["by_method"].get(method, 0) + 1
+        if self._fh is not None:
+            self._fh.write(json.dumps({"group": gid, **entry}) + "\n")
+        else:
+            self._groups[gid] = entry
+
+    def close(self) -> Dict[str, Any]:
+        if self._closed:
+            return self.summary
+        self._closed = True
+        if self._fh is not None:
+            self._fh.write(json.dumps({"summary": self.summary, **self.extra}) + "\n")
+            self._fh.close()
+        else:
+            payload = {"summary": self.summary, "groups": self._groups, **self.extra}
+            self.path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        return self.summary
+
+    def __enter__(self) -> "ReportWriter":
+        return self
+
+    def __exit__(self, *_exc: Any) -> None:
+        # Also on errors: whatever was found so far is worth keeping
+        self.close()
+
+
+def write_report_entries(path: Path, entries: Dict[str, Dict[str, Any]], **extra: Any) -> Dict[str, Any]:
+    """Write ready-made group entries in the format ``path`` implies; returns the summary."""
+    with ReportWriter(path, **extra) as out:
+        for gid, entry in entries.items():
+            out.add(gid, entry)
+    return out.summary
+
+
+def write_report(
+    path: Path,
+    winners: Dict[str, Tuple[Meta, List[Meta]]],
+    *,
+    metadata: Optional[Dict[str, Dict[str, Any]]] = None,
+):
+    with ReportWriter(path) as out:
+        for gid, pair in winners.items():
+            # One group at a time so NDJSON output never holds the whole report
+            out.add(gid, report_entries({gid: pair}, metadata=metadata)[gid])
 
 
 # -----------------------
 # Apply (delete/link/move)
 # -----------------------
+def backup_destination(path: Path, backup_root: Path, base_root: Path) -> Path:
+    """Where ``path`` goes under ``backup_root``, keeping its layout relative to ``base_root``."""
+    return backup_root.joinpath(path.resolve().relative_to(base_root.resolve()))
+
+
 def ensure_backup_move(path: Path, backup_root: Path, base_root: Path) -> Path:
-    rel = path.resolve().relative_to(base_root.resolve())
-    dest = backup_root.joinpath(rel)
+    dest = backup_destination(path, backup_root, base_root)
     dest.parent.mkdir(parents=True, exist_ok=True)
     shutil.move(str(path), str(dest))
     return dest
@@ -257,6 +288,8 @@ def apply_report(
     reporter: Any = None,
     verbosity: int = 0,
     full_file_names: bool = False,   # NEW: show real paths if True; otherwise compact vset… aliases
+    workers: int = DEFAULT_APPLY_WORKERS,
+    journal_path: Optional[Path] = None,
 ) -> Tuple:
     """
     Apply a report:
@@ -270,6 +303,12 @@ def apply_report(
               - Delete/backup the loser.
               - Create a HARDLINK at the loser path pointing to the vaulted file.
 
+    The operations of all groups are planned first and then run by vdedup.fileops:
+    same-device renames/deletes/links in batches, cross-device moves on ``workers``
+    threads. Progress is journaled to ``journal_path`` (default: next to the report),
+    so re-running an interrupted apply resumes where it stopped; the journal is removed
+    once every operation succeeded.
+
     Returns (ops_count, total_bytes_saved_from_losers)
 
     Prints group-by-group details according to `verbosity`:
@@ -357,8 +396,8 @@ def apply_report(
     C_FOLD = "36"     # cyan folder token
     C_DIM  = "2"
 
-    # Progress
-    if reporter:
+    # Progress (real runs report per operation from the engine)
+    if reporter and dry_run:
         reporter.start_stage("apply report", total=len(groups))
 
     # Determine total reclaimable bytes from losers
@@ -402,20 +441,75 @@ def apply_report(
         if not dry_run:
             vault.mkdir(parents=True, exist_ok=True)
 
+    planned_dests: set[Path] = set()
+
+    # Moves an interrupted run already journaled (src -> dst): a resumed apply plans
+    # the same destination for a keep it moved, and treats the keep as present
+    journal_file = journal_path or report_path.with_name(report_path.name + ".apply-journal.sqlite")
+    journaled_moves: Dict[Path, Path] = {}
+    if not dry_run and journal_file.exists():
+        previous = ApplyJournal(journal_file)
+        try:
+            for key in previous.done_keys():
+                kind, src, dst = parse_op_key(key)
+                if kind == "move" and dst is not None:
+                    journaled_moves[src] = dst
+        finally:
+            previous.close()
+
+    def _free_vault_slot(cand: Path, keep_path: Path) -> bool:
+        if cand in planned_dests:
+            return False
+        if not cand.exists():
+            return True
+        try:
+            return os.path.samefile(keep_path, cand)
+        except OSError:
+            return False
+
     def _choose_vault_dest(vroot: Path, keep_path: Path, evidence: Optional[Dict[str, Any]]) -> Path:
-        dest = vroot.joinpath(keep_path.name)
-        if not dest.exists():
+        if keep_path in journaled_moves:
+            dest = journaled_moves[keep_path]
+            planned_dests.add(dest)
             return dest
-        # Avoid collision — append short hash if available, else numeric suffix
-        suffix = ""
-        if evidence and isinstance(evidence.get("sha256"), str) and evidence["sha256"]:
-            suffix = f".{evidence['sha256'][:8]}"
-        i = 1
-        while True:
-            cand = vroot.joinpath(keep_path.stem + (suffix or f".{i}") + keep_path.suffix)
-            if not cand.exists():
-                return cand
-            i += 1
+        dest = vroot.joinpath(keep_path.name)
+        if not _free_vault_slot(dest, keep_path):
+            # Avoid collision — append short hash if available, else numeric suffix
+            suffix = ""
+            if evidence and isinstance(evidence.get("sha256"), str) and evidence["sha256"]:
+                suffix = f".{evidence['sha256'][:8]}"
+            i = 1
+            while True:
+                dest = vroot.joinpath(keep_path.stem + (suffix or f".{i}") + keep_path.suffix)
+                if _free_vault_slot(dest, keep_path):
+                    break
+                suffix = ""
+                i += 1
+        planned_dests.add(dest)
+        return dest
+
+    # Planned filesystem operations (real runs); loser removals are counted from their keys
+    ops: List[FileOp] = []
+    loser_keys: List[str] = []
+
+    def _plan_removal(l: Path, *, phase: int, after: Optional[str]) -> Optional[FileOp]:
+        if backup:
+            try:
+                op = FileOp(
+                    "move", l, backup_destination(l, backup, base_root or Path("/")),
+                    phase=phase, after=after, src_id=file_identity(l),
+                )
+            except Exception as e:
+                print(f"    WARN: backup move failed for {rel(l)}: {e}")
+                return None
+        else:
+            op = FileOp("delete", l, phase=phase, after=after)
+        ops.append(op)
+        loser_keys.append(op.key)
+        return op
+
+    # One prober for the whole report, so a keep shared by many losers is probed once
+    probes = ProbeService()
 
     # iterate with enumeration for fallback numbering
     for idx, (gid, g) in enumerate(groups.items(), start=0):
@@ -424,6 +518,12 @@ def apply_report(
         method = g.get("method", "unknown")
         evidence = g.get("evidence") or {}
 
+        # Never remove losers without a keep to fall back on
+        if keep is None or not (keep.exists() or keep in journaled_moves):
+            if verbosity >= 0:
+                print(f"[{_friendly_gid(method, gid)}] WARN: keep file missing, group skipped: {rel(keep) if keep else '(none)'}")
+            continue
+
         # set size stat
         set_sizes.append((1 if keep else 0) + len(losers))
 
@@ -467,9 +567,10 @@ def apply_report(
 
         # Detailed diffs (V2) — these are meaningful only with real paths
         if verbosity >= 2 and keep:
-            astats = _probe_stats(keep)
+            loser_meta = g.get("loser_meta") or {}
+            astats = _probe_stats(keep, probes=probes, known=g.get("keep_meta"))
             for l, rl in zip(losers, rel_losers):
-                bstats = _probe_stats(l)
+                bstats = _probe_stats(l, probes=probes, known=loser_meta.get(str(l)))
                 for line in _render_pair_diff(Path(_trim(rel_keep)), Path(_trim(rl)), astats, bstats):
                     print(f"    {line}")
 
@@ -519,49 +620,17 @@ def apply_report(
                         else:
                             print(f"    {_c('[DRY] DELETE', C_LOSE)} {_fold_colored_loser(_trim(rl), la)}")
             losers_processed += len(losers)
+        elif vault and planned_vault_dest and keep:
+            to_vault = FileOp("move", keep, planned_vault_dest, phase=0, src_id=file_identity(keep))
+            ops.append(to_vault)
+            ops.append(FileOp("link", planned_vault_dest, keep, phase=2, after=to_vault.key))
+            for l in losers:
+                removal = _plan_removal(l, phase=1, after=to_vault.key)
+                if removal is not None:
+                    ops.append(FileOp("link", planned_vault_dest, l, phase=2, after=removal.key))
         else:
-            try:
-                if vault and planned_vault_dest and keep:
-                    planned_vault_dest.parent.mkdir(parents=True, exist_ok=True)
-                    shutil.move(str(keep), str(planned_vault_dest))
-                    try:
-                        if keep.exists():
-                            keep.unlink()
-                    except Exception:
-                        pass
-                    os.link(str(planned_vault_dest), str(keep))
-                    link_ops += 1
-                    for l in losers:
-                        try:
-                            if backup:
-                                ensure_backup_move(l, backup, base_root or Path("/"))
-                            else:
-                                l.unlink(missing_ok=True)
-                        except Exception:
-                            pass
-                        try:
-                            os.link(str(planned_vault_dest), str(l))
-                            link_ops += 1
-                        except Exception as e:
-                            print(f"    WARN: failed to hardlink {rel(l)}: {e}")
-                    losers_processed += len(losers)
-                else:
-                    for l in losers:
-                        if backup:
-                            try:
-                                ensure_backup_move(l, backup, base_root or Path("/"))
-                            except Exception as e:
-                                print(f"    WARN: backup move failed for {rel(l)}: {e}")
-                                continue
-                        else:
-                            try:
-                                l.unlink(missing_ok=True)
-                            except Exception as e:
-                                print(f"    WARN: delete failed for {rel(l)}: {e}")
-                                continue
-                        losers_processed += 1
-            except Exception as e:
-                print(f"  ERROR applying group {gid}: {e}")
+            for l in losers:
+                _plan_removal(l, phase=0, after=None)
 
         if verbosity == 0:
             # terse 1-liner per group
@@ -569,9 +638,25 @@ def apply_report(
             links = (1 + len(losers)) if vault else 0
             print(f"[{_friendly_gid(method, gid)}] keep: {keep_name}  <- {len(losers)} losers; +{links} links")
 
-        if reporter:
+        if reporter and dry_run:
             reporter.inc_hashed(1, cache_hit=False)
 
+    result = None
+    journal: Optional[ApplyJournal] = None
+    if not dry_run and ops:
+        journal = ApplyJournal(journal_file)
+        result = ApplyEngine(workers=workers, journal=journal, reporter=reporter).run(ops)
+        failure_labels = {"delete": "delete failed for", "move": "move failed for", "link": "failed to hardlink"}
+        for op, err in result.failures:
+            target = op.dst if op.kind == "link" and op.dst else op.src
+            print(f"    WARN: {failure_labels.get(op.kind, op.kind)} {rel(target)}: {err}")
+        link_ops = result.completed.get("link", 0)
+        losers_processed = sum(1 for k in loser_keys if k in result.succeeded)
+        if result.interrupted or result.failures or result.skipped:
+            journal.close()
+        else:
+            journal.discard()
+
     # Footer summary
     if verbosity >= 0:
         print("")
@@ -581,6 +666,15 @@ def apply_report(
         if vault:
             print(f"  hardlinks created : {link_ops}" + (" (dry-run planned)" if dry_run else ""))
         print(f"  space reclaimable : { _fmt_bytes(total_size) }")
+        if result is not None:
+            if result.resumed:
+                print(f"  resumed (journal) : {result.resumed} operation(s) already done")
+            if result.copies:
+                print("  cross-device      : " + ", ".join(f"{n} via {m}" for m, n in sorted(result.copies.items())))
+            if result.failures or result.skipped:
+                print(f"  failed / skipped  : {len(result.failures)} / {result.skipped}")
+            if journal is not None and (result.interrupted or result.failures or result.skipped):
+                print(f"  journal           : {journal.path} (re-run to resume)")
         if set_sizes:
             s = sorted(set_sizes)
             n = len(s)
@@ -597,55 +691,52 @@ def apply_report(
 def collapse_report_file(in_path: Path, out_path: Optional[Path] = None, reporter: Any = None) -> Path:
     """
     Collapse overlapping groups in a report:
-      - Build a graph where each file path (keep+losers) is a node
-      - Connect nodes that appear together in any group
-      - Each connected component becomes a single collapsed group
+      - Stream the groups, union-ing every group's members (keep+losers) by path
+      - Each resulting set of connected paths becomes a single collapsed group
       - Winner picked by simple heuristic: bigger size first, then lexicographic path
 
+    Memory grows with the number of distinct paths, not with pairs of group members.
+    Sizes come from the recorded metadata; only paths without one are stat'ed. The
+    output uses the input's format (JSON or NDJSON).
+
     Returns the written output path.
     """
-    data = load_report(in_path)
-    groups = data.get("groups") or {}
-    if not groups:
-        out_path = out_path or in_path.with_name(in_path.stem + "-collapsed.json")
-        Path(out_path).write_text(json.dumps(data, indent=2), encoding="utf-8")
-        return Path(out_path)
-
-    # Build adjacency
-    adj: Dict[str, set[str]] = {}
-    def _add_edge(a: str, b: str):
-        if a not in adj: adj[a] = set()
-        if b not in adj: adj[b] = set()
-        adj[a].add(b)
-        adj[b].add(a)
-
-    all_paths: set[str] = set()
-    for g in groups.values():
-        members = [str(g.get("keep", ""))] + [str(x) for x in (g.get("losers") or [])]
-        members = [m for m in members if m]
-        for m in members:
-            all_paths.add(m)
-        for i in range(len(members)):
-            for j in range(i + 1, len(members)):
-                _add_edge(members[i], members[j])
-
-    # Connected components (BFS)
-    seen: set[str] = set()
-    comps: List[List[str]] = []
-    for n in list(all_paths):
-        if n in seen:
-            continue
-        q = [n]
-        seen.add(n)
-        comp = []
-        while q:
-            x = q.pop()
-            comp.append(x)
-            for y in adj.get(x, ()):
-                if y not in seen:
-                    seen.add(y)
-                    q.append(y)
-        comps.append(comp)
+    in_path = Path(in_path)
+    ids: Dict[str, int] = {}
+    parent: List[int] = []
+    meta: List[Dict[str, Any]] = []
+
+    def _find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def _node(p: str, m: Any) -> int:
+        # Overlap hints are relative to the source group, so they do not carry over
+        m = {k: v for k, v in m.items() if k != "overlap_hint"} if isinstance(m, dict) else {}
+        idx = ids.get(p)
+        if idx is None:
+            idx = ids[p] = len(parent)
+            parent.append(idx)
+            meta.append(m)
+        elif not meta[idx]:
+            meta[idx] = m
+        return idx
+
+    for _gid, g in iter_report_groups(in_path):
+        loser_meta = g.get("loser_meta") or {}
+        members = [(str(g.get("keep", "")), g.get("keep_meta"))]
+        members += [(str(x), loser_meta.get(str(x))) for x in (g.get("losers") or [])]
+        nodes = [_node(p, m) for p, m in members if p]
+        for other in nodes[1:]:
+            ra, rb = _find(nodes[0]), _find(other)
+            if ra != rb:
+                parent[rb] = ra
+
+    comps: Dict[int, List[str]] = {}
+    for p, idx in ids.items():
+        comps.setdefault(_find(idx), []).append(p)
 
     if reporter:
         try:
@@ -656,36 +747,31 @@ def collapse_report_file(in_path: Path, out_path: Optional[Path] = None, reporte
 
     # Pick winner per component
     def _size_of(p: str) -> int:
+        size = meta[ids[p]].get("size")
+        if size:
+            return int(size)
         try:
             return int(Path(p).stat().st_size)
         except Exception:
             return -1
 
-    collapsed: Dict[str, Dict[str, Any]] = {}
-    gid = 0
-    losers_total = 0
-    size_total = 0
-
-    for comp in comps:
-        sorted_comp = sorted(comp, key=lambda s: (_size_of(s), s), reverse=True)
-        keep = sorted_comp[0]
-        losers = sorted_comp[1:]
-        collapsed[f"collapsed:{gid}"] = {"keep": keep, "losers": losers, "method": "collapsed"}
-        gid += 1
-        losers_total += len(losers)
-        for lp in losers:
-            try:
-                size_total += Path(lp).stat().st_size
-            except Exception:
-                pass
-        if reporter:
-            reporter.inc_hashed(1, cache_hit=False)
-
-    payload = {
-        "summary": {"groups": len(collapsed), "losers": losers_total, "size_bytes": size_total},
-        "groups": collapsed,
-    }
-
-    out_path = out_path or in_path.with_name(in_path.stem + "-collapsed.json")
-    Path(out_path).write_text(json.dumps(payload, indent=2), encoding="utf-8")
-    return Path(out_path)
+    out_path = Path(out_path or in_path.with_name(in_path.stem + "-collapsed" + in_path.suffix))
+    with ReportWriter(out_path) as out:
+        for gid, comp in enumerate(comps.values()):
+            sizes = {p: _size_of(p) for p in comp}
+            sorted_comp = sorted(comp, key=lambda s: (sizes[s], s), reverse=True)
+            keep = sorted_comp[0]
+            losers = sorted_comp[1:]
+            out.add(
+                f"collapsed:{gid}",
+                {
+                    "keep": keep,
+                    "losers": losers,
+                    "method": "collapsed",
+                    "keep_meta": {**meta[ids[keep]], "size": max(sizes[keep], 0)},
+                    "loser_meta": {lp: {**meta[ids[lp]], "size": max(sizes[lp], 0)} for lp in losers},
+                },
+            )
+            if reporter:
+                reporter.inc_hashed(1, cache_hit=False)
+    return out_path
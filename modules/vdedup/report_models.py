@@ -1,9 +1,17 @@
 from __future__ import annotations
 
 import json
+import os
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Sequence
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Reports with these suffixes are NDJSON: one {"group": gid, ...entry} object per line,
+# closed by a {"summary": {...}} line. Anything else is a single JSON document.
+STREAMING_SUFFIXES = (".ndjson", ".jsonl")
+
+# Groups of an NDJSON report read together when one of them is first needed
+DEFAULT_PAGE_SIZE = 256
 
 
 @dataclass(slots=True)
@@ -42,21 +50,36 @@ class DuplicateGroup:
     losers: List[FileStats] = field(default_factory=list)
     source_report: Optional["ReportDocument"] = None
     raw_payload: Optional[Dict[str, Any]] = None
+    # Paged (NDJSON) reports fill losers/raw_payload on load(); the totals are known up front
+    pager: Optional["ReportPager"] = field(default=None, repr=False)
+    loser_total: int = 0
+    reclaim_total: int = 0
+    keep_score: Optional[Dict[str, Any]] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.pager is None
+
+    def load(self) -> "DuplicateGroup":
+        """Read the group's members if it came from a paged report (no-op otherwise)."""
+        if self.pager is not None:
+            self.pager.fill(self)
+        return self
 
     @property
     def duplicate_count(self) -> int:
-        return len(self.losers)
+        return len(self.losers) if self.loaded else self.loser_total
 
     @property
     def total_duplicate_size(self) -> int:
-        return sum(l.size for l in self.losers)
+        return sum(l.size for l in self.losers) if self.loaded else self.reclaim_total
 
     @property
     def reclaimable_bytes(self) -> int:
         return self.total_duplicate_size
 
     def evidence(self) -> Dict[str, Any]:
-        payload = self.raw_payload or {}
+        payload = self.load().raw_payload or {}
         evidence = payload.get("evidence")
         return evidence if isinstance(evidence, dict) else {}
 
@@ -100,44 +123,183 @@ def _safe_int(value: Any) -> Optional[int]:
         return None
 
 
+def is_streaming_report(path: Path) -> bool:
+    return Path(path).suffix.lower() in STREAMING_SUFFIXES
+
+
+def _report_records(path: Path) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (byte offset, object) for every non-empty line of an NDJSON report."""
+    offset = 0
+    with open(path, "rb") as fh:
+        for raw in fh:
+            if raw.strip():
+                yield offset, json.loads(raw)
+            offset += len(raw)
+
+
+def _split_record(record: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    payload = dict(record)
+    return str(payload.pop("group")), payload
+
+
+def iter_report_groups(path: Path) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Yield (group_id, entry) for every group of a report. NDJSON reports are read one
+    line at a time; JSON reports have to be parsed whole first.
+    """
+    if is_streaming_report(path):
+        for _offset, record in _report_records(Path(path)):
+            if "group" in record:
+                yield _split_record(record)
+        return
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    yield from (data.get("groups") or {}).items()
+
+
+def read_report(path: Path) -> Dict[str, Any]:
+    """Whole report as one {"summary": ..., "groups": {...}} dict, whatever its format."""
+    if not is_streaming_report(path):
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    data: Dict[str, Any] = {"groups": {}}
+    for _offset, record in _report_records(Path(path)):
+        if "group" in record:
+            gid, payload = _split_record(record)
+            data["groups"][gid] = payload
+        else:
+            data.update(record)
+    return data
+
+
+def _group_from_payload(gid: str, payload: Dict[str, Any]) -> DuplicateGroup:
+    keep_path = Path(payload.get("keep", "")).expanduser()
+    losers = [Path(p).expanduser() for p in (payload.get("losers") or [])]
+    keep_meta = payload.get("keep_meta") or payload.get("keep_stats") or {}
+    loser_meta_map = payload.get("loser_meta") or {}
+    return DuplicateGroup(
+        group_id=gid,
+        method=str(payload.get("method") or "unknown"),
+        keep=_build_stats(keep_path, keep_meta),
+        losers=[_build_stats(lp, loser_meta_map.get(str(lp), {})) for lp in losers],
+        raw_payload=payload,
+    )
+
+
+class ReportPager:
+    """
+    Lazily loaded groups of an NDJSON report.
+
+    Opening the report reads every line once but keeps only each group's byte offset,
+    keep file, loser count and reclaimable bytes (from the recorded loser sizes, so no
+    loser is stat'ed). The losers and evidence of a group are parsed when it is first
+    needed, together with the rest of its page of ``page_size`` groups.
+    """
+
+    def __init__(self, path: Path, *, page_size: int = DEFAULT_PAGE_SIZE):
+        self.path = Path(path)
+        self.page_size = max(1, int(page_size))
+        self.groups: List[DuplicateGroup] = []
+        self.trailer: Dict[str, Any] = {}
+        self.pages_loaded = 0
+        self._offsets: List[int] = []
+        self._index: Dict[str, int] = {}
+        for offset, record in _report_records(self.path):
+            if "group" not in record:
+                self.trailer.update(record)
+                continue
+            gid, payload = _split_record(record)
+            self._index[gid] = len(self.groups)
+            self._offsets.append(offset)
+            self.groups.append(self._summary_group(gid, payload))
+
+    def _summary_group(self, gid: str, payload: Dict[str, Any]) -> DuplicateGroup:
+        keep_path = Path(payload.get("keep", "")).expanduser()
+        losers = payload.get("losers") or []
+        loser_meta = payload.get("loser_meta") or {}
+        evidence = payload.get("evidence") if isinstance(payload.get("evidence"), dict) else {}
+        scores = evidence.get("scores") if isinstance(evidence.get("scores"), dict) else {}
+        keep_score = scores.get(str(payload.get("keep", "")))
+        return DuplicateGroup(
+            group_id=gid,
+            method=str(payload.get("method") or "unknown"),
+            keep=_build_stats(keep_path, payload.get("keep_meta") or payload.get("keep_stats") or {}),
+            pager=self,
+            loser_total=len(losers),
+            reclaim_total=sum(int((loser_meta.get(str(p)) or {}).get("size") or 0) for p in losers),
+            keep_score=keep_score if isinstance(keep_score, dict) else None,
+        )
+
+    def fill(self, group: DuplicateGroup) -> None:
+        """Load the page holding ``group``; every still-pending group on it is filled in."""
+        idx = self._index.get(group.group_id)
+        if idx is None or self.groups[idx] is not group:
+            group.pager = None
+            return
+        start = idx - idx % self.page_size
+        with open(self.path, "rb") as fh:
+            for i in range(start, min(start + self.page_size, len(self.groups))):
+                target = self.groups[i]
+                if target.pager is None:
+                    continue
+                fh.seek(self._offsets[i])
+                _gid, payload = _split_record(json.loads(fh.readline()))
+                full = _group_from_payload(target.group_id, payload)
+                target.losers = full.losers
+                target.raw_payload = payload
+                target.pager = None
+        self.pages_loaded += 1
+
+    def rewrite(self, updates: Dict[str, Dict[str, Any]]) -> None:
+        """Rewrite the report with the given groups replaced; all other lines are copied verbatim."""
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        offsets: List[int] = []
+        with open(self.path, "rb") as src, open(tmp, "wb") as dst:
+            for raw in src:
+                if not raw.strip():
+                    continue
+                record = json.loads(raw)
+                if "group" in record:
+                    offsets.append(dst.tell())
+                    gid = str(record["group"])
+                    if gid in updates:
+                        raw = (json.dumps({"group": gid, **updates[gid]}) + "\n").encode("utf-8")
+                dst.write(raw)
+        os.replace(tmp, self.path)
+        self._offsets = offsets
+
+
 @dataclass(slots=True)
 class ReportDocument:
     path: Path
     data: Dict[str, Any]
     groups: List[DuplicateGroup]
+    pager: Optional[ReportPager] = None
 
     def save(self) -> None:
+        if self.pager is not None:
+            # NDJSON: data["groups"] only holds the groups edited since loading
+            self.pager.rewrite(self.data.get("groups") or {})
+            return
         self.path.write_text(json.dumps(self.data, indent=2, sort_keys=True), encoding="utf-8")
 
 
-def load_report_documents(report_paths: Sequence[Path]) -> List[ReportDocument]:
+def load_report_documents(
+    report_paths: Sequence[Path],
+    *,
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> List[ReportDocument]:
     documents: List[ReportDocument] = []
     for rp in report_paths:
-        data = json.loads(Path(rp).read_text(encoding="utf-8"))
-        groups_raw: Dict[str, Dict[str, Any]] = data.get("groups", {}) or {}
-        groups: List[DuplicateGroup] = []
-        for gid, payload in groups_raw.items():
-            keep_path = Path(payload.get("keep", "")).expanduser()
-            losers = [Path(p).expanduser() for p in (payload.get("losers") or [])]
-            method = str(payload.get("method") or "unknown")
-            keep_meta = payload.get("keep_meta") or payload.get("keep_stats") or {}
-            loser_meta_map = payload.get("loser_meta") or {}
-            keep_stats = _build_stats(keep_path, keep_meta)
-            loser_stats = [
-                _build_stats(lp, loser_meta_map.get(str(lp), {})) for lp in losers
-            ]
-            groups.append(
-                DuplicateGroup(
-                    group_id=gid,
-                    method=method,
-                    keep=keep_stats,
-                    losers=loser_stats,
-                    source_report=None,  # patched below
-                    raw_payload=payload,
-                )
+        if is_streaming_report(rp):
+            pager = ReportPager(Path(rp), page_size=page_size)
+            document = ReportDocument(
+                path=Path(rp), data={**pager.trailer, "groups": {}}, groups=list(pager.groups), pager=pager
             )
-        document = ReportDocument(path=Path(rp), data=data, groups=groups)
-        for group in groups:
+        else:
+            data = json.loads(Path(rp).read_text(encoding="utf-8"))
+            groups_raw: Dict[str, Dict[str, Any]] = data.get("groups", {}) or {}
+            groups = [_group_from_payload(gid, payload) for gid, payload in groups_raw.items()]
+            document = ReportDocument(path=Path(rp), data=data, groups=groups)
+        for group in document.groups:
             group.source_report = document
         documents.append(document)
     return documents
@@ -145,7 +307,7 @@ def load_report_documents(report_paths: Sequence[Path]) -> List[ReportDocument]:
 
 def load_report_groups(report_path: Path) -> List[DuplicateGroup]:
     """
-    Load a dedupe report JSON and return structured groups with basic file stats.
+    Load a dedupe report (JSON or NDJSON) and return structured groups with basic file stats.
     """
     docs = load_report_documents([report_path])
     return docs[0].groups if docs else []
@@ -570,13 +570,8 @@ class DuplicateListManager:
         self._expanded: set[str] = set()
         self._group_map: Dict[str, DuplicateGroup] = {g.group_id: g for g in self._groups}
         self._selected_ids: set[str] = set()
+        # Filled per group on first use: evidence of paged groups is only read when they are loaded
         self._group_scores: Dict[str, Dict[str, Any]] = {}
-        for group in self._groups:
-            evidence = group.evidence() if hasattr(group, "evidence") else {}
-            if isinstance(evidence, dict):
-                scores_payload = evidence.get("scores")
-                if isinstance(scores_payload, dict):
-                    self._group_scores[group.group_id] = scores_payload
 
     @staticmethod
     def _display_name_for(path: Path, suffix: str) -> str:
@@ -609,10 +604,13 @@ class DuplicateListManager:
     def visible_rows(self) -> List[DuplicateListRow]:
         rows: List[DuplicateListRow] = []
         for group in self._groups:
+            if self.is_expanded(group.group_id):
+                group.load()
             keep = group.keep
-            # Determine minimal suffixes per path for display
-            paths = [keep.path] + [loser.path for loser in group.losers]
-            suffix_map = _unique_suffixes(paths)
+            # Determine minimal suffixes per path for display (collapsed paged groups show base names)
+            suffix_map: Dict[Path, str] = {}
+            if group.loaded:
+                suffix_map = _unique_suffixes([keep.path] + [loser.path for loser in group.losers])
             keep_score, keep_payload = self._score_entry(group.group_id, keep.path)
             keep_row = DuplicateListRow(
                 group_id=group.group_id,
@@ -671,10 +669,16 @@ class DuplicateListManager:
         self._group_map = {g.group_id: g for g in self._groups}
 
     def get_group(self, group_id: str) -> Optional[DuplicateGroup]:
-        return self._group_map.get(group_id)
+        group = self._group_map.get(group_id)
+        return group.load() if group else None
 
     def score_map_for(self, group_id: str) -> Dict[str, Any]:
-        return self._group_scores.get(group_id, {})
+        if group_id not in self._group_scores:
+            group = self.get_group(group_id)
+            evidence = group.evidence() if group else {}
+            scores_payload = evidence.get("scores") if isinstance(evidence, dict) else None
+            self._group_scores[group_id] = scores_payload if isinstance(scores_payload, dict) else {}
+        return self._group_scores[group_id]
 
     def set_selected(self, row_ids: Iterable[str]) -> None:
         self._selected_ids = {rid for rid in row_ids if rid}
@@ -687,7 +691,7 @@ class DuplicateListManager:
             row.selected = self.is_selected(getattr(row, "row_id", None))
 
     def promote_to_master(self, group_id: str, new_master_path: Path) -> bool:
-        group = self._group_map.get(group_id)
+        group = self.get_group(group_id)
         if not group:
             return False
         target = None
@@ -722,8 +726,12 @@ class DuplicateListManager:
         return True
 
     def _score_entry(self, group_id: str, path: Path) -> Tuple[Optional[float], Optional[Dict[str, Any]]]:
-        score_map = self._group_scores.get(group_id, {})
-        entry = score_map.get(str(path))
+        group = self._group_map.get(group_id)
+        if group is not None and not group.loaded:
+            # The keep score is indexed with the group summary; nothing else is shown collapsed
+            entry = group.keep_score if path == group.keep.path else None
+        else:
+            entry = self.score_map_for(group_id).get(str(path))
         if isinstance(entry, dict):
             final = entry.get("final")
             try:
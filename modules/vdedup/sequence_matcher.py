@@ -328,11 +328,21 @@ def find_all_overlaps(
     )
 
     overlaps = []
+    position = {fp.path: i for i, fp in enumerate(fingerprints)}
 
-    # Compare all pairs
+    # Only verify pairs the index reports as sharing enough frames for a streak;
+    # any other pair cannot yield min_streak_length matches, so skipping it is exact.
     for i, fp_a in enumerate(fingerprints):
-        for fp_b in fingerprints[i+1:]:
-            overlap = matcher.find_overlap(fp_a, fp_b, index)
+        candidates = index.find_matching_videos(
+            fp_a,
+            hamming_threshold=hamming_threshold,
+            min_matching_frames=min_streak_length
+        )
+        for video_path, _count in candidates:
+            j = position.get(video_path)
+            if j is None or j <= i:
+                continue
+            overlap = matcher.find_overlap(fp_a, fingerprints[j], index)
 
             if overlap and overlap.overlap_ratio >= min_overlap_ratio:
                 overlaps.append(overlap)
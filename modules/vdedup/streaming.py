@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+vdedup.streaming
+
+Bounded producer/consumer plumbing for the front of the pipeline
+(discovery -> stat -> partial hash), so each step starts while the previous one is
+still running and memory stays bounded by queue sizes rather than library size.
+
+- stream_map(fn, source, workers): a feeder thread pulls ``source`` (e.g. a directory
+  walk) into a bounded queue, worker threads apply ``fn``, and results are yielded in
+  completion order. A slow consumer blocks the workers, which block the feeder.
+- WorkQueue(fn, workers): fire-and-forget workers behind a bounded queue; submit()
+  blocks while the queue is full (back-pressure on the submitting thread).
+
+Worker and source exceptions are re-raised in the consuming thread.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+from typing import Any, Callable, Iterable, Iterator, List, Optional
+
+DEFAULT_QUEUE_SIZE = 256
+
+_DONE = object()
+_POLL_SECONDS = 0.1
+
+
+def _put(q: "queue.Queue[Any]", item: Any, cancel: threading.Event) -> bool:
+    """Blocking put that gives up once ``cancel`` is set."""
+    while not cancel.is_set():
+        try:
+            q.put(item, timeout=_POLL_SECONDS)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q: "queue.Queue[Any]", cancel: threading.Event) -> Any:
+    """Blocking get that returns _DONE once ``cancel`` is set."""
+    while not cancel.is_set():
+        try:
+            return q.get(timeout=_POLL_SECONDS)
+        except queue.Empty:
+            continue
+    return _DONE
+
+
+def stream_map(
+    fn: Callable[[Any], Any],
+    source: Iterable[Any],
+    workers: int,
+    *,
+    maxsize: int = DEFAULT_QUEUE_SIZE,
+    stop: Optional[Callable[[], bool]] = None,
+) -> Iterator[Any]:
+    """
+    Yield ``fn(item)`` for every item of ``source``, in completion order.
+
+    At most ``maxsize`` items wait in each queue. ``stop()`` returning True ends the
+    feed early (items already queued still complete). Closing the generator early
+    cancels the remaining work.
+    """
+    workers = max(1, int(workers))
+    inbox: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, maxsize))
+    outbox: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, maxsize))
+    cancel = threading.Event()
+    errors: List[BaseException] = []
+
+    def feed() -> None:
+        try:
+            for item in source:
+                if cancel.is_set() or (stop is not None and stop()):
+                    break
+                if not _put(inbox, item, cancel):
+                    return
+        except BaseException as exc:  # surfaced by the consumer
+            errors.append(exc)
+        finally:
+            for _ in range(workers):
+                _put(inbox, _DONE, cancel)
+
+    def work() -> None:
+        try:
+            while True:
+                item = _get(inbox, cancel)
+                if item is _DONE:
+                    break
+                if not _put(outbox, fn(item), cancel):
+                    return
+        except BaseException as exc:
+            errors.append(exc)
+            cancel.set()
+        finally:
+            _put(outbox, _DONE, cancel)
+
+    # Daemon threads: a feeder stuck in a slow directory walk must not block interpreter exit
+    threads = [threading.Thread(target=feed, name="vdedup-feed", daemon=True)]
+    threads += [threading.Thread(target=work, name=f"vdedup-stream-{i}", daemon=True) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+
+    finished = 0
+    try:
+        while finished < workers:
+            try:
+                item = outbox.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                if cancel.is_set():
+                    break
+                continue
+            if item is _DONE:
+                finished += 1
+                continue
+            yield item
+        if errors:
+            raise errors[0]
+    finally:
+        cancel.set()
+        for thread in threads[1:]:
+            thread.join()
+
+
+class WorkQueue:
+    """
+    Fixed pool of worker threads applying ``fn`` to submitted items; results are
+    delivered by ``fn`` itself (e.g. appending to a locked map).
+
+    submit() blocks while ``maxsize`` items are waiting, join() drains the queue and
+    re-raises the first worker exception. A failing item still counts as completed;
+    the first failure stops the workers, abandoning queued items (see ``finished``).
+    """
+
+    def __init__(self, fn: Callable[[Any], Any], workers: int, *, maxsize: int = DEFAULT_QUEUE_SIZE):
+        self._fn = fn
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, maxsize))
+        self._cancel = threading.Event()
+        self._errors: List[BaseException] = []
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self._threads = [
+            threading.Thread(target=self._work, name=f"vdedup-work-{i}", daemon=True)
+            for i in range(max(1, int(workers)))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return self.submitted - self.completed
+
+    @property
+    def finished(self) -> bool:
+        """True once every submitted item completed, or the queue was cancelled or failed."""
+        return self.pending <= 0 or self._cancel.is_set()
+
+    def _work(self) -> None:
+        while True:
+            item = _get(self._queue, self._cancel)
+            if item is _DONE:
+                return
+            try:
+                self._fn(item)
+            except BaseException as exc:  # re-raised by submit()/join()
+                self._errors.append(exc)
+                self._cancel.set()
+                return
+            finally:
+                with self._lock:
+                    self.completed += 1
+
+    def submit(self, item: Any) -> None:
+        if self._errors:
+            raise self._errors[0]
+        with self._lock:
+            self.submitted += 1
+        if not _put(self._queue, item, self._cancel) and self._errors:
+            raise self._errors[0]
+
+    def join(self) -> None:
+        for _ in self._threads:
+            _put(self._queue, _DONE, self._cancel)
+        for thread in self._threads:
+            thread.join()
+        if self._errors:
+            raise self._errors[0]
+
+    def cancel(self) -> None:
+        """Abandon queued items and stop the workers after their current item."""
+        self._cancel.set()
+        for thread in self._threads:
+            thread.join()
@@ -6,7 +6,12 @@ from typing import Dict, Tuple
 import pytest
 
 from vdedup.models import VideoMeta
-from vdedup.pipeline import PipelineConfig, _score_metadata_cluster, run_pipeline
+from vdedup.pipeline import (
+    PipelineConfig,
+    _phash_candidate_neighbors,
+    _score_metadata_cluster,
+    run_pipeline,
+)
 from vdedup.progress import ProgressReporter
 
 
@@ -244,6 +249,150 @@ def test_subset_stage_handles_multiple_partials(tmp_path: Path, monkeypatch: pyt
         assert str(base) in hints
 
 
+def test_phash_index_engine_groups_near_duplicates(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, reporter: ProgressReporter) -> None:
+    root = tmp_path / "indexed"
+    names = ("orig.mp4", "reencode.mp4", "other.mp4")
+    for idx, name in enumerate(names):
+        _touch(root / name, bytes([idx]) * (64 + idx))
+
+    base_sig = (0x1234_5678_9ABC_DEF0, 0x0FED_CBA9_8765_4321, 0xAAAA_5555_AAAA_5555)
+    signatures = {
+        "orig.mp4": base_sig,
+        "reencode.mp4": tuple(h ^ 0b101 for h in base_sig),
+        "other.mp4": tuple(~h & 0xFFFF_FFFF_FFFF_FFFF for h in base_sig),
+    }
+
+    def fake_phash(path: Path, **_: object) -> Tuple[int, ...]:
+        return signatures[path.name]
+
+    monkeypatch.setattr("vdedup.phash.compute_phash_signature", fake_phash)
+
+    cfg = PipelineConfig(threads=1, phash_frames=3, phash_threshold=6, q4_engine="index")
+    groups = run_pipeline(
+        root=root,
+        patterns=["*.mp4"],
+        max_depth=None,
+        selected_stages=[4],
+        cfg=cfg,
+        cache=None,
+        reporter=reporter,
+    )
+
+    phash_groups = [members for key, members in groups.items() if key.startswith("phash:")]
+    assert len(phash_groups) == 1
+    assert {m.path.name for m in phash_groups[0]} == {"orig.mp4", "reencode.mp4"}
+    metrics = reporter.stage_metrics["q4_phash"]
+    assert metrics["engine"] == "index"
+    assert metrics["comparisons"] == "1"
+
+
+def test_phash_auto_index_keeps_pairs_at_the_threshold(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, reporter: ProgressReporter) -> None:
+    import random
+
+    rng = random.Random(11)
+    root = tmp_path / "many"
+    # 12 differing bits per frame, 3 in each 16-bit index segment
+    spread = sum(1 << (16 * seg + bit) for seg in range(4) for bit in (2, 8, 14))
+    signatures: Dict[str, Tuple[int, ...]] = {}
+    for pair in range(130):
+        base = (rng.getrandbits(64), rng.getrandbits(64))
+        signatures[f"p{pair:03d}a.mp4"] = base
+        signatures[f"p{pair:03d}b.mp4"] = tuple(h ^ spread for h in base)
+    for idx, name in enumerate(signatures):
+        _touch(root / name, idx.to_bytes(2, "big") * 8)
+
+    def fake_phash(path: Path, **_: object) -> Tuple[int, ...]:
+        return signatures[path.name]
+
+    monkeypatch.setattr("vdedup.phash.compute_phash_signature", fake_phash)
+
+    cfg = PipelineConfig(threads=1, phash_frames=2, phash_threshold=12)
+    groups = run_pipeline(
+        root=root,
+        patterns=["*.mp4"],
+        max_depth=None,
+        selected_stages=[4],
+        cfg=cfg,
+        cache=None,
+        reporter=reporter,
+    )
+
+    phash_groups = sorted(sorted(m.path.name for m in members) for key, members in groups.items() if key.startswith("phash:"))
+    assert phash_groups == [[f"p{pair:03d}a.mp4", f"p{pair:03d}b.mp4"] for pair in range(130)]
+    assert reporter.stage_metrics["q4_phash"]["engine"] == "index"
+
+
+def test_phash_index_engine_finds_the_same_subsets_as_pairwise(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    import random
+
+    import vdedup.pipeline as pipeline_mod
+
+    rng = random.Random(5)
+    master = tuple(rng.getrandbits(64) for _ in range(20))
+    # 9 bits off per frame: beyond phash_threshold, within subset_frame_threshold
+    noise = sum(1 << bit for bit in (1, 9, 17, 25, 33, 41, 49, 57, 63))
+    signatures = {"master.mp4": master, "clip.mp4": tuple(h ^ noise for h in master[5:10])}
+    durations = {"master.mp4": 40.0, "clip.mp4": 10.0}
+    for idx, name in enumerate(signatures):
+        _touch(tmp_path / "subsets" / name, bytes([idx]) * (64 + idx))
+
+    class FakeProbes:
+        backend = "fake"
+
+        def __init__(self, cache=None, *, workers=1) -> None:
+            pass
+
+        def cached(self, path, size=None, mtime=None):
+            return None
+
+        def probe(self, path, size=None, mtime=None):
+            return {"duration": durations[path.name], "width": 1280, "height": 720, "vcodec": "h264"}
+
+    def fake_phash(path: Path, **_: object) -> Tuple[int, ...]:
+        return signatures[path.name]
+
+    monkeypatch.setattr(pipeline_mod, "ProbeService", FakeProbes)
+    monkeypatch.setattr("vdedup.phash.compute_phash_signature", fake_phash)
+
+    results = {}
+    for engine in ("pairwise", "index"):
+        cfg = PipelineConfig(
+            threads=1, phash_threshold=6, subset_detect=True, subset_frame_threshold=14, subset_min_ratio=0.2, q4_engine=engine,
+        )
+        groups = run_pipeline(
+            root=tmp_path / "subsets",
+            patterns=["*.mp4"],
+            max_depth=None,
+            selected_stages=[3, 4],
+            cfg=cfg,
+            cache=None,
+            reporter=ProgressReporter(enable_dash=False),
+        )
+        results[engine] = sorted(
+            sorted(m.path.name for m in members) for key, members in groups.items() if key.startswith("subset:")
+        )
+
+    assert results["pairwise"] == [["clip.mp4", "master.mp4"]]
+    assert results["index"] == results["pairwise"]
+
+
+def test_phash_candidate_neighbors_skips_unrelated(tmp_path: Path) -> None:
+    sig = (0x1111_2222_3333_4444, 0x5555_6666_7777_8888)
+    far = tuple(~h & 0xFFFF_FFFF_FFFF_FFFF for h in sig)
+    vids = [
+        VideoMeta(path=tmp_path / "a.mp4", size=1, mtime=0.0, duration=10.0, phash_signature=sig),
+        VideoMeta(path=tmp_path / "b.mp4", size=1, mtime=0.0, duration=10.0, phash_signature=far),
+        VideoMeta(path=tmp_path / "c.mp4", size=1, mtime=0.0, duration=10.0, phash_signature=sig),
+        VideoMeta(path=tmp_path / "d.mp4", size=1, mtime=0.0, duration=10.0),
+    ]
+
+    neighbors = _phash_candidate_neighbors(vids, frame_threshold=4)
+    assert neighbors[0] == {2}
+    assert neighbors[2] == {0}
+    assert not neighbors.get(1)
+    assert not neighbors.get(3)
+
+
 def test_score_metadata_cluster_filters_low_confidence(tmp_path: Path, reporter: ProgressReporter) -> None:
     base = tmp_path / "meta_cluster"
     base.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Tests for spectral audio landmarks and inverted-index matching (Q6).
+"""
+import io
+from pathlib import Path
+from typing import Tuple
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from vdedup.audio import analysis_hop, fingerprint_pcm_stream, pack_landmark, unpack_landmark
+from vdedup.audio_index import AudioIndex
+from vdedup.pipeline import PipelineConfig, run_pipeline
+from vdedup.progress import ProgressReporter
+
+RATE = 8000
+
+
+def _music(seed: int, seconds: float) -> "np.ndarray":
+    """Quarter-second chords of random partials: stable spectral peaks, distinct per seed."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(RATE // 4) / RATE
+    notes = []
+    for _ in range(int(seconds * 4)):
+        freqs = rng.uniform(200, 2500, size=3)
+        notes.append(sum(np.sin(2 * np.pi * f * t) * a for f, a in zip(freqs, (1.0, 0.6, 0.4))))
+    return np.concatenate(notes) * 6000
+
+
+def _fingerprint(samples: "np.ndarray") -> Tuple[int, ...]:
+    pcm = np.clip(samples, -32768, 32767).astype("<i2").tobytes()
+    sig = fingerprint_pcm_stream(io.BytesIO(pcm), sample_rate=RATE)
+    assert sig is not None
+    return sig
+
+
+def test_landmarks_pack_hash_and_offset() -> None:
+    assert unpack_landmark(pack_landmark(0xABCDE, 77)) == (0xABCDE, 77)
+
+
+def test_gain_change_and_noise_still_match() -> None:
+    original = _music(1, 30)
+    rng = np.random.default_rng(5)
+    quieter = original * 0.4 + rng.normal(0, 300, len(original))
+
+    index = AudioIndex()
+    a = index.add(_fingerprint(original))
+    index.add(_fingerprint(_music(2, 30)))
+
+    matches = index.query(_fingerprint(quieter), min_score=0.2)
+
+    assert [m.item for m in matches] == [a]
+    assert matches[0].offset == 0
+
+
+def test_subset_clip_is_found_at_its_offset() -> None:
+    full = _music(3, 40)
+    start = 12 * RATE + 137  # deliberately not on a frame boundary
+    clip = full[start:start + 15 * RATE]
+
+    index = AudioIndex()
+    item = index.add(_fingerprint(full))
+
+    matches = index.query(_fingerprint(clip), min_score=0.2)
+
+    assert [m.item for m in matches] == [item]
+    assert abs(matches[0].offset - start / analysis_hop(RATE)) <= 1
+
+
+def test_silence_yields_no_fingerprint() -> None:
+    assert fingerprint_pcm_stream(io.BytesIO(bytes(RATE * 2 * 10)), sample_rate=RATE) is None
+
+
+def test_q6_groups_duplicates_and_subsets_through_the_index(monkeypatch, tmp_path: Path) -> None:
+    root = tmp_path / "lib"
+    root.mkdir()
+    full = _music(4, 40)
+    sigs = {
+        "song.mp4": _fingerprint(full),
+        "song_quiet.mp4": _fingerprint(full * 0.5),
+        "excerpt.mp4": _fingerprint(full[10 * RATE:30 * RATE]),
+        "other.mp4": _fingerprint(_music(6, 40)),
+    }
+    # Without probe data Q6 compares lengths by size in MiB; sparse files keep that cheap
+    sizes_mib = {"song.mp4": 40, "song_quiet.mp4": 40, "excerpt.mp4": 20, "other.mp4": 41}
+    for name, mib in sizes_mib.items():
+        with open(root / name, "wb") as fh:
+            fh.truncate(mib * 1024 * 1024)
+
+    monkeypatch.setattr("vdedup.audio.compute_audio_fingerprint", lambda path, **_: sigs[path.name])
+
+    groups = run_pipeline(
+        roots=[root],
+        patterns=["*.mp4"],
+        max_depth=None,
+        selected_stages=[6],
+        cfg=PipelineConfig(threads=2, subset_min_ratio=0.3),
+        reporter=ProgressReporter(enable_dash=False),
+    )
+
+    members = {gid.split(":")[0]: sorted(m.path.name for m in vms) for gid, vms in groups.items()}
+    assert members["audio"] == ["song.mp4", "song_quiet.mp4"]
+    assert "excerpt.mp4" in members["audio-sub"]
+    assert len(groups) == 2
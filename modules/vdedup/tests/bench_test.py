@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Tests for the benchmark harness (corpus truth, stage sampling, scoring, comparison).
+"""
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+from vdedup.bench import compare_results, generate_corpus, main, run_bench, score_groups
+from vdedup.models import FileMeta
+from vdedup.pipeline import PipelineConfig
+
+
+def _byte_corpus(root: Path) -> Path:
+    """Corpus of plain files: a0 has an exact copy, b0 has none (a negative)."""
+    (root / "original").mkdir(parents=True)
+    (root / "variants" / "a0").mkdir(parents=True)
+    (root / "original" / "a0.mp4").write_bytes(b"alpha" * 100)
+    (root / "variants" / "a0" / "a0_copy.mp4").write_bytes(b"alpha" * 100)
+    (root / "original" / "b0.mp4").write_bytes(b"bravo" * 90)
+    truth = {
+        "version": 1,
+        "keys": {
+            "a0": {"original": "original/a0.mp4", "variants": ["variants/a0/a0_copy.mp4"]},
+            "b0": {"original": "original/b0.mp4", "variants": []},
+        },
+    }
+    (root / "truth.json").write_text(json.dumps(truth), encoding="utf-8")
+    return root
+
+
+def test_score_groups_counts_pairs_per_method(tmp_path: Path) -> None:
+    a, b, c, d = (tmp_path / n for n in "abcd")
+    truth = [[a, b, c], [d]]
+    groups = {
+        "hash:x": [FileMeta(path=a, size=1, mtime=0), FileMeta(path=b, size=1, mtime=0)],
+        "phash:0": [FileMeta(path=c, size=1, mtime=0), FileMeta(path=d, size=1, mtime=0)],
+    }
+
+    acc = score_groups(groups, truth)
+
+    assert (acc["expected_pairs"], acc["tp"], acc["fp"], acc["fn"]) == (3, 1, 1, 2)
+    assert acc["precision"] == 0.5
+    assert acc["by_method"]["hash"] == {"pairs": 1, "tp": 1, "precision": 1.0}
+    assert acc["by_method"]["phash"]["precision"] == 0.0
+
+
+def test_run_bench_records_stage_samples_and_accuracy(tmp_path: Path) -> None:
+    root = _byte_corpus(tmp_path / "corpus")
+
+    result = run_bench(root, stages=[1, 2], cfg=PipelineConfig(threads=2), overhead_calls=2000)
+
+    assert {"scanning files", "Q1 size bucketing", "Q2 partial", "Q2 full hash"} <= set(result["stages"])
+    q2 = result["stages"]["Q2 partial"]
+    assert q2["items"] == 2 and q2["wall_seconds"] >= 0
+    assert result["accuracy"]["recall"] == 1.0 and result["accuracy"]["precision"] == 1.0
+    assert {"locked_ns_per_call", "sharded_ns_per_call", "share_pct"} <= set(result["reporter"])
+    json.dumps(result)  # comparable between runs means serialisable
+
+
+def test_compare_flags_slowdowns_and_accuracy_drops() -> None:
+    previous = {"stages": {"Q4 pHash": {"wall_seconds": 10.0, "ffmpeg_seconds": 4.0}},
+                "accuracy": {"precision": 0.9, "recall": 0.8}}
+    current = {"stages": {"Q4 pHash": {"wall_seconds": 10.5, "ffmpeg_seconds": 6.0}},
+               "accuracy": {"precision": 0.9, "recall": 0.75}}
+
+    rows = {r["metric"]: r for r in compare_results(previous, current, threshold=10.0)}
+
+    assert not rows["Q4 pHash.wall_seconds"]["regression"]
+    assert rows["Q4 pHash.ffmpeg_seconds"]["regression"]
+    assert rows["accuracy.recall"]["regression"]
+    assert not rows["accuracy.precision"]["regression"]
+
+
+def test_cli_writes_results_and_returns_regression_status(tmp_path: Path) -> None:
+    root = _byte_corpus(tmp_path / "corpus")
+    first = tmp_path / "first.json"
+    assert main(["-c", str(root), "-o", str(tmp_path), "-p", "1-2", "-R", str(first)]) == 0
+
+    # Against a baseline with higher recall the same run counts as a regression
+    previous = json.loads(first.read_text(encoding="utf-8"))
+    previous["accuracy"]["recall"] = 1.5
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(previous), encoding="utf-8")
+    second = tmp_path / "second.json"
+    assert main(["-c", str(root), "-o", str(tmp_path), "-p", "1-2", "-R", str(second), "-C", str(baseline)]) == 1
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not available")
+def test_generate_corpus_is_reused_for_the_same_spec(tmp_path: Path) -> None:
+    spec = dict(sources=1, seed=3, duration=2.0, variants=("copy", "noaudio"), negatives=1)
+    first = generate_corpus(tmp_path, **spec)
+    truth = json.loads((tmp_path / "truth.json").read_text(encoding="utf-8"))
+    assert len(truth["keys"]) == 2 and first["files"] == 4
+    assert generate_corpus(tmp_path, **spec) == first
@@ -6,7 +6,7 @@ import tempfile
 import time
 from pathlib import Path
 
-from vdedup.cache import HashCache
+from vdedup.cache import HashCache, SqliteHashCache, open_cache
 
 
 def test_cache_mtime_validation():
@@ -106,6 +106,75 @@ def test_cache_all_getters_validation():
         cache.close()
 
 
+def test_jsonl_compaction_keeps_latest_record():
+    """put_field appends a full record per call; compact() rewrites one line per key."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache_path = Path(temp_dir) / "test_cache.jsonl"
+        test_file = Path(temp_dir) / "test_file.txt"
+        test_file.write_text("test content")
+        stat = test_file.stat()
+
+        cache = HashCache(cache_path)
+        cache.open_append()
+        cache.put_field(test_file, stat.st_size, stat.st_mtime, "sha256", "fake_hash")
+        cache.put_field(test_file, stat.st_size, stat.st_mtime, "phash", [1, 2])
+        assert len(cache_path.read_text().strip().splitlines()) == 2
+
+        cache.compact()
+        cache.close()
+        assert len(cache_path.read_text().strip().splitlines()) == 1
+
+        reloaded = HashCache(cache_path)
+        assert reloaded.get_sha256(test_file, stat.st_size, stat.st_mtime) == "fake_hash"
+        assert reloaded.get_phash(test_file, stat.st_size, stat.st_mtime) == [1, 2]
+
+
+def test_sqlite_cache_tolerance_and_persistence():
+    """The SQLite backend honours the same 1s mtime tolerance and survives reopen."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache_path = Path(temp_dir) / "test_cache.sqlite"
+        test_file = Path(temp_dir) / "test_file.txt"
+        test_file.write_text("test content")
+        stat = test_file.stat()
+
+        cache = SqliteHashCache(cache_path)
+        cache.put_field(test_file, stat.st_size, stat.st_mtime, "sha256", "fake_hash")
+        cache.put_field(test_file, stat.st_size, stat.st_mtime, "video_meta", {"duration": 1.5})
+        assert cache.get_sha256(test_file, stat.st_size, stat.st_mtime + 0.5) == "fake_hash"
+        assert cache.get_sha256(test_file, stat.st_size, stat.st_mtime + 2.0) is None
+        assert cache.get_sha256(test_file, stat.st_size + 1, stat.st_mtime) is None
+        cache.close()
+
+        reopened = SqliteHashCache(cache_path)
+        try:
+            assert len(reopened) == 1
+            assert reopened.get_video_meta(test_file, stat.st_size, stat.st_mtime) == {"duration": 1.5}
+        finally:
+            reopened.close()
+
+
+def test_open_cache_imports_legacy_jsonl():
+    """A fresh SQLite cache picks up records from the sibling JSONL cache."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        legacy_path = Path(temp_dir) / "vdedup-q2-cache.jsonl"
+        test_file = Path(temp_dir) / "test_file.txt"
+        test_file.write_text("test content")
+        stat = test_file.stat()
+
+        legacy = HashCache(legacy_path)
+        legacy.open_append()
+        legacy.put_field(test_file, stat.st_size, stat.st_mtime, "blake3_full", "legacy_hash")
+        legacy.close()
+
+        cache = open_cache(legacy_path, backend="sqlite")
+        try:
+            assert isinstance(cache, SqliteHashCache)
+            assert cache.path == legacy_path.with_suffix(".sqlite")
+            assert cache.get_field(test_file, stat.st_size, stat.st_mtime, "blake3_full") == "legacy_hash"
+        finally:
+            cache.close()
+
+
 if __name__ == "__main__":
     test_cache_mtime_validation()
     test_cache_tolerance()
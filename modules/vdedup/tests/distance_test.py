@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared Hamming-distance kernels (vectorised vs scalar reference).
+"""
+import random
+
+import pytest
+
+import vdedup.distance as distance
+
+
+def _ref_hamming(a: int, b: int) -> int:
+    return bin((a ^ b) & 0xFFFFFFFFFFFFFFFF).count("1")
+
+
+def _random_sig(rng: random.Random, n: int):
+    return [rng.getrandbits(64) for _ in range(n)]
+
+
+def test_one_to_many_and_matrix_match_reference():
+    rng = random.Random(7)
+    hashes = _random_sig(rng, 80)
+    probe = rng.getrandbits(64)
+    assert distance.hamming_one_to_many(probe, hashes) == [_ref_hamming(probe, h) for h in hashes]
+
+    a, b = hashes[:40], hashes[40:]
+    block = distance.hamming_matrix(a, b)
+    for i, x in enumerate(a):
+        for j, y in enumerate(b):
+            assert int(block[i][j]) == _ref_hamming(x, y)
+
+
+def test_hamming_without_int_bit_count(monkeypatch):
+    # Python 3.9 has no int.bit_count()
+    rng = random.Random(3)
+    pairs = [(rng.getrandbits(64), rng.getrandbits(70)) for _ in range(50)] + [(5, 3), (-1, 0)]
+    monkeypatch.setattr(distance, "_int_popcount", distance._bin_popcount)
+    assert [distance.hamming(a, b) for a, b in pairs] == [_ref_hamming(a, b) for a, b in pairs]
+
+
+def test_prefix_distances_use_common_prefix():
+    rng = random.Random(11)
+    sigs = [_random_sig(rng, n) for n in (5, 40, 64, 3, 0)]
+    matrix, lengths = distance.pack_matrix(sigs)
+    probe = _random_sig(rng, 50)
+
+    totals, counts = distance.prefix_distances(probe, matrix, lengths)
+    for sig, total, count in zip(sigs, totals, counts):
+        assert count == min(len(probe), len(sig))
+        assert total == sum(_ref_hamming(x, y) for x, y in zip(probe, sig))
+
+    assert distance.avg_signature_distance(probe, sigs[1]) == pytest.approx(totals[1] / counts[1])
+    assert distance.avg_signature_distance(probe, []) == float("inf")
+
+
+@pytest.mark.parametrize("short_len,long_len", [(3, 7), (12, 40), (30, 31), (50, 160)])
+def test_best_alignment_matches_scalar_path(monkeypatch, short_len, long_len):
+    rng = random.Random(short_len * 1000 + long_len)
+    long_sig = _random_sig(rng, long_len)
+    start = rng.randrange(0, long_len - short_len + 1)
+    short_sig = [h ^ (1 << rng.randrange(64)) for h in long_sig[start:start + short_len]]
+
+    vectorised = distance.best_alignment(short_sig, long_sig)
+    monkeypatch.setattr(distance, "_NUMPY_AVAILABLE", False)
+    scalar = distance.best_alignment(short_sig, long_sig)
+
+    assert vectorised == scalar
+    assert vectorised is not None and vectorised[0] <= 1.0
+
+
+def test_adjacent_variation_matches_reference():
+    rng = random.Random(3)
+    sig = _random_sig(rng, 48)
+    expected = sum(_ref_hamming(sig[i], sig[i + 1]) for i in range(len(sig) - 1)) / (len(sig) - 1)
+    assert distance.adjacent_variation(sig) == pytest.approx(expected)
+    assert distance.adjacent_variation(sig[:1]) == 0.0
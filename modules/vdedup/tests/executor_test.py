@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Tests for the thread/process stage executor layer.
+"""
+import math
+
+from vdedup.executor import StageExecutor
+from vdedup.progress import ProgressReporter
+
+
+def test_thread_map_keeps_order_and_reports_utilisation() -> None:
+    reporter = ProgressReporter(enable_dash=False)
+    with StageExecutor("thread", 4, reporter=reporter, stage="Q2 partial") as ex:
+        assert list(ex.map(lambda x: x * 2, range(50))) == [x * 2 for x in range(50)]
+        assert ex.mode == "thread"
+
+    metrics = reporter.stage_metrics["q2_partial"]
+    assert metrics["executor"] == "thread x4"
+    assert metrics["utilisation"].endswith("%")
+
+
+def test_process_map_runs_chunked_batches_in_order() -> None:
+    items = list(range(200))
+    with StageExecutor("process", 2, cpu_bound=True, total=len(items)) as ex:
+        out = list(ex.map(math.sqrt, items))
+        assert ex.mode == "process"
+    assert out == [math.sqrt(x) for x in items]
+
+
+def test_process_mode_keeps_unpicklable_work_on_threads() -> None:
+    offset = 3
+    with StageExecutor("process", 2, cpu_bound=True) as ex:
+        assert list(ex.map(lambda x: x + offset, [1, 2])) == [4, 5]
+        assert ex.call(lambda: offset) == 3
+        assert ex.mode == "thread"
+
+
+def test_auto_uses_processes_only_for_large_cpu_bound_batches() -> None:
+    assert not StageExecutor("auto", 4, cpu_bound=True, total=10).uses_processes(math.sqrt)
+    assert StageExecutor("auto", 4, cpu_bound=True, total=500).uses_processes(math.sqrt)
+    assert not StageExecutor("auto", 4, cpu_bound=False, total=500).uses_processes(math.sqrt)
+    assert not StageExecutor("process", 1, cpu_bound=True).uses_processes(math.sqrt)
+
+
+def test_quit_skips_remaining_cpu_bound_items() -> None:
+    reporter = ProgressReporter(enable_dash=False)
+    reporter._quit_evt.set()
+    with StageExecutor("thread", 2, reporter=reporter, stage="Q5 scene", cpu_bound=True) as ex:
+        assert list(ex.map(math.sqrt, [4, 9])) == [None, None]
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Tests for single-decode descriptor extraction.
+"""
+import io
+from pathlib import Path
+
+import vdedup.extract as extract
+from vdedup.extract import ExtractionSettings, consume_frames
+from vdedup.models import VideoMeta
+from vdedup.pipeline import PipelineConfig, _SingleDecoder
+
+FRAME = extract.FRAME_SIZE * extract.FRAME_SIZE
+
+
+def _frames(*levels: int) -> io.BytesIO:
+    return io.BytesIO(b"".join(bytes([level]) * FRAME for level in levels))
+
+
+def test_consume_frames_derives_every_video_descriptor(monkeypatch) -> None:
+    # Hash = gray level, so results show exactly which frames were picked
+    monkeypatch.setattr(extract, "gray_frame_phash", lambda frame: frame[0])
+    levels = [0] * 4 + [255] * 4 + [0] * 4 + [128] * 8  # 20 frames @ 2 fps = 10 s
+    settings = ExtractionSettings(phash_frames=4, timeline_max_frames=12)
+
+    out = consume_frames(_frames(*levels).read, ["phash", "scene", "timeline"], settings, duration=10.0)
+
+    # targets 2, 4, 6, 8 s -> frames 4, 8, 12, 16
+    assert out["phash"] == (255, 0, 128, 128)
+    # hard cuts at frames 4 and 8; 0 -> 128 (~0.5) also crosses the 0.35 threshold
+    assert out["scene"] == (255, 0, 128)
+    assert out["timeline"] == tuple(levels[:12])
+
+
+def test_consume_frames_rejects_short_streams(monkeypatch) -> None:
+    monkeypatch.setattr(extract, "gray_frame_phash", lambda frame: frame[0])
+    out = consume_frames(_frames(0, 0, 0).read, ["scene", "timeline"], ExtractionSettings(), duration=None)
+    assert out == {"scene": None, "timeline": None}
+
+
+def test_consume_frames_stops_once_satisfied(monkeypatch) -> None:
+    monkeypatch.setattr(extract, "gray_frame_phash", lambda frame: frame[0])
+    stream = _frames(*([7] * 50))
+    settings = ExtractionSettings(timeline_max_frames=10)
+
+    out = consume_frames(stream.read, ["timeline"], settings, duration=None, stop_when_satisfied=True)
+
+    assert out["timeline"] == (7,) * 10
+    assert stream.tell() == 10 * FRAME
+
+
+def test_single_decoder_decodes_once_for_later_stages(monkeypatch, tmp_path: Path) -> None:
+    calls = []
+
+    def fake_extract(path, kinds, *, duration=None, settings=None):
+        calls.append(list(kinds))
+        return {kind: (len(kind),) for kind in kinds}
+
+    monkeypatch.setattr("vdedup.pipeline.extract_descriptors", fake_extract)
+    vm = VideoMeta(path=tmp_path / "a.mp4", size=1, mtime=0.0, duration=10.0)
+    decoder = _SingleDecoder(PipelineConfig(), {1, 2, 4, 5, 7})
+
+    assert decoder.get(vm, "phash") == (5,)
+    assert decoder.get(vm, "scene") == (5,)
+    assert decoder.get(vm, "timeline") == (8,)
+    assert calls == [["phash", "scene", "timeline"]]
+    assert decoder.decodes == 1
+
+    # A kind that was already handed out (or never planned) triggers a fresh decode
+    assert decoder.get(vm, "audio") == (5,)
+    assert calls[-1] == ["audio", "timeline"]
+
+
+def test_single_decoder_skips_stored_kinds_and_releases_memo(monkeypatch, tmp_path: Path) -> None:
+    from vdedup.fingerprints import FingerprintStore
+    from vdedup.pipeline import _descriptor_variant
+
+    calls = []
+
+    def fake_extract(path, kinds, *, duration=None, settings=None):
+        calls.append(list(kinds))
+        return {kind: (len(kind),) for kind in kinds}
+
+    monkeypatch.setattr("vdedup.pipeline.extract_descriptors", fake_extract)
+    cfg = PipelineConfig(single_decode=True)
+    a = VideoMeta(path=tmp_path / "a.mp4", size=1, mtime=0.0, duration=10.0)
+    b = VideoMeta(path=tmp_path / "b.mp4", size=2, mtime=0.0, duration=10.0)
+    store = FingerprintStore(None)
+    store.put("scene", a.path, a.size, a.mtime, (42,), _descriptor_variant(cfg, "scene"))
+    decoder = _SingleDecoder(cfg, {4, 5, 7}, store)
+
+    decoder.get(a, "phash")
+    decoder.get(b, "phash")
+    assert calls == [["phash", "timeline"], ["phash", "scene", "timeline"]]
+    assert decoder.memoised == 3
+
+    # b was grouped in Q4, so Q5 never asks for it; finishing Q5 drops its scene
+    decoder.release("scene")
+    assert decoder.memoised == 2
+    assert decoder.get(a, "timeline") == (8,)
+    decoder.release("timeline")
+    assert decoder.memoised == 0
+    store.close()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Tests for the apply engine (batched/parallel file operations with a resume journal).
+"""
+import json
+import os
+from pathlib import Path
+
+from vdedup.fileops import ApplyEngine, ApplyJournal, FileOp, copy_file, file_identity
+from vdedup.report import apply_report
+
+
+class _QuitAfter:
+    """Reporter stub asking to quit once ``n`` operations were ticked."""
+
+    def __init__(self, n: int):
+        self.n = n
+        self.ticks = 0
+
+    def start_stage(self, *_a, **_k) -> None:
+        pass
+
+    def inc_hashed(self, n: int = 1, cache_hit: bool = False) -> None:
+        self.ticks += n
+
+    def should_quit(self) -> bool:
+        return self.ticks >= self.n
+
+
+def _files(root: Path, names):
+    root.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for name in names:
+        p = root / name
+        p.write_bytes(name.encode() * 100)
+        paths.append(p)
+    return paths
+
+
+def _report(path: Path, keep: Path, losers) -> Path:
+    path.write_text(json.dumps({"groups": {"hash:1": {"keep": str(keep), "losers": [str(l) for l in losers]}}}))
+    return path
+
+
+def test_interrupted_run_resumes_from_journal(tmp_path: Path) -> None:
+    files = _files(tmp_path / "lib", [f"f{i}.mp4" for i in range(6)])
+    ops = [FileOp("delete", p) for p in files]
+    journal_path = tmp_path / "journal.sqlite"
+
+    first = ApplyEngine(journal=ApplyJournal(journal_path), reporter=_QuitAfter(2), batch_size=2).run(ops)
+    assert first.interrupted and first.completed["delete"] == 2
+    assert sum(p.exists() for p in files) == 4
+
+    second = ApplyEngine(journal=ApplyJournal(journal_path), batch_size=2).run(ops)
+    assert second.resumed == 2 and second.completed["delete"] == 6
+    assert not any(p.exists() for p in files)
+
+
+def test_cross_device_moves_run_on_the_pool(monkeypatch, tmp_path: Path) -> None:
+    files = _files(tmp_path / "src", ["a.mp4", "b.mp4", "c.mp4"])
+    dest = tmp_path / "elsewhere" / "nested"
+    engine = ApplyEngine(workers=2)
+    monkeypatch.setattr(engine, "same_device", lambda src, dst: False)
+
+    result = engine.run([FileOp("move", p, dest / p.name) for p in files])
+
+    assert sum(result.copies.values()) == 3 and not result.failures
+    assert sorted(p.name for p in dest.iterdir()) == ["a.mp4", "b.mp4", "c.mp4"]
+    assert (dest / "b.mp4").read_bytes() == b"b.mp4" * 100
+    assert not any(p.exists() for p in files)
+
+
+def test_copy_file_reports_method(tmp_path: Path) -> None:
+    src = tmp_path / "src.bin"
+    src.write_bytes(os.urandom(3 * 1024 * 1024 + 17))
+    method = copy_file(src, tmp_path / "dst.bin")
+    assert method in {"reflink", "copy_file_range", "copy"}
+    assert (tmp_path / "dst.bin").read_bytes() == src.read_bytes()
+
+
+def test_dependents_of_a_failed_operation_are_skipped(tmp_path: Path) -> None:
+    keep, loser = _files(tmp_path, ["keep.mp4", "loser.mp4"])
+    missing = FileOp("move", tmp_path / "gone.mp4", tmp_path / "vault" / "gone.mp4")
+    removal = FileOp("delete", loser, phase=1, after=missing.key)
+
+    result = ApplyEngine().run([missing, removal])
+
+    assert len(result.failures) == 1 and result.skipped == 1
+    assert loser.exists()
+
+
+def test_apply_report_backup_moves_losers_and_drops_journal(tmp_path: Path) -> None:
+    keep, a, b = _files(tmp_path / "lib", ["keep.mp4", "a.mp4", "b.mp4"])
+    report = _report(tmp_path / "r.json", keep, [a, b])
+    backup = tmp_path / "backup"
+
+    count, _size = apply_report(report, dry_run=False, force=True, backup=backup, base_root=tmp_path, verbosity=-1)
+
+    assert count == 2
+    assert (backup / "lib" / "a.mp4").exists() and (backup / "lib" / "b.mp4").exists()
+    assert keep.exists() and not a.exists()
+    assert not (tmp_path / "r.json.apply-journal.sqlite").exists()
+
+
+def test_apply_report_vault_links_every_path_to_the_vaulted_keep(tmp_path: Path) -> None:
+    keep, a = _files(tmp_path / "lib", ["keep.mp4", "a.mp4"])
+    report = _report(tmp_path / "r.json", keep, [a])
+    vault = tmp_path / "vault"
+
+    count, _size = apply_report(report, dry_run=False, force=True, backup=None, vault=vault, verbosity=-1)
+
+    assert count == 2
+    vaulted = vault / "keep.mp4"
+    assert os.path.samefile(keep, vaulted) and os.path.samefile(a, vaulted)
+
+
+def test_move_with_missing_source_is_done_only_for_the_planned_file(tmp_path: Path) -> None:
+    keep, loser = _files(tmp_path / "lib", ["keep.mp4", "loser.mp4"])
+    planned = file_identity(keep)
+    vaulted = tmp_path / "vault" / "keep.mp4"
+    vaulted.parent.mkdir()
+    vaulted.write_bytes(b"an unrelated file")
+    keep.unlink()
+    move = FileOp("move", keep, vaulted, src_id=planned)
+    removal = FileOp("delete", loser, phase=1, after=move.key)
+
+    result = ApplyEngine().run([move, removal])
+
+    assert len(result.failures) == 1 and result.skipped == 1
+    assert loser.exists() and vaulted.read_bytes() == b"an unrelated file"
+
+    # The same move finished by an earlier run is recognised by size and mtime
+    keep.write_bytes(b"keep payload")
+    planned = file_identity(keep)
+    os.replace(keep, vaulted)
+    result = ApplyEngine().run([FileOp("move", keep, vaulted, src_id=planned), removal])
+    assert not result.failures and not loser.exists()
+
+
+def test_apply_report_skips_groups_whose_keep_is_missing(tmp_path: Path) -> None:
+    keep, a = _files(tmp_path / "lib", ["keep.mp4", "a.mp4"])
+    report = _report(tmp_path / "r.json", keep, [a])
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    (vault / "keep.mp4").write_bytes(b"an unrelated file")
+    keep.unlink()
+
+    count, _size = apply_report(report, dry_run=False, force=True, backup=None, vault=vault, verbosity=-1)
+
+    assert count == 0
+    assert a.read_bytes() == b"a.mp4" * 100
+    assert (vault / "keep.mp4").read_bytes() == b"an unrelated file"
+
+
+def test_apply_report_resumes_a_journaled_vault_move(tmp_path: Path) -> None:
+    keep, a = _files(tmp_path / "lib", ["keep.mp4", "a.mp4"])
+    report = _report(tmp_path / "r.json", keep, [a])
+    vault = (tmp_path / "vault").resolve()
+    vault.mkdir()
+    vaulted = vault / "keep.mp4"
+    # An earlier run moved the keep and journaled it, then stopped
+    os.replace(keep, vaulted)
+    journal = ApplyJournal(tmp_path / "r.json.apply-journal.sqlite")
+    journal.mark([FileOp("move", keep, vaulted).key])
+    journal.close()
+
+    count, _size = apply_report(report, dry_run=False, force=True, backup=None, vault=vault, verbosity=-1)
+
+    assert count == 2
+    assert os.path.samefile(keep, vaulted) and os.path.samefile(a, vaulted)
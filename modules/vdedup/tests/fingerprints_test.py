@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Tests for the persistent Q5/Q6/Q7 descriptor store.
+"""
+from pathlib import Path
+from typing import List, Tuple
+
+import pytest
+
+from vdedup.fingerprints import FingerprintStore
+from vdedup.models import VideoMeta
+from vdedup.pipeline import PipelineConfig, run_pipeline
+from vdedup.progress import ProgressReporter
+
+
+def test_store_roundtrip_tolerance_and_variants(tmp_path: Path) -> None:
+    store_path = tmp_path / "fp.sqlite"
+    clip = tmp_path / "clip.mp4"
+    sig = (0, 1, 0xFFFF_FFFF_FFFF_FFFF, 0x8000_0000_0000_0000)
+
+    store = FingerprintStore(store_path)
+    store.put("scene", clip, 100, 50.0, sig, "max_scenes=12")
+    store.put("audio", clip, 100, 50.0, None)
+    store.close()
+
+    store = FingerprintStore(store_path)
+    try:
+        assert store.get("scene", clip, 100, 50.4, "max_scenes=12") == sig
+        assert store.get("scene", clip, 100, 52.0, "max_scenes=12") is None
+        assert store.get("scene", clip, 100, 50.0, "max_scenes=24") is None
+        assert store.get("scene", clip, 101, 50.0, "max_scenes=12") is None
+        assert store.get("audio", clip, 100, 50.0) == ()
+        assert store.get("timeline", clip, 100, 50.0) is None
+        with pytest.raises(ValueError):
+            store.get("bogus", clip, 100, 50.0)
+    finally:
+        store.close()
+
+
+def test_failures_are_markers_that_expire(tmp_path: Path) -> None:
+    clip = tmp_path / "clip.mp4"
+    store = FingerprintStore(tmp_path / "fp.sqlite")
+    try:
+        store.put("scene", clip, 100, 50.0, None)
+        assert store.get("scene", clip, 100, 50.0) == ()
+        assert store.count("scene") == 0
+        store.failure_ttl = 0.0
+        assert store.get("scene", clip, 100, 50.0) is None  # expired: retried
+        store.put("scene", clip, 100, 50.0, (7, 8))
+        store.failure_ttl = 3600.0
+        assert store.get("scene", clip, 100, 50.0) == (7, 8)
+        # Older versions stored failures as empty blobs: those are retried too
+        store._conn.execute("INSERT INTO timeline VALUES (?, 100, 50.0, '', x'')", (str(clip),))
+        assert store.get("timeline", clip, 100, 50.0) is None
+    finally:
+        store.close()
+
+
+def test_lazy_view_loads_on_access(tmp_path: Path) -> None:
+    store = FingerprintStore(tmp_path / "fp.sqlite")
+    metas = [VideoMeta(path=tmp_path / f"{i}.mp4", size=10 + i, mtime=1.0) for i in range(3)]
+    for i, vm in enumerate(metas):
+        store.put("timeline", vm.path, vm.size, vm.mtime, (i, i + 1))
+
+    view = store.lazy("timeline", metas)
+    assert len(view) == 3
+    assert view.loaded_count == 0
+    assert view[metas[2].path] == (2, 3)
+    assert view.loaded_count == 1
+    store.close()
+
+
+def test_scene_stage_reuses_stored_descriptors(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    root = tmp_path / "scene"
+    root.mkdir()
+    for name, payload in (("a.mp4", b"A" * 64), ("b.mp4", b"B" * 64)):
+        (root / name).write_bytes(payload)
+
+    calls: List[str] = []
+
+    def fake_scene(path: Path, **_: object) -> Tuple[int, ...]:
+        calls.append(path.name)
+        return (1, 2, 3, 4)
+
+    monkeypatch.setattr("vdedup.phash.compute_scene_fingerprint", fake_scene)
+    store = FingerprintStore(tmp_path / "fp.sqlite")
+    try:
+        for _ in range(2):
+            groups = run_pipeline(
+                root=root,
+                patterns=["*.mp4"],
+                max_depth=None,
+                selected_stages=[5],
+                cfg=PipelineConfig(threads=1),
+                cache=None,
+                reporter=ProgressReporter(enable_dash=False),
+                fingerprints=store,
+            )
+            assert any(key.startswith("scene") for key in groups)
+    finally:
+        store.close()
+
+    assert sorted(calls) == ["a.mp4", "b.mp4"]
+
+
+def test_scene_subsets_read_signatures_through_the_lazy_view(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    root = tmp_path / "scene"
+    root.mkdir()
+    # No durations: Q5 compares sizes in MiB, so these differ by 7 "seconds"
+    for name, mib in (("short.mp4", 6), ("long.mp4", 13)):
+        with open(root / name, "wb") as fh:
+            fh.truncate(mib * 1024 * 1024)
+    frames = (0x0F0F_0F0F_0F0F_0F0F, 0x3333_3333_3333_3333, 0x5555_5555_5555_5555, 0x00FF_00FF_00FF_00FF)
+    signatures = {"short.mp4": frames, "long.mp4": (0xFFFF, 0xF0F0) + frames + (0xAAAA,)}
+
+    def fake_scene(path: Path, **_: object) -> Tuple[int, ...]:
+        return signatures[path.name]
+
+    views: List[object] = []
+    real_lazy = FingerprintStore.lazy
+
+    def tracking_lazy(self, *args, **kwargs):
+        view = real_lazy(self, *args, **kwargs)
+        views.append(view)
+        return view
+
+    monkeypatch.setattr("vdedup.phash.compute_scene_fingerprint", fake_scene)
+    monkeypatch.setattr(FingerprintStore, "lazy", tracking_lazy)
+    store = FingerprintStore(tmp_path / "fp.sqlite")
+    try:
+        groups = run_pipeline(
+            root=root,
+            patterns=["*.mp4"],
+            max_depth=None,
+            selected_stages=[5],
+            cfg=PipelineConfig(threads=1),
+            cache=None,
+            reporter=ProgressReporter(enable_dash=False),
+            fingerprints=store,
+        )
+    finally:
+        store.close()
+
+    subsets = [sorted(m.path.name for m in members) for key, members in groups.items() if key.startswith("scene-sub:")]
+    assert subsets == [["long.mp4", "short.mp4"]]
+    assert len(views) == 1 and views[0].loaded_count == 2
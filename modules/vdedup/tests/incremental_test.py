@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Tests for incremental runs: file diffing, group merging and baseline-limited pipelines.
+"""
+from pathlib import Path
+from typing import Any, Dict, List
+
+import vdedup.pipeline as pipeline_mod
+from vdedup.incremental import FileDelta, RunState, diff_files, merge_groups
+from vdedup.pipeline import PipelineConfig, run_pipeline
+from vdedup.progress import ProgressReporter
+from vdedup.report import write_report_entries
+
+
+def _entry(keep: str, *losers: str, method: str = "hash") -> Dict[str, Any]:
+    return {
+        "keep": keep,
+        "losers": list(losers),
+        "method": method,
+        "evidence": {},
+        "keep_meta": {"size": 10},
+        "loser_meta": {p: {"size": 10} for p in losers},
+    }
+
+
+def test_diff_files_classifies_by_size_and_mtime() -> None:
+    previous = {"a": (10, 100.0), "b": (10, 100.0), "c": (10, 100.0), "gone": (5, 1.0)}
+    current = {"a": (10, 100.5), "b": (11, 100.0), "c": (10, 107.0), "new": (3, 1.0)}
+
+    delta = diff_files(previous, current)
+
+    assert delta.added == {"new"}
+    assert delta.changed == {"b", "c"}
+    assert delta.removed == {"gone"}
+    assert delta.unchanged == 1
+    assert delta.touched == {"new", "b", "c"}
+
+
+def test_merge_groups_updates_dissolves_and_absorbs(tmp_path: Path) -> None:
+    previous = {
+        "hash:1": _entry("a", "b", "c"),
+        "hash:2": _entry("d", "e"),
+        "phash:0": _entry("f", "g"),
+        "hash:3": _entry("x", "y"),
+    }
+    # a was removed, e changed; new file n duplicates f
+    delta = FileDelta(added={"n"}, changed={"e"}, removed={"a"})
+    fresh = {"phash:0": _entry("n", "g", method="phash"), "hash:9": _entry("p", "q")}
+
+    merged, changes = merge_groups(previous, fresh, delta)
+
+    assert merged["hash:1"]["keep"] == "b" and merged["hash:1"]["losers"] == ["c"]
+    assert "hash:2" not in merged
+    assert merged["hash:3"] == previous["hash:3"]
+    absorbed = [entry for entry in merged.values() if entry["keep"] == "n"]
+    assert len(absorbed) == 1
+    assert absorbed[0]["losers"] == ["g", "f"]
+    assert absorbed[0]["loser_meta"]["f"] == {"size": 10}
+    assert changes["dissolved"] == ["hash:2"]
+    assert changes["new"] == ["hash:9"]
+    assert sorted(changes["updated"]) == sorted(["hash:1", "phash:0"])
+    assert write_report_entries(tmp_path / "report.ndjson", merged)["losers"] == 5
+
+
+def test_run_state_roundtrip(tmp_path: Path) -> None:
+    state = RunState(tmp_path / "state.sqlite")
+    assert state.is_empty()
+    state.record({"a": (1, 2.0)}, {"hash:1": _entry("a", "b")})
+    state.close()
+
+    state = RunState(tmp_path / "state.sqlite")
+    try:
+        assert state.files() == {"a": (1, 2.0)}
+        assert state.groups()["hash:1"]["losers"] == ["b"]
+    finally:
+        state.close()
+
+
+def test_run_pipeline_with_baseline_hashes_only_touched_buckets(monkeypatch, tmp_path: Path) -> None:
+    root = tmp_path / "lib"
+    root.mkdir()
+    for name, payload in (("old1.mp4", b"old payload"), ("old2.mp4", b"old payload"), ("solo.mp4", b"x" * 40)):
+        (root / name).write_bytes(payload)
+
+    partial_calls: List[Path] = []
+    real_partial = pipeline_mod._blake3_partial_hex
+
+    def tracking_partial(path: Path, **kwargs: Any) -> str:
+        partial_calls.append(path)
+        return real_partial(path, **kwargs)
+
+    monkeypatch.setattr(pipeline_mod, "_blake3_partial_hex", tracking_partial)
+
+    def _run(baseline=None):
+        return run_pipeline(
+            roots=[root],
+            patterns=["*.mp4"],
+            max_depth=None,
+            selected_stages=[1, 2],
+            cfg=PipelineConfig(threads=1),
+            reporter=ProgressReporter(enable_dash=False),
+            baseline=baseline,
+        )
+
+    first = _run()
+    assert first.touched is None
+    assert len(first.scanned) == 3
+
+    partial_calls.clear()
+    unchanged = _run(baseline=first.scanned)
+    assert unchanged.touched == set() and not unchanged
+    assert partial_calls == []
+
+    (root / "new.mp4").write_bytes(b"x" * 40)
+    second = _run(baseline=first.scanned)
+    assert second.touched == {str((root / "new.mp4").resolve())}
+    assert {p.name for p in partial_calls} == {"new.mp4", "solo.mp4"}
+    members = [{m.path.name for m in members} for members in second.values()]
+    assert members == [{"new.mp4", "solo.mp4"}]
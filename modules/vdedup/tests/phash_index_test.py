@@ -210,6 +210,23 @@ class TestPHashIndexQuery:
         matches = index.query(phash2, hamming_threshold=5)
         assert len(matches) == 0
 
+    @pytest.mark.parametrize("filler", [0, 4000])
+    def test_query_finds_hash_at_exactly_the_threshold(self, filler):
+        """Threshold 12 with 3 differing bits in every 16-bit segment still matches."""
+        import random
+
+        rng = random.Random(7)
+        index = PHashIndex()
+        for i in range(filler):  # large enough to probe buckets instead of scanning
+            index.add(Path("filler.mp4"), i, float(i), rng.getrandbits(64))
+        phash = 0x123456789abcdef0
+        index.add(Path("video.mp4"), 0, 1.0, phash)
+
+        spread = sum(1 << (16 * seg + bit) for seg in range(4) for bit in (1, 7, 13))
+        matches = index.query(phash ^ spread, hamming_threshold=12, exclude_video=Path("filler.mp4"))
+        assert [m.video_path for m in matches] == [Path("video.mp4")]
+        assert not index.query(phash ^ spread | 1, hamming_threshold=12, exclude_video=Path("filler.mp4"))
+
     def test_query_no_threshold(self):
         """Query without threshold should return all bucket candidates."""
         index = PHashIndex()
@@ -105,3 +105,58 @@ def test_run_pipeline_sampling_honors_seed(monkeypatch, tmp_path: Path) -> None:
     assert recorded["seed"] == 42
     assert recorded["k"] == expected
     assert len(recorded["population"]) == total_files
+
+
+def test_metadata_clusters_chain_durations_within_blocks() -> None:
+    from vdedup.models import VideoMeta
+
+    def vm(name: str, duration, width=1920, vcodec="h264") -> VideoMeta:
+        return VideoMeta(path=Path(name), size=1, mtime=0.0, duration=duration, width=width, height=1080, vcodec=vcodec)
+
+    probed = [
+        vm("a", 30.0), vm("b", 31.5), vm("c", 33.0),  # chained by 1.5 s steps
+        vm("d", 40.0), vm("e", 30.5, width=1280), vm("f", None), vm("g", 33.2, vcodec="hevc"),
+    ]
+
+    clusters, comparisons, blocks = pipeline_mod._metadata_clusters(
+        probed, tolerance=2.0, cfg=PipelineConfig(same_res=True, same_codec=True)
+    )
+
+    assert [[m.path.name for m in c] for c in clusters] == [["a", "b", "c"]]
+    assert blocks == 3
+    assert comparisons == 3  # one per neighbour in the 4-video block, none for singleton blocks
+
+    clusters, _comparisons, blocks = pipeline_mod._metadata_clusters(probed, tolerance=2.0, cfg=PipelineConfig())
+    assert blocks == 1
+    assert [[m.path.name for m in c] for c in clusters] == [["a", "b", "c", "e", "g"]]
+
+
+def test_run_pipeline_q3_groups_probed_videos(monkeypatch, tmp_path: Path) -> None:
+    durations = {"a.mp4": 60.0, "b.mp4": 60.5, "c.mp4": 300.0}
+    for name in durations:
+        _touch(tmp_path / name, name.encode() * 100)
+
+    class FakeProbes:
+        backend = "fake"
+
+        def __init__(self, cache=None, *, workers=1) -> None:
+            pass
+
+        def cached(self, path, size=None, mtime=None):
+            return None
+
+        def probe(self, path, size=None, mtime=None):
+            return {"duration": durations[path.name], "width": 1280, "height": 720, "vcodec": "h264"}
+
+    monkeypatch.setattr(pipeline_mod, "ProbeService", FakeProbes)
+    groups = run_pipeline(
+        root=tmp_path,
+        patterns=["*.mp4"],
+        max_depth=None,
+        selected_stages=[3],
+        cfg=PipelineConfig(threads=1, duration_tolerance=2.0),
+        reporter=ProgressReporter(enable_dash=False),
+    )
+
+    meta_groups = [sorted(m.path.name for m in members) for gid, members in groups.items() if gid.startswith("meta:")]
+    assert meta_groups == [["a.mp4", "b.mp4"]]
@@ -17,7 +17,8 @@ from unittest.mock import patch, MagicMock
 
 import pytest
 
-from vdedup.probe import run_ffprobe_json
+from vdedup.cache import HashCache
+from vdedup.probe import ProbeService, parse_ffprobe, probe_stats, run_ffprobe_json
 
 
 class TestRunFFProbeJson:
@@ -326,5 +327,56 @@ class TestRunFFProbeJson:
             test_file.unlink()
 
 
+class TestProbeService:
+    """Tests for the memoised, cache-backed probe service."""
+
+    FFPROBE_OUTPUT = {
+        "streams": [{"codec_type": "video", "width": 1280, "height": 720, "codec_name": "h264", "bit_rate": "900"}],
+        "format": {"duration": "12.5", "format_name": "mov,mp4,m4a", "bit_rate": "1000"},
+    }
+
+    def test_parse_ffprobe_maps_fields(self):
+        fields = parse_ffprobe(self.FFPROBE_OUTPUT)
+        assert fields["duration"] == 12.5
+        assert (fields["width"], fields["height"], fields["vcodec"]) == (1280, 720, "h264")
+        assert fields["container"] == "mov"
+        assert (fields["overall_bitrate"], fields["video_bitrate"]) == (1000, 900)
+        assert parse_ffprobe(None) is None
+
+    def test_probe_many_probes_each_file_once_and_fills_cache(self, tmp_path):
+        files = [tmp_path / f"{n}.mp4" for n in "abc"]
+        for f in files:
+            f.write_bytes(b"x")
+        cache = HashCache(tmp_path / "cache.jsonl")
+
+        with patch("vdedup.probe.run_ffprobe_json", return_value=self.FFPROBE_OUTPUT) as mock_probe:
+            service = ProbeService(cache, workers=2)
+            results = service.probe_many(files + files[:1])
+            assert mock_probe.call_count == 3
+            assert all(r["duration"] == 12.5 for r in results.values())
+            service.get(files[0])
+            assert mock_probe.call_count == 3
+
+            # A new service (e.g. the report renderer) is answered by the cache
+            fresh = ProbeService(cache)
+            assert fresh.probe_many(files)[files[1]]["width"] == 1280
+            assert mock_probe.call_count == 3 and fresh.cache_hits == 3
+
+        st = files[2].stat()
+        assert cache.get_video_meta(files[2], st.st_size, st.st_mtime)["vcodec"] == "h264"
+
+    def test_probe_stats_prefers_report_metadata(self, tmp_path):
+        clip = tmp_path / "clip.mp4"
+        clip.write_bytes(b"12345")
+        with patch("vdedup.probe.run_ffprobe_json", return_value=self.FFPROBE_OUTPUT) as mock_probe:
+            known = probe_stats(clip, known={"size": 5, "duration": 3.0, "width": 640})
+            assert mock_probe.call_count == 0
+            assert (known["size"], known["duration"], known["width"], known["height"]) == (5, 3.0, 640, None)
+
+            probed = probe_stats(clip, known={"size": 5})
+            assert mock_probe.call_count == 1
+            assert probed["duration"] == 12.5 and probed["height"] == 720
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
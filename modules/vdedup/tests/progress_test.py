@@ -67,3 +67,47 @@ def test_stage_stall_detector_emits_warning() -> None:
     # second call without new activity should not duplicate warning
     reporter._check_stage_stall()
     assert len(reporter.recent_logs()) == last_count
+
+
+def test_sharded_counters_aggregate_across_threads() -> None:
+    import threading
+
+    reporter = ProgressReporter(enable_dash=False, sharded=True)
+    reporter.start_stage("Q2 partial", total=4000)
+
+    def work() -> None:
+        for i in range(1000):
+            reporter.inc_hashed(1, cache_hit=i % 2 == 0)
+
+    workers = [threading.Thread(target=work) for _ in range(4)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+
+    snap = reporter.snapshot()
+    assert snap["hashed"] == 4000 and snap["cache_hits"] == 2000
+    assert snap["stage_done"] == 4000
+    # Counts made before a stage boundary stay with the previous stage
+    reporter.inc_scanned(3, bytes_added=30)
+    reporter.start_stage("Q3 metadata", total=10)
+    assert reporter.stage_done == 0 and reporter.scanned_files == 3
+
+
+def test_metrics_stream_writes_ndjson_lines() -> None:
+    import io
+    import json
+
+    stream = io.StringIO()
+    reporter = ProgressReporter(enable_dash=False, sharded=True, refresh_rate=0.1,
+                                metrics_stream=stream, metrics_interval=0.1)
+    reporter.start()
+    reporter.start_stage("scanning files", total=5)
+    reporter.inc_scanned(5)
+    time.sleep(0.35)
+    reporter.stop()
+
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert len(records) >= 2
+    assert records[-1]["final"] is True
+    assert records[-1]["stage"] == "scanning files" and records[-1]["scanned"] == 5
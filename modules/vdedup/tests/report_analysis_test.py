@@ -5,7 +5,7 @@ import vdedup.video_dedupe as cli
 
 def test_analysis_mode_monkeypatch(tmp_path: Path, monkeypatch):
     # fake _probe_stats so we don't need ffprobe
-    def fake_probe(p: Path):
+    def fake_probe(p: Path, **_):
         # encode some numbers based on filename to get deltas
         base = 1000 if "keep" in p.name else 800
         return {
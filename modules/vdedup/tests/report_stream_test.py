@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Tests for NDJSON reports: incremental writing, paged loading and streaming collapse.
+"""
+import json
+from pathlib import Path
+
+from vdedup.models import FileMeta
+from vdedup.report import collapse_report_file, collect_exclusions, load_report, write_report
+from vdedup.report_models import iter_report_groups, load_report_documents
+from vdedup.report_viewer import DuplicateListManager
+
+
+def _winners(root: Path, count: int):
+    winners = {}
+    for i in range(count):
+        keep = FileMeta(path=root / f"keep{i}.mp4", size=1000 + i, mtime=0)
+        loser = FileMeta(path=root / f"dup{i}.mp4", size=10 + i, mtime=0)
+        winners[f"hash:{i}"] = (keep, [loser])
+    return winners
+
+
+def test_ndjson_report_has_one_line_per_group_and_a_summary(tmp_path: Path) -> None:
+    # The files do not exist: sizes must come from the metadata, not from stat()
+    path = tmp_path / "r.ndjson"
+    write_report(path, _winners(tmp_path, 3))
+
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [line.get("group") for line in lines[:3]] == ["hash:0", "hash:1", "hash:2"]
+    assert lines[-1]["summary"] == {"groups": 3, "losers": 3, "size_bytes": 33, "by_method": {"unknown": 3}}
+
+    data = load_report(path)
+    assert data["summary"]["size_bytes"] == 33
+    assert data["groups"]["hash:1"]["keep"] == str(tmp_path / "keep1.mp4")
+    assert [gid for gid, _ in iter_report_groups(path)] == ["hash:0", "hash:1", "hash:2"]
+    assert tmp_path / "dup2.mp4" in collect_exclusions([path])
+
+
+def test_viewer_pages_groups_on_demand(tmp_path: Path) -> None:
+    path = tmp_path / "r.ndjson"
+    write_report(path, _winners(tmp_path, 10))
+    doc = load_report_documents([path], page_size=4)[0]
+    pager = doc.pager
+
+    manager = DuplicateListManager(doc.groups)
+    rows = manager.visible_rows()
+    assert len(rows) == 10 and pager.pages_loaded == 0
+    assert rows[5].duplicate_count == 1 and rows[5].reclaimable_bytes == 15
+
+    group = manager.get_group("hash:5")
+    assert group.losers[0].path == tmp_path / "dup5.mp4"
+    assert pager.pages_loaded == 1
+    assert [g.loaded for g in doc.groups] == [False] * 4 + [True] * 4 + [False] * 2
+
+
+def test_promote_in_paged_report_rewrites_only_that_group(tmp_path: Path) -> None:
+    path = tmp_path / "r.ndjson"
+    write_report(path, _winners(tmp_path, 5))
+    before = path.read_text(encoding="utf-8").splitlines()
+    doc = load_report_documents([path], page_size=2)[0]
+
+    manager = DuplicateListManager(doc.groups)
+    assert manager.promote_to_master("hash:3", tmp_path / "dup3.mp4")
+
+    after = path.read_text(encoding="utf-8").splitlines()
+    assert [a == b for a, b in zip(before, after)] == [True, True, True, False, True, True]
+    assert json.loads(after[3])["keep"] == str(tmp_path / "dup3.mp4")
+    # Offsets were refreshed: groups that were not loaded yet still read correctly
+    assert manager.get_group("hash:4").losers[0].path == tmp_path / "dup4.mp4"
+
+
+def test_collapse_streams_overlapping_groups(tmp_path: Path) -> None:
+    a, b, c, d = (str(tmp_path / f"{n}.mp4") for n in "abcd")
+    path = tmp_path / "r.ndjson"
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write(json.dumps({"group": "g1", "keep": a, "losers": [b], "method": "hash",
+                             "keep_meta": {"size": 5}, "loser_meta": {b: {"size": 9}}}) + "\n")
+        fh.write(json.dumps({"group": "g2", "keep": c, "losers": [b], "method": "phash",
+                             "keep_meta": {"size": 7}, "loser_meta": {b: {"size": 9}}}) + "\n")
+        fh.write(json.dumps({"group": "g3", "keep": d, "losers": [], "method": "hash",
+                             "keep_meta": {"size": 1}, "loser_meta": {}}) + "\n")
+
+    out = collapse_report_file(path)
+
+    assert out == tmp_path / "r-collapsed.ndjson"
+    data = load_report(out)
+    groups = {g["keep"]: sorted(g["losers"]) for g in data["groups"].values()}
+    assert groups == {b: sorted([a, c]), d: []}
+    assert data["summary"]["size_bytes"] == 12
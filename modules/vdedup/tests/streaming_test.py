@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Tests for the bounded streaming front end (discovery -> stat -> partial hash).
+"""
+import threading
+import time
+from pathlib import Path
+from typing import Any, List
+
+import pytest
+
+import vdedup.pipeline as pipeline_mod
+from vdedup.pipeline import PipelineConfig, run_pipeline
+from vdedup.progress import ProgressReporter
+from vdedup.streaming import WorkQueue, stream_map
+
+
+def test_stream_map_yields_every_result_with_bounded_read_ahead() -> None:
+    pulled = []
+    consumed = []
+
+    def source():
+        for i in range(100):
+            pulled.append(i)
+            yield i
+
+    for result in stream_map(lambda x: x * 2, source(), workers=3, maxsize=4):
+        consumed.append(result)
+        if len(consumed) == 1:
+            time.sleep(0.2)
+            # Feeder may only run ahead by the two queues plus items held by workers
+            assert len(pulled) <= 1 + 4 + 4 + 3 + 1
+
+    assert sorted(consumed) == [i * 2 for i in range(100)]
+
+
+def test_stream_map_reraises_worker_and_source_errors() -> None:
+    def boom(x: int) -> int:
+        if x == 5:
+            raise ValueError("bad item")
+        return x
+
+    with pytest.raises(ValueError, match="bad item"):
+        list(stream_map(boom, range(20), workers=2, maxsize=2))
+
+    def broken_source():
+        yield 1
+        raise OSError("walk failed")
+
+    with pytest.raises(OSError, match="walk failed"):
+        list(stream_map(lambda x: x, broken_source(), workers=2))
+
+
+def test_work_queue_runs_all_items_and_reports_errors() -> None:
+    seen: List[int] = []
+    lock = threading.Lock()
+
+    def record(x: int) -> None:
+        with lock:
+            seen.append(x)
+
+    work = WorkQueue(record, workers=3, maxsize=2)
+    for i in range(50):
+        work.submit(i)
+    work.join()
+    assert sorted(seen) == list(range(50))
+    assert work.submitted == work.completed == 50
+
+    def fail(_x: Any) -> None:
+        raise RuntimeError("worker failed")
+
+    failing = WorkQueue(fail, workers=1)
+    failing.submit(1)
+    with pytest.raises(RuntimeError, match="worker failed"):
+        failing.join()
+
+
+def test_work_queue_failure_counts_item_and_finishes() -> None:
+    release = threading.Event()
+
+    def fail(_x: Any) -> None:
+        release.wait(5)
+        raise RuntimeError("worker failed")
+
+    failing = WorkQueue(fail, workers=1, maxsize=8)
+    for i in range(5):
+        failing.submit(i)
+    assert not failing.finished
+    release.set()
+    deadline = time.monotonic() + 5
+    while not failing.finished and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert failing.finished
+    assert failing.completed >= 1  # the failed item is counted
+    with pytest.raises(RuntimeError, match="worker failed"):
+        failing.join()
+
+
+def test_pipeline_reraises_partial_hash_failure(monkeypatch, tmp_path: Path) -> None:
+    root = tmp_path / "lib"
+    root.mkdir()
+    for name in ("a.mp4", "b.mp4", "c.mp4"):
+        (root / name).write_bytes(b"same payload")
+
+    def broken_partial(path: Path, **kwargs: Any) -> str:
+        raise OSError(f"cannot read {path.name}")
+
+    monkeypatch.setattr(pipeline_mod, "_blake3_partial_hex", broken_partial)
+    outcome: List[BaseException] = []
+
+    def run() -> None:
+        try:
+            run_pipeline(
+                roots=[root],
+                patterns=["*.mp4"],
+                max_depth=None,
+                selected_stages=[1, 2],
+                cfg=PipelineConfig(threads=2),
+                reporter=ProgressReporter(enable_dash=False),
+            )
+        except BaseException as exc:
+            outcome.append(exc)
+
+    runner = threading.Thread(target=run, daemon=True)
+    runner.start()
+    runner.join(30)
+    assert not runner.is_alive(), "Q2 wait loop hung on a failed worker"
+    assert len(outcome) == 1 and isinstance(outcome[0], OSError)
+
+
+def test_pipeline_partial_hashes_only_size_matched_files(monkeypatch, tmp_path: Path) -> None:
+    root = tmp_path / "lib"
+    root.mkdir()
+    (root / "a.mp4").write_bytes(b"same payload")
+    (root / "b.mp4").write_bytes(b"same payload")
+    (root / "c.mp4").write_bytes(b"diff payload")
+    (root / "unique.mp4").write_bytes(b"a size nobody else has")
+
+    hashed: List[str] = []
+    real_partial = pipeline_mod._blake3_partial_hex
+
+    def tracking_partial(path: Path, **kwargs: Any) -> str:
+        hashed.append(path.name)
+        return real_partial(path, **kwargs)
+
+    monkeypatch.setattr(pipeline_mod, "_blake3_partial_hex", tracking_partial)
+
+    groups = run_pipeline(
+        roots=[root],
+        patterns=["*.mp4"],
+        max_depth=None,
+        selected_stages=[1, 2],
+        cfg=PipelineConfig(threads=4),
+        reporter=ProgressReporter(enable_dash=False),
+    )
+
+    assert sorted(hashed) == ["a.mp4", "b.mp4", "c.mp4"]
+    assert [sorted(m.path.name for m in members) for members in groups.values()] == [["a.mp4", "b.mp4"]]
@@ -14,10 +14,14 @@ import pytest
 from pathlib import Path
 from unittest.mock import patch, MagicMock
 
+import vdedup.phash as phash
 from vdedup.phash import (
+    FRAME_SIZE,
     FrameHash,
     VideoFingerprint,
     compute_video_fingerprint,
+    phash_gray,
+    phash_gray_frames,
 )
 
 
@@ -313,5 +317,52 @@ class TestComputeVideoFingerprint:
         assert result.duration == 7200.0
 
 
+class TestRawFrameHashing:
+    """Tests for in-memory rawvideo frame hashing."""
+
+    @staticmethod
+    def _frames(count):
+        np = pytest.importorskip("numpy")
+        rng = np.random.default_rng(7)
+        return [rng.integers(0, 256, (FRAME_SIZE, FRAME_SIZE), dtype=np.uint8) for _ in range(count)]
+
+    def test_phash_gray_matches_imagehash(self):
+        """Hashing raw gray bytes should agree bit-for-bit with imagehash.phash."""
+        imagehash = pytest.importorskip("imagehash")
+        from PIL import Image
+
+        for pixels in self._frames(20):
+            expected = int(str(imagehash.phash(Image.fromarray(pixels, "L"))), 16)
+            assert phash_gray(pixels.tobytes()) == expected
+
+    def test_batched_buffer_matches_single_frames(self):
+        """A concatenated rawvideo buffer hashes like its frames one by one; partial tails are ignored."""
+        frames = [f.tobytes() for f in self._frames(5)]
+        buf = b"".join(frames) + b"\x00" * 10
+
+        assert phash_gray_frames(buf) == [phash_gray(f) for f in frames]
+
+    def test_short_batch_falls_back_to_per_timestamp_seeks(self, monkeypatch):
+        """When the single pass yields too few frames, each timestamp is extracted on its own."""
+        frames = [f.tobytes() for f in self._frames(4)]
+        calls = []
+
+        def fake_run(cmd, capture_output=True):
+            calls.append(cmd)
+            return MagicMock(returncode=0, stdout=frames[0])
+
+        def fake_check_output(cmd, stderr=None):
+            calls.append(cmd)
+            return frames[len(calls) - 2]
+
+        monkeypatch.setattr(phash.subprocess, "run", fake_run)
+        monkeypatch.setattr(phash.subprocess, "check_output", fake_check_output)
+
+        sig = phash._compute_phash_from_timestamps(Path("clip.mp4"), [1.0, 2.0, 3.0, 4.0])
+
+        assert sig == tuple(phash_gray(f) for f in frames)
+        assert "rawvideo" in calls[0] and len(calls) == 5
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -12,6 +12,9 @@ Examples:
   # Thorough scan including pHash + subset detection
   video-dedupe -D "D:\\Videos" -q 5 -u 8 -F 9 -T 14 -t 16 -o D:\\output -L -g
 
+  # Re-run over the same library: only new/changed files are fingerprinted
+  video-dedupe -D "D:\\Videos" -q 5 -r -o D:\\output -i
+
   # Multiple directories
   video-dedupe -D D:\\Videos -D E:\\Archive -q 2 -r -L
 
@@ -23,6 +26,9 @@ Examples:
 
   # Analyze report(s): print winner<->loser diffs (duration, resolution, bitrates, size)
   video-dedupe -y D:\\report.json
+
+  # Benchmark stages on a synthetic corpus and compare with an earlier run
+  video-dedupe bench -o D:\\bench -p 1-7 -C D:\\bench\\bench-previous.json
 """
 
 from __future__ import annotations
@@ -51,10 +57,15 @@ except ImportError:
 # NOTE: absolute imports so the CLI works whether installed or run from source
 from vdedup.pipeline import PipelineConfig, parse_pipeline, run_pipeline
 from vdedup.progress import ProgressReporter
-from vdedup.cache import HashCache
+from vdedup.cache import HashCache, open_cache
+from vdedup.fingerprints import FingerprintStore
 from vdedup.grouping import choose_winners
+from vdedup.incremental import RunState, diff_files, merge_groups, touching
+from vdedup.probe import ProbeService, probe_stats
 from vdedup.report import (
     write_report,
+    write_report_entries,
+    report_entries,
     apply_report,
     pretty_print_reports,
     collect_exclusions,
@@ -320,58 +331,18 @@ def _fmt_dur(sec: Optional[float]) -> str:
         return "--:--:--"
 
 
-def _probe_stats(path: Path) -> Dict[str, Any]:
+def _probe_stats(
+    path: Path,
+    *,
+    probes: Optional[ProbeService] = None,
+    known: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
     """
     Lightweight probe used by analysis mode.
     Returns dict: duration, width, height, overall_bitrate, video_bitrate, size.
+    Report metadata (``known``) is used when it already has a duration.
     """
-    size = 0
-    try:
-        st = path.stat()
-        size = int(st.st_size)
-    except Exception:
-        pass
-
-    duration = None
-    width = height = None
-    overall_bitrate = None
-    video_bitrate = None
-    try:
-        from vdedup.probe import run_ffprobe_json  # lazy
-        fmt = run_ffprobe_json(path)
-        if fmt:
-            try:
-                duration = float(fmt.get("format", {}).get("duration", 0.0))
-            except Exception:
-                duration = None
-            try:
-                br = fmt.get("format", {}).get("bit_rate", None)
-                overall_bitrate = int(br) if br is not None else None
-            except Exception:
-                overall_bitrate = None
-            for s in fmt.get("streams", []):
-                if s.get("codec_type") == "video":
-                    try:
-                        video_bitrate = int(s.get("bit_rate")) if s.get("bit_rate") is not None else None
-                    except Exception:
-                        video_bitrate = None
-                    try:
-                        width = int(s.get("width") or 0) or None
-                        height = int(s.get("height") or 0) or None
-                    except Exception:
-                        width = height = None
-                    break
-    except Exception:
-        pass
-
-    return {
-        "size": size,
-        "duration": duration,
-        "width": width,
-        "height": height,
-        "overall_bitrate": overall_bitrate,
-        "video_bitrate": video_bitrate,
-    }
+    return probe_stats(path, probes=probes, known=known)
 
 
 def _render_pair_diff(keep: Path, lose: Path, a: Dict[str, Any], b: Dict[str, Any]) -> List[str]:
@@ -468,13 +439,22 @@ class _TextProgress:
 
 # -------- report analysis printer with progress --------
 
-def render_analysis_for_reports(paths: List[Path], verbosity: int = 1, *, show_progress: bool = True) -> str:
+def render_analysis_for_reports(
+    paths: List[Path],
+    verbosity: int = 1,
+    *,
+    show_progress: bool = True,
+    cache: Optional[HashCache] = None,
+) -> str:
     """
     Produce a readable diff for each (keep, loser) pair in one or more reports.
     verbosity currently:
       0 = totals only (number of pairs)
       1 = per-group winner/loser pairs with stat lines
 
+    Stats come from the report's keep/loser metadata, then the hash cache (``cache``);
+    the remaining files are probed once each, concurrently, before rendering.
+
     Always ends with a global summary (groups, losers, space).
     While running, a textual progress bar is shown if show_progress=True and stdout is a TTY.
     """
@@ -486,17 +466,32 @@ def render_analysis_for_reports(paths: List[Path], verbosity: int = 1, *, show_p
     overall_losers = 0
     overall_space_bytes = 0
 
-    # Pre-count total pairs for the progress bar
+    # Pre-count total pairs for the progress bar and collect files the reports lack stats for
     planned_pairs = 0
+    unknown: List[Path] = []
     for rp in paths:
         try:
             d = load_report(rp)
             groups = d.get("groups") or {}
             for g in groups.values():
                 planned_pairs += len(g.get("losers") or [])
+                if g.get("keep") and (g.get("keep_meta") or {}).get("duration") is None:
+                    unknown.append(Path(g["keep"]))
+                loser_meta = g.get("loser_meta") or {}
+                unknown.extend(Path(l) for l in g.get("losers") or [] if (loser_meta.get(l) or {}).get("duration") is None)
         except Exception:
             continue
 
+    probes = ProbeService(cache)
+    if verbosity >= 1 and unknown:
+        probes.probe_many(unknown)
+    stats: Dict[Path, Dict[str, Any]] = {}
+
+    def _stats(path: Path, known: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        if path not in stats:
+            stats[path] = _probe_stats(path, probes=probes, known=known)
+        return stats[path]
+
     prog: Optional[_TextProgress] = None
     if show_progress and sys.stdout.isatty():
         prog = _TextProgress(planned_pairs, label="Analyzing report(s)")
@@ -525,12 +520,13 @@ def render_analysis_for_reports(paths: List[Path], verbosity: int = 1, *, show_p
         for gid, g in groups.items():
             keep = Path(g.get("keep", ""))
             losers = [Path(x) for x in (g.get("losers") or [])]
+            loser_meta = g.get("loser_meta") or {}
             if verbosity >= 1:
                 out.append(f"  [{g.get('method', 'unknown')}] {gid}")
             for l in losers:
                 total_pairs += 1
-                a = _probe_stats(keep)
-                b = _probe_stats(l)
+                a = _stats(keep, g.get("keep_meta"))
+                b = _stats(l, loser_meta.get(str(l)))
                 # If report summary didn't contain size_bytes, accumulate via probing
                 if not isinstance(data.get("summary"), dict) or "size_bytes" not in data["summary"]:
                     try:
@@ -717,6 +713,53 @@ def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
     )
     p.add_argument("-g", "--gpu", action="store_true",
                    help="Use GPU acceleration for pHash extraction (requires compatible GPU)")
+    p.add_argument(
+        "-C",
+        "--cache-backend",
+        choices=["sqlite", "jsonl"],
+        default="sqlite",
+        help="Hash cache storage (default: sqlite; an existing JSONL cache in the output dir is imported once).",
+    )
+    p.add_argument(
+        "-O",
+        "--report-format",
+        choices=["json", "ndjson"],
+        default="json",
+        help="Report file format (default: json; ndjson streams one group per line and pages groups in the viewer).",
+    )
+    p.add_argument(
+        "-M",
+        "--metrics",
+        default=None,
+        help="Write progress metrics as NDJSON, one line per second, to this file ('-' for stdout); for runs without a TTY.",
+    )
+    p.add_argument(
+        "-I",
+        "--q4-engine",
+        choices=["auto", "index", "pairwise"],
+        default="auto",
+        help="Q4 pHash comparison engine: index (bucketed candidates), pairwise (all pairs), or auto (index for large sets).",
+    )
+    p.add_argument(
+        "-S",
+        "--single-decode",
+        action="store_true",
+        help="Decode each video once for all Q4-Q7 descriptors instead of one ffmpeg pass per stage.",
+    )
+    p.add_argument(
+        "-i",
+        "--incremental",
+        action="store_true",
+        help="Only examine files that are new or changed since the last run in this output dir; "
+             "merge their groups into the previous report and write a -delta.json report.",
+    )
+    p.add_argument(
+        "-x",
+        "--executor",
+        choices=["auto", "thread", "process"],
+        default="auto",
+        help="Worker pool for Q4-Q7 descriptor work: process pool, threads, or auto (processes for large batches).",
+    )
     p.add_argument(
         "-m",
         "--sample-percent",
@@ -986,6 +1029,12 @@ def _validate_args(args: argparse.Namespace) -> Optional[str]:
 
 
 def main(argv: Optional[Sequence[str]] = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv[:1] == ["bench"]:
+        from vdedup.bench import main as bench_main
+
+        return bench_main(argv[1:])
+
     # Global quit flag for signal handling
     quit_requested = False
     active_reporter = None
@@ -1114,6 +1163,7 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
                 reporter=reporter,
                 verbosity=int(args.verbosity),
                 full_file_names=False,
+                workers=args.threads,
             )
 
             reporter.set_results(dup_groups=0, losers_count=count, bytes_total=size)
@@ -1170,8 +1220,15 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
 
     # Auto-generate cache and report filenames
     base_name = f"vdedup-q{args.quality}"
-    cache_path = output_dir / f"{base_name}-cache.jsonl"
-    report_path = output_dir / f"{base_name}-report.json"
+    cache_backend = getattr(args, "cache_backend", "sqlite")
+    cache_suffix = ".sqlite" if cache_backend == "sqlite" else ".jsonl"
+    cache_path = output_dir / f"{base_name}-cache{cache_suffix}"
+    report_suffix = ".ndjson" if getattr(args, "report_format", "json") == "ndjson" else ".json"
+    report_path = output_dir / f"{base_name}-report{report_suffix}"
+    # Q4-Q7 descriptors do not depend on the quality level, so every run shares one store
+    fingerprints_path = output_dir / "vdedup-fingerprints.sqlite"
+    state_path = output_dir / f"{base_name}-state.sqlite"
+    delta_path = output_dir / f"{base_name}-delta{report_suffix}"
     logger.info(f"Cache file: {cache_path}")
     logger.info(f"Report file: {report_path}")
 
@@ -1197,6 +1254,9 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         include_partials=bool(getattr(args, "include_partials", False)),
         sample_ratio=sample_ratio,
         sample_seed=getattr(args, "sample_seed", None),
+        q4_engine=getattr(args, "q4_engine", "auto"),
+        single_decode=bool(getattr(args, "single_decode", False)),
+        executor=getattr(args, "executor", "auto"),
     )
 
     logger.info(f"Pipeline configuration: threads={cfg.threads}, GPU={cfg.gpu}, subset_detect={cfg.subset_detect}")
@@ -1212,8 +1272,21 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
     else:
         logger.info("Running in console mode")
 
-    # Use 0.25s refresh rate (4 Hz) for smooth, responsive UI that doesn't appear frozen
-    reporter = ProgressReporter(enable_dash=enable_ui, refresh_rate=0.25, banner=banner, stacked_ui=None)
+    metrics_arg = getattr(args, "metrics", None)
+    metrics_stream = None
+    if metrics_arg:
+        metrics_stream = sys.stdout if metrics_arg == "-" else open(Path(metrics_arg).expanduser(), "w", encoding="utf-8")
+
+    # Use 0.25s refresh rate (4 Hz) for smooth, responsive UI that doesn't appear frozen.
+    # Workers only bump per-thread counters; the reporter's heartbeat aggregates them at that rate.
+    reporter = ProgressReporter(
+        enable_dash=enable_ui,
+        refresh_rate=0.25,
+        banner=banner,
+        stacked_ui=None,
+        sharded=True,
+        metrics_stream=metrics_stream,
+    )
     active_reporter = reporter
     logger.info("Starting ProgressReporter...")
     try:
@@ -1225,11 +1298,11 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
 
     logger.info("Initializing hash cache...")
     try:
-        cache = HashCache(cache_path)
+        cache: HashCache = open_cache(cache_path, backend=cache_backend)
     except Exception as e:
         logger.error(f"HashCache() creation crashed: {e}", exc_info=True)
         raise
-    logger.info("HashCache created")
+    logger.info("HashCache created (%s backend, %d records)", cache_backend, len(cache))
 
     try:
         cache.open_append()
@@ -1238,6 +1311,25 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         raise
     logger.info("HashCache opened for append")
 
+    fingerprints: Optional[FingerprintStore] = None
+    if any(stage in parse_pipeline(pipeline_str) for stage in (4, 5, 6, 7)):
+        try:
+            fingerprints = FingerprintStore(fingerprints_path)
+            logger.info(f"Fingerprint store: {fingerprints_path}")
+        except Exception as e:
+            logger.warning(f"Fingerprint store unavailable, descriptors will be recomputed: {e}")
+            fingerprints = None
+
+    run_state: Optional[RunState] = None
+    baseline: Optional[Dict[str, Tuple[int, float]]] = None
+    if getattr(args, "incremental", False):
+        run_state = RunState(state_path)
+        if not run_state.is_empty():
+            baseline = run_state.files()
+            logger.info(f"Incremental run against {len(baseline):,} files recorded in {state_path}")
+        else:
+            logger.info(f"No previous state in {state_path}; running a full scan to create it")
+
     # Build exclusion set from reports, if any
     skip_paths = set()
     if args.exclude_by_report:
@@ -1272,10 +1364,12 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
 
         groups_all: Dict[str, Tuple[Any, List[Any]]] = {}
         group_metadata: Dict[str, Dict[str, Any]] = {}
+        scanned_all: Dict[str, Tuple[int, float]] = {}
 
         def _merge_groups(dst: Dict[str, Tuple[Any, List[Any]]], src: Dict[str, Tuple[Any, List[Any]]]):
             # Avoid accidental key collisions by rewriting ids if necessary
             src_meta = getattr(src, "metadata", {}) if hasattr(src, "metadata") else {}
+            scanned_all.update(getattr(src, "scanned", None) or {})
             for k, v in src.items():
                 nk = k
                 i = 1
@@ -1302,6 +1396,8 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
                     cache=cache,
                     reporter=pipeline_reporter,
                     skip_paths=skip_paths,
+                    fingerprints=fingerprints,
+                    baseline=baseline,
                 )
                 logger.info(f"Unlimited depth pipeline completed with {len(g_unlim)} groups")
             except TypeError as e:
@@ -1330,6 +1426,8 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
                     cache=cache,
                     reporter=pipeline_reporter,
                     skip_paths=skip_paths,
+                    fingerprints=fingerprints,
+                    baseline=baseline,
                 )
                 logger.info(f"Fallback unlimited depth pipeline completed with {len(g_unlim)} groups")
             _merge_groups(groups_all, g_unlim)
@@ -1350,6 +1448,8 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
                     cache=cache,
                     reporter=pipeline_reporter,
                     skip_paths=skip_paths,
+                    fingerprints=fingerprints,
+                    baseline=baseline,
                 )
                 logger.info(f"Finite depth pipeline completed with {len(g_fin)} groups")
             except TypeError as e:
@@ -1382,6 +1482,8 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
                     cache=cache,
                     reporter=pipeline_reporter,
                     skip_paths=skip_paths,
+                    fingerprints=fingerprints,
+                    baseline=baseline,
                 )
 
                 logger.info(f"Fallback finite depth pipeline completed with {len(g_fin)} groups")
@@ -1395,8 +1497,25 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
 
         logger.info(f"Writing report with {len(winners)} groups to: {report_path}")
         reporter.set_status("Writing report to disk")
-        write_report(report_path, winners, metadata=group_metadata)
-        print(f"Wrote report to: {report_path}")
+        if run_state is not None and not quit_requested:
+            # Untouched files keep their stored groups; only groups involving touched files are taken from this run
+            delta = diff_files(baseline or {}, scanned_all)
+            fresh = report_entries(winners, metadata=group_metadata)
+            if baseline is not None:
+                fresh = touching(fresh, delta.touched)
+            merged, changes = merge_groups(run_state.groups(), fresh, delta)
+            write_report_entries(report_path, merged)
+            changed_entries = {gid: merged[gid] for gid in [*changes["new"], *changes["updated"]]}
+            write_report_entries(delta_path, changed_entries, delta={**delta.summary(), **changes})
+            run_state.record(scanned_all, merged)
+            print(f"Wrote report to: {report_path}")
+            print(
+                f"Wrote delta report to: {delta_path} "
+                f"({len(changes['new'])} new, {len(changes['updated'])} updated, {len(changes['dissolved'])} dissolved groups)"
+            )
+        else:
+            write_report(report_path, winners, metadata=group_metadata)
+            print(f"Wrote report to: {report_path}")
         if quit_requested:
             print("Scan interrupted early; partial findings saved to the report above.")
 
@@ -1418,7 +1537,7 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         if args.analyze_report:
             logger.info(f"Analyzing reports: {args.analyze_report}")
             paths = [Path(p).expanduser().resolve() for p in args.analyze_report]
-            print(render_analysis_for_reports(paths, verbosity=1, show_progress=True))
+            print(render_analysis_for_reports(paths, verbosity=1, show_progress=True, cache=cache))
 
         if quit_requested:
             logger.warning("Scan ended early due to interrupt.")
@@ -1432,7 +1551,13 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         if cache:
             logger.debug("Closing hash cache")
             cache.close()
+        if fingerprints is not None:
+            fingerprints.close()
+        if run_state is not None:
+            run_state.close()
         reporter.stop()
+        if metrics_stream is not None and metrics_stream is not sys.stdout:
+            metrics_stream.close()
         _release_output_lock(lock_file, logger)
         logger.info("vdedup session ended")
 
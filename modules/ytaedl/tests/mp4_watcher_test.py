@@ -85,3 +85,21 @@ def test_configuration_changes_emit_log_entries(tmp_path):
     assert "Default operation set to copy" in log_text
     assert "Max files per run set to 5" in log_text
     assert "Free-space trigger set to 7.5 GiB" in log_text
+
+
+def test_close_releases_the_staging_monitor(tmp_path, monkeypatch):
+    from ytaedl import mp4_sync
+
+    closed = []
+    monkeypatch.setattr(mp4_sync.StagedInventory, "close", lambda self: closed.append(self))
+    cfg = _make_config(tmp_path)
+    (cfg.staging_root / "alice").mkdir()
+    (cfg.staging_root / "alice" / "a.mp4").write_bytes(b"x" * 64)
+    watcher = MP4Watcher(config=cfg, enabled=True)
+
+    assert watcher._calculate_total_mp4_size() == 64
+    staged = watcher._staged
+    watcher.close()
+    watcher.close()
+    assert closed == [staged]
+    assert watcher._staged is None
@@ -0,0 +1,148 @@
+"""Tests for the in-process asyncio worker engine."""
+
+from __future__ import annotations
+
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+import ytaedl.async_engine as async_engine
+from ytaedl.async_engine import AsyncEngine, UrlFileJob, _split_lines
+from ytaedl.state_db import DownloadState
+
+# Stands in for yt-dlp: destination, '\r'-separated progress, then the file
+FAKE_YTDLP = r"""
+import sys, time
+out, url, mode = sys.argv[1], sys.argv[2], sys.argv[3]
+if mode == "hang":
+    time.sleep(60)
+name = url.rsplit("/", 1)[-1] + ".mp4"
+print(f"[download] Destination: {out}/{name}", flush=True)
+for pct in (10.0, 55.5, 100.0):
+    sys.stdout.write(f"[download] {pct:5.1f}% of 2.00MiB at 1.00MiB/s ETA 00:01\r")
+    sys.stdout.flush()
+open(f"{out}/{name}", "wb").write(b"x" * 2048)
+"""
+
+
+@pytest.fixture
+def fake_tool(monkeypatch):
+    mode = {"value": "ok"}
+
+    def build(urls, out_dir, max_mibs=None, max_height=None, temp_dir=None):
+        return [sys.executable, "-c", FAKE_YTDLP, str(out_dir), urls[0], mode["value"]]
+
+    monkeypatch.setattr(async_engine, "_build_ytdlp_cmd", build)
+    return mode
+
+
+def _job(tmp_path: Path, name: str, urls, **kwargs) -> UrlFileJob:
+    urlfile = tmp_path / "urls" / f"{name}.txt"
+    urlfile.parent.mkdir(parents=True, exist_ok=True)
+    urlfile.write_text("\n".join(urls) + "\n", encoding="utf-8")
+    out = tmp_path / "stars" / name
+    return UrlFileJob(
+        urlfile=urlfile,
+        out_dir=out,
+        canonical_out_dir=out,
+        work_dir=tmp_path / "tmp",
+        raw_dir=tmp_path / "raw",
+        program_log=tmp_path / "logs" / f"{name}.log",
+        **kwargs,
+    )
+
+
+def test_split_lines_keeps_carriage_return_chunks():
+    assert _split_lines("a\rb\nc") == (["a\r", "b\n"], "c")
+
+
+def test_slots_share_one_loop_and_record_outcomes(tmp_path, fake_tool):
+    events = {"alpha": [], "beta": []}
+    engine = AsyncEngine()
+    try:
+        with DownloadState(tmp_path / "state.sqlite") as state:
+            jobs = {
+                "alpha": _job(tmp_path, "alpha", ["https://e.com/a1", "https://e.com/a2"], state=state),
+                "beta": _job(tmp_path, "beta", ["https://e.com/b1"], state=state, archive_dir=tmp_path / "archive"),
+            }
+            workers = {name: engine.start(job, events[name].append) for name, job in jobs.items()}
+            assert {name: w.wait(30) for name, w in workers.items()} == {"alpha": 0, "beta": 0}
+
+            assert state.statuses(jobs["alpha"].urlfile) == {
+                "https://e.com/a1": "downloaded",
+                "https://e.com/a2": "downloaded",
+            }
+            assert state.file_state(jobs["beta"].urlfile).pending == 0
+    finally:
+        engine.close()
+
+    assert sorted(p.name for p in (tmp_path / "stars" / "alpha").iterdir()) == ["a1.mp4", "a2.mp4"]
+    kinds = [e["event"] for e in events["alpha"]]
+    assert kinds.count("start") == 2 and kinds.count("finish") == 2
+    progress = [e for e in events["alpha"] if e["event"] == "progress"]
+    assert progress and all(e["percent"] <= 99.9 for e in progress)
+    assert progress[0]["url_index"] == 1 and progress[0]["downloader"] == "yt-dlp"
+    assert any(e["event"] == "archive_write" for e in events["beta"])
+    assert (tmp_path / "archive" / "yt-beta.txt").read_text(encoding="utf-8").startswith("downloaded\t")
+
+
+def test_silent_tool_is_recorded_as_stalled(tmp_path, fake_tool):
+    fake_tool["value"] = "hang"
+    engine = AsyncEngine()
+    try:
+        with DownloadState(tmp_path / "state.sqlite") as state:
+            job = _job(tmp_path, "gamma", ["https://e.com/g1"], state=state, stall_seconds=1, retries=0)
+            events = []
+            assert engine.start(job, events.append).wait(30) == 124
+            assert state.statuses(job.urlfile) == {"https://e.com/g1": "stalled"}
+        assert any(e["event"] == "stalled" for e in events)
+    finally:
+        engine.close()
+
+
+def test_terminate_stops_the_tool(tmp_path, fake_tool):
+    fake_tool["value"] = "hang"
+    started = threading.Event()
+    engine = AsyncEngine()
+    try:
+        job = _job(tmp_path, "delta", ["https://e.com/d1"], stall_seconds=0)
+        worker = engine.start(job, lambda evt: started.set() if evt["event"] == "start" else None)
+        assert started.wait(10)
+        assert worker.poll() is None
+        worker.terminate()
+        assert worker.wait(10) < 0
+        assert worker.pid is None
+    finally:
+        engine.close()
+
+
+def test_state_database_is_used_off_the_event_loop(tmp_path, fake_tool):
+    threads = []
+
+    class TrackingState(DownloadState):
+        def sync_url_file(self, *args, **kwargs):
+            threads.append(threading.current_thread().name)
+            return super().sync_url_file(*args, **kwargs)
+
+        def next_unfinished(self, *args, **kwargs):
+            threads.append(threading.current_thread().name)
+            return super().next_unfinished(*args, **kwargs)
+
+        def record(self, *args, **kwargs):
+            threads.append(threading.current_thread().name)
+            return super().record(*args, **kwargs)
+
+    engine = AsyncEngine()
+    try:
+        with TrackingState(tmp_path / "state.sqlite") as state:
+            job = _job(tmp_path, "eps", ["https://e.com/e1"], state=state, archive_dir=tmp_path / "archive")
+            events = []
+            assert engine.start(job, events.append).wait(30) == 0
+            assert state.statuses(job.urlfile) == {"https://e.com/e1": "downloaded"}
+    finally:
+        engine.close()
+
+    assert len(threads) >= 4 and "ytaedl-async-engine" not in threads
+    assert any(e["event"] == "archive_write" for e in events)
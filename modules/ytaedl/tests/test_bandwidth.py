@@ -0,0 +1,80 @@
+"""Tests for the manager's bandwidth scheduler."""
+
+from __future__ import annotations
+
+import pytest
+
+from ytaedl.bandwidth import BandwidthScheduler, fair_shares, host_of
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.t = 1000.0
+
+    def __call__(self) -> float:
+        return self.t
+
+
+def test_host_of_normalises():
+    assert host_of("https://WWW.Example.com:8443/v/1") == "example.com"
+    assert host_of("https://cdn.example.com/x") == "cdn.example.com"
+    assert host_of("not a url") is None
+    assert host_of(None) is None
+
+
+def test_fair_shares_gives_leftover_to_unsatisfied_flows():
+    shares = fair_shares(30.0, {"slow": 4.0, "a": 30.0, "b": 30.0})
+    assert shares == {"slow": 4.0, "a": pytest.approx(13.0), "b": pytest.approx(13.0)}
+    assert fair_shares(10.0, {}) == {}
+
+
+def test_per_host_limit_and_admission():
+    sched = BandwidthScheduler(total_mibs=10, per_worker_mibs=4, max_per_host=1)
+    assert sched.assign(1, "a.com") == 4.0
+    assert not sched.host_has_room("a.com")
+    assert sched.host_has_room("b.com") and sched.host_has_room(None)
+
+    sched.observe(1, 8.0)
+    assert not sched.can_admit()  # 8 in use + 4 for a newcomer > 10
+    sched.release(1)
+    assert sched.host_has_room("a.com") and sched.can_admit()
+
+
+def test_stalled_worker_gives_its_share_to_saturated_ones():
+    clock = Clock()
+    sched = BandwidthScheduler(total_mibs=12, clock=clock, cooldown=3.0, stall_seconds=20.0)
+    assert [sched.assign(slot, f"h{slot}.com") for slot in (1, 2, 3)] == [12.0, 6.0, 4.0]
+    clock.t += 5
+    sched.observe(1, 8.0, last_progress=clock.t)
+    sched.observe(2, 4.0, last_progress=clock.t)  # below its cap of 6: limited by the site
+    sched.observe(3, 4.0, last_progress=clock.t)
+    # Slot 1 uses more than its fair share of 4; slot 2 is left alone
+    assert sched.rebalance() == {1: pytest.approx(4.0)}
+
+    # Slot 3 stops reporting; slot 1 runs at its cap and gets the freed bandwidth
+    clock.t += 30
+    sched.observe(1, 4.0, last_progress=clock.t)
+    sched.observe(2, 5.5, last_progress=clock.t)
+    assert sched.stalled(3)
+    assert sched.used() == pytest.approx(9.5)
+    assert sched.rebalance() == {1: pytest.approx(6.0)}
+    assert sched.cap_of(3) == 4.0
+
+    # Slot 3 moves again: slot 2 goes back to an equal share; slot 1 is still in its cooldown
+    sched.observe(3, 4.0, last_progress=clock.t)
+    assert sched.rebalance() == {2: pytest.approx(4.0)}
+
+
+def test_site_limited_worker_keeps_cap_and_uncappable_usage_is_reserved():
+    clock = Clock()
+    sched = BandwidthScheduler(total_mibs=20, per_worker_mibs=8, clock=clock)
+    assert [sched.assign(slot, f"h{slot}.com") for slot in (1, 3, 2)] == [8.0, 8.0, pytest.approx(20 / 3)]
+    clock.t += 5
+    sched.observe(1, 1.0, last_progress=clock.t)  # far below its cap: the site is the limit
+    sched.observe(2, 6.6, last_progress=clock.t)  # at its cap
+    sched.observe(3, 5.0, last_progress=clock.t, cappable=False)
+    targets = sched.targets()
+    assert targets[1] == pytest.approx(1.25)
+    assert targets[2] == pytest.approx(8.0)  # 15 left after aebndl, bounded by the per-worker cap
+    # The slow worker is not restarted just to lower a cap it does not use
+    assert sched.rebalance() == {2: pytest.approx(8.0)}
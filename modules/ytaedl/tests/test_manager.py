@@ -632,6 +632,9 @@ class TestMainFunction:
             def log_event(self, *_args, **_kwargs):
                 return None
 
+            def close(self):
+                return None
+
         monkeypatch.setattr(manager, "MP4Watcher", DummyWatcher)
 
         args = [
@@ -0,0 +1,258 @@
+"""Tests for the mp4_sync transfer engine."""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from ytaedl import mp4_sync
+from ytaedl.mp4_sync import (
+    PollingSource,
+    ProgressState,
+    StabilityQueue,
+    StagedInventory,
+    build_plan,
+    copy_with_progress,
+    execute_plan,
+    monitor_for_new_files,
+)
+
+
+def _staging(tmp_path: Path, sizes) -> Path:
+    source = tmp_path / "staging"
+    for folder, names in sizes.items():
+        (source / folder).mkdir(parents=True)
+        for name, size in names.items():
+            (source / folder / name).write_bytes(bytes([len(name)]) * size)
+    return source
+
+
+def _run(tmp_path: Path, *, no_delete: bool, workers: int):
+    source = _staging(tmp_path, {"alice": {"a.mp4": 3000, "b.mp4": 5000}, "bob": {"c.mp4": 7000}})
+    dest = tmp_path / "dest"
+    dest.mkdir()
+    (dest / "alice").mkdir()
+    (dest / "alice" / "b.mp4").write_bytes(b"x" * 10)  # smaller: replaced
+    progress = ProgressState()
+    plan, totals = build_plan(source, dest, mp4_sync.ACTION_MOVE)
+    progress.set_folder_totals(totals)
+    progress.set_total_bytes(sum(a.source_size or 0 for a in plan.actions if a.source))
+    done = execute_plan(plan, dry_run=False, progress=progress, no_delete=no_delete, workers=workers)
+    return source, dest, progress, done
+
+
+def test_parallel_move_renames_within_a_filesystem(tmp_path):
+    source, dest, progress, done = _run(tmp_path, no_delete=False, workers=3)
+    assert [Path(a.destination).name for a in done] == ["a.mp4", "b.mp4", "c.mp4"]
+    assert {a.metadata["transfer"] for a in done} == {"rename"}
+    assert (dest / "alice" / "b.mp4").stat().st_size == 5000
+    assert (dest / "bob" / "c.mp4").stat().st_size == 7000
+    assert not list(source.rglob("*.mp4"))
+    snap = progress.snapshot()
+    assert snap["processed_bytes"] == snap["total_bytes"] == 15000
+    assert snap["processed_files"] == 3 and snap["active_transfers"] == 0
+
+
+def test_parallel_copy_keeps_sources_and_counts_bytes_once(tmp_path):
+    source, dest, progress, done = _run(tmp_path, no_delete=True, workers=2)
+    assert len(done) == 3
+    assert all(a.metadata["transfer"] != "rename" for a in done)
+    assert len(list(source.rglob("*.mp4"))) == 3
+    assert (dest / "alice" / "a.mp4").read_bytes() == (source / "alice" / "a.mp4").read_bytes()
+    snap = progress.snapshot()
+    assert snap["processed_bytes"] == 15000
+    assert progress.folder_progress == {"alice": {"files": 2, "bytes": 8000}, "bob": {"files": 1, "bytes": 7000}}
+
+
+def test_copy_falls_back_to_read_write(tmp_path, monkeypatch):
+    monkeypatch.setattr(mp4_sync, "_kernel_copy", lambda *a: None)
+    src = tmp_path / "in.mp4"
+    src.write_bytes(b"z" * 100_000)
+    progress = ProgressState()
+    progress.start_file("f", "f", src.name, 100_000)
+    assert copy_with_progress(src, tmp_path / "out" / "in.mp4", progress, chunk_size=4096) == "read/write"
+    assert (tmp_path / "out" / "in.mp4").read_bytes() == src.read_bytes()
+    assert progress.snapshot()["current_file_done"] == 100_000
+
+
+def test_kernel_copy_returning_zero_up_front_falls_back(tmp_path, monkeypatch):
+    # FUSE/network filesystems may answer 0 before copying anything
+    monkeypatch.setattr(mp4_sync.os, "copy_file_range", lambda *a: 0, raising=False)
+    monkeypatch.setattr(mp4_sync.os, "sendfile", lambda *a: 0, raising=False)
+    src = tmp_path / "in.mp4"
+    src.write_bytes(b"z" * 10_000)
+    progress = ProgressState()
+    progress.start_file("f", "f", src.name, 10_000)
+    assert copy_with_progress(src, tmp_path / "out" / "in.mp4", progress) == "read/write"
+    assert (tmp_path / "out" / "in.mp4").read_bytes() == src.read_bytes()
+
+
+def test_short_copy_keeps_the_source(tmp_path, monkeypatch):
+    calls = []
+
+    def stalls(src_fd, dest_fd, count):
+        calls.append(count)
+        return os.write(dest_fd, b"z" * 100) if len(calls) == 1 else 0
+
+    monkeypatch.setattr(mp4_sync.os, "copy_file_range", stalls, raising=False)
+    source = _staging(tmp_path, {"alice": {"a.mp4": 3000}})
+    dest = tmp_path / "dest"
+    dest.mkdir()
+    monkeypatch.setattr(mp4_sync, "same_filesystem", lambda *a: False)
+    progress = ProgressState()
+    plan, totals = build_plan(source, dest, mp4_sync.ACTION_MOVE)
+    progress.set_folder_totals(totals)
+    done = execute_plan(plan, dry_run=False, progress=progress, no_delete=False, workers=1)
+    assert done == []
+    assert (source / "alice" / "a.mp4").stat().st_size == 3000
+
+
+def test_throughput_aggregates_concurrent_transfers():
+    progress = ProgressState()
+    progress.set_folder_totals({"f": {"files": 2, "bytes": 0}})
+    barrier = threading.Barrier(2)
+
+    def transfer(name: str) -> None:
+        progress.start_file("f", "f", name, 4 << 20)
+        barrier.wait()
+        for _ in range(4):
+            progress.update_file_progress(1 << 20, 0.01)
+        progress.finish_file(4 << 20)
+
+    threads = [threading.Thread(target=transfer, args=(n,)) for n in ("a", "b")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    snap = progress.snapshot()
+    assert snap["processed_bytes"] == 8 << 20
+    assert snap["current_folder_processed_files"] == 2
+    assert snap["current_speed"] > 0
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.t = 100.0
+
+    def __call__(self) -> float:
+        return self.t
+
+
+def _wait_for(predicate, timeout: float = 10.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_stability_queue_waits_for_size_to_settle(tmp_path):
+    clock = Clock()
+    queue = StabilityQueue(settle=2.0, clock=clock)
+    growing, gone = tmp_path / "a.mp4", tmp_path / "b.mp4"
+    growing.write_bytes(b"x" * 10)
+    gone.write_bytes(b"y")
+    queue.touch(growing)
+    queue.touch(gone)
+    assert queue.next_due_in() == 2.0 and queue.pop_ready() == []
+
+    growing.write_bytes(b"x" * 20)
+    gone.unlink()
+    clock.t += 2.0
+    assert queue.pop_ready() == []  # grew since it was reported; the missing one is dropped
+    assert len(queue) == 1
+    clock.t += 2.0
+    assert queue.pop_ready() == [growing]
+    assert queue.next_due_in() is None
+
+
+@pytest.mark.parametrize("backend", ["polling", "inotify"])
+def test_source_monitor_reports_finished_and_new_folders(tmp_path, backend):
+    if backend == "inotify" and not sys.platform.startswith("linux"):
+        pytest.skip("inotify is Linux only")
+    root = tmp_path / "staging"
+    (root / "alice").mkdir(parents=True)
+    monitor = PollingSource(root, interval=0.1) if backend == "polling" else mp4_sync.InotifySource(root)
+    try:
+        monitor.poll(0)
+        (root / "alice" / "a.mp4").write_bytes(b"x")
+        (root / "alice" / "a.part.mp4").write_bytes(b"x")
+        (root / "bob").mkdir()
+        (root / "bob" / "b.mp4").write_bytes(b"y")
+        seen = set()
+
+        def found() -> bool:
+            for path in monitor.poll(0.2):
+                seen.update(mp4_sync.expand_changed(path, root))
+            return {root / "alice" / "a.mp4", root / "bob" / "b.mp4"} <= seen
+
+        assert _wait_for(found)
+        assert root / "alice" / "a.part.mp4" not in seen
+    finally:
+        monitor.close()
+
+
+def test_scan_mode_moves_files_once_settled(tmp_path):
+    source = _staging(tmp_path, {"alice": {"old.mp4": 10}})
+    dest = tmp_path / "dest"
+    dest.mkdir()
+    known = {str(source / "alice" / "old.mp4"): 10}
+    stop = threading.Event()
+    actions = []
+    watcher = threading.Thread(
+        target=monitor_for_new_files,
+        args=(source, dest, mp4_sync.ACTION_MOVE, False, known, ProgressState(), stop, actions),
+        kwargs={"poll_interval": 0.1, "settle_seconds": 0.2},
+    )
+    watcher.start()
+    try:
+        time.sleep(0.3)
+        (source / "alice" / "new.mp4").write_bytes(b"n" * 50)
+        assert _wait_for(lambda: (dest / "alice" / "new.mp4").exists())
+    finally:
+        stop.set()
+        watcher.join(10)
+    assert not watcher.is_alive()
+    assert [Path(a.destination).name for a in actions] == ["new.mp4"]
+    assert (source / "alice" / "old.mp4").exists()
+
+
+def test_scan_mode_picks_up_files_that_landed_before_the_monitor(tmp_path):
+    # a.mp4 finished after collect_known_files() ran but before any watch existed
+    source = _staging(tmp_path, {"alice": {"old.mp4": 10, "a.mp4": 20}})
+    dest = tmp_path / "dest"
+    dest.mkdir()
+    known = {str(source / "alice" / "old.mp4"): 10}
+    stop = threading.Event()
+    actions = []
+    watcher = threading.Thread(
+        target=monitor_for_new_files,
+        args=(source, dest, mp4_sync.ACTION_MOVE, False, known, ProgressState(), stop, actions),
+        kwargs={"poll_interval": 60.0, "settle_seconds": 0.1},
+    )
+    watcher.start()
+    try:
+        assert _wait_for(lambda: (dest / "alice" / "a.mp4").exists())
+    finally:
+        stop.set()
+        watcher.join(10)
+    assert [Path(a.destination).name for a in actions] == ["a.mp4"]
+
+
+def test_staged_inventory_tracks_total(tmp_path):
+    source = _staging(tmp_path, {"alice": {"a.mp4": 100, "a.mp4.part": 7}, "bob": {"b.mp4": 50}})
+    inventory = StagedInventory(source, poll_interval=0.1)
+    try:
+        assert inventory.total_bytes() == 150
+        (source / "alice" / "a.mp4").unlink()
+        (source / "carol").mkdir()
+        (source / "carol" / "c.mp4").write_bytes(b"c" * 30)
+        assert _wait_for(lambda: inventory.total_bytes() == 80)
+    finally:
+        inventory.close()
@@ -0,0 +1,111 @@
+"""Tests for the shared download-state database."""
+
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from unittest.mock import patch
+
+import ytaedl.downloader as downloader
+from ytaedl.archive_builder import build_archive_for_file
+from ytaedl.state_db import DownloadState
+
+
+def _urlfile(tmp_path: Path, *urls: str) -> Path:
+    path = tmp_path / "star.txt"
+    path.write_text("\n".join(urls) + "\n", encoding="utf-8")
+    return path
+
+
+def test_sync_keeps_statuses_and_counts_unfinished(tmp_path):
+    urlfile = _urlfile(tmp_path, "https://e.com/1", "# note", "https://e.com/2", "https://e.com/3", "https://e.com/1")
+    with DownloadState(tmp_path / "state.sqlite") as state:
+        info = state.sync_url_file(urlfile)
+        assert (info.url_count, info.pending) == (3, 3)
+
+        state.record(urlfile, "https://e.com/1", "downloaded", bytes=10, elapsed=1.5)
+        state.record(urlfile, "https://e.com/3", "bad-url")
+        assert state.next_unfinished(urlfile) == (2, "https://e.com/2")
+        assert state.next_unfinished(urlfile, after=2) is None
+
+        urlfile.write_text("https://e.com/3\nhttps://e.com/4\nhttps://e.com/1\n", encoding="utf-8")
+        info = state.sync_url_file(urlfile)
+        assert (info.url_count, info.pending) == (3, 1)
+        assert state.statuses(urlfile) == {"https://e.com/1": "downloaded", "https://e.com/3": "bad-url"}
+        assert state.next_unfinished(urlfile) == (2, "https://e.com/4")
+        assert state.unfinished_files() == {str(urlfile.resolve()): 1}
+
+
+def test_archive_import_maps_lines_without_urls_by_position(tmp_path):
+    urlfile = _urlfile(tmp_path, "https://e.com/1", "https://e.com/2", "https://e.com/3")
+    archive = tmp_path / "yt-star.txt"
+    archive.write_text(
+        "downloaded\t1.000\t2025-09-30T09:47:55\t2.00MiB\tid1\n"
+        "stalled\t3.000\t2025-09-30T09:48:00\t0.00MiB\t\thttps://e.com/3\n",
+        encoding="utf-8",
+    )
+    with DownloadState(tmp_path / "state.sqlite") as state:
+        state.sync_url_file(urlfile)
+        assert state.import_archive(urlfile, archive) == 2
+        assert state.statuses(urlfile) == {"https://e.com/1": "downloaded", "https://e.com/3": "stalled"}
+        # Imported once: later archive edits do not override the database
+        assert state.import_archive(urlfile, archive) == 0
+        assert state.file_state(urlfile).pending == 1
+
+
+def test_concurrent_workers_update_atomically(tmp_path):
+    urls = [f"https://e.com/{i}" for i in range(200)]
+    urlfile = _urlfile(tmp_path, *urls)
+    db = tmp_path / "state.sqlite"
+    DownloadState(db).sync_url_file(urlfile)
+
+    def worker(chunk):
+        # One connection per worker, as separate downloader processes would have
+        with DownloadState(db) as state:
+            for url in chunk:
+                state.record(urlfile, url, "downloaded", bytes=1)
+
+    threads = [threading.Thread(target=worker, args=(urls[i::4],)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    with DownloadState(db) as state:
+        assert state.file_state(urlfile).pending == 0
+        assert state.next_unfinished(urlfile) is None
+
+
+def test_downloader_skips_urls_recorded_in_state_db(tmp_path):
+    urlfile = _urlfile(tmp_path, "https://example.com/video1", "https://example.com/video2")
+    db = tmp_path / "state.sqlite"
+    with DownloadState(db) as state:
+        state.sync_url_file(urlfile)
+        state.record(urlfile, "https://example.com/video1", "downloaded")
+
+    argv = ["ytaedl", "-f", str(urlfile), "-o", str(tmp_path / "out"), "-g", str(tmp_path / "prog.log"),
+            "-r", str(tmp_path / "raw"), "-w", str(tmp_path / "work"), "--state-db", str(db)]
+    with patch("sys.argv", argv):
+        with patch("ytaedl.downloader._run_one") as mock_run:
+            mock_run.return_value = (124, {"elapsed_s": 2.0, "downloaded": 0, "already": False})
+            assert downloader.main() == 124
+            assert [c.kwargs["url_index"] for c in mock_run.call_args_list] == [2]
+
+    with DownloadState(db) as state:
+        assert state.statuses(urlfile)["https://example.com/video2"] == "stalled"
+        assert state.file_state(urlfile).pending == 0
+
+
+def test_archive_builder_fills_only_unrecorded_urls(tmp_path):
+    urlfile = _urlfile(tmp_path, "https://e.com/1", "https://e.com/2")
+    media = tmp_path / "dl" / "star"
+    media.mkdir(parents=True)
+    (media / "a.mp4").write_bytes(b"x" * 2048)
+    (media / "b.mp4").write_bytes(b"x" * 2048)
+    with DownloadState(tmp_path / "state.sqlite") as state:
+        state.sync_url_file(urlfile)
+        state.record(urlfile, "https://e.com/2", "bad-url")
+
+        build_archive_for_file(urlfile, "p", [tmp_path / "dl"], tmp_path / "archives", True, state=state)
+
+        assert state.statuses(urlfile) == {"https://e.com/1": "ARCHIVE_REBUILD", "https://e.com/2": "bad-url"}
@@ -0,0 +1,77 @@
+"""Tests for the URL scan inventory cache."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from ytaedl import urlscan
+from ytaedl.urlscan import InventoryCache, scan_url_stats
+
+
+def _age(path: Path, seconds: float = 60.0) -> None:
+    """Push the mtime back so the cache does not treat it as racy."""
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns - int(seconds * 1e9)))
+
+
+def _tree(tmp_path: Path):
+    stars, ae, media = tmp_path / "stars-urls", tmp_path / "ae-urls", tmp_path / "media"
+    for d in (stars, ae, media / "alice", media / "bob"):
+        d.mkdir(parents=True)
+    (stars / "alice.txt").write_text("https://e.com/1\nhttps://e.com/2\nhttps://e.com/2\n", encoding="utf-8")
+    (ae / "alice.txt").write_text("https://e.com/2\nhttps://e.com/3\n", encoding="utf-8")
+    (stars / "bob.txt").write_text("https://e.com/9\n", encoding="utf-8")
+    (media / "alice" / "a.mp4").write_bytes(b"x" * 10)
+    for path in [stars / "alice.txt", ae / "alice.txt", stars / "bob.txt", stars, ae, media / "alice", media / "bob"]:
+        _age(path)
+    return stars, ae, media
+
+
+def test_cached_scan_matches_full_scan_and_skips_unchanged(tmp_path, monkeypatch):
+    stars, ae, media = _tree(tmp_path)
+    cache = InventoryCache()
+    first = scan_url_stats(stars, ae, media, cache=cache)
+    full = scan_url_stats(stars, ae, media)
+    assert first.totals == full.totals
+    alice = first.path_index[str((stars / "alice.txt").resolve())]
+    assert (alice.total_unique_urls, alice.stars_line_count, alice.ae_unique_urls, alice.remaining) == (3, 3, 2, 2)
+
+    reads = []
+    monkeypatch.setattr(urlscan, "read_url_lines", lambda p: reads.append(p) or [])
+    monkeypatch.setattr(urlscan, "mp4_inventory", lambda f: reads.append(f) or (0, 0, []))
+    again = scan_url_stats(stars, ae, media, cache=cache)
+    assert reads == []
+    assert again.totals == full.totals
+
+
+def test_only_changed_folders_and_files_are_rescanned(tmp_path):
+    stars, ae, media = _tree(tmp_path)
+    cache = InventoryCache(tmp_path / "cache.json")
+    scan_url_stats(stars, ae, media, cache=cache)
+    cache.save()
+
+    (media / "bob" / "b.mp4").write_bytes(b"y" * 5)
+    _age(media / "bob")
+    with (stars / "alice.txt").open("a", encoding="utf-8") as fh:
+        fh.write("https://e.com/4\n")
+    _age(stars / "alice.txt")
+
+    # A fresh process picks the cache up from disk
+    warm = InventoryCache(tmp_path / "cache.json")
+    scan = scan_url_stats(stars, ae, media, cache=warm)
+    assert warm.misses == 2  # bob's media folder and alice's URL counts
+    by_name = {e.name: e for e in scan.entries}
+    assert by_name["alice"].total_unique_urls == 4
+    assert (by_name["bob"].mp4_count, by_name["bob"].mp4_files) == (1, ["b.mp4"])
+    assert scan.totals == scan_url_stats(stars, ae, media).totals
+
+
+def test_recent_changes_are_not_cached(tmp_path):
+    stars, ae, media = _tree(tmp_path)
+    (media / "alice" / "new.mp4").write_bytes(b"z")  # folder mtime is now
+    cache = InventoryCache()
+    scan_url_stats(stars, ae, media, cache=cache)
+    misses = cache.misses
+    scan_url_stats(stars, ae, media, cache=cache)
+    assert cache.misses - misses == 1
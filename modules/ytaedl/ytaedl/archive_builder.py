@@ -5,12 +5,14 @@ Archive file rebuilder for ytaedl URL files.
 from __future__ import annotations
 
 import argparse
+import sys
 import time
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
 from .downloader import _ensure_archive_line_has_url, _format_archive_line
+from .state_db import DownloadState
 from .urlscan import read_url_lines
 
 DEFAULT_URL_DIRS = ["files/downloads/stars", "files/downloads/ae-stars"]
@@ -87,6 +89,7 @@ def build_archive_for_file(
     download_dirs: List[Path],
     archive_dir: Path,
     apply: bool,
+    state: Optional[DownloadState] = None,
 ) -> ArchiveBuildResult:
     urls = read_url_lines(url_file)
     stem = url_file.stem
@@ -94,6 +97,7 @@ def build_archive_for_file(
     mp4_iter = iter(mp4_infos)
     now = time.time()
     new_lines: List[str] = []
+    state_rows: List[Tuple[str, str, int, float, str]] = []
     mp4_used = 0
     for idx, url in enumerate(urls, start=1):
         try:
@@ -113,6 +117,11 @@ def build_archive_for_file(
             url,
         )
         new_lines.append(line)
+        state_rows.append((url, ARCHIVE_STATUS, size_bytes, elapsed, ""))
+    if state is not None and state_rows:
+        # Only fills in URLs the downloader has not recorded; real statuses win
+        state.sync_url_file(url_file)
+        state.record_many(url_file, state_rows, only_unfinished=True, append=False)
     archive_dir.mkdir(parents=True, exist_ok=True)
     archive_path = archive_dir / f"{prefix}_{stem}.txt"
     new_text = "\n".join(new_lines) + ("\n" if new_lines else "")
@@ -161,6 +170,12 @@ def build_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Overwrite existing archive files instead of writing .rebuild copies.",
     )
+    parser.add_argument(
+        "-D",
+        "--state-db",
+        default=None,
+        help="ytaedl state database to fill with the rebuilt statuses (URLs without a status only).",
+    )
     return parser
 
 
@@ -175,10 +190,15 @@ def cli_main(argv: Optional[Sequence[str]] = None) -> int:
         print("No URL files were found.", file=sys.stderr)
         return 1
 
+    state = DownloadState(Path(args.state_db).expanduser().resolve()) if args.state_db else None
     results: List[ArchiveBuildResult] = []
-    for url_file, prefix in url_files:
-        result = build_archive_for_file(url_file, prefix, download_dirs, archive_dir, args.apply)
-        results.append(result)
+    try:
+        for url_file, prefix in url_files:
+            result = build_archive_for_file(url_file, prefix, download_dirs, archive_dir, args.apply, state=state)
+            results.append(result)
+    finally:
+        if state is not None:
+            state.close()
 
     total_written = sum(1 for r in results if r.written)
     total_repaired = sum(1 for r in results if r.repaired)
@@ -189,6 +209,8 @@ def cli_main(argv: Optional[Sequence[str]] = None) -> int:
     print(f"URL directories: {', '.join(str(p) for p in url_dirs)}")
     print(f"Download directories: {', '.join(str(p) for p in download_dirs)}")
     print(f"Archive directory: {archive_dir}")
+    if state is not None:
+        print(f"State database: {state.path}")
     print(f"Total URL files: {total_archives}")
     print(f"Archives written: {total_written} ({total_repaired} repairs)")
 
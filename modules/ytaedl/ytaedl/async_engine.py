@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+In-process asyncio engine for the manager's download slots.
+
+The default ("process") engine starts one downloader.py Python subprocess per
+slot. That subprocess runs yt-dlp/aebndl, re-encodes every parsed line as
+NDJSON, and the manager decodes it again on a reader thread per slot.
+AsyncEngine keeps a single event loop, on one background thread, for all
+slots instead:
+
+- each slot is a task that works through its URL file like downloader.main
+  does, with the same skip rules, retries, stall/timeout handling, program
+  log, raw logs, archive file and state database;
+- the task runs the tool directly with asyncio streams (splitting on both
+  '\\r' and '\\n') and parses it with procparsers;
+- event dicts go straight to a callback, with no NDJSON encode/decode and no
+  reader threads.
+
+The manager controls a slot through AsyncWorker, which offers the part of
+subprocess.Popen it uses (pid/poll/wait/terminate/kill) plus pause/resume.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import codecs
+import os
+import signal
+import subprocess
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from procparsers import parse_aebndl_line, parse_ytdlp_line, sanitize_line
+
+from .downloader import (
+    ProgLogger,
+    _archive_file_for,
+    _archive_start_index,
+    _build_aebndl_cmd,
+    _build_ytdlp_cmd,
+    _clamp_progress,
+    _iter_pending_urls,
+    _looks_supported_video,
+    _outcome_status,
+    _raw_log_path,
+    _read_urls,
+    _record_outcome,
+    _tool_for,
+    _urlfile_stem,
+)
+from .state_db import DownloadState
+
+EventCallback = Callable[[dict], None]
+
+_READ_CHUNK = 64 * 1024
+_TICK_S = 0.5  # how often stall/timeout/deadline checks run while a tool is silent
+_PARSERS = {"yt-dlp": parse_ytdlp_line, "aebndl": parse_aebndl_line}
+
+
+@dataclass
+class UrlFileJob:
+    """One slot's assignment: a URL file plus the downloader options that apply to it."""
+    urlfile: Path
+    out_dir: Path                 # where the tool writes (proxy location or canonical)
+    canonical_out_dir: Path       # where finished files live; used for duplicate checks
+    work_dir: Path
+    raw_dir: Path
+    program_log: Path
+    mode: str = "auto"
+    archive_dir: Optional[Path] = None
+    state: Optional[DownloadState] = None
+    timeout_s: Optional[int] = None
+    retries: int = 1
+    stall_seconds: int = 60
+    progress_log_freq: int = 30
+    max_dl_speed: Optional[float] = None
+    max_height: Optional[int] = None
+    deadline: Optional[float] = None
+
+
+def _split_lines(buffer: str) -> Tuple[List[str], str]:
+    """Split ``buffer`` after every '\\r' or '\\n'; returns (complete chunks, unterminated rest)."""
+    chunks: List[str] = []
+    start = 0
+    for i, ch in enumerate(buffer):
+        if ch == "\n" or ch == "\r":
+            chunks.append(buffer[start:i + 1])
+            start = i + 1
+    return chunks, buffer[start:]
+
+
+class AsyncWorker:
+    """Popen-like handle of one slot running on an AsyncEngine."""
+
+    def __init__(self, engine: "AsyncEngine", job: UrlFileJob, on_event: EventCallback):
+        self.job = job
+        self.returncode: Optional[int] = None
+        self._engine = engine
+        self._on_event = on_event
+        self._tool: Optional[asyncio.subprocess.Process] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop_requested = False
+        self._paused = False
+        self._done = threading.Event()
+        engine.loop.call_soon_threadsafe(self._spawn)
+
+    # ---- Popen interface (called from the manager thread) ----
+    @property
+    def pid(self) -> Optional[int]:
+        tool = self._tool
+        return tool.pid if tool is not None else None
+
+    def poll(self) -> Optional[int]:
+        return self.returncode if self._done.is_set() else None
+
+    def wait(self, timeout: Optional[float] = None) -> int:
+        if not self._done.wait(timeout):
+            raise subprocess.TimeoutExpired(f"slot:{self.job.urlfile}", timeout)
+        return self.returncode  # type: ignore[return-value]
+
+    def terminate(self) -> None:
+        self._stop_requested = True
+        self._engine.loop.call_soon_threadsafe(self._cancel)
+
+    kill = terminate
+
+    def pause(self) -> bool:
+        """Stop the running tool (SIGSTOP / psutil suspend); stall timers are held meanwhile."""
+        if self._signal_tool(suspend=True):
+            self._paused = True
+            return True
+        return False
+
+    def resume(self) -> bool:
+        if self._signal_tool(suspend=False):
+            self._paused = False
+            return True
+        return False
+
+    def _signal_tool(self, suspend: bool) -> bool:
+        tool = self._tool
+        if tool is None or tool.returncode is not None or self._done.is_set():
+            return False
+        try:
+            if os.name == "nt":
+                import psutil  # type: ignore
+
+                proc = psutil.Process(tool.pid)
+                if suspend:
+                    proc.suspend()
+                else:
+                    proc.resume()
+            else:
+                os.kill(tool.pid, signal.SIGSTOP if suspend else signal.SIGCONT)
+            return True
+        except Exception:
+            return False
+
+    # ---- event loop side ----
+    def _spawn(self) -> None:
+        if self._stop_requested:
+            self._finish(-signal.SIGTERM)
+            return
+        self._task = self._engine.loop.create_task(self._run())
+
+    def _cancel(self) -> None:
+        if self._task is not None and not self._task.done():
+            if self._paused:
+                self.resume()
+            self._task.cancel()
+
+    def _finish(self, rc: int) -> None:
+        self.returncode = rc
+        self._done.set()
+
+    def _emit(self, evt: dict) -> None:
+        try:
+            self._on_event(evt)
+        except Exception:
+            # A broken consumer must not take the download down with it
+            pass
+
+    async def _run(self) -> None:
+        rc = 1
+        try:
+            rc = await self._run_urlfile()
+        except asyncio.CancelledError:
+            rc = -signal.SIGTERM
+        except Exception as exc:
+            self._emit({"event": "error", "error": str(exc)})
+        finally:
+            self._finish(rc)
+
+    def _prepare(self) -> Tuple[ProgLogger, List[str], Optional[Path], int]:
+        """Blocking set-up of a URL file (folders, program log, URL list, state sync); run off the loop."""
+        job = self.job
+        for folder in (job.out_dir, job.canonical_out_dir, job.work_dir, job.raw_dir):
+            folder.mkdir(parents=True, exist_ok=True)
+        proglog = ProgLogger(path=job.program_log, t0=time.time())
+        proglog.program_start(job.urlfile.resolve(), job.canonical_out_dir, job.mode)
+
+        urls = _read_urls(job.urlfile)
+        if not urls:
+            return proglog, urls, None, 1
+        archive_file = _archive_file_for(job.archive_dir, job.urlfile)
+        if job.state is not None:
+            job.state.sync_url_file(job.urlfile, urls)
+            if archive_file:
+                job.state.import_archive(job.urlfile, archive_file)
+            return proglog, urls, archive_file, 1
+        return proglog, urls, archive_file, _archive_start_index(archive_file, urls)
+
+    async def _run_urlfile(self) -> int:
+        # The state database (busy timeout up to 30 s) and file I/O run on worker threads,
+        # so one slot waiting on a lock or a slow disk never stalls the other slots
+        job = self.job
+        proglog, urls, archive_file, first_unprocessed = await asyncio.to_thread(self._prepare)
+        if not urls:
+            return 3
+
+        overall_rc = 0
+        pending = _iter_pending_urls(urls, job.urlfile, job.state, first_unprocessed)
+        try:
+            while (nxt := await asyncio.to_thread(next, pending, None)) is not None:
+                index, url = nxt
+                if not _looks_supported_video(url):
+                    self._emit({"event": "skipped", "reason": "unsupported_url_shape", "url_index": index, "url": url})
+                    proglog.finish(index, 0.0, "FINISH_BAD")
+                    continue
+                tool = _tool_for(job.mode, url)
+                for _attempt in range(max(0, job.retries) + 1):
+                    rc, info = await self._run_tool(tool, index, url, proglog)
+                    if rc == 0:
+                        break
+                if archive_file or job.state is not None:
+                    # Events are collected on the worker and emitted from the loop, in order
+                    events: List[dict] = []
+                    await asyncio.to_thread(
+                        _record_outcome,
+                        job.urlfile, index, url, _outcome_status(rc, info), info, archive_file, job.state,
+                        emit=events.append,
+                    )
+                    for evt in events:
+                        self._emit(evt)
+                if rc != 0:
+                    overall_rc = rc
+        except asyncio.CancelledError:
+            proglog.program_force_exit()
+            raise
+        return overall_rc
+
+    async def _run_tool(self, tool: str, index: int, url: str, proglog: ProgLogger) -> Tuple[int, dict]:
+        """Run the tool for one URL; mirrors downloader._run_one without the NDJSON hop."""
+        job = self.job
+        proglog.start(index, 1, url)
+        t_start = time.time()
+        if tool == "aebndl":
+            cmd = _build_aebndl_cmd(url, job.out_dir, job.work_dir, job.max_height)
+        else:
+            cmd = _build_ytdlp_cmd([url], job.out_dir, job.max_dl_speed, job.max_height, temp_dir=job.work_dir)
+        self._emit({"event": "start", "downloader": tool, "url_index": index, "url_total": None,
+                    "url": url, "out_dir": str(job.out_dir), "cmd": None})
+
+        parser = _PARSERS[tool]
+        raw_path = _raw_log_path(job.raw_dir, tool, index, _urlfile_stem(Path(url)))
+        raw_path.parent.mkdir(parents=True, exist_ok=True)
+        canonical = job.canonical_out_dir.expanduser().resolve()
+        already = False
+        cleanup_proxy_path: Optional[Path] = None
+        last_progress: Optional[dict] = None
+        rc: Optional[int] = None
+
+        def _info() -> dict:
+            return {"elapsed_s": time.time() - t_start, "downloaded": (last_progress or {}).get("downloaded"),
+                    "total": (last_progress or {}).get("total"), "already": already, "downloader": tool}
+
+        try:
+            proc = await asyncio.create_subprocess_exec(*cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        except OSError as exc:
+            self._emit({"event": "error", "downloader": tool, "url_index": index, "url": url, "error": str(exc)})
+            self._emit({"event": "finish", "downloader": tool, "url_index": index, "url": url, "rc": 127})
+            proglog.finish(index, time.time() - t_start, "FINISH_BAD")
+            return 127, _info()
+        self._tool = proc
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        pending = ""
+        last_real_t = last_proglog_t = time.time()
+
+        try:
+            with raw_path.open("a", encoding="utf-8", buffering=1) as raw:
+                eof = False
+                while rc is None and not eof:
+                    try:
+                        data = await asyncio.wait_for(proc.stdout.read(_READ_CHUNK), _TICK_S)  # type: ignore[union-attr]
+                    except asyncio.TimeoutError:
+                        data = None
+                    if data is not None:
+                        eof = data == b""
+                        chunks, pending = _split_lines(pending + decoder.decode(data, final=eof))
+                        if eof and pending:
+                            chunks.append(pending)
+                            pending = ""
+                        for chunk in chunks:
+                            raw.write(chunk)
+                            evt = parser(sanitize_line(chunk))
+                            if not evt:
+                                continue
+                            last_real_t = time.time()
+                            kind = evt.get("event")
+                            if kind == "already":
+                                # Short-circuit this URL, as the downloader does
+                                already = True
+                                rc = 0
+                            elif kind == "destination" and evt.get("path"):
+                                candidate = Path(evt["path"]).expanduser().resolve()
+                                if canonical != job.out_dir:
+                                    try:
+                                        rel = candidate.relative_to(job.out_dir)
+                                    except ValueError:
+                                        rel = Path(candidate.name)
+                                    if (canonical / rel).exists():
+                                        already = True
+                                        cleanup_proxy_path = candidate
+                                        rc = 0
+                            elif kind == "progress":
+                                last_progress = evt
+                                evt = _clamp_progress(evt)
+                            self._emit({**evt, "downloader": tool, "url_index": index, "url": url})
+                            if rc is not None:
+                                break
+
+                    now = time.time()
+                    if self._paused:
+                        last_real_t = now
+                        continue
+                    if rc is not None or eof:
+                        break
+                    if job.deadline and now >= job.deadline:
+                        rc = 131
+                        self._emit({"event": "deadline", "url_index": index, "url": url})
+                    elif job.stall_seconds and job.stall_seconds > 0 and (now - last_real_t) > job.stall_seconds:
+                        rc = 124
+                        self._emit({"event": "stalled", "url_index": index, "url": url, "stall_seconds": job.stall_seconds})
+                    elif job.timeout_s and (now - t_start) > job.timeout_s:
+                        rc = 124
+                    elif job.progress_log_freq and job.progress_log_freq > 0 and last_progress \
+                            and now - last_proglog_t >= job.progress_log_freq:
+                        proglog.progress(
+                            url_index=index,
+                            pct=last_progress.get("percent"),
+                            downloaded=last_progress.get("downloaded"),
+                            total=last_progress.get("total"),
+                            speed_bps=last_progress.get("speed_bps"),
+                            eta_s=last_progress.get("eta_s"),
+                        )
+                        last_proglog_t = now
+            if rc is None:
+                rc = await proc.wait()
+            else:
+                await self._stop_tool(proc, kill=rc in (124, 131))
+        except asyncio.CancelledError:
+            await self._stop_tool(proc, kill=False)
+            self._emit({"event": "aborted", "reason": "terminated"})
+            proglog.force_exit(index, time.time() - t_start, last_progress)
+            raise
+        finally:
+            self._tool = None
+
+        if cleanup_proxy_path is not None:
+            try:
+                if cleanup_proxy_path.exists():
+                    cleanup_proxy_path.unlink()
+                    parent = cleanup_proxy_path.parent
+                    while parent != job.out_dir and parent != parent.parent and not any(parent.iterdir()):
+                        parent.rmdir()
+                        parent = parent.parent
+            except Exception:
+                pass
+
+        status = "FINISH_SUCCESS" if rc == 0 else "FINISH_BAD"
+        if rc == 0 and tool == "yt-dlp" and already:
+            status = "FINISH_DUPLICATE"
+        self._emit({"event": "finish", "downloader": tool, "url_index": index, "url": url, "rc": rc})
+        proglog.finish(index, time.time() - t_start, status)
+        return rc, _info()
+
+    @staticmethod
+    async def _stop_tool(proc: asyncio.subprocess.Process, kill: bool) -> None:
+        if proc.returncode is not None:
+            return
+        try:
+            if kill:
+                proc.kill()
+            else:
+                proc.terminate()
+        except ProcessLookupError:
+            return
+        try:
+            await asyncio.wait_for(proc.wait(), 2.0)
+        except asyncio.TimeoutError:
+            try:
+                proc.kill()
+            except ProcessLookupError:
+                pass
+            await proc.wait()
+
+
+class AsyncEngine:
+    """
+    One event loop, on a background thread, driving every slot.
+
+    Example:
+        >>> engine = AsyncEngine()
+        >>> worker = engine.start(job, on_event=print)
+        >>> worker.wait()
+        >>> engine.close()
+    """
+
+    def __init__(self) -> None:
+        self.loop = asyncio.new_event_loop()
+        self._workers: List[AsyncWorker] = []
+        self._thread = threading.Thread(target=self._serve, name="ytaedl-async-engine", daemon=True)
+        self._thread.start()
+
+    def _serve(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def start(self, job: UrlFileJob, on_event: EventCallback) -> AsyncWorker:
+        self._workers = [w for w in self._workers if w.poll() is None]
+        worker = AsyncWorker(self, job, on_event)
+        self._workers.append(worker)
+        return worker
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Stop every slot (their tools are terminated) and the loop."""
+        for worker in self._workers:
+            worker.terminate()
+        deadline = time.time() + timeout
+        for worker in self._workers:
+            try:
+                worker.wait(max(0.0, deadline - time.time()))
+            except subprocess.TimeoutExpired:
+                pass
+        self._workers = []
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+        if not self._thread.is_alive():
+            self.loop.close()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Global bandwidth scheduling for the manager.
+
+The manager has a total download budget (--max-total-dl-speed), an optional
+per-worker ceiling (--max-process-dl-speed) and an optional limit on workers
+per host (--max-per-host). Bytes never pass through the manager: yt-dlp
+enforces a rate limit per process, fixed when the tool starts. So instead of
+a shared token bucket the scheduler divides the budget into per-worker caps
+and the manager restarts a tool when its cap has to change:
+  - shares are max-min fair: a worker that cannot use its equal share (the
+    site is slower than that) keeps what it uses, and the rest is split among
+    the workers that are running at their cap
+  - a stalled worker (no progress for ``stall_seconds``) gets no share, so its
+    bandwidth goes to the others until it moves again
+  - bandwidth used by workers whose rate cannot be capped (aebndl) is taken
+    off the budget first
+  - a cap is changed only when the difference matters (a lower cap for a
+    worker that uses more than its share, a higher one for a worker running
+    at its cap) and not more often than ``cooldown`` seconds per worker
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, Mapping, Optional, TypeVar
+from urllib.parse import urlsplit
+
+K = TypeVar("K", bound=Hashable)
+
+
+def host_of(url: Optional[str]) -> Optional[str]:
+    """Host part of ``url`` (lowercase, without port or a leading "www."), or None."""
+    if not url:
+        return None
+    try:
+        host = urlsplit(url.strip()).hostname
+    except ValueError:
+        return None
+    if not host:
+        return None
+    return host[4:] if host.startswith("www.") else host
+
+
+def fair_shares(budget: float, demands: Mapping[K, float]) -> Dict[K, float]:
+    """
+    Max-min fair split of ``budget``: in ascending order of demand each flow gets
+    its demand or an equal share of what is left, whichever is smaller.
+    """
+    shares: Dict[K, float] = {}
+    left = max(0.0, budget)
+    ordered = sorted(demands.items(), key=lambda kv: kv[1])
+    for i, (key, demand) in enumerate(ordered):
+        share = min(max(0.0, demand), left / (len(ordered) - i))
+        shares[key] = share
+        left -= share
+    return shares
+
+
+def _positive(value: Optional[float]) -> Optional[float]:
+    return float(value) if isinstance(value, (int, float)) and value > 0 else None
+
+
+@dataclass
+class _Flow:
+    host: Optional[str]
+    cap: Optional[float]
+    started: float
+    speed: float = 0.0
+    last_progress: Optional[float] = None
+    last_change: float = 0.0
+    cappable: bool = True
+    paused: bool = False
+
+
+class BandwidthScheduler:
+    """
+    Per-worker rate caps and per-host admission for the manager's slots (MiB/s).
+
+    Example:
+        >>> sched = BandwidthScheduler(total_mibs=40, max_per_host=2)
+        >>> cap = sched.assign(slot, host)           # cap to start the tool with
+        >>> sched.observe(slot, speed_mibs, last_progress=t)
+        >>> for slot, cap in sched.rebalance().items(): ...  # restart with the new cap
+    """
+
+    def __init__(
+        self,
+        total_mibs: Optional[float] = None,
+        per_worker_mibs: Optional[float] = None,
+        max_per_host: int = 0,
+        *,
+        min_cap: float = 0.25,
+        stall_seconds: float = 20.0,
+        cooldown: float = 3.0,
+        saturation: float = 0.85,
+        headroom: float = 0.25,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.total = _positive(total_mibs)
+        self.per_worker = _positive(per_worker_mibs)
+        self.max_per_host = max(0, int(max_per_host or 0))
+        self.min_cap = min_cap
+        self.stall_seconds = stall_seconds
+        self.cooldown = cooldown
+        self.saturation = saturation
+        self.headroom = headroom
+        self._clock = clock
+        self._flows: Dict[int, _Flow] = {}
+
+    # ---- admission ----
+    def host_count(self, host: Optional[str]) -> int:
+        return sum(1 for f in self._flows.values() if host is not None and f.host == host)
+
+    def host_has_room(self, host: Optional[str]) -> bool:
+        return not self.max_per_host or host is None or self.host_count(host) < self.max_per_host
+
+    def used(self) -> float:
+        """Observed aggregate speed of running workers (MiB/s); stalled ones count as idle."""
+        return sum(f.speed for slot, f in self._flows.items() if not f.paused and not self.stalled(slot))
+
+    def can_admit(self) -> bool:
+        """Whether the budget leaves room for another worker."""
+        if self.total is None:
+            return True
+        return self.used() + (self.per_worker or 0.0) <= self.total
+
+    def assign(self, slot: int, host: Optional[str]) -> Optional[float]:
+        """Register a worker starting on ``host``; returns the cap to start its tool with."""
+        cap = self.per_worker
+        if self.total is not None:
+            share = max(self.min_cap, self.total / (len(self._flows) + 1))
+            cap = min(cap, share) if cap is not None else share
+        now = self._clock()
+        self._flows[slot] = _Flow(host=host, cap=cap, started=now, last_change=now)
+        return cap
+
+    def release(self, slot: int) -> None:
+        self._flows.pop(slot, None)
+
+    # ---- observation ----
+    def observe(
+        self,
+        slot: int,
+        speed_mibs: Optional[float],
+        *,
+        last_progress: Optional[float] = None,
+        host: Optional[str] = None,
+        cappable: bool = True,
+        paused: bool = False,
+    ) -> None:
+        """Record a worker's current speed, the time of its last event and the host it is on."""
+        flow = self._flows.get(slot)
+        if flow is None:
+            return
+        flow.speed = max(0.0, float(speed_mibs)) if isinstance(speed_mibs, (int, float)) else 0.0
+        if last_progress is not None:
+            flow.last_progress = last_progress
+        if host is not None:
+            flow.host = host
+        flow.cappable = cappable
+        flow.paused = paused
+
+    def stalled(self, slot: int) -> bool:
+        flow = self._flows.get(slot)
+        if flow is None:
+            return False
+        since = flow.last_progress if flow.last_progress is not None else flow.started
+        return (self._clock() - since) > self.stall_seconds
+
+    def cap_of(self, slot: int) -> Optional[float]:
+        flow = self._flows.get(slot)
+        return flow.cap if flow is not None else None
+
+    # ---- allocation ----
+    def _demand(self, slot: int, flow: _Flow, ceiling: float) -> float:
+        if self.stalled(slot):
+            return 0.0
+        if flow.cap is None or flow.speed <= 0.0 or flow.speed >= flow.cap * self.saturation:
+            # Held back by its cap, or just starting (no speed reported yet)
+            return ceiling
+        # Limited by the site, not by its cap: it needs what it uses, plus some room
+        return min(ceiling, flow.speed * (1.0 + self.headroom))
+
+    def targets(self) -> Dict[int, float]:
+        """Fair cap for every running cappable worker under the total budget."""
+        if self.total is None:
+            return {}
+        running = {slot: f for slot, f in self._flows.items() if not f.paused}
+        fixed = sum(f.speed for slot, f in running.items() if not f.cappable and not self.stalled(slot))
+        budget = max(0.0, self.total - fixed)
+        ceiling = min(budget, self.per_worker) if self.per_worker is not None else budget
+        demands = {slot: self._demand(slot, f, ceiling) for slot, f in running.items() if f.cappable}
+        targets = {}
+        for slot, share in fair_shares(budget, demands).items():
+            target = max(self.min_cap, share)
+            targets[slot] = min(target, self.per_worker) if self.per_worker is not None else target
+        return targets
+
+    def rebalance(self) -> Dict[int, float]:
+        """
+        New caps the manager should apply now (slot -> MiB/s). The returned caps
+        are taken as applied.
+        """
+        now = self._clock()
+        changes: Dict[int, float] = {}
+        for slot, target in self.targets().items():
+            flow = self._flows[slot]
+            if now - flow.last_change < self.cooldown or self.stalled(slot):
+                # A stalled worker keeps its cap for when it moves again; its share is not reserved
+                continue
+            current = flow.cap if flow.cap is not None else float("inf")
+            if target < current - self.min_cap:
+                # Lowering only matters for a worker that uses more than its share
+                if flow.speed <= target + self.min_cap:
+                    continue
+            elif target > current + self.min_cap:
+                # Raising only helps a worker held back by its cap
+                if flow.speed < current * self.saturation:
+                    continue
+            else:
+                continue
+            flow.cap = target
+            flow.last_change = now
+            changes[slot] = target
+        return changes
@@ -30,10 +30,15 @@ import sys
 import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, List, Optional
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
 
 from procparsers import iter_parsed_events, events_to_ndjson
 
+try:
+    from .state_db import DownloadState
+except ImportError:  # run as a script by the manager
+    from state_db import DownloadState
+
 MAX_RESOLUTION_CHOICES = ("4k", "2k", "1080", "720", "480")
 _MAX_RESOLUTION_HEIGHTS = {
     "4k": 2160,
@@ -77,6 +82,8 @@ def make_parser() -> argparse.ArgumentParser:
     p.add_argument("-U", "--max-ndjson-rate", type=float, default=5.0,
                    help="Max NDJSON progress events printed per second (-1 for unlimited). Applies to 'progress' events.")
     p.add_argument("-a", "--archive-dir", type=str, default=None, help="Directory to store per-urlfile archive status files.")
+    p.add_argument("-D", "--state-db", type=str, default=None,
+                   help="Shared SQLite download-state database; skips URLs it has a status for instead of re-reading the archive.")
     p.add_argument("-S", "--stall-seconds", type=int, default=60, help="If no non-heartbeat events arrive for N seconds, treat URL as stalled and move to next.")
     p.add_argument("-E", "--exit-at-time", type=int, default=-1, help="Exit the program after N seconds (<=0 disables).")
     p.add_argument("-X", "--max-dl-speed", type=float, default=None,
@@ -631,6 +638,109 @@ def _run_one(
         return _run_one(tool, urls, out_dir, canonical_out_dir, work_dir, raw_dir, url_index, proglog, timeout, retries - 1, quiet, dry_run, progress_freq_s, max_ndjson_rate, stall_seconds, program_deadline, max_dl_speed, max_height)
     return rc, info
 
+# ---- Archive / state bookkeeping ---------------------------------------------
+
+def _tool_for(mode: str, url: str) -> str:
+    if mode == "yt":
+        return "yt-dlp"
+    if mode == "aebn":
+        return "aebndl"
+    return "aebndl" if _is_aebn(url) else "yt-dlp"
+
+def _archive_file_for(archive_dir: Optional[Path], urlfile: Path) -> Optional[Path]:
+    if not archive_dir:
+        return None
+    try:
+        prefix = 'ae' if 'ae-stars' in str(urlfile.parent) else 'yt'
+        archive_dir.mkdir(parents=True, exist_ok=True)
+        return archive_dir / f"{prefix}-{urlfile.stem}.txt"
+    except Exception:
+        return None
+
+def _archive_start_index(archive_file: Optional[Path], urls: List[str]) -> int:
+    """1-based index of the first URL without an archive line; repairs lines that lack their URL."""
+    if not archive_file:
+        return 1
+    processed_lines: list[str] = []
+    if archive_file.exists():
+        try:
+            raw_lines = archive_file.read_text(encoding='utf-8').splitlines()
+        except Exception:
+            raw_lines = []
+        for idx, ln in enumerate(raw_lines):
+            if not ln.strip():
+                continue
+            url_for_line = urls[idx] if idx < len(urls) else ''
+            processed_lines.append(_ensure_archive_line_has_url(ln, url_for_line))
+        if processed_lines and processed_lines != [ln for ln in raw_lines if ln.strip()]:
+            try:
+                archive_file.write_text('\n'.join(processed_lines) + '\n', encoding='utf-8')
+            except Exception:
+                pass
+    return len(processed_lines) + 1
+
+def _iter_pending_urls(
+    urls: List[str],
+    urlfile: Path,
+    state: Optional[DownloadState],
+    first_unprocessed: int = 1,
+) -> Iterator[Tuple[int, str]]:
+    """(1-based index, url) of the URLs still to process, from the state database when there is one."""
+    if state is None:
+        for i, url in enumerate(urls, 1):
+            if i >= first_unprocessed:
+                yield i, url
+        return
+    # Re-queried after every URL so statuses written meanwhile by other workers are honoured
+    i = 0
+    while (nxt := state.next_unfinished(urlfile, after=i)) is not None:
+        i, url = nxt
+        yield i, url
+
+def _outcome_status(rc: Optional[int], info: dict) -> str:
+    """Archive/state status of a URL outcome; '' when it must not be recorded (Ctrl+C, deadline)."""
+    if rc == 0:
+        return 'already' if info.get('already') else 'downloaded'
+    if rc == 124:
+        return 'stalled'
+    if rc in (130, 131):
+        return ''
+    return 'bad-url'
+
+def _record_outcome(
+    urlfile: Path,
+    url_index: int,
+    url: str,
+    status: str,
+    info: dict,
+    archive_file: Optional[Path],
+    state: Optional[DownloadState],
+    emit: Optional[Callable[[dict], None]] = None,
+) -> None:
+    """Write a URL's status to the state database and the archive file, reporting through ``emit``."""
+    emit = emit or _emit_json
+    if not status:
+        emit({"event": "archive_skip", "url_index": url_index, "url": url, "archive_path": str(archive_file), "reason": "status_suppressed"})
+        return
+    elapsed_s = float(info.get('elapsed_s') or 0.0)
+    when = time.strftime('%Y-%m-%dT%H:%M:%S')
+    downloaded = float(info.get('downloaded') or 0.0)
+    downloaded_mib = downloaded / (1024*1024)
+    vid = _extract_video_id(url)
+    if state is not None:
+        try:
+            state.record(urlfile, url, status, bytes=int(downloaded), elapsed=elapsed_s, video_id=vid)
+        except Exception as exc:
+            emit({"event": "state_write_failed", "status": status, "url_index": url_index, "url": url, "error": str(exc)})
+    if archive_file:
+        line = _format_archive_line(status, elapsed_s, when, downloaded_mib, vid, url)
+        try:
+            with archive_file.open('a', encoding='utf-8') as fh:
+                fh.write(line + "\n")
+            emit({"event": "archive_write", "status": status, "url_index": url_index, "url": url, "archive_path": str(archive_file)})
+        except Exception:
+            emit({"event": "archive_write_failed", "status": status, "url_index": url_index, "url": url, "archive_path": str(archive_file)})
+
 def main() -> int:
     args = make_parser().parse_args()
 
@@ -679,55 +789,35 @@ def main() -> int:
     urls = _read_urls(urlfile)
     # Archive support
     archive_dir = Path(args.archive_dir).expanduser().resolve() if args.archive_dir else None
-    archive_file: Optional[Path] = None
-    if archive_dir:
+    archive_file = _archive_file_for(archive_dir, urlfile)
+    state: Optional[DownloadState] = None
+    if args.state_db and urls:
         try:
-            prefix = 'ae' if 'ae-stars' in str(urlfile.parent) else 'yt'
-            archive_dir.mkdir(parents=True, exist_ok=True)
-            archive_file = archive_dir / f"{prefix}-{urlfile.stem}.txt"
-        except Exception:
-            archive_file = None
+            state = DownloadState(Path(args.state_db).expanduser().resolve())
+            state.sync_url_file(urlfile, urls)
+            if archive_file:
+                state.import_archive(urlfile, archive_file)
+        except Exception as exc:
+            print(f"[WARN] State database unavailable ({exc}); falling back to the archive file.", file=sys.stderr)
+            if state is not None:
+                state.close()
+            state = None
     # Read existing archive entries and compute starting index
-    processed_lines: list[str] = []
-    if archive_file and archive_file.exists():
-        try:
-            raw_lines = archive_file.read_text(encoding='utf-8').splitlines()
-        except Exception:
-            raw_lines = []
-        for idx, ln in enumerate(raw_lines):
-            if not ln.strip():
-                continue
-            url_for_line = urls[idx] if idx < len(urls) else ''
-            processed_lines.append(_ensure_archive_line_has_url(ln, url_for_line))
-        if processed_lines and processed_lines != [ln for ln in raw_lines if ln.strip()]:
-            try:
-                archive_file.write_text('\n'.join(processed_lines) + '\n', encoding='utf-8')
-            except Exception:
-                pass
-    first_unprocessed = (len(processed_lines) + 1) if archive_file else 1
+    first_unprocessed = _archive_start_index(archive_file, urls) if state is None else 1
     if not urls:
         print("[ERROR] No URLs found.", file=sys.stderr)
         return 3
 
     overall_rc = 0
     try:
-        for i, url in enumerate(urls, 1):
-            # Skip already processed based on archive
-            if archive_file and i < first_unprocessed:
-                continue
+        for i, url in _iter_pending_urls(urls, urlfile, state, first_unprocessed):
             # Quick pre-filter: skip known unsupported listing pages
             if not _looks_supported_video(url):
                 _emit_json({"event": "skipped", "reason": "unsupported_url_shape", "url_index": i, "url": url})
                 # Do not write to archive for skipped; just log and continue
                 proglog.finish(i, 0.0, "FINISH_BAD")
                 continue
-            # pick tool
-            if args.mode == "yt":
-                tool = "yt-dlp"
-            elif args.mode == "aebn":
-                tool = "aebndl"
-            else:
-                tool = "aebndl" if _is_aebn(url) else "yt-dlp"
+            tool = _tool_for(args.mode, url)
 
             rc, info = _run_one(
                 tool=tool,
@@ -750,31 +840,8 @@ def main() -> int:
                 max_height=_max_height_for_label(args.max_resolution),
             )
             # Update archive status (skip marking on Ctrl-C abort rc==130)
-            if archive_file:
-                if rc == 0:
-                    status = 'already' if info.get('already') else 'downloaded'
-                elif rc == 124:
-                    status = 'stalled'
-                elif rc in (130, 131):
-                    status = ''  # do not write on Ctrl+C/deadline
-                else:
-                    status = 'bad-url'
-                if status:
-                    elapsed_s = float(info.get('elapsed_s') or 0.0)
-                    when = time.strftime('%Y-%m-%dT%H:%M:%S')
-                    downloaded = float(info.get('downloaded') or 0.0)
-                    downloaded_mib = downloaded / (1024*1024)
-                    vid = _extract_video_id(url)
-                    line = _format_archive_line(status, elapsed_s, when, downloaded_mib, vid, url)
-                    processed_lines.append(line)
-                    try:
-                        with archive_file.open('a', encoding='utf-8') as fh:
-                            fh.write(line + "\n")
-                        _emit_json({"event": "archive_write", "status": status, "url_index": i, "url": url, "archive_path": str(archive_file)})
-                    except Exception:
-                        _emit_json({"event": "archive_write_failed", "status": status, "url_index": i, "url": url, "archive_path": str(archive_file)})
-                else:
-                    _emit_json({"event": "archive_skip", "url_index": i, "url": url, "archive_path": str(archive_file), "reason": "status_suppressed"})
+            if archive_file or state is not None:
+                _record_outcome(urlfile, i, url, _outcome_status(rc, info), info, archive_file, state)
 
             if rc != 0:
                 overall_rc = rc  # remember last non-zero
@@ -788,6 +855,9 @@ def main() -> int:
         except Exception:
             pass
         raise
+    finally:
+        if state is not None:
+            state.close()
 
 if __name__ == "__main__":
     try:
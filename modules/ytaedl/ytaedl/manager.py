@@ -9,6 +9,12 @@ Master downloader that coordinates multiple dlscript.py workers.
 - Enforces a per-assignment time limit (-T seconds; -1 disables)
 - Tracks per-worker progress by reading dlscript NDJSON and renders a live dashboard
 - Records finished URL files in a log so they are not reassigned
+- Keeps per-URL status in a shared SQLite state database (see state_db) so
+  assignment looks up remaining counts instead of re-reading URL and archive files
+- With --engine async, runs every slot on one in-process asyncio loop that drives
+  the tools directly (see async_engine) instead of a downloader subprocess per slot
+- Splits --max-total-dl-speed into fair per-worker caps and limits workers per host
+  (see bandwidth)
 """
 
 from __future__ import annotations
@@ -28,7 +34,7 @@ import types
 from collections import deque
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional, Sequence
+from typing import Callable, Dict, List, Optional, Sequence
 
 # Import EnforcedArgumentParser with fallback
 try:
@@ -40,8 +46,11 @@ except ImportError:
     ENFORCER_AVAILABLE = False
 
 from . import archive_builder, urlscan
-from .downloader import MAX_RESOLUTION_CHOICES
+from .async_engine import AsyncEngine, UrlFileJob
+from .bandwidth import BandwidthScheduler, host_of
+from .downloader import MAX_RESOLUTION_CHOICES, _max_height_for_label
 from .mp4_watcher import MP4Watcher, WatcherConfig, WatcherSnapshot
+from .state_db import DEFAULT_STATE_DB_NAME, DownloadState, UrlFileState
 from termdash import utils as td_utils
 
 MP4_VALID_OPERATIONS = ("copy", "move")
@@ -69,6 +78,7 @@ WATCHER_LOG_STATUS_COLOURS = {
 GIB = 1024**3
 ANSI_ESCAPE_RE = re.compile(r"\x1b\[[0-9;]*m")
 URL_PANEL_AUTO_INTERVAL = 10.0
+IDLE_FILL_INTERVAL = 5.0
 
 # Use TermDash for robust in-place dashboard rendering
 # We avoid TermDash here for maximal compatibility across shells; do manual frames
@@ -524,6 +534,9 @@ def _pause_process(proc: subprocess.Popen) -> bool:
     """Pause a process. Returns True if successful."""
     if not proc or proc.poll() is not None:
         return False
+    if hasattr(proc, "pause"):
+        # Async engine slot: pauses its running tool
+        return proc.pause()
 
     try:
         if os.name == "nt":
@@ -575,6 +588,8 @@ def _resume_process(proc: subprocess.Popen) -> bool:
     """Resume a paused process. Returns True if successful."""
     if not proc or proc.poll() is not None:
         return False
+    if hasattr(proc, "resume"):
+        return proc.resume()
 
     try:
         if os.name == "nt":
@@ -623,14 +638,17 @@ class WorkerState:
     last_already: bool = False
     overlay_msg: Optional[str] = None
     overlay_since: float = 0.0
-    ndjson_buf: list[str] = field(default_factory=list)
+    ndjson_buf: list = field(default_factory=list)  # NDJSON lines (process engine) or event dicts (async engine)
     prog_log_path: Optional[Path] = None
     is_paused: bool = False
     paused_speed_bps: Optional[float] = None
 
 
 def _gather_from_roots(
-    roots: List[Path], finished_log: Path, priority_files: Optional[List[str]] = None
+    roots: List[Path],
+    finished_log: Path,
+    priority_files: Optional[List[str]] = None,
+    state: Optional[DownloadState] = None,
 ) -> tuple[List[Path], List[Path]]:
     pool: List[Path] = []
     for root in roots:
@@ -640,7 +658,9 @@ def _gather_from_roots(
             if p.is_file():
                 pool.append(p)
     finished: set[str] = set()
-    if finished_log.exists():
+    if state is not None:
+        finished = state.finished_files()
+    elif finished_log.exists():
         try:
             finished = set(x.strip() for x in finished_log.read_text(encoding="utf-8").splitlines() if x.strip())
         except Exception:
@@ -673,6 +693,7 @@ def _start_worker(
     cap_mibs: Optional[float],
     proxy_dl_location: Optional[str] = None,
     max_resolution: Optional[str] = None,
+    state_db: Optional[Path] = None,
 ) -> subprocess.Popen:
     canonical_dir = (canonical_root / urlfile.stem).expanduser().resolve()
     canonical_dir.parent.mkdir(parents=True, exist_ok=True)
@@ -692,6 +713,8 @@ def _start_worker(
         cmd += ["-X", str(cap_mibs)]
     if archive_dir:
         cmd += ["-a", str(archive_dir)]
+    if state_db:
+        cmd += ["-D", str(state_db)]
     if proxy_dl_location:
         cmd += ["--proxy-dl-location", str(proxy_dl_location)]
     if max_resolution:
@@ -746,6 +769,20 @@ def make_parser() -> argparse.ArgumentParser:
     p.add_argument("-r", "--refresh-hz", type=float, default=5.0, help="UI refresh rate")
     p.add_argument("-e", "--exit-at-time", type=int, default=-1, help="Exit the manager after N seconds (<=0 disables)")
     p.add_argument("-a", "--archive", type=str, default=None, help="Archive folder to store per-urlfile status files")
+    p.add_argument(
+        "-D",
+        "--state-db",
+        type=str,
+        default=None,
+        help=f"SQLite download-state database shared with workers (default: <log-dir>/{DEFAULT_STATE_DB_NAME})",
+    )
+    p.add_argument(
+        "-j",
+        "--engine",
+        choices=("process", "async"),
+        default="process",
+        help="Worker engine: a downloader subprocess per slot, or one in-process asyncio loop driving the tools",
+    )
     p.add_argument(
         "-g", "--log-dir", type=str, default="./logs", help="Directory for all logs (manager, workers, watcher)"
     )
@@ -764,7 +801,14 @@ def make_parser() -> argparse.ArgumentParser:
         "--max-total-dl-speed",
         type=float,
         default=None,
-        help="Global max download speed across all workers (MiB/s)",
+        help="Global max download speed across all workers (MiB/s), shared fairly between them",
+    )
+    p.add_argument(
+        "-H",
+        "--max-per-host",
+        type=int,
+        default=0,
+        help="Max workers downloading from the same host at once (0 = unlimited)",
     )
     p.add_argument("-b", "--show-bars", action="store_true", help="Show an ASCII progress bar per worker")
     p.add_argument("-w", "--enable-mp4-watcher", action="store_true", help="Enable MP4 watcher integration")
@@ -893,6 +937,13 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         archive_dir.mkdir(parents=True, exist_ok=True)
     finished_log = Path(args.finished_log).expanduser().resolve()
     finished_log.parent.mkdir(parents=True, exist_ok=True)
+    state_db_path = (
+        Path(args.state_db).expanduser().resolve() if args.state_db else log_dir / DEFAULT_STATE_DB_NAME
+    )
+    state = DownloadState(state_db_path)
+    state.import_finished_log(finished_log)
+    engine: Optional[AsyncEngine] = AsyncEngine() if args.engine == "async" else None
+    scheduler = BandwidthScheduler(args.max_total_dl_speed, args.max_process_dl_speed, args.max_per_host)
 
     mp4_trigger_total_bytes = (
         int(args.mp4_trigger_total_gb * (1024**3))
@@ -964,14 +1015,14 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         mlog.info("MP4 watcher configuration ignored because --enable-mp4-watcher was not set")
 
     roots: List[Path] = [stars_dir, aebn_dir]
-    pool, priority_pool = _gather_from_roots(roots, finished_log, args.priority_files)
+    pool, priority_pool = _gather_from_roots(roots, finished_log, args.priority_files, state)
     if not pool and not priority_pool:
         # Fallback to test dirs if primary roots are empty
         repo_root = Path(__file__).resolve().parent.parent
         test_stars = (repo_root / "test" / "files" / "downloads" / "stars").resolve()
         test_aebn = (repo_root / "test" / "files" / "downloads" / "ae-stars").resolve()
         roots = [test_stars, test_aebn]
-        pool, priority_pool = _gather_from_roots(roots, finished_log, args.priority_files)
+        pool, priority_pool = _gather_from_roots(roots, finished_log, args.priority_files, state)
     active: set[str] = set()
     watcher_log_scroll = 0
     watcher_log_follow = True
@@ -981,7 +1032,7 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
     workers: List[WorkerState] = [WorkerState(slot=i) for i in range(1, args.threads + 1)]
     stop = threading.Event()
     mlog.info(
-        f"Start manager threads={args.threads} time_limit={args.time_limit} refresh_hz={args.refresh_hz} exit_at_time={args.exit_at_time} archive_dir={archive_dir}"
+        f"Start manager threads={args.threads} time_limit={args.time_limit} refresh_hz={args.refresh_hz} exit_at_time={args.exit_at_time} archive_dir={archive_dir} state_db={state_db_path}"
     )
     mlog.info(f"Log dir: {log_dir} | Manager log: {manager_log_path}")
     if args.priority_files:
@@ -997,6 +1048,7 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
     next_url_scan: Optional[float] = None
     last_url_scan = 0.0
     url_scan_json_path = log_dir / "urlscan-latest.json"
+    url_scan_cache = urlscan.InventoryCache(log_dir / "urlscan-cache.json")
     url_scan_thread: Optional[threading.Thread] = None
     url_scan_pending_trigger: Optional[str] = None
     url_scan_status = "idle"
@@ -1016,10 +1068,15 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
     def _refresh_url_scan_sync(trigger: str) -> bool:
         nonlocal url_rankings, url_order_paths, url_scan_state, next_url_scan, last_url_scan, url_panel_top, url_panel_scroll
         try:
-            scan = urlscan.scan_url_stats(stars_dir, aebn_dir, download_root)
+            hits, misses = url_scan_cache.hits, url_scan_cache.misses
+            scan = urlscan.scan_url_stats(stars_dir, aebn_dir, download_root, state=state, cache=url_scan_cache)
         except Exception as exc:
             mlog.error(f"URL scan failed ({trigger}): {exc}")
             return False
+        try:
+            url_scan_cache.save()
+        except Exception as exc:
+            mlog.error(f"Failed to save URL scan cache: {exc}")
         url_scan_state = scan
         ordered_paths, ranks = urlscan.compute_rankings(
             [entry for entry in scan.entries if entry.remaining > 0],
@@ -1051,6 +1108,7 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
             next_url_scan = None
         mlog.info(
             f"URL scan refreshed ({trigger}) entries={len(scan.entries)} "
+            f"cached={url_scan_cache.hits - hits} rescanned={url_scan_cache.misses - misses} "
             f"order_key={args.url_order_key} ascending={args.url_order_ascending}"
         )
         return True
@@ -1097,18 +1155,37 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
             return None
         return entry.remaining
 
-    def _remaining_for_path(path: Path) -> Optional[int]:
-        """Return remaining URL count using scan data or a quick inline estimate."""
-        remaining = _path_remaining(path)
-        if remaining is not None:
-            return remaining
+    def _file_state(path: Path) -> Optional[UrlFileState]:
+        """Synced state-database entry for a URL file (reads the file only when it changed)."""
         try:
-            urls = _read_urls(path)
-        except Exception:
+            info = state.sync_url_file(path)
+            if info is not None and archive_dir and not info.archive_imported:
+                prefix = "ae" if ("ae-stars" in str(path.parent)) else "yt"
+                state.import_archive(path, archive_dir / f"{prefix}-{path.stem}.txt")
+                info = state.file_state(path)
+            return info
+        except Exception as exc:
+            mlog.error(f"state database lookup failed for {path}: {exc}")
             return None
-        dest_dir = (download_root / path.stem).resolve()
-        mp4_count, _, _ = urlscan.mp4_inventory(dest_dir)
-        return max(len(urls) - mp4_count, 0)
+
+    def _remaining_for_path(path: Path) -> Optional[int]:
+        """Return remaining URL count using scan data or a quick inline estimate, capped by the state database."""
+        info = _file_state(path)
+        remaining = _path_remaining(path)
+        if remaining is None:
+            if info is not None:
+                url_count = info.url_count
+            else:
+                try:
+                    url_count = len(_read_urls(path))
+                except Exception:
+                    return None
+            dest_dir = (download_root / path.stem).resolve()
+            mp4_count, _, _ = urlscan.mp4_inventory(dest_dir)
+            remaining = max(url_count - mp4_count, 0)
+        if info is not None:
+            remaining = min(remaining, info.pending)
+        return remaining
 
     def _select_best(candidates: List[Path]) -> Path:
         eligible = [c for c in candidates if _remaining_for_path(c) != 0]
@@ -1132,6 +1209,117 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
 
     _schedule_url_scan("startup")
 
+    def _handle_event(ws: WorkerState, evt: dict) -> None:
+        """Apply one downloader event to the worker's state (both engines)."""
+        nonlocal total_started_urls, total_processed_urls, total_completed_urls, total_completed_bytes
+        ws.last_event_time = time.time()
+        ev = evt.get("event")
+        if ev == "start":
+            ws.url_index = evt.get("url_index")
+            ws.url_current = evt.get("url")
+            ws.downloader = evt.get("downloader")
+            # Reset progress state on new URL
+            ws.percent = None
+            ws.speed_bps = None
+            ws.eta_s = None
+            ws.downloaded_bytes = None
+            ws.total_bytes = None
+            ws.url_t0 = time.time()
+            # Clear overlay upon new activity
+            ws.overlay_msg = None
+            ws.overlay_since = 0.0
+            total_started_urls += 1
+            mlog.info(f"[{ws.slot:02d}] START idx={ws.url_index} url={ws.url_current}")
+        elif ev == "destination":
+            ws.destination = evt.get("path")
+            mlog.info(f"[{ws.slot:02d}] DEST path={ws.destination}")
+        elif ev == "already":
+            # Mark that this URL was already downloaded
+            ws.last_already = True
+        elif ev == "progress":
+            # Clamp and normalize to avoid >100% and >total displays
+            try:
+                dl = evt.get("downloaded")
+                tot = evt.get("total")
+                sp = evt.get("speed_bps")
+                eta = evt.get("eta_s")
+                pct = evt.get("percent")
+                if isinstance(dl, int) and isinstance(tot, int) and tot and tot > 0:
+                    show_dl = min(dl, tot)
+                    ws.downloaded_bytes = show_dl
+                    ws.total_bytes = tot
+                    pct_calc = 100.0 * (float(show_dl) / float(tot))
+                    ws.percent = min(99.9, pct_calc)
+                else:
+                    # Clamp percentage even when bytes unavailable
+                    if isinstance(pct, (int, float)):
+                        ws.percent = min(99.9, max(0.0, float(pct)))
+                    # Clamp downloaded bytes to total if both provided
+                    if isinstance(dl, int) and isinstance(tot, int) and tot > 0:
+                        ws.downloaded_bytes = min(dl, tot)
+                        ws.total_bytes = tot
+                    else:
+                        # Keep values as-is only if no total to compare against
+                        ws.downloaded_bytes = dl if isinstance(dl, int) else ws.downloaded_bytes
+                        ws.total_bytes = tot if isinstance(tot, int) else ws.total_bytes
+                ws.speed_bps = float(sp) if isinstance(sp, (int, float)) else ws.speed_bps
+                # eta may be 0 or negative near completion
+                ws.eta_s = float(eta) if isinstance(eta, (int, float)) else ws.eta_s
+                # Any progress clears overlay
+                ws.overlay_msg = None
+                ws.overlay_since = 0.0
+            except Exception:
+                pass
+        elif ev == "finish":
+            mlog.info(f"[{ws.slot:02d}] FINISH rc={evt.get('rc')} idx={ws.url_index}")
+            # Update per-URL counters here (process continues running)
+            try:
+                rc_v = int(evt.get("rc")) if evt.get("rc") is not None else None
+            except Exception:
+                rc_v = None
+            # Count this URL as processed
+            total_processed_urls += 1
+            if rc_v == 0:
+                total_completed_urls += 1
+                if isinstance(ws.downloaded_bytes, int):
+                    total_completed_bytes += ws.downloaded_bytes
+            # Build overlay message until next start/progress
+            status = (
+                "FINISHED_DL"
+                if rc_v == 0 and not ws.last_already
+                else ("DUPLICATE" if rc_v == 0 and ws.last_already else "BAD_URL")
+            )
+            ws.last_already = False
+            # Colorize status
+            color = (
+                "\x1b[32m" if status == "FINISHED_DL" else ("\x1b[33m" if status == "DUPLICATE" else "\x1b[31m")
+            )
+            reset = "\x1b[0m"
+            elapsed_url = _hms(time.time() - (ws.url_t0 or ws.assign_t0))
+            name = ws.url_current or ""
+            ws.overlay_msg = (
+                f"URL {ws.url_index or 0} Finished Status {color}{status}{reset} {elapsed_url} {name}"
+            )
+            ws.overlay_since = time.time()
+            # Reset progress so stale >100% values don’t linger
+            ws.percent = None
+            ws.speed_bps = None
+            ws.eta_s = None
+            ws.downloaded_bytes = None
+            ws.total_bytes = None
+        elif ev == "aborted":
+            mlog.info(f"[{ws.slot:02d}] ABORT reason={evt.get('reason')}")
+            ws.overlay_msg = f"URL {ws.url_index or 0} Finished Status \x1b[35mABORTED\x1b[0m 00:00:00 {ws.url_current or ''}"
+            ws.overlay_since = time.time()
+        elif ev == "stalled":
+            mlog.info(f"[{ws.slot:02d}] STALLED stall_seconds={evt.get('stall_seconds')}")
+            ws.overlay_msg = f"URL {ws.url_index or 0} Finished Status \x1b[31mSTALLED\x1b[0m 00:00:00 {ws.url_current or ''}"
+            ws.overlay_since = time.time()
+        elif ev == "deadline":
+            mlog.info(f"[{ws.slot:02d}] DEADLINE idx={ws.url_index}")
+            ws.overlay_msg = f"URL {ws.url_index or 0} Finished Status \x1b[35mDEADLINE\x1b[0m 00:00:00 {ws.url_current or ''}"
+            ws.overlay_since = time.time()
+
     def _reader(ws: WorkerState):
         f = ws.proc.stdout  # type: ignore
         try:
@@ -1150,136 +1338,86 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
                     evt = json.loads(line)
                 except Exception:
                     continue
-                ws.last_event_time = time.time()
-                ev = evt.get("event")
-                if ev == "start":
-                    ws.url_index = evt.get("url_index")
-                    ws.url_current = evt.get("url")
-                    ws.downloader = evt.get("downloader")
-                    # Reset progress state on new URL
-                    ws.percent = None
-                    ws.speed_bps = None
-                    ws.eta_s = None
-                    ws.downloaded_bytes = None
-                    ws.total_bytes = None
-                    ws.url_t0 = time.time()
-                    # Clear overlay upon new activity
-                    ws.overlay_msg = None
-                    ws.overlay_since = 0.0
-                    nonlocal total_started_urls
-                    total_started_urls += 1
-                    mlog.info(f"[{ws.slot:02d}] START idx={ws.url_index} url={ws.url_current}")
-                elif ev == "destination":
-                    ws.destination = evt.get("path")
-                    mlog.info(f"[{ws.slot:02d}] DEST path={ws.destination}")
-                elif ev == "already":
-                    # Mark that this URL was already downloaded
-                    ws.last_already = True
-                elif ev == "progress":
-                    # Clamp and normalize to avoid >100% and >total displays
-                    try:
-                        dl = evt.get("downloaded")
-                        tot = evt.get("total")
-                        sp = evt.get("speed_bps")
-                        eta = evt.get("eta_s")
-                        pct = evt.get("percent")
-                        if isinstance(dl, int) and isinstance(tot, int) and tot and tot > 0:
-                            show_dl = min(dl, tot)
-                            ws.downloaded_bytes = show_dl
-                            ws.total_bytes = tot
-                            pct_calc = 100.0 * (float(show_dl) / float(tot))
-                            ws.percent = min(99.9, pct_calc)
-                        else:
-                            # Clamp percentage even when bytes unavailable
-                            if isinstance(pct, (int, float)):
-                                ws.percent = min(99.9, max(0.0, float(pct)))
-                            # Clamp downloaded bytes to total if both provided
-                            if isinstance(dl, int) and isinstance(tot, int) and tot > 0:
-                                ws.downloaded_bytes = min(dl, tot)
-                                ws.total_bytes = tot
-                            else:
-                                # Keep values as-is only if no total to compare against
-                                ws.downloaded_bytes = dl if isinstance(dl, int) else ws.downloaded_bytes
-                                ws.total_bytes = tot if isinstance(tot, int) else ws.total_bytes
-                        ws.speed_bps = float(sp) if isinstance(sp, (int, float)) else ws.speed_bps
-                        # eta may be 0 or negative near completion
-                        ws.eta_s = float(eta) if isinstance(eta, (int, float)) else ws.eta_s
-                        # Any progress clears overlay
-                        ws.overlay_msg = None
-                        ws.overlay_since = 0.0
-                    except Exception:
-                        pass
-                elif ev == "finish":
-                    mlog.info(f"[{ws.slot:02d}] FINISH rc={evt.get('rc')} idx={ws.url_index}")
-                    # Update per-URL counters here (process continues running)
-                    try:
-                        rc_v = int(evt.get("rc")) if evt.get("rc") is not None else None
-                    except Exception:
-                        rc_v = None
-                    # Count this URL as processed
-                    nonlocal total_processed_urls, total_completed_urls, total_completed_bytes
-                    total_processed_urls += 1
-                    if rc_v == 0:
-                        total_completed_urls += 1
-                        if isinstance(ws.downloaded_bytes, int):
-                            total_completed_bytes += ws.downloaded_bytes
-                    # Build overlay message until next start/progress
-                    status = (
-                        "FINISHED_DL"
-                        if rc_v == 0 and not ws.last_already
-                        else ("DUPLICATE" if rc_v == 0 and ws.last_already else "BAD_URL")
-                    )
-                    ws.last_already = False
-                    # Colorize status
-                    color = (
-                        "\x1b[32m" if status == "FINISHED_DL" else ("\x1b[33m" if status == "DUPLICATE" else "\x1b[31m")
-                    )
-                    reset = "\x1b[0m"
-                    elapsed_url = _hms(time.time() - (ws.url_t0 or ws.assign_t0))
-                    name = ws.url_current or ""
-                    ws.overlay_msg = (
-                        f"URL {ws.url_index or 0} Finished Status {color}{status}{reset} {elapsed_url} {name}"
-                    )
-                    ws.overlay_since = time.time()
-                    # Reset progress so stale >100% values don’t linger
-                    ws.percent = None
-                    ws.speed_bps = None
-                    ws.eta_s = None
-                    ws.downloaded_bytes = None
-                    ws.total_bytes = None
-                elif ev == "aborted":
-                    mlog.info(f"[{ws.slot:02d}] ABORT reason={evt.get('reason')}")
-                    ws.overlay_msg = f"URL {ws.url_index or 0} Finished Status \x1b[35mABORTED\x1b[0m 00:00:00 {ws.url_current or ''}"
-                    ws.overlay_since = time.time()
-                elif ev == "stalled":
-                    mlog.info(f"[{ws.slot:02d}] STALLED stall_seconds={evt.get('stall_seconds')}")
-                    ws.overlay_msg = f"URL {ws.url_index or 0} Finished Status \x1b[31mSTALLED\x1b[0m 00:00:00 {ws.url_current or ''}"
-                    ws.overlay_since = time.time()
-                elif ev == "deadline":
-                    mlog.info(f"[{ws.slot:02d}] DEADLINE idx={ws.url_index}")
-                    ws.overlay_msg = f"URL {ws.url_index or 0} Finished Status \x1b[35mDEADLINE\x1b[0m 00:00:00 {ws.url_current or ''}"
-                    ws.overlay_since = time.time()
+                _handle_event(ws, evt)
                 if ws.reader_stop.is_set():
                     break
         except Exception as e:
             mlog.error(f"reader exception slot={ws.slot}: {e}\n{traceback.format_exc()}")
 
+    def _async_events(ws: WorkerState) -> Callable[[dict], None]:
+        def deliver(evt: dict) -> None:
+            ws.ndjson_buf.append(evt)
+            if len(ws.ndjson_buf) > 400:
+                ws.ndjson_buf = ws.ndjson_buf[-200:]
+            _handle_event(ws, evt)
+
+        return deliver
+
+    def _launch(ws: WorkerState) -> None:
+        """Start ws.urlfile on the selected engine: a downloader subprocess plus reader thread, or an async slot."""
+        assert ws.urlfile is not None
+        if engine is not None:
+            canonical_dir = (download_root / ws.urlfile.stem).resolve()
+            out_dir = (proxy_root / ws.urlfile.stem).resolve() if proxy_root else canonical_dir
+            job = UrlFileJob(
+                urlfile=ws.urlfile,
+                out_dir=out_dir,
+                canonical_out_dir=canonical_dir,
+                work_dir=(out_dir / "_tmp") if proxy_root else Path("./tmp").resolve(),
+                raw_dir=log_dir / "raw",
+                program_log=log_dir / f"ytaedler-worker-{ws.slot:02d}.log",
+                archive_dir=archive_dir,
+                state=state,
+                max_dl_speed=ws.cap_mibs,
+                max_height=_max_height_for_label(args.max_resolution),
+            )
+            ws.proc = engine.start(job, _async_events(ws))  # type: ignore[assignment]
+            ws.reader = None
+            return
+        ws.proc = _start_worker(
+            ws.slot,
+            ws.urlfile,
+            download_root,
+            args.max_ndjson_rate,
+            args.quiet,
+            archive_dir,
+            log_dir,
+            ws.cap_mibs,
+            args.proxy_dl_location,
+            args.max_resolution,
+            state_db_path,
+        )
+        ws.reader = threading.Thread(target=_reader, args=(ws,), daemon=True)
+        ws.reader.start()
+
+    def _host_for_path(path: Path) -> Optional[str]:
+        """Host of the next URL a worker would download from ``path``."""
+        try:
+            nxt = state.next_unfinished(path)
+        except Exception:
+            nxt = None
+        if nxt is not None:
+            return host_of(nxt[1])
+        urls = _read_urls(path)
+        return host_of(urls[0]) if urls else None
+
     def _assign(ws: WorkerState) -> bool:
         nonlocal pool, priority_pool
         # Filter out finished from current pools on each assignment
-        finished: set[str] = set()
-        if finished_log.exists():
-            try:
-                finished = set(x.strip() for x in finished_log.read_text(encoding="utf-8").splitlines() if x.strip())
-            except Exception:
-                finished = set()
+        finished = state.finished_files()
+
+        def _open(p: Path) -> bool:
+            key = str(p.resolve())
+            return (
+                key not in active
+                and key not in finished
+                and _remaining_for_path(p) != 0
+                # the host lookup hits the state db or the URL file; skip it when hosts are uncapped
+                and (not scheduler.max_per_host or scheduler.host_has_room(_host_for_path(p)))
+            )
 
         # Try priority files first
-        priority_avail = [
-            p
-            for p in priority_pool
-            if str(p.resolve()) not in active and str(p.resolve()) not in finished and _remaining_for_path(p) != 0
-        ]
+        priority_avail = [p for p in priority_pool if _open(p)]
         if priority_avail:
             selected = _select_priority(priority_avail)
             if selected is None:
@@ -1290,11 +1428,7 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
             mlog.info(f"[{ws.slot:02d}] ASSIGN PRIORITY {urlfile}")
         else:
             # Fall back to regular pool
-            avail = [
-                p
-                for p in pool
-                if str(p.resolve()) not in active and str(p.resolve()) not in finished and _remaining_for_path(p) != 0
-            ]
+            avail = [p for p in pool if _open(p)]
             if not avail:
                 return False
             urlfile = _select_best(avail)
@@ -1302,40 +1436,22 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
 
         active.add(str(urlfile.resolve()))
         ws.urlfile = urlfile
-        ws.url_count = len(_read_urls(urlfile))
-        # If archive indicates completion, skip assignment
-        if archive_dir and ws.url_count > 0:
-            prefix = "ae" if ("ae-stars" in str(urlfile.parent)) else "yt"
-            arch = archive_dir / f"{prefix}-{urlfile.stem}.txt"
-            if arch.exists():
-                try:
-                    statuses = arch.read_text(encoding="utf-8").splitlines()
-                except Exception:
-                    statuses = []
-                done = sum(1 for s in statuses if s.strip())
-                if done >= ws.url_count:
-                    # mark finished and choose another
-                    try:
-                        with finished_log.open("a", encoding="utf-8") as f:
-                            f.write(str(urlfile.resolve()) + "\n")
-                    except Exception:
-                        pass
-                    active.discard(str(urlfile.resolve()))
-                    mlog.info(f"[{ws.slot:02d}] SKIP finished {urlfile}")
-                    return _assign(ws)
+        info = _file_state(urlfile)
+        ws.url_count = info.url_count if info is not None else len(_read_urls(urlfile))
+        # If every URL already has a status (state database / imported archive), skip assignment
+        if info is not None and info.url_count > 0 and info.pending == 0:
+            # mark finished and choose another
+            _mark_finished(urlfile)
+            active.discard(str(urlfile.resolve()))
+            mlog.info(f"[{ws.slot:02d}] SKIP finished {urlfile}")
+            return _assign(ws)
         ws.percent = ws.speed_bps = ws.eta_s = None
         ws.url_index = None
         ws.url_current = None
         ws.destination = None
         ws.assign_t0 = time.time()
         ws.rc = None
-        ws.cap_mibs = (
-            float(args.max_process_dl_speed)
-            if isinstance(args.max_process_dl_speed, (int, float))
-            and args.max_process_dl_speed
-            and args.max_process_dl_speed > 0
-            else None
-        )
+        ws.cap_mibs = scheduler.assign(ws.slot, _host_for_path(urlfile))
         # Remember program log path for this worker
         try:
             ws.prog_log_path = (Path(log_dir) / f"ytaedler-worker-{ws.slot:02d}.log").resolve()
@@ -1343,23 +1459,21 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
             ws.prog_log_path = None
         canonical_dir = (download_root / urlfile.stem).resolve()
         ws.canonical_dir = canonical_dir
-        ws.proc = _start_worker(
-            ws.slot,
-            urlfile,
-            download_root,
-            args.max_ndjson_rate,
-            args.quiet,
-            archive_dir,
-            log_dir,
-            ws.cap_mibs,
-            args.proxy_dl_location,
-            args.max_resolution,
-        )
         ws.reader_stop.clear()
-        ws.reader = threading.Thread(target=_reader, args=(ws,), daemon=True)
-        ws.reader.start()
+        _launch(ws)
         return True
 
+    def _mark_finished(urlfile: Path) -> None:
+        try:
+            state.mark_finished(urlfile)
+        except Exception as exc:
+            mlog.error(f"state database update failed for {urlfile}: {exc}")
+        try:
+            with finished_log.open("a", encoding="utf-8") as f:
+                f.write(str(urlfile.resolve()) + "\n")
+        except Exception:
+            pass
+
     def _requeue(ws: WorkerState, finished: bool, reason: str):
         # Cleanup process
         if ws.proc and ws.proc.poll() is None:
@@ -1385,12 +1499,9 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
             key = str(ws.urlfile.resolve())
             active.discard(key)
             if finished:
-                try:
-                    with finished_log.open("a", encoding="utf-8") as f:
-                        f.write(key + "\n")
-                except Exception:
-                    pass
+                _mark_finished(ws.urlfile)
         mlog.info(f"[{ws.slot:02d}] REQUEUE finished={finished} reason={reason}")
+        scheduler.release(ws.slot)
         ws.proc = None
         ws.urlfile = None
         ws.canonical_dir = None
@@ -1400,39 +1511,55 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
                 _maybe_preempt_workers()
 
     # Helpers for total throttle
-    def _current_speed_mib() -> float:
-        return sum(float(w.speed_bps) for w in workers if isinstance(w.speed_bps, (int, float)) and not w.is_paused) / (
-            1024 * 1024
-        )
+    def _observe_speeds() -> None:
+        for w in workers:
+            if w.proc is None:
+                continue
+            scheduler.observe(
+                w.slot,
+                float(w.speed_bps) / (1024 * 1024) if isinstance(w.speed_bps, (int, float)) else None,
+                last_progress=w.last_event_time or None,
+                host=host_of(w.url_current),
+                cappable=w.downloader == "yt-dlp",
+                paused=w.is_paused,
+            )
 
     def _can_assign_more() -> bool:
-        if (
-            not isinstance(args.max_total_dl_speed, (int, float))
-            or not args.max_total_dl_speed
-            or args.max_total_dl_speed <= 0
-        ):
-            return True
-        cur = _current_speed_mib()
-        est_add = (
-            float(args.max_process_dl_speed)
-            if isinstance(args.max_process_dl_speed, (int, float))
-            and args.max_process_dl_speed
-            and args.max_process_dl_speed > 0
-            else 0.0
+        _observe_speeds()
+        return scheduler.can_admit()
+
+    def _apply_cap(w: WorkerState, cap: float) -> None:
+        """Restart w's tool with a new rate cap (the tools read it only at startup)."""
+        speed = float(w.speed_bps) / (1024 * 1024) if isinstance(w.speed_bps, (int, float)) else 0.0
+        verb = "THROTTLE" if w.cap_mibs is None or cap < w.cap_mibs else "UNTHROTTLE"
+        mlog.info(
+            f"[{w.slot:02d}] {verb} speed={speed:.2f}MiB/s total={scheduler.used():.2f}MiB/s -> cap {cap:.2f}MiB/s"
         )
-        return (cur + est_add) <= float(args.max_total_dl_speed)
+        try:
+            if w.proc and w.proc.poll() is None:
+                w.proc.terminate()
+                w.proc.wait(timeout=2)
+        except Exception:
+            pass
+        if w.urlfile:
+            w.cap_mibs = cap
+            w.reader_stop.set()
+            if w.reader:
+                try:
+                    w.reader.join(timeout=1)
+                except Exception:
+                    pass
+            w.reader_stop.clear()
+            try:
+                w.prog_log_path = (Path(log_dir) / f"ytaedler-worker-{w.slot:02d}.log").resolve()
+            except Exception:
+                w.prog_log_path = None
+            _launch(w)
 
     def _maybe_preempt_workers() -> None:
         if not args.url_preempt or not url_order_paths or args.url_random_order:
             return
-        finished_set: set[str] = set()
-        if finished_log.exists():
-            try:
-                finished_set = set(
-                    x.strip() for x in finished_log.read_text(encoding="utf-8").splitlines() if x.strip()
-                )
-            except Exception:
-                finished_set = set()
+        finished_set = state.finished_files()
         desired: List[str] = []
         for path in url_order_paths:
             key = str(path.resolve())
@@ -1485,6 +1612,7 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
     active_panel = "downloads"
     # Pause/quit state
     paused = False
+    next_fill_t = time.time() + IDLE_FILL_INTERVAL
     quit_confirm = False
     try:
         while not stop.is_set():
@@ -1540,141 +1668,14 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
                 if watcher_status and watcher_status.config.free_space_trigger_bytes
                 else mp4_trigger_free_bytes
             )
-            # Dynamic total throttle: proportional caps across yt-dlp workers
+            # Dynamic total throttle: fair caps across yt-dlp workers, stalled ones give theirs up
             now_check = time.time()
-            if (
-                isinstance(args.max_total_dl_speed, (int, float))
-                and args.max_total_dl_speed
-                and args.max_total_dl_speed > 0
-            ):
-                cap = float(args.max_total_dl_speed)
-                total_mib = sum(
-                    float(w.speed_bps) for w in workers if isinstance(w.speed_bps, (int, float)) and not w.is_paused
-                ) / (1024 * 1024)
-                elig = [
-                    w
-                    for w in workers
-                    if w.proc
-                    and w.downloader == "yt-dlp"
-                    and isinstance(w.speed_bps, (int, float))
-                    and w.speed_bps
-                    and w.speed_bps > 0
-                    and not w.is_paused
-                ]
-                elig_sum = sum((float(w.speed_bps) / (1024 * 1024)) for w in elig)
-                non_elig_mib = max(0.0, total_mib - elig_sum)
-                budget = max(0.0, cap - non_elig_mib)
-                if total_mib > cap * 1.05 and elig:
-                    # Proportional scaling to stay under budget
-                    if elig_sum <= 0.0:
-                        target_each = budget / len(elig) if budget > 0 else 0.5
-                        targets = {w: target_each for w in elig}
-                    else:
-                        scale = budget / elig_sum if elig_sum > 0 else 0.0
-                        targets = {w: max(0.25, (float(w.speed_bps) / (1024 * 1024)) * scale) for w in elig}
-                    for w, tgt in targets.items():
-                        # Respect per-process cap if set
-                        if (
-                            isinstance(args.max_process_dl_speed, (int, float))
-                            and args.max_process_dl_speed
-                            and args.max_process_dl_speed > 0
-                        ):
-                            tgt = min(tgt, float(args.max_process_dl_speed))
-                        # Change only if significant and cooldown passed
-                        if (w.cap_mibs is None or abs(tgt - w.cap_mibs) > 0.25) and (
-                            now_check - w.last_throttle_t
-                        ) > 3.0:
-                            w.last_throttle_t = now_check
-                            mlog.info(
-                                f"[{w.slot:02d}] THROTTLE total={total_mib:.2f}MiB/s -> cap {tgt:.2f}MiB/s (budget {budget:.2f})"
-                            )
-                            try:
-                                if w.proc and w.proc.poll() is None:
-                                    w.proc.terminate()
-                                    w.proc.wait(timeout=2)
-                            except Exception:
-                                pass
-                            if w.urlfile:
-                                w.cap_mibs = max(0.25, tgt)
-                                w.reader_stop.set()
-                                if w.reader:
-                                    try:
-                                        w.reader.join(timeout=1)
-                                    except Exception:
-                                        pass
-                                w.reader_stop.clear()
-                                try:
-                                    w.prog_log_path = (Path(log_dir) / f"ytaedler-worker-{w.slot:02d}.log").resolve()
-                                except Exception:
-                                    w.prog_log_path = None
-                                    w.proc = _start_worker(
-                                        w.slot,
-                                        w.urlfile,
-                                        download_root,
-                                        args.max_ndjson_rate,
-                                        args.quiet,
-                                        archive_dir,
-                                        log_dir,
-                                        w.cap_mibs,
-                                        args.proxy_dl_location,
-                                        args.max_resolution,
-                                    )
-                                w.reader = threading.Thread(target=_reader, args=(w,), daemon=True)
-                                w.reader.start()
-                elif total_mib < cap * 0.60:
-                    # Gently increase caps back toward per-process cap (if any)
-                    for w in elig:
-                        if w.cap_mibs and (now_check - w.last_throttle_t) > 5.0:
-                            target = (
-                                float(args.max_process_dl_speed)
-                                if isinstance(args.max_process_dl_speed, (int, float))
-                                and args.max_process_dl_speed
-                                and args.max_process_dl_speed > 0
-                                else None
-                            )
-                            new_cap = w.cap_mibs * 1.2
-                            if target:
-                                new_cap = min(new_cap, target)
-                            if new_cap > w.cap_mibs + 0.25:
-                                w.last_throttle_t = now_check
-                                mlog.info(
-                                    f"[{w.slot:02d}] UNTHROTTLE total={total_mib:.2f}MiB/s -> cap {new_cap:.2f}MiB/s"
-                                )
-                                try:
-                                    if w.proc and w.proc.poll() is None:
-                                        w.proc.terminate()
-                                        w.proc.wait(timeout=2)
-                                except Exception:
-                                    pass
-                                if w.urlfile:
-                                    w.cap_mibs = new_cap
-                                    w.reader_stop.set()
-                                    if w.reader:
-                                        try:
-                                            w.reader.join(timeout=1)
-                                        except Exception:
-                                            pass
-                                    w.reader_stop.clear()
-                                    try:
-                                        w.prog_log_path = (
-                                            Path(log_dir) / f"ytaedler-worker-{w.slot:02d}.log"
-                                        ).resolve()
-                                    except Exception:
-                                        w.prog_log_path = None
-                                    w.proc = _start_worker(
-                                        w.slot,
-                                        w.urlfile,
-                                        download_root,
-                                        args.max_ndjson_rate,
-                                        args.quiet,
-                                        archive_dir,
-                                        log_dir,
-                                        w.cap_mibs,
-                                        args.proxy_dl_location,
-                                        args.max_resolution,
-                                    )
-                                    w.reader = threading.Thread(target=_reader, args=(w,), daemon=True)
-                                    w.reader.start()
+            _observe_speeds()
+            caps = scheduler.rebalance()
+            for w in workers:
+                if w.slot in caps and w.proc and w.urlfile:
+                    w.last_throttle_t = now_check
+                    _apply_cap(w, caps[w.slot])
             # Check time limit and exits
             for ws in workers:
                 if not ws.proc:
@@ -1696,6 +1697,12 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
                     # Assign a new one if available (only if not paused)
                     if not paused:
                         _assign(ws)
+            # Idle slots held back by the bandwidth budget or per-host limits: retry now and then
+            if not paused and now_check >= next_fill_t:
+                next_fill_t = now_check + IDLE_FILL_INTERVAL
+                for ws in workers:
+                    if ws.proc is None and not ws.is_paused and (not _can_assign_more() or not _assign(ws)):
+                        break
 
             # Build frame lines and redraw whole screen
             try:
@@ -1884,7 +1891,7 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
             else:
                 # Downloads panel
                 active_workers = sum(1 for w in workers if w.proc)
-                current_regular, current_priority = _gather_from_roots(roots, finished_log, args.priority_files)
+                current_regular, current_priority = _gather_from_roots(roots, finished_log, args.priority_files, state)
                 total_available = len([p for p in current_regular if str(p.resolve()) not in active]) + len(
                     [p for p in current_priority if str(p.resolve()) not in active]
                 )
@@ -2234,6 +2241,8 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
                             max_lines = 20
                         max_lines = max(10, min(60, max_lines))
                         for ln in sel.ndjson_buf[-max_lines:]:
+                            if not isinstance(ln, str):
+                                ln = json.dumps(ln, ensure_ascii=False)
                             lines.append(ln[:cols])
                 # Mode 2: Program log tail (colorized statuses)
                 elif verbose_mode == 2:
@@ -2286,7 +2295,7 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
 
             # If all workers idle and both pools empty, stop
             if all(w.proc is None for w in workers):
-                current_regular, current_priority = _gather_from_roots(roots, finished_log, args.priority_files)
+                current_regular, current_priority = _gather_from_roots(roots, finished_log, args.priority_files, state)
                 if not current_regular and not current_priority:
                     break
 
@@ -2320,6 +2329,11 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
                 url_scan_thread.join(timeout=2)
             except Exception:
                 pass
+        if engine is not None:
+            engine.close()
+        if watcher is not None:
+            watcher.close()
+        state.close()
         # Leave cursor below
     return 0
 
@@ -7,21 +7,30 @@ Features:
     * Dry-run mode for safe simulation.
     * Analyse mode that reports planned operations with colourised output and emits a JSON plan.
     * Plan application mode allowing execution from a previously generated JSON plan.
-    * Optional continuous scanning mode that watches for new MP4 files after the initial run.
+    * Optional continuous scanning mode that watches for new MP4 files after the initial run
+      (inotify events on Linux, periodic rescans elsewhere), handling each file once it settles.
     * Rich logging and a live console dashboard updating several times per second.
+    * Transfers run on a bounded worker pool per destination device; a file is renamed when
+      source and destination share a filesystem and copied in-kernel (copy_file_range /
+      sendfile) otherwise.
 """
 
 from __future__ import annotations
 
 import argparse
 import ctypes
+import ctypes.util
+import errno
 import json
 import logging
 import os
+import select
 import shutil
+import struct
 import sys
 import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from dataclasses import dataclass, field
 from collections import deque
 from pathlib import Path
@@ -225,6 +234,10 @@ ACTION_CREATE_DIR = "create_dir"
 
 VALID_OPERATIONS = {ACTION_COPY, ACTION_MOVE}
 
+DEFAULT_JOBS_PER_DEVICE = 2
+COPY_CHUNK_SIZE = 8 * 1024 * 1024
+THROUGHPUT_WINDOW_S = 3.0
+
 ACTIONS_ORDER = [ACTION_COPY, ACTION_MOVE, ACTION_REPLACE, ACTION_SKIP]
 ACTION_LABELS = {
     ACTION_COPY: "Copies",
@@ -343,7 +356,6 @@ class ProgressState:
             self.processed_bytes = 0
             self.current_file_size = 0
             self.current_file_done = 0
-            self.current_speed = 0.0
             self.current_folder_key = ""
             self.current_folder_total_files = 0
             self.current_folder_processed_files = 0
@@ -352,6 +364,33 @@ class ProgressState:
             self.folder_totals: Dict[str, Dict[str, int]] = {}
             self.folder_progress: Dict[str, Dict[str, int]] = {}
             self.ui_enabled = False
+            # Files in flight, keyed by the thread transferring them (one file per thread at a time)
+            self._active: Dict[int, Dict[str, object]] = {}
+            # (time, bytes transferred so far) samples for the aggregate throughput
+            self._transferred = 0
+            self._rate_samples: deque[Tuple[float, int]] = deque()
+
+    def _throughput(self, now: float) -> float:
+        """Aggregate bytes/s over the last THROUGHPUT_WINDOW_S seconds, across all transfers."""
+        samples = self._rate_samples
+        while samples and now - samples[0][0] > THROUGHPUT_WINDOW_S:
+            samples.popleft()
+        if not samples:
+            return 0.0
+        t0, b0 = samples[0]
+        span = now - t0
+        return (self._transferred - b0) / span if span > 0 else 0.0
+
+    def _file_entry(self) -> Optional[Dict[str, object]]:
+        return self._active.get(threading.get_ident())
+
+    def _add_folder_progress(self, folder_key: str, files: int, nbytes: int) -> None:
+        progress = self.folder_progress.setdefault(folder_key, {"files": 0, "bytes": 0})
+        progress["files"] += files
+        progress["bytes"] += nbytes
+        if folder_key == self.current_folder_key:
+            self.current_folder_processed_files = progress["files"]
+            self.current_folder_processed_bytes = progress["bytes"]
 
     def snapshot(self) -> Dict[str, object]:
         with self._lock:
@@ -378,7 +417,8 @@ class ProgressState:
                 "processed_bytes": self.processed_bytes,
                 "current_file_size": self.current_file_size,
                 "current_file_done": self.current_file_done,
-                "current_speed": self.current_speed,
+                "current_speed": self._throughput(time.perf_counter()),
+                "active_transfers": len(self._active),
                 "current_folder_key": folder_key,
                 "current_folder_total_files": folder_totals.get("files", 0),
                 "current_folder_total_bytes": folder_totals.get("bytes", 0),
@@ -461,6 +501,7 @@ class ProgressState:
 
     def start_file(self, folder_key: str, folder_name: str, filename: str, file_size: int) -> None:
         with self._lock:
+            self._active[threading.get_ident()] = {"folder": folder_key, "size": file_size, "done": 0}
             self.current_folder_key = folder_key
             self.current_folder_total_files = self.folder_totals.get(folder_key, {}).get("files", 0)
             self.current_folder_total_bytes = self.folder_totals.get(folder_key, {}).get("bytes", 0)
@@ -469,64 +510,54 @@ class ProgressState:
             self.current_folder_processed_bytes = progress.get("bytes", 0)
             self.current_file_size = file_size
             self.current_file_done = 0
-            self.current_speed = 0.0
             self.current_folder = folder_name
             self.current_file = filename
 
     def update_file_progress(self, bytes_added: int, elapsed: float) -> None:
+        """Record ``bytes_added`` transferred for the calling thread's file; ``elapsed`` is the time it took."""
         if bytes_added <= 0:
             return
         with self._lock:
-            self.current_file_done = min(self.current_file_done + bytes_added, self.current_file_size or float("inf"))
+            entry = self._file_entry()
+            folder_key = str(entry["folder"]) if entry else self.current_folder_key
+            if entry is not None:
+                size = int(entry["size"]) or None
+                entry["done"] = min(int(entry["done"]) + bytes_added, size) if size else int(entry["done"]) + bytes_added
+                self.current_file_size = int(entry["size"])
+                self.current_file_done = int(entry["done"])
+            else:
+                self.current_file_done = min(self.current_file_done + bytes_added, self.current_file_size or float("inf"))
             self.processed_bytes += bytes_added
-            folder_key = self.current_folder_key
-            progress = self.folder_progress.setdefault(folder_key, {"files": 0, "bytes": 0})
-            progress["bytes"] += bytes_added
-            self.current_folder_processed_bytes = progress["bytes"]
-            if elapsed > 0:
-                instant_speed = bytes_added / elapsed
-                if self.current_speed > 0:
-                    self.current_speed = (self.current_speed * 0.7) + (instant_speed * 0.3)
-                else:
-                    self.current_speed = instant_speed
+            self._add_folder_progress(folder_key, 0, bytes_added)
+            self._transferred += bytes_added
+            now = time.perf_counter()
+            if not self._rate_samples:
+                # First chunk: anchor the window where the transfer started
+                self._rate_samples.append((now - max(elapsed, 1e-9), self._transferred - bytes_added))
+            self._rate_samples.append((now, self._transferred))
+            self._throughput(now)
+
+    def _close_file(self, file_size: int) -> None:
+        """Count the calling thread's file as processed, including bytes not reported as transferred."""
+        entry = self._active.pop(threading.get_ident(), None)
+        folder_key = str(entry["folder"]) if entry else self.current_folder_key
+        done = int(entry["done"]) if entry else self.current_file_done
+        delta = max(0, file_size - done)
+        self.processed_bytes += delta
+        self._add_folder_progress(folder_key, 1, delta)
+        self.current_file_done = file_size
 
     def finish_file(self, file_size: int) -> None:
         with self._lock:
-            folder_key = self.current_folder_key
-            progress = self.folder_progress.setdefault(folder_key, {"files": 0, "bytes": 0})
-            progress["files"] += 1
-            self.current_folder_processed_files = progress["files"]
-            self.current_folder_processed_bytes = progress["bytes"]
-            if self.current_file_done < file_size:
-                delta = file_size - self.current_file_done
-                self.current_file_done = file_size
-                self.processed_bytes += delta
-                progress["bytes"] += delta
-                self.current_folder_processed_bytes = progress["bytes"]
+            self._close_file(file_size)
 
     def record_skip(self, file_size: int) -> None:
         with self._lock:
-            folder_key = self.current_folder_key
-            progress = self.folder_progress.setdefault(folder_key, {"files": 0, "bytes": 0})
-            progress["files"] += 1
-            progress["bytes"] += file_size
-            self.current_folder_processed_files = progress["files"]
-            self.current_folder_processed_bytes = progress["bytes"]
-            self.processed_bytes += file_size
-            self.current_file_done = file_size
-            self.current_speed = 0.0
+            self._close_file(file_size)
 
     def complete_simulated_file(self, file_size: int) -> None:
         with self._lock:
-            folder_key = self.current_folder_key
-            progress = self.folder_progress.setdefault(folder_key, {"files": 0, "bytes": 0})
-            progress["files"] += 1
-            progress["bytes"] += file_size
-            self.current_folder_processed_files = progress["files"]
-            self.current_folder_processed_bytes = progress["bytes"]
-            self.processed_bytes += file_size
-            self.current_file_done = file_size
-            self.current_speed = 0.0
+            self._close_file(file_size)
 
 
 @dataclass
@@ -730,6 +761,7 @@ class ProgressUI:
             folder_processed_bytes = snapshot.get("current_folder_processed_bytes", 0)
             folder_percent = folder_processed_bytes / folder_total_bytes * 100 if folder_total_bytes else 0.0
             current_speed = snapshot.get("current_speed", 0.0)
+            active_transfers = snapshot.get("active_transfers", 0)
             lines = [
                 bright("MP4 Folder Synchroniser"),
                 f"Elapsed: {format_duration(elapsed)}",
@@ -740,13 +772,14 @@ class ProgressUI:
                 f"Collisions: {snapshot['collisions']} "
                 f"(replaced: {snapshot['replaced_dest']}, kept dest: {snapshot['kept_dest']})",
                 f"Total progress: {format_bytes(processed_bytes)} / {format_bytes(total_bytes)} ({total_percent:.1f}%)",
+                f"Throughput: {format_rate(current_speed)} across {active_transfers} active transfer(s)",
             ]
             lines.append("")
             lines.append(bright("Transfer Progress"))
             if current_file_size:
                 lines.append(
                     f"File progress: {format_bytes(current_file_done)} / {format_bytes(current_file_size)} "
-                    f"({file_percent:.1f}%) @ {format_rate(current_speed)}"
+                    f"({file_percent:.1f}%)"
                 )
             if folder_total_files:
                 lines.append(
@@ -790,14 +823,19 @@ def list_immediate_subdirs(path: Path) -> Iterable[Path]:
             yield entry
 
 
+def is_sync_candidate(name: str) -> bool:
+    """Whether a file name is a finished MP4 (not a partial download)."""
+    name_lower = name.lower()
+    if not name_lower.endswith(".mp4"):
+        return False
+    return not (name_lower.endswith(".part.mp4") or name_lower.endswith(".mp4.part"))
+
+
 def iter_mp4_files(directory: Path) -> Iterable[Path]:
     for entry in directory.iterdir():
         if not entry.is_file():
             continue
-        name_lower = entry.name.lower()
-        if not name_lower.endswith(".mp4"):
-            continue
-        if name_lower.endswith(".part.mp4") or name_lower.endswith(".mp4.part"):
+        if not is_sync_candidate(entry.name):
             continue
         yield entry
 
@@ -1016,25 +1054,106 @@ def maybe_delete_source(src_path: Path, dry_run: bool, no_delete: bool) -> bool:
         return False
 
 
+# errno values meaning "this kernel copy is not available for this pair of files"
+_KERNEL_COPY_UNSUPPORTED = {
+    getattr(errno, name)
+    for name in ("EXDEV", "ENOSYS", "EINVAL", "EOPNOTSUPP", "ENOTSUP", "ENOTSOCK", "EBADF")
+    if hasattr(errno, name)
+}
+
+
+def _kernel_copy(src_fd: int, dest_fd: int, chunk_size: int, report) -> Optional[str]:
+    """
+    Copy with copy_file_range (which may reflink or offload on capable filesystems), else
+    sendfile, without passing the data through Python. Returns the method, or None when
+    neither works for these files and nothing was written. Some filesystems (FUSE, network,
+    procfs) answer 0 straight away for a non-empty file; that counts as "does not work", like
+    shutil does, while running dry partway through raises rather than leave a short copy.
+    """
+    size = os.fstat(src_fd).st_size
+    for method in ("copy_file_range", "sendfile"):
+        fn = getattr(os, method, None)
+        if fn is None:
+            continue
+        copied = 0
+        try:
+            while True:
+                if method == "copy_file_range":
+                    n = fn(src_fd, dest_fd, chunk_size)
+                else:
+                    n = fn(dest_fd, src_fd, copied, chunk_size)
+                if not n:
+                    if copied >= size:
+                        return method
+                    if not copied:
+                        break
+                    raise OSError(errno.EIO, f"{method} stopped after {copied} of {size} bytes")
+                copied += n
+                report(n)
+        except OSError as exc:
+            if copied or exc.errno not in _KERNEL_COPY_UNSUPPORTED:
+                raise
+    return None
+
+
 def copy_with_progress(
-    src_path: Path, dest_path: Path, progress: ProgressState, chunk_size: int = 8 * 1024 * 1024
-) -> None:
+    src_path: Path, dest_path: Path, progress: ProgressState, chunk_size: int = COPY_CHUNK_SIZE
+) -> str:
+    """Copy a file reporting progress per chunk; returns the method used (see _kernel_copy, else "read/write")."""
     src_path.parent.mkdir(parents=True, exist_ok=True)
     dest_path.parent.mkdir(parents=True, exist_ok=True)
     last_time = time.perf_counter()
-    bytes_copied = 0
+
+    def report(nbytes: int) -> None:
+        nonlocal last_time
+        now = time.perf_counter()
+        progress.update_file_progress(nbytes, max(now - last_time, 1e-9))
+        last_time = now
+
     with src_path.open("rb") as src, dest_path.open("wb") as dest:
-        while True:
-            chunk = src.read(chunk_size)
-            if not chunk:
-                break
-            dest.write(chunk)
-            bytes_copied += len(chunk)
-            now = time.perf_counter()
-            elapsed = max(now - last_time, 1e-9)
-            progress.update_file_progress(len(chunk), elapsed)
-            last_time = now
+        method = _kernel_copy(src.fileno(), dest.fileno(), chunk_size, report)
+        if method is None:
+            method = "read/write"
+            while True:
+                chunk = src.read(chunk_size)
+                if not chunk:
+                    break
+                dest.write(chunk)
+                report(len(chunk))
     shutil.copystat(src_path, dest_path, follow_symlinks=True)
+    return method
+
+
+def same_filesystem(src_path: Path, dest_dir: Path) -> bool:
+    """Whether ``src_path`` can be renamed into ``dest_dir`` (or its nearest existing ancestor)."""
+    probe = dest_dir
+    while True:
+        try:
+            dest_dev = os.stat(probe).st_dev
+            break
+        except OSError:
+            if probe.parent == probe:
+                return False
+            probe = probe.parent
+    try:
+        return os.stat(src_path).st_dev == dest_dev
+    except OSError:
+        return False
+
+
+def transfer_file(src_path: Path, dest_path: Path, progress: ProgressState, *, remove_source: bool) -> str:
+    """
+    Put ``src_path`` at ``dest_path``. When the source is going to be removed anyway and both
+    are on one filesystem this is a rename; otherwise a copy. Returns the method used.
+    """
+    if remove_source and same_filesystem(src_path, dest_path.parent):
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.replace(src_path, dest_path)
+            return "rename"
+        except OSError:
+            pass
+    return copy_with_progress(src_path, dest_path, progress)
 
 
 def execute_action(
@@ -1163,7 +1282,12 @@ def execute_action(
             dest_path.unlink()
 
     try:
-        copy_with_progress(src_path, dest_path, progress)
+        action.metadata["transfer"] = transfer_file(src_path, dest_path, progress, remove_source=not no_delete)
+        if action.metadata["transfer"] != "rename":
+            # never let a short copy through to the source deletion below
+            src_size, dest_size = src_path.stat().st_size, dest_path.stat().st_size
+            if dest_size != src_size:
+                raise OSError(errno.EIO, f"copied {dest_size} of {src_size} bytes; source kept")
     except Exception as exc:
         log_event(
             "ERROR",
@@ -1205,6 +1329,70 @@ def execute_action(
     return action
 
 
+def _destination_device(action: Action) -> Optional[int]:
+    probe = Path(action.destination or "").parent
+    while True:
+        try:
+            return os.stat(probe).st_dev
+        except OSError:
+            if probe.parent == probe:
+                return None
+            probe = probe.parent
+
+
+def _execute_parallel(
+    plan: Plan,
+    progress: ProgressState,
+    *,
+    no_delete: bool,
+    max_files: Optional[int],
+    workers: int,
+) -> List[Action]:
+    """
+    Run the plan with ``workers`` transfers at a time per destination device. Directories
+    are created first; results come back in plan order. With ``max_files`` only the first
+    that many file actions are started.
+    """
+    source_root = Path(plan.source)
+    file_actions: List[Action] = []
+    for action in plan.actions:
+        if action.action == ACTION_CREATE_DIR:
+            execute_action(action, dry_run=False, progress=progress, source_root=source_root, no_delete=no_delete)
+        else:
+            file_actions.append(action)
+    if max_files is not None and len(file_actions) > max_files:
+        file_actions = file_actions[:max_files]
+        message = f"Reached max-files limit ({max_files}); remaining actions skipped."
+        log_event("INFO", message)
+        progress.set_message(message)
+
+    pools: Dict[Optional[int], ThreadPoolExecutor] = {}
+    futures: Dict[Future, int] = {}
+    results: Dict[int, Optional[Action]] = {}
+    try:
+        for index, action in enumerate(file_actions):
+            device = _destination_device(action)
+            pool = pools.get(device)
+            if pool is None:
+                pool = pools[device] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"mp4-sync-{device}")
+            future = pool.submit(
+                execute_action,
+                action,
+                dry_run=False,
+                progress=progress,
+                source_root=source_root,
+                no_delete=no_delete,
+            )
+            futures[future] = index
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+    finally:
+        for pool in pools.values():
+            # On an error or Ctrl+C, running transfers finish and queued ones are dropped
+            pool.shutdown(wait=True, cancel_futures=True)
+    return [result for _, result in sorted(results.items()) if result]
+
+
 def execute_plan(
     plan: Plan,
     dry_run: bool,
@@ -1213,7 +1401,11 @@ def execute_plan(
     confirm: bool = False,
     no_delete: bool = False,
     max_files: Optional[int] = None,
+    workers: int = 1,
 ) -> List[Action]:
+    if workers > 1 and not dry_run and not confirm:
+        return _execute_parallel(plan, progress, no_delete=no_delete, max_files=max_files, workers=workers)
+
     processed: List[Action] = []
     processed_count = 0
     limit_reached = False
@@ -1263,6 +1455,281 @@ def wait_for_file_stability(path: Path, attempts: int = 3, interval: float = 1.0
     return True
 
 
+# ---------------------------------------------------------------------------
+# Source monitoring
+#
+# A source monitor reports paths under a source root that may have changed: MP4 files in
+# its immediate subdirectories, or a subdirectory itself (list it again). Consumers stat
+# what they are given, so a report for a file that is gone means "removed".
+
+# From <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK if hasattr(os, "O_NONBLOCK") else 0o4000
+IN_CLOEXEC = 0o2000000
+
+_INOTIFY_EVENT = struct.Struct("iIII")
+UNWATCHED_RESCAN_S = 30.0
+
+
+class PollingSource:
+    """Fallback monitor: lists every subdirectory again each ``interval`` seconds."""
+
+    backend = "polling"
+
+    def __init__(self, root: Path, interval: float = 5.0) -> None:
+        self.root = root
+        self.interval = max(0.1, interval)
+        self._seen: Dict[str, Tuple[int, int]] = {}
+        self._next_scan = 0.0
+
+    def poll(self, timeout: float) -> List[Path]:
+        now = time.monotonic()
+        if now < self._next_scan:
+            time.sleep(max(0.0, min(timeout, self._next_scan - now)))
+            return []
+        self._next_scan = now + self.interval
+        current: Dict[str, Tuple[int, int]] = {}
+        for subdir in list_immediate_subdirs(self.root):
+            for path in iter_mp4_files(subdir):
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue
+                current[str(path)] = (st.st_size, st.st_mtime_ns)
+        changed = [Path(key) for key, sig in current.items() if self._seen.get(key) != sig]
+        changed += [Path(key) for key in self._seen if key not in current]
+        self._seen = current
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+class InotifySource:
+    """
+    Linux monitor: one inotify watch on the root (subdirectories coming and going) and one
+    per subdirectory (files finished writing, renamed in or out, deleted). Idle cost does
+    not depend on how many files the library holds.
+    """
+
+    backend = "inotify"
+
+    _ROOT_MASK = IN_CREATE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE | IN_ONLYDIR
+    _DIR_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE | IN_ONLYDIR
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._fd = fd
+        self._dirs: Dict[int, Path] = {}
+        self._unwatched: set[Path] = set()
+        self._next_unwatched_scan = 0.0
+        try:
+            self._root_wd = self._add_watch(root, self._ROOT_MASK)
+            for subdir in list_immediate_subdirs(root):
+                self._watch_subdir(subdir)
+        except OSError:
+            self.close()
+            raise
+
+    def _add_watch(self, path: Path, mask: int) -> int:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(str(path)), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), str(path))
+        return wd
+
+    def _watch_subdir(self, subdir: Path) -> None:
+        try:
+            self._dirs[self._add_watch(subdir, self._DIR_MASK)] = subdir
+            self._unwatched.discard(subdir)
+        except OSError as exc:
+            if exc.errno == errno.ENOENT:
+                return
+            # Usually fs.inotify.max_user_watches; list this folder periodically instead
+            if subdir not in self._unwatched:
+                log_event("WARN", f"path: {subdir}\nerror: cannot watch ({exc}); rescanning it periodically")
+            self._unwatched.add(subdir)
+
+    def _read(self) -> bytes:
+        chunks = []
+        while True:
+            try:
+                chunk = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    def poll(self, timeout: float) -> List[Path]:
+        changed: List[Path] = []
+        now = time.monotonic()
+        if self._unwatched and now >= self._next_unwatched_scan:
+            self._next_unwatched_scan = now + UNWATCHED_RESCAN_S
+            changed.extend(sorted(self._unwatched))
+        ready, _, _ = select.select([self._fd], [], [], 0 if changed else max(0.0, timeout))
+        if not ready:
+            return changed
+        data = self._read()
+        offset = 0
+        while offset + _INOTIFY_EVENT.size <= len(data):
+            wd, mask, _cookie, length = _INOTIFY_EVENT.unpack_from(data, offset)
+            offset += _INOTIFY_EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost: have every subdirectory listed again
+                changed.extend(list_immediate_subdirs(self.root))
+                continue
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            if wd == self._root_wd:
+                if mask & IN_ISDIR and name:
+                    subdir = self.root / name
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        # Files may have landed before the watch existed; the listing covers them
+                        self._watch_subdir(subdir)
+                    else:
+                        for key, path in list(self._dirs.items()):
+                            if path == subdir:
+                                self._libc.inotify_rm_watch(self._fd, key)
+                                self._dirs.pop(key, None)
+                        self._unwatched.discard(subdir)
+                    changed.append(subdir)
+                continue
+            directory = self._dirs.get(wd)
+            if directory is not None and name and not mask & IN_ISDIR and is_sync_candidate(name):
+                changed.append(directory / name)
+        return changed
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def open_source_monitor(root: Path, poll_interval: float = 5.0):
+    """inotify on Linux, periodic rescans where it is unavailable."""
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifySource(root)
+        except (OSError, AttributeError) as exc:
+            log_event("WARN", f"path: {root}\nerror: inotify unavailable ({exc}); polling every {poll_interval:g}s")
+    return PollingSource(root, poll_interval)
+
+
+def expand_changed(path: Path, root: Path) -> List[Path]:
+    """Files a monitor report stands for: the file itself, or a subdirectory's current MP4 files."""
+    if path.parent == root:
+        try:
+            return list(iter_mp4_files(path))
+        except OSError:
+            return []
+    return [path]
+
+
+class StabilityQueue:
+    """
+    Debounces change reports: a file is ready once it has had no reports for ``settle``
+    seconds and its size did not change meanwhile. Nothing sleeps per file.
+    """
+
+    def __init__(self, settle: float = 2.0, clock=time.monotonic) -> None:
+        self.settle = settle
+        self._clock = clock
+        self._due: Dict[Path, Tuple[float, Optional[int]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    @staticmethod
+    def _size(path: Path) -> Optional[int]:
+        try:
+            return path.stat().st_size
+        except OSError:
+            return None
+
+    def touch(self, path: Path) -> None:
+        self._due[path] = (self._clock() + self.settle, self._size(path))
+
+    def next_due_in(self) -> Optional[float]:
+        if not self._due:
+            return None
+        return max(0.0, min(due for due, _ in self._due.values()) - self._clock())
+
+    def pop_ready(self) -> List[Path]:
+        now = self._clock()
+        ready: List[Path] = []
+        for path, (due, size) in list(self._due.items()):
+            if due > now:
+                continue
+            current = self._size(path)
+            if current is None:
+                del self._due[path]
+            elif current != size:
+                self._due[path] = (now + self.settle, current)
+            else:
+                del self._due[path]
+                ready.append(path)
+        return ready
+
+
+class StagedInventory:
+    """Running total of the MP4 bytes a sync of ``root`` would pick up, kept current by a source monitor."""
+
+    def __init__(self, root: Path, poll_interval: float = 5.0) -> None:
+        self.root = root
+        self._monitor = open_source_monitor(root, poll_interval)
+        self._sizes: Dict[Path, int] = {}
+        self._total = 0
+        for subdir in list_immediate_subdirs(root):
+            self._apply(subdir)
+
+    @property
+    def backend(self) -> str:
+        return self._monitor.backend
+
+    def _set(self, path: Path, size: Optional[int]) -> None:
+        self._total -= self._sizes.pop(path, 0)
+        if size is not None:
+            self._sizes[path] = size
+            self._total += size
+
+    def _apply(self, path: Path) -> None:
+        if path.parent == self.root:
+            present = set(expand_changed(path, self.root))
+            for known in [p for p in self._sizes if p.parent == path and p not in present]:
+                self._set(known, None)
+            for file_path in present:
+                self._set(file_path, StabilityQueue._size(file_path))
+        else:
+            self._set(path, StabilityQueue._size(path))
+
+    def total_bytes(self) -> int:
+        for path in self._monitor.poll(0.0):
+            self._apply(path)
+        return self._total
+
+    def close(self) -> None:
+        self._monitor.close()
+
+
 def monitor_for_new_files(
     source: Path,
     destination: Path,
@@ -1275,47 +1742,56 @@ def monitor_for_new_files(
     confirm: bool = False,
     no_delete: bool = False,
     poll_interval: float = 5.0,
+    settle_seconds: float = 2.0,
 ) -> None:
     progress.set_scanning(True)
     progress.set_message("Monitoring for new MP4 files")
-    log_event("SCAN", "Monitoring for new MP4 files")
+    source_monitor = open_source_monitor(source, poll_interval)
+    pending = StabilityQueue(settle_seconds)
+    log_event("SCAN", f"Monitoring for new MP4 files ({source_monitor.backend})")
+    # inotify only reports what happens after its watches exist: pick up files that landed
+    # between collect_known_files() and open_source_monitor()
+    for subdir in list_immediate_subdirs(source):
+        for src_file in expand_changed(subdir, source):
+            if str(src_file) not in known_files:
+                pending.touch(src_file)
 
     try:
         while not stop_event.is_set():
-            for src_subdir in list_immediate_subdirs(source):
-                dest_subdir = destination / src_subdir.name
-                for src_file in iter_mp4_files(src_subdir):
-                    key = str(src_file)
-                    if key in known_files:
-                        continue
-                    if not wait_for_file_stability(src_file):
-                        continue
-
-                    action = determine_action(src_file, dest_subdir, operation)
-                    if action.action != ACTION_SKIP and not dest_subdir.exists() and not dry_run:
-                        dest_subdir.mkdir(parents=True, exist_ok=True)
-
-                    progress.increment_total()
-                    result = execute_action(
-                        action,
-                        dry_run=dry_run,
-                        progress=progress,
-                        source_root=source,
-                        confirm=confirm,
-                        no_delete=no_delete,
-                    )
-                    try:
-                        known_files[key] = src_file.stat().st_size
-                    except FileNotFoundError:
-                        continue
-                    progress.add_scan_new_file()
-                    if result:
-                        summary_actions.append(result)
-
-            stop_event.wait(poll_interval)
+            # Wake for the next settled file, and at least once a second to notice stop_event
+            due_in = pending.next_due_in()
+            for changed in source_monitor.poll(1.0 if due_in is None else min(1.0, due_in)):
+                for src_file in expand_changed(changed, source):
+                    if str(src_file) not in known_files:
+                        pending.touch(src_file)
+
+            for src_file in pending.pop_ready():
+                key = str(src_file)
+                if key in known_files:
+                    continue
+                dest_subdir = destination / src_file.parent.name
+
+                action = determine_action(src_file, dest_subdir, operation)
+                if action.action != ACTION_SKIP and not dest_subdir.exists() and not dry_run:
+                    dest_subdir.mkdir(parents=True, exist_ok=True)
+
+                progress.increment_total()
+                result = execute_action(
+                    action,
+                    dry_run=dry_run,
+                    progress=progress,
+                    source_root=source,
+                    confirm=confirm,
+                    no_delete=no_delete,
+                )
+                known_files[key] = action.source_size or 0
+                progress.add_scan_new_file()
+                if result:
+                    summary_actions.append(result)
     except KeyboardInterrupt:
         stop_event.set()
     finally:
+        source_monitor.close()
         progress.set_scanning(False)
         progress.set_message("Scan mode stopped")
         log_event("SCAN", "Scan mode stopped")
@@ -1522,7 +1998,14 @@ def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
         "--scan-interval",
         type=float,
         default=5.0,
-        help="Polling interval in seconds for scan mode",
+        help="Polling interval in seconds for scan mode when inotify is unavailable",
+    )
+    parser.add_argument(
+        "-S",
+        "--settle",
+        type=float,
+        default=2.0,
+        help="Seconds a new file must stay unchanged before scan mode handles it",
     )
     parser.add_argument(
         "-y",
@@ -1542,6 +2025,13 @@ def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
         action="store_true",
         help="Retain source MP4 files after processing (skip source cleanup)",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=DEFAULT_JOBS_PER_DEVICE,
+        help="Concurrent transfers per destination device (dry-run and --confirm run one at a time)",
+    )
     return parser.parse_args(argv)
 
 
@@ -1661,6 +2151,7 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
                 confirm=args.confirm,
                 no_delete=args.no_delete,
                 max_files=effective_max_files,
+                workers=args.jobs,
             )
             return_code = 0
 
@@ -1678,6 +2169,7 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
                 confirm=args.confirm,
                 no_delete=args.no_delete,
                 poll_interval=args.scan_interval,
+                settle_seconds=args.settle,
             )
     except KeyboardInterrupt:
         log_event("WARN", "Interrupted by user.")
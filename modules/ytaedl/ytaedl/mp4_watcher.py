@@ -107,6 +107,7 @@ class MP4Watcher:
         self._known_download_bytes = 0
         self._bytes_at_last_run = 0
         self._mp4_sync = None
+        self._staged = None
         self._log_ready = False
 
     def is_enabled(self) -> bool:
@@ -201,20 +202,22 @@ class MP4Watcher:
         return started
 
     def _calculate_total_mp4_size(self) -> int:
-        """Calculate total size of all MP4 files in staging root subdirectories."""
-        total_bytes = 0
+        """Total size of the MP4 files a sync would pick up from the staging subdirectories."""
         try:
-            if not self._config.staging_root.exists():
-                return 0
-            for mp4_file in self._config.staging_root.rglob("*.mp4"):
-                if mp4_file.is_file():
-                    try:
-                        total_bytes += mp4_file.stat().st_size
-                    except Exception:
-                        pass  # Skip files we can't read
+            if self._staged is None:
+                if not self._config.staging_root.exists():
+                    return 0
+                # Kept current by inotify events (or periodic rescans) instead of a walk per call
+                self._staged = self._load_mp4_sync().StagedInventory(self._config.staging_root)
+            return self._staged.total_bytes()
         except Exception:
-            pass
-        return total_bytes
+            return 0
+
+    def close(self) -> None:
+        """Release the staging monitor (an inotify descriptor on Linux)."""
+        staged, self._staged = self._staged, None
+        if staged is not None:
+            staged.close()
 
     def update_download_progress(self, total_download_bytes: int) -> Optional[str]:
         with self._lock:
@@ -359,6 +362,7 @@ class MP4Watcher:
                 confirm=False,
                 no_delete=self._config.keep_source,
                 max_files=effective_max,
+                workers=mp4_sync.DEFAULT_JOBS_PER_DEVICE,
             )
             processed_bytes = sum(a.source_size or 0 for a in processed_actions)
             summary = mp4_sync.compute_summary(processed_actions, delete_source=not self._config.keep_source)
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Persistent download state shared by the manager, the downloader workers,
+the archive rebuilder and the URL scanner.
+
+One SQLite database (WAL mode, so readers never block the writer) holds:
+  - url_files: one row per URL file with the (mtime, size) it was last read
+    at, its URL count, a maintained count of unfinished URLs and the
+    manager's "finished" flag
+  - urls: one row per (URL file, URL) with the download status, bytes,
+    elapsed seconds and video id
+
+The unfinished count is kept up to date by triggers inside the same
+transaction as every status change, so "how much is left in this file" is
+a primary-key lookup and "next unfinished URL" walks a partial index over
+unfinished rows only; neither re-reads URL files or archive text files.
+Workers run as separate processes: writes take the database lock up front
+(BEGIN IMMEDIATE) and wait up to ``timeout`` seconds for each other.
+
+Archive text files (``<prefix>-<stem>.txt``) and the finished log are still
+written for people and older tooling; they are imported once per URL file.
+"""
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+DEFAULT_STATE_DB_NAME = "ytaedl-state.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS url_files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER,
+    size INTEGER,
+    url_count INTEGER NOT NULL DEFAULT 0,
+    pending INTEGER NOT NULL DEFAULT 0,
+    finished INTEGER NOT NULL DEFAULT 0,
+    archive_imported INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS urls (
+    url_file TEXT NOT NULL,
+    url TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    status TEXT,
+    bytes INTEGER,
+    elapsed REAL,
+    video_id TEXT,
+    updated REAL,
+    PRIMARY KEY (url_file, url)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS urls_unfinished ON urls (url_file, idx) WHERE status IS NULL;
+CREATE INDEX IF NOT EXISTS url_files_finished ON url_files (finished);
+CREATE TRIGGER IF NOT EXISTS urls_pending_insert AFTER INSERT ON urls WHEN NEW.status IS NULL
+BEGIN
+    UPDATE url_files SET pending = pending + 1 WHERE path = NEW.url_file;
+END;
+CREATE TRIGGER IF NOT EXISTS urls_pending_delete AFTER DELETE ON urls WHEN OLD.status IS NULL
+BEGIN
+    UPDATE url_files SET pending = pending - 1 WHERE path = OLD.url_file;
+END;
+CREATE TRIGGER IF NOT EXISTS urls_pending_update AFTER UPDATE OF status ON urls
+WHEN (OLD.status IS NULL) <> (NEW.status IS NULL)
+BEGIN
+    UPDATE url_files SET pending = pending + (CASE WHEN NEW.status IS NULL THEN 1 ELSE -1 END)
+    WHERE path = NEW.url_file;
+END;
+"""
+
+
+def read_urls(path: Path) -> List[str]:
+    """URLs of a URL file as the downloader sees them (comments dropped, stable de-dup)."""
+    lines = path.read_text(encoding="utf-8", errors="ignore").splitlines()
+    out: List[str] = []
+    for ln in lines:
+        s = ln.strip()
+        if not s:
+            continue
+        if s.startswith("#") or s.startswith(";") or s.startswith("]"):
+            continue
+        out.append(s.split("  #", 1)[0].split("  ;", 1)[0].strip())
+    return list(dict.fromkeys(out))
+
+
+def _parse_mib(text: str) -> int:
+    try:
+        return int(float(text.strip().upper().removesuffix("MIB")) * 1024 * 1024)
+    except ValueError:
+        return 0
+
+
+def _key(path: Path) -> str:
+    return str(Path(path).expanduser().resolve())
+
+
+@dataclass(frozen=True)
+class UrlFileState:
+    path: str
+    url_count: int
+    pending: int
+    finished: bool
+    archive_imported: bool
+
+    @property
+    def done(self) -> int:
+        return self.url_count - self.pending
+
+
+class DownloadState:
+    """
+    SQLite store of per-URL download status.
+
+    Example:
+        >>> state = DownloadState(Path("logs/ytaedl-state.sqlite"))
+        >>> state.sync_url_file(urlfile)
+        >>> state.next_unfinished(urlfile)
+        (1, 'https://...')
+        >>> state.record(urlfile, url, "downloaded", bytes=1234, elapsed=8.5)
+    """
+
+    def __init__(self, path: Path, timeout: float = 30.0):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            str(self.path), timeout=timeout, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock:
+            self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "DownloadState":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _read(self, sql: str, params: Sequence = ()) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    # ---- URL files ----
+    def file_state(self, urlfile: Path) -> Optional[UrlFileState]:
+        """Stored state of a URL file (None if it was never synced)."""
+        rows = self._read(
+            "SELECT path, url_count, pending, finished, archive_imported FROM url_files "
+            "WHERE path = ? AND mtime_ns IS NOT NULL",
+            (_key(urlfile),),
+        )
+        if not rows:
+            return None
+        path, count, pending, finished, imported = rows[0]
+        return UrlFileState(path, count, pending, bool(finished), bool(imported))
+
+    def sync_url_file(self, urlfile: Path, urls: Optional[Sequence[str]] = None) -> Optional[UrlFileState]:
+        """
+        Bring the stored URL list of ``urlfile`` up to date and return its state.
+
+        The file is only read when its mtime or size changed since the last sync
+        (or when ``urls`` is given). Statuses of URLs still in the file are kept.
+        """
+        key = _key(urlfile)
+        try:
+            st = Path(key).stat()
+        except OSError:
+            return self.file_state(urlfile)
+        stamp = (st.st_mtime_ns, st.st_size)
+        if urls is None:
+            rows = self._read("SELECT mtime_ns, size FROM url_files WHERE path = ?", (key,))
+            if rows and tuple(rows[0]) == stamp:
+                return self.file_state(urlfile)
+            urls = read_urls(Path(key))
+        wanted = list(dict.fromkeys(urls))
+        with self._write() as conn:
+            conn.execute("INSERT OR IGNORE INTO url_files (path) VALUES (?)", (key,))
+            known = {url for (url,) in conn.execute("SELECT url FROM urls WHERE url_file = ?", (key,))}
+            gone = known.difference(wanted)
+            if gone:
+                conn.executemany("DELETE FROM urls WHERE url_file = ? AND url = ?", [(key, u) for u in gone])
+            conn.executemany(
+                "INSERT INTO urls (url_file, url, idx) VALUES (?, ?, ?) "
+                "ON CONFLICT (url_file, url) DO UPDATE SET idx = excluded.idx WHERE idx <> excluded.idx",
+                [(key, url, i) for i, url in enumerate(wanted, 1)],
+            )
+            conn.execute(
+                "UPDATE url_files SET mtime_ns = ?, size = ?, url_count = ? WHERE path = ?",
+                (stamp[0], stamp[1], len(wanted), key),
+            )
+        return self.file_state(urlfile)
+
+    def pending_count(self, urlfile: Path) -> Optional[int]:
+        state = self.file_state(urlfile)
+        return state.pending if state else None
+
+    def unfinished_files(self) -> Dict[str, int]:
+        """{URL file: unfinished URL count} for files not marked finished that still have work."""
+        return dict(self._read("SELECT path, pending FROM url_files WHERE finished = 0 AND pending > 0"))
+
+    def mark_finished(self, urlfile: Path, finished: bool = True) -> None:
+        key = _key(urlfile)
+        with self._write() as conn:
+            conn.execute("INSERT OR IGNORE INTO url_files (path) VALUES (?)", (key,))
+            conn.execute("UPDATE url_files SET finished = ? WHERE path = ?", (int(finished), key))
+
+    def finished_files(self) -> Set[str]:
+        return {path for (path,) in self._read("SELECT path FROM url_files WHERE finished = 1")}
+
+    def import_finished_log(self, finished_log: Path) -> int:
+        """Mark every URL file listed in a finished log as finished; returns the number of entries."""
+        try:
+            entries = [x.strip() for x in finished_log.read_text(encoding="utf-8").splitlines() if x.strip()]
+        except OSError:
+            return 0
+        with self._write() as conn:
+            conn.executemany("INSERT OR IGNORE INTO url_files (path) VALUES (?)", [(p,) for p in entries])
+            conn.executemany("UPDATE url_files SET finished = 1 WHERE path = ?", [(p,) for p in entries])
+        return len(entries)
+
+    # ---- URLs ----
+    def next_unfinished(self, urlfile: Path, after: int = 0) -> Optional[Tuple[int, str]]:
+        """The first URL (1-based index, url) past ``after`` without a status, or None."""
+        rows = self._read(
+            "SELECT idx, url FROM urls WHERE url_file = ? AND status IS NULL AND idx > ? ORDER BY idx LIMIT 1",
+            (_key(urlfile), int(after)),
+        )
+        return (rows[0][0], rows[0][1]) if rows else None
+
+    def statuses(self, urlfile: Path) -> Dict[str, str]:
+        """{url: status} of the URLs of ``urlfile`` that have one."""
+        return dict(
+            self._read("SELECT url, status FROM urls WHERE url_file = ? AND status IS NOT NULL", (_key(urlfile),))
+        )
+
+    def record(
+        self,
+        urlfile: Path,
+        url: str,
+        status: str,
+        *,
+        bytes: int = 0,
+        elapsed: float = 0.0,
+        video_id: str = "",
+    ) -> None:
+        """Store the outcome of one URL (atomically; an unknown URL is appended to the file's list)."""
+        self.record_many(urlfile, [(url, status, bytes, elapsed, video_id)])
+
+    def record_many(
+        self,
+        urlfile: Path,
+        rows: Iterable[Tuple[str, str, int, float, str]],
+        *,
+        only_unfinished: bool = False,
+        append: bool = True,
+    ) -> int:
+        """
+        Store several ``(url, status, bytes, elapsed, video_id)`` outcomes in one transaction.
+
+        With ``only_unfinished`` URLs that already have a status keep it; without
+        ``append`` URLs missing from the file's list are ignored. Returns the
+        number of URLs updated.
+        """
+        key = _key(urlfile)
+        now = time.time()
+        changed = 0
+        guard = " AND status IS NULL" if only_unfinished else ""
+        with self._write() as conn:
+            conn.execute("INSERT OR IGNORE INTO url_files (path) VALUES (?)", (key,))
+            for url, status, size, elapsed, video_id in rows:
+                params = (status or None, int(size or 0), float(elapsed or 0.0), video_id or "", now, key, url)
+                cur = conn.execute(
+                    "UPDATE urls SET status = ?, bytes = ?, elapsed = ?, video_id = ?, updated = ? "
+                    "WHERE url_file = ? AND url = ?" + guard,
+                    params,
+                )
+                if cur.rowcount:
+                    changed += 1
+                    continue
+                if not append:
+                    continue
+                exists = conn.execute("SELECT 1 FROM urls WHERE url_file = ? AND url = ?", (key, url)).fetchone()
+                if exists:
+                    continue
+                conn.execute(
+                    "INSERT INTO urls (url_file, url, idx, status, bytes, elapsed, video_id, updated) "
+                    "VALUES (?, ?, (SELECT COALESCE(MAX(idx), 0) + 1 FROM urls WHERE url_file = ?), ?, ?, ?, ?, ?)",
+                    (key, url, key) + params[:5],
+                )
+                conn.execute("UPDATE url_files SET url_count = url_count + 1 WHERE path = ?", (key,))
+                changed += 1
+        return changed
+
+    def import_archive(self, urlfile: Path, archive_file: Path) -> int:
+        """
+        Load a downloader archive text file into the store, once per URL file.
+
+        Lines are ``status, elapsed, when, <n>MiB, video id, url``; lines without a
+        URL (older archives) belong to the URL at the same position. URLs no longer
+        in the file are ignored and statuses the store already has win. Returns the number of URLs updated.
+        """
+        state = self.file_state(urlfile)
+        if state is None or state.archive_imported:
+            return 0
+        key = _key(urlfile)
+        try:
+            lines = [ln for ln in archive_file.read_text(encoding="utf-8").splitlines() if ln.strip()]
+        except OSError:
+            lines = []
+        by_index = dict(self._read("SELECT idx, url FROM urls WHERE url_file = ?", (key,)))
+        rows: List[Tuple[str, str, int, float, str]] = []
+        for pos, line in enumerate(lines, 1):
+            parts = (line.split("\t") + [""] * 6)[:6]
+            url = parts[5] or by_index.get(pos, "")
+            if not url or not parts[0]:
+                continue
+            try:
+                elapsed = float(parts[1] or 0.0)
+            except ValueError:
+                elapsed = 0.0
+            rows.append((url, parts[0], _parse_mib(parts[3]), elapsed, parts[4]))
+        changed = self.record_many(urlfile, rows, only_unfinished=True, append=False) if rows else 0
+        with self._write() as conn:
+            conn.execute("UPDATE url_files SET archive_imported = 1 WHERE path = ?", (key,))
+        return changed
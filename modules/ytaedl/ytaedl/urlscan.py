@@ -3,7 +3,9 @@
 URL file audit utilities for ytaedl.
 
 Provides scanning helpers that can be reused programmatically as well as
-an interactive/JSON/table CLI.
+an interactive/JSON/table CLI. Repeated scans (the manager refreshes its URL
+panel periodically) can pass an InventoryCache so only URL files and media
+folders that changed since the previous scan are read again.
 """
 from __future__ import annotations
 
@@ -11,13 +13,19 @@ import argparse
 import importlib
 import json
 import math
+import os
 import re
 import shutil
 import sys
+import threading
+import time
 from dataclasses import dataclass
 from fnmatch import fnmatch
 from pathlib import Path
-from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .state_db import DownloadState
 
 GBYTES = 1024 ** 3
 ANSI_RE = re.compile(r"\x1b\[[0-9;]*m")
@@ -56,6 +64,7 @@ class UrlEntry:
     ae_path: Optional[Path]
     stars_path: Optional[Path]
     media_path: Path
+    recorded: int = 0
 
 
 @dataclass
@@ -137,15 +146,185 @@ def mp4_inventory(folder: Path) -> Tuple[int, int, List[str]]:
     return count, total_bytes, files
 
 
+def url_counts(ae_path: Optional[Path], stars_path: Optional[Path]) -> Tuple[int, int, int, int, int]:
+    """(AE lines, AE unique, stars lines, stars unique, combined unique) for one name."""
+    ae_lines = read_url_lines(ae_path)
+    stars_lines = read_url_lines(stars_path)
+    ae_unique = set(ae_lines)
+    stars_unique = set(stars_lines)
+    return len(ae_lines), len(ae_unique), len(stars_lines), len(stars_unique), len(ae_unique | stars_unique)
+
+
+Signature = Optional[Tuple[int, int]]
+
+# An mtime this close to the scan may be followed by another change in the same
+# timestamp tick, so results derived from it are not cached
+_RACY_SECONDS = 2.0
+
+
+def _signature(path: Optional[Path]) -> Signature:
+    """(mtime_ns, size) of ``path``, None when it is missing."""
+    if path is None:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class InventoryCache:
+    """
+    Incremental inputs for collect_entries, keyed by what they were computed from.
+
+    - URL directory listings are reused while the directory's mtime is unchanged
+    - URL counts of a name are reused while its AE and stars files keep their
+      (mtime, size)
+    - the MP4 inventory of a media folder is reused while the folder's mtime is
+      unchanged; adding, removing or renaming a file changes it, rewriting a file
+      in place does not
+
+    With ``path`` the cache is loaded from and saved to a JSON file, so a new
+    process starts warm.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else None
+        self._lock = threading.Lock()
+        self._dirs: Dict[str, Tuple[int, Dict[str, str]]] = {}
+        self._urls: Dict[str, Tuple[Signature, Signature, Tuple[int, int, int, int, int]]] = {}
+        self._media: Dict[str, Tuple[int, int, int, List[str]]] = {}
+        self.hits = 0
+        self.misses = 0
+        if self.path is not None:
+            self._load()
+
+    @staticmethod
+    def _sig(raw: Any) -> Signature:
+        return (int(raw[0]), int(raw[1])) if raw else None
+
+    def _load(self) -> None:
+        assert self.path is not None
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get("version") != self.VERSION:
+            return
+        try:
+            self._dirs = {k: (int(m), dict(files)) for k, (m, files) in data.get("dirs", {}).items()}
+            self._urls = {
+                k: (self._sig(ae), self._sig(st), tuple(int(c) for c in counts))  # type: ignore[misc]
+                for k, (ae, st, counts) in data.get("urls", {}).items()
+            }
+            self._media = {k: (int(m), int(c), int(b), list(f)) for k, (m, c, b, f) in data.get("media", {}).items()}
+        except (TypeError, ValueError):
+            self._dirs, self._urls, self._media = {}, {}, {}
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        with self._lock:
+            payload = {"version": self.VERSION, "dirs": self._dirs, "urls": self._urls, "media": self._media}
+            text = json.dumps(payload, separators=(",", ":"))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    @staticmethod
+    def _settled(mtime_ns: int) -> bool:
+        return time.time() - mtime_ns / 1e9 > _RACY_SECONDS
+
+    def _count(self, hit: bool) -> None:
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def file_map(self, directory: Path, label: str) -> Dict[str, Path]:
+        key = str(directory)
+        sig = _signature(directory)
+        cached = self._dirs.get(key)
+        if sig is not None and cached is not None and cached[0] == sig[0]:
+            self._count(True)
+            return {stem: Path(p) for stem, p in cached[1].items()}
+        self._count(False)
+        result = gather_file_map(directory, label)
+        if sig is not None and self._settled(sig[0]):
+            with self._lock:
+                self._dirs[key] = (sig[0], {stem: str(p) for stem, p in result.items()})
+        return result
+
+    def url_counts(self, name: str, ae_path: Optional[Path], stars_path: Optional[Path]) -> Tuple[int, int, int, int, int]:
+        ae_sig, stars_sig = _signature(ae_path), _signature(stars_path)
+        cached = self._urls.get(name)
+        if cached is not None and cached[0] == ae_sig and cached[1] == stars_sig:
+            self._count(True)
+            return cached[2]
+        self._count(False)
+        counts = url_counts(ae_path, stars_path)
+        if all(sig is None or self._settled(sig[0]) for sig in (ae_sig, stars_sig)):
+            with self._lock:
+                self._urls[name] = (ae_sig, stars_sig, counts)
+        return counts
+
+    def mp4_inventory(self, folder: Path) -> Tuple[int, int, List[str]]:
+        key = str(folder)
+        sig = _signature(folder)
+        cached = self._media.get(key)
+        if sig is not None and cached is not None and cached[0] == sig[0]:
+            self._count(True)
+            return cached[1], cached[2], list(cached[3])
+        self._count(False)
+        count, total_bytes, files = mp4_inventory(folder)
+        if sig is not None and self._settled(sig[0]):
+            with self._lock:
+                self._media[key] = (sig[0], count, total_bytes, list(files))
+        return count, total_bytes, files
+
+    def retain(self, names: Iterable[str], folders: Iterable[Path]) -> None:
+        """Forget names and media folders that are no longer part of the scan."""
+        keep_names = set(names)
+        keep_folders = {str(f) for f in folders}
+        with self._lock:
+            self._urls = {k: v for k, v in self._urls.items() if k in keep_names}
+            self._media = {k: v for k, v in self._media.items() if k in keep_folders}
+
+
 def compute_ratio(remaining: int, downloaded: int) -> float:
     if downloaded == 0:
         return math.inf if remaining else 0.0
     return remaining / downloaded
 
 
-def collect_entries(ae_dir: Path, stars_dir: Path, media_dir: Path) -> Tuple[List[UrlEntry], Dict[str, int]]:
-    ae_map = gather_file_map(ae_dir, "AE URL")
-    stars_map = gather_file_map(stars_dir, "Star URL")
+def _state_counts(state: Optional["DownloadState"], paths: Sequence[Optional[Path]]) -> Optional[Tuple[int, int]]:
+    """(URLs with a status, URLs without one) recorded in the state database, None if it knows none of the files."""
+    if state is None:
+        return None
+    recorded = pending = 0
+    known = False
+    for path in paths:
+        info = state.file_state(path) if path else None
+        if info is not None:
+            known = True
+            recorded += info.done
+            pending += info.pending
+    return (recorded, pending) if known else None
+
+
+def collect_entries(
+    ae_dir: Path,
+    stars_dir: Path,
+    media_dir: Path,
+    state: Optional["DownloadState"] = None,
+    cache: Optional[InventoryCache] = None,
+) -> Tuple[List[UrlEntry], Dict[str, int]]:
+    file_map = cache.file_map if cache is not None else gather_file_map
+    ae_map = file_map(ae_dir, "AE URL")
+    stars_map = file_map(stars_dir, "Star URL")
     names = sorted(set(ae_map) | set(stars_map), key=lambda n: n.lower())
     totals = {
         "total_unique_urls": 0,
@@ -162,21 +341,26 @@ def collect_entries(ae_dir: Path, stars_dir: Path, media_dir: Path) -> Tuple[Lis
         ae_path = ae_map.get(name)
         stars_path = stars_map.get(name)
         media_path = media_dir / name
-        ae_lines = read_url_lines(ae_path)
-        stars_lines = read_url_lines(stars_path)
-        ae_unique = set(ae_lines)
-        stars_unique = set(stars_lines)
-        combined_unique = ae_unique | stars_unique
-        mp4_count, mp4_bytes, mp4_files = mp4_inventory(media_path)
-        total_unique = len(combined_unique)
+        if cache is not None:
+            ae_lines, ae_unique, stars_lines, stars_unique, total_unique = cache.url_counts(name, ae_path, stars_path)
+            mp4_count, mp4_bytes, mp4_files = cache.mp4_inventory(media_path)
+        else:
+            ae_lines, ae_unique, stars_lines, stars_unique, total_unique = url_counts(ae_path, stars_path)
+            mp4_count, mp4_bytes, mp4_files = mp4_inventory(media_path)
         remaining = max(total_unique - mp4_count, 0)
+        counts = _state_counts(state, (ae_path, stars_path))
+        recorded = 0
+        if counts is not None:
+            # URLs with a status (including bad/stalled ones) are not left to download
+            recorded, pending = counts
+            remaining = min(remaining, pending)
         entry = UrlEntry(
             name=name,
             total_unique_urls=total_unique,
-            ae_line_count=len(ae_lines),
-            ae_unique_urls=len(ae_unique),
-            stars_line_count=len(stars_lines),
-            stars_unique_urls=len(stars_unique),
+            ae_line_count=ae_lines,
+            ae_unique_urls=ae_unique,
+            stars_line_count=stars_lines,
+            stars_unique_urls=stars_unique,
             mp4_count=mp4_count,
             mp4_bytes=mp4_bytes,
             mp4_files=mp4_files,
@@ -185,21 +369,30 @@ def collect_entries(ae_dir: Path, stars_dir: Path, media_dir: Path) -> Tuple[Lis
             ae_path=ae_path,
             stars_path=stars_path,
             media_path=media_path,
+            recorded=recorded,
         )
         entries.append(entry)
         totals["total_unique_urls"] += total_unique
-        totals["ae_url_lines"] += len(ae_lines)
-        totals["ae_unique_urls"] += len(ae_unique)
-        totals["stars_url_lines"] += len(stars_lines)
-        totals["stars_unique_urls"] += len(stars_unique)
+        totals["ae_url_lines"] += ae_lines
+        totals["ae_unique_urls"] += ae_unique
+        totals["stars_url_lines"] += stars_lines
+        totals["stars_unique_urls"] += stars_unique
         totals["downloaded_mp4s"] += mp4_count
         totals["downloaded_bytes"] += mp4_bytes
         totals["remaining"] += remaining
+    if cache is not None:
+        cache.retain(names, (e.media_path for e in entries))
     return entries, totals
 
 
-def scan_url_stats(stars_dir: Path, ae_dir: Path, media_dir: Path) -> ScanResult:
-    entries, totals = collect_entries(ae_dir, stars_dir, media_dir)
+def scan_url_stats(
+    stars_dir: Path,
+    ae_dir: Path,
+    media_dir: Path,
+    state: Optional["DownloadState"] = None,
+    cache: Optional[InventoryCache] = None,
+) -> ScanResult:
+    entries, totals = collect_entries(ae_dir, stars_dir, media_dir, state=state, cache=cache)
     path_index: Dict[str, UrlEntry] = {}
     for entry in entries:
         for path in (entry.ae_path, entry.stars_path):
@@ -334,6 +527,7 @@ def build_json(entries: List[UrlEntry], totals: Dict[str, int], settings: argpar
                 "downloaded_gb": entry.mp4_bytes / GBYTES,
                 "mp4_files": entry.mp4_files,
                 "remaining": entry.remaining,
+                "recorded_urls": entry.recorded,
                 "remaining_ratio": None if math.isinf(entry.ratio) else entry.ratio,
                 "ae_file": str(entry.ae_path) if entry.ae_path else None,
                 "stars_file": str(entry.stars_path) if entry.stars_path else None,
@@ -583,6 +777,10 @@ def build_parser() -> argparse.ArgumentParser:
                         help="Skip the interactive TUI and print the static table")
     parser.add_argument("-T", "--termdash-path", default=TERMDASH_DEFAULT,
                         help="Path to the termdash module")
+    parser.add_argument("-D", "--state-db",
+                        help="ytaedl state database; URLs with a recorded status count as done")
+    parser.add_argument("-c", "--cache-file",
+                        help="JSON inventory cache; unchanged URL files and media folders are not read again")
     return parser
 
 
@@ -592,7 +790,19 @@ def cli_main(argv: Optional[Sequence[str]] = None) -> int:
     ae_dir = normalize_path(args.ae_dir)
     media_dir = normalize_path(args.media_dir)
 
-    scan = scan_url_stats(stars_dir, ae_dir, media_dir)
+    state = None
+    if args.state_db:
+        from .state_db import DownloadState
+
+        state = DownloadState(normalize_path(args.state_db))
+    cache = InventoryCache(normalize_path(args.cache_file)) if args.cache_file else None
+    try:
+        scan = scan_url_stats(stars_dir, ae_dir, media_dir, state=state, cache=cache)
+    finally:
+        if state is not None:
+            state.close()
+    if cache is not None:
+        cache.save()
     if not scan.entries:
         print("No URL files were found in the provided directories.", file=sys.stderr)
         return 1